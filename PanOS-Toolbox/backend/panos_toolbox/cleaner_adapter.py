@@ -208,6 +208,10 @@ def patchset_from_cleaner_plan(
 ) -> PatchSet:
     """Convert typed planner structures directly; never parse rendered CLI."""
 
+    _legacy_root()
+    from panorama_cleanup.references import reference_index  # type: ignore[import-not-found]
+
+    rules_by_container = reference_index(model).rules_by_container
     specs: list[_Spec] = []
 
     for (key, field), removals in sorted(plan.rule_field_removals.items()):
@@ -267,16 +271,9 @@ def patchset_from_cleaner_plan(
             )
         container_order = [
             candidate.name
-            for candidate in sorted(
-                (
-                    item.key
-                    for item in model.rules.values()
-                    if item.key.location == key.location
-                    and item.key.rulebase == key.rulebase
-                    and item.key.policy_type == key.policy_type
-                ),
-                key=lambda candidate: model.rules[candidate].order_index,
-            )
+            for candidate in rules_by_container[
+                (key.location, key.rulebase, key.policy_type)
+            ]
         ]
         specs.append(
             _Spec(
@@ -433,6 +430,7 @@ def build_cleanup_patchset(
     panorama_username: str,
     nat_translation_action: str = "delete-rule",
     allow_default_policy_override: bool = False,
+    workers: int = 1,
 ) -> CleanerPlanResult:
     _legacy_root()
     from panorama_cleanup.models import BlockReason, TargetToken  # type: ignore[import-not-found]
@@ -545,6 +543,7 @@ def build_cleanup_patchset(
         forced_groups=forced_groups,
         forced_rules=forced_rules,
         nat_translation_action=nat_translation_action,
+        workers=workers,
     )
 
     # Capture DEFAULT dependencies before any other safety re-plan.  A single
@@ -599,6 +598,7 @@ def build_cleanup_patchset(
                 if target not in blocked_tokens and key.policy_type != "application-override"
             },
             nat_translation_action=nat_translation_action,
+            workers=workers,
         )
         for target, paths in sorted(app_override_paths.items(), key=lambda item: item[0].ip):
             plan.blocked_ips[target.ip] = [
@@ -649,6 +649,7 @@ def build_cleanup_patchset(
                     if target not in blocked_tokens_for_planner
                 },
                 nat_translation_action=nat_translation_action,
+                workers=workers,
             )
             for target, reasons in previous_blocked.items():
                 plan.blocked_ips.setdefault(target, []).extend(reasons)
@@ -16,6 +16,7 @@ from .models import ApiStage
 from .profile import load_profile, obtain_password
 from .service import make_writer, plan_cleanup_session, plan_restore_session
 from .sessions import SessionStore
+from .snapshot_cache import SnapshotCache
 
 
 PROJECT_DIR = Path(__file__).resolve().parents[2]
@@ -35,12 +36,24 @@ def _add_store(parser: argparse.ArgumentParser) -> None:
         "--session-dir",
         help="Niestandardowy katalog sesji (domyślnie %%LOCALAPPDATA%%\\PanOS Toolbox\\sessions).",
     )
+    parser.add_argument(
+        "--delta-snapshots",
+        action="store_true",
+        help="Zapisuj snapshoty dowodowe i zakończonych sesji tylko jako dotknięte poddrzewa z hashem pełnej konfiguracji.",
+    )
 
 
 def _add_apply(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--session", required=True)
     parser.add_argument("--enable-api-write", action="store_true")
     parser.add_argument("--no-server-snapshot", action="store_true")
+    parser.add_argument(
+        "--multi-config-batch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Grupuj do N kolejnych operacji set/edit/delete w jednym atomowym multi-config (domyślnie wyłączone).",
+    )
     _add_connection(parser)
     _add_store(parser)
 
@@ -63,6 +76,12 @@ def build_parser() -> argparse.ArgumentParser:
     cleanup_plan.add_argument("--no-ping", action="store_true")
     cleanup_plan.add_argument("--ping-timeout-ms", type=int, default=1000)
     cleanup_plan.add_argument("--ping-workers", type=int, default=32)
+    cleanup_plan.add_argument(
+        "--plan-workers",
+        type=int,
+        default=1,
+        help="Procesy planujące niezależne grupy celów równolegle (1..32).",
+    )
     cleanup_plan.add_argument("--recent-hit-days", type=int, default=14)
     cleanup_plan.add_argument(
         "--nat-translation", choices=("delete-rule", "block"), default="delete-rule"
@@ -84,6 +103,12 @@ def build_parser() -> argparse.ArgumentParser:
     session_show = session_commands.add_parser("show")
     session_show.add_argument("--session", required=True)
     _add_store(session_show)
+    session_prune = session_commands.add_parser(
+        "prune-snapshots",
+        help="Usuń bloby snapshotów, do których nie odwołuje się żadna sesja.",
+    )
+    session_prune.add_argument("--grace-seconds", type=float, default=3600.0)
+    _add_store(session_prune)
     session_commit = session_commands.add_parser("commit")
     session_commit.add_argument("--session", required=True)
     session_commit.add_argument("--enable-api-write", action="store_true")
@@ -135,12 +160,18 @@ def build_parser() -> argparse.ArgumentParser:
 
 
 def _store(args: argparse.Namespace) -> SessionStore:
-    return SessionStore(Path(args.session_dir) if args.session_dir else None)
+    return SessionStore(
+        Path(args.session_dir) if args.session_dir else None,
+        delta_snapshots=args.delta_snapshots,
+    )
 
 
-def _reader(args: argparse.Namespace) -> PanoramaReadClient:
+def _reader(args: argparse.Namespace, store: SessionStore) -> PanoramaReadClient:
     profile = load_profile(Path(args.host_file))
-    reader = PanoramaReadClient(profile)
+    snapshot_cache = SnapshotCache(
+        store.root.parent / "snapshot-cache", enforce_acl=store.enforce_acl
+    )
+    reader = PanoramaReadClient(profile, snapshot_cache=snapshot_cache)
     password = obtain_password(args.password_env)
     reader.authenticate(password)
     password = ""
@@ -183,6 +214,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 static_dir=Path(args.static_dir),
                 session_dir=Path(args.session_dir) if args.session_dir else None,
                 profile_path=Path(args.host_file) if args.host_file else None,
+                delta_snapshots=args.delta_snapshots,
             )
             return 0
         store = _store(args)
@@ -192,8 +224,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         if args.command == "session" and args.session_command == "show":
             _print(store.load_manifest(args.session))
             return 0
+        if args.command == "session" and args.session_command == "prune-snapshots":
+            _print(store.prune_snapshots(grace_seconds=args.grace_seconds))
+            return 0
 
-        reader = _reader(args)
+        reader = _reader(args, store)
         if args.command == "cleanup" and args.cleanup_command == "plan":
             result = plan_cleanup_session(
                 store,
@@ -205,6 +240,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 no_ping=args.no_ping,
                 ping_timeout_ms=args.ping_timeout_ms,
                 ping_workers=args.ping_workers,
+                plan_workers=args.plan_workers,
                 nat_translation_action=args.nat_translation,
                 recent_hit_days=args.recent_hit_days,
                 allow_default_policy_override=args.allow_default_policy_override,
@@ -213,7 +249,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             args, f"{args.command}_command"
         ) == "apply":
             writer = make_writer(
-                reader, ApiStage.CANDIDATE, enable_api_write=args.enable_api_write
+                reader,
+                ApiStage.CANDIDATE,
+                enable_api_write=args.enable_api_write,
+                multi_config_batch_size=args.multi_config_batch,
             )
             result = dataclass_to_dict(
                 apply_candidate(
@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
+import collections
+import concurrent.futures
 import copy
+import http.client
+import os
+import queue
 import socket
 import ssl
 import threading
@@ -13,17 +19,37 @@ import urllib.request
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable, Mapping, Optional, Protocol
+from contextlib import contextmanager
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Coroutine,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 from .errors import (
     CapabilityError,
     OutcomeUnknownError,
+    PanoramaBusyError,
     PanoramaResponseError,
+    ToolboxError,
     TransportError,
 )
 from .models import ApiStage, MutationAction, MutationOperation
 from .profile import PanoramaProfile, WriteLease
-from .xmlutil import parse_api_response, parse_xml, raw_sha256
+from .snapshot_cache import SnapshotCache
+from .xmlutil import parse_api_response, parse_config_stream, parse_xml, raw_sha256
+
+
+_T = TypeVar("_T")
 
 
 class XMLTransport(Protocol):
@@ -36,15 +62,40 @@ class XMLTransport(Protocol):
     ) -> bytes: ...
 
 
+class StreamingXMLTransport(XMLTransport, Protocol):
+    """Optional read-only extension used for full ``/config`` downloads."""
+
+    def post_stream(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+        consumer: Callable[[BinaryIO], _T],
+    ) -> _T: ...
+
+
 class _NoRedirect(urllib.request.HTTPRedirectHandler):
     def redirect_request(self, req, fp, code, msg, headers, newurl):  # noqa: ANN001
         return None
 
 
 MAX_XML_RESPONSE_BYTES = 512 * 1024 * 1024
+_BUSY_STATUSES = frozenset({429, 503})
+MAX_MULTI_CONFIG_OPERATIONS = 200
+MAX_MULTI_CONFIG_BYTES = 512 * 1024
+_MULTI_CONFIG_ACTIONS = frozenset(
+    {MutationAction.SET, MutationAction.EDIT, MutationAction.DELETE}
+)
 
 
-def _bounded_response_body(response: Any, *, mutating: bool) -> bytes:
+def _oversized(*, mutating: bool) -> TransportError:
+    message = "Odpowiedź Panorama XML API przekracza bezpieczny limit 512 MiB."
+    if mutating:
+        return OutcomeUnknownError(f"{message} Wynik operacji jest nieznany.")
+    return TransportError(message)
+
+
+def _check_declared_length(response: Any, *, mutating: bool) -> None:
     declared = response.headers.get("Content-Length")
     if declared:
         try:
@@ -52,22 +103,62 @@ def _bounded_response_body(response: Any, *, mutating: bool) -> bytes:
         except (TypeError, ValueError):
             declared_size = -1
         if declared_size > MAX_XML_RESPONSE_BYTES:
-            message = (
-                "Odpowiedź Panorama XML API przekracza bezpieczny limit 512 MiB."
-            )
-            if mutating:
-                raise OutcomeUnknownError(f"{message} Wynik operacji jest nieznany.")
-            raise TransportError(message)
+            raise _oversized(mutating=mutating)
+
 
+def _bounded_response_body(response: Any, *, mutating: bool) -> bytes:
+    _check_declared_length(response, mutating=mutating)
     payload = response.read(MAX_XML_RESPONSE_BYTES + 1)
     if len(payload) > MAX_XML_RESPONSE_BYTES:
-        message = "Odpowiedź Panorama XML API przekracza bezpieczny limit 512 MiB."
-        if mutating:
-            raise OutcomeUnknownError(f"{message} Wynik operacji jest nieznany.")
-        raise TransportError(message)
+        raise _oversized(mutating=mutating)
     return payload
 
 
+class _BoundedResponseStream:
+    """File-like view of a read-only response enforcing the same body limit."""
+
+    def __init__(self, response: Any) -> None:
+        _check_declared_length(response, mutating=False)
+        self._response = response
+        self._consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = MAX_XML_RESPONSE_BYTES + 1 - self._consumed
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        chunk = self._response.read(size)
+        self._consumed += len(chunk)
+        if self._consumed > MAX_XML_RESPONSE_BYTES:
+            raise _oversized(mutating=False)
+        return chunk
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None  # HTTP-date form; the budget's own backoff applies instead
+
+
+def _status_error(status: int, retry_after: Optional[str] = None) -> TransportError:
+    if status in _BUSY_STATUSES:
+        return PanoramaBusyError(
+            f"Panorama XML API zwróciła HTTP {status} (przeciążenie).",
+            retry_after=_retry_after(retry_after),
+        )
+    return TransportError(f"Panorama XML API zwróciła HTTP {status}.")
+
+
+def _ssl_context(
+    profile: PanoramaProfile, ca_bundle: Optional[str]
+) -> Optional[ssl.SSLContext]:
+    if profile.use_ssl and profile.verify_ssl:
+        return ssl.create_default_context(cafile=ca_bundle)
+    if profile.use_ssl:
+        return ssl._create_unverified_context()  # noqa: SLF001  # explicit operator choice  # nosec B323
+    return None
+
+
 class UrllibXMLTransport:
     """Single-attempt HTTPS transport.
 
@@ -85,12 +176,7 @@ class UrllibXMLTransport:
     ) -> None:
         self.profile = profile
         self.timeout = timeout
-        if profile.use_ssl and profile.verify_ssl:
-            context = ssl.create_default_context(cafile=ca_bundle)
-        elif profile.use_ssl:
-            context = ssl._create_unverified_context()  # noqa: SLF001  # explicit operator choice  # nosec B323
-        else:
-            context = None
+        context = _ssl_context(profile, ca_bundle)
         handlers = [_NoRedirect()]
         if context is not None:
             handlers.append(urllib.request.HTTPSHandler(context=context))
@@ -103,19 +189,42 @@ class UrllibXMLTransport:
         headers: Mapping[str, str],
         mutating: bool,
     ) -> bytes:
+        with self._exchange(params, headers=headers, mutating=mutating) as response:
+            return _bounded_response_body(response, mutating=mutating)
+
+    def post_stream(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+        consumer: Callable[[BinaryIO], _T],
+    ) -> _T:
+        """Hand a bounded read-only response body to ``consumer`` unbuffered.
+
+        Streaming is never offered for mutating requests; those always need
+        the complete, bounded response before the outcome is interpreted.
+        """
+
+        with self._exchange(params, headers=headers, mutating=False) as response:
+            return consumer(_BoundedResponseStream(response))  # type: ignore[arg-type]
+
+    @contextmanager
+    def _exchange(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+        mutating: bool,
+    ) -> Iterator[Any]:
         request = urllib.request.Request(
             self.profile.base_url,
             data=urllib.parse.urlencode(params).encode("utf-8"),
-            headers={
-                "User-Agent": "ByteTech-PanOS-Toolbox/0.8.2",
-                "Content-Type": "application/x-www-form-urlencoded",
-                **headers,
-            },
+            headers={**_REQUEST_HEADERS, **headers},
             method="POST",
         )
         try:
             with self.opener.open(request, timeout=self.timeout) as response:
-                return _bounded_response_body(response, mutating=mutating)
+                yield response
         except urllib.error.HTTPError as exc:
             if 300 <= exc.code < 400:
                 raise TransportError(
@@ -126,7 +235,8 @@ class UrllibXMLTransport:
                     f"Mutujący POST zwrócił HTTP {exc.code}; nie można bezpiecznie "
                     "założyć, że Panorama nie zastosowała żądania."
                 ) from exc
-            raise TransportError(f"Panorama XML API zwróciła HTTP {exc.code}.") from exc
+            retry_after = exc.headers.get("Retry-After") if exc.headers else None
+            raise _status_error(exc.code, retry_after) from exc
         except (TimeoutError, socket.timeout) as exc:
             if mutating:
                 raise OutcomeUnknownError(
@@ -151,6 +261,747 @@ class UrllibXMLTransport:
             raise TransportError(f"Błąd lokalnego transportu: {type(exc).__name__}.") from exc
 
 
+_REQUEST_HEADERS = {
+    "User-Agent": "ByteTech-PanOS-Toolbox/0.8.2",
+    "Content-Type": "application/x-www-form-urlencoded",
+}
+
+
+def _proxy_applies(scheme: str, host: str) -> bool:
+    proxies = urllib.request.getproxies()
+    if not proxies.get(scheme or "https"):
+        return False
+    try:
+        return not urllib.request.proxy_bypass(host)
+    except OSError:
+        return True
+
+
+class PooledXMLTransport:
+    """Keep-alive transport for read-only XML API traffic.
+
+    Parallel targeted reads (point lookup, rule hit counts) otherwise pay a
+    full TCP + TLS handshake per query.  Up to ``max_connections`` persistent
+    connections to the profile host are reused; idle ones older than
+    ``idle_timeout`` are closed instead of risking a server-side reset.
+    Redirects are refused and bodies are bounded exactly as in
+    :class:`UrllibXMLTransport`.
+
+    ``http.client`` connects directly, so when ``HTTPS_PROXY``/``HTTP_PROXY``
+    (or the platform proxy settings) apply to the host and ``NO_PROXY`` does
+    not exempt it, every request is delegated to the urllib transport, which
+    honours the proxy, instead of silently bypassing it.
+
+    Mutating POSTs never touch the pool.  A request written to a kept-alive
+    socket that the server has just closed cannot be told apart from a lost
+    response, so they go through the single-attempt fresh-connection
+    transport.  Read-only requests that fail on a reused connection before a
+    response arrives are retried once on a new one.
+    """
+
+    def __init__(
+        self,
+        profile: PanoramaProfile,
+        *,
+        ca_bundle: Optional[str] = None,
+        timeout: float = 300.0,
+        max_connections: int = 16,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        if max_connections < 1:
+            raise ValueError("max_connections must be positive")
+        self.profile = profile
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.mutating_transport = UrllibXMLTransport(
+            profile, ca_bundle=ca_bundle, timeout=timeout
+        )
+        self._context = _ssl_context(profile, ca_bundle)
+        location = urllib.parse.urlsplit(profile.base_url)
+        self._host = location.hostname or profile.host
+        self._port = location.port
+        self._path = location.path or "/api/"
+        self.proxied = _proxy_applies(location.scheme, self._host)
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: list[tuple[float, http.client.HTTPConnection]] = []
+        self._idle_lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self._context is not None:
+            return http.client.HTTPSConnection(
+                self._host, self._port, timeout=self.timeout, context=self._context
+            )
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._idle_lock:
+            while self._idle:
+                released, connection = self._idle.pop()
+                if now - released <= self.idle_timeout:
+                    return connection, True
+                connection.close()
+        return self._new_connection(), False
+
+    def _checkin(self, connection: http.client.HTTPConnection) -> None:
+        with self._idle_lock:
+            self._idle.append((time.monotonic(), connection))
+
+    def _drain_idle(self) -> None:
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for _released, connection in idle:
+            connection.close()
+
+    def close(self) -> None:
+        self._drain_idle()
+
+    def post(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+        mutating: bool,
+    ) -> bytes:
+        if mutating or self.proxied:
+            return self.mutating_transport.post(
+                params, headers=headers, mutating=mutating
+            )
+        with self._exchange(params, headers=headers) as response:
+            return _bounded_response_body(response, mutating=False)
+
+    def post_stream(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+        consumer: Callable[[BinaryIO], _T],
+    ) -> _T:
+        if self.proxied:
+            return self.mutating_transport.post_stream(
+                params, headers=headers, consumer=consumer
+            )
+        with self._exchange(params, headers=headers) as response:
+            return consumer(_BoundedResponseStream(response))  # type: ignore[arg-type]
+
+    def _send(
+        self, body: bytes, headers: Mapping[str, str]
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        connection, reused = self._checkout()
+        try:
+            return connection, self._request(connection, body, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+        except BaseException:
+            connection.close()
+            raise
+        # The idle socket was closed by Panorama; every other idle entry is at
+        # least as old, so retry once on a fresh connection instead of another
+        # checkout.  A failure here surfaces through _exchange as TransportError.
+        self._drain_idle()
+        connection = self._new_connection()
+        try:
+            return connection, self._request(connection, body, headers)
+        except BaseException:
+            connection.close()
+            raise
+
+    def _request(
+        self,
+        connection: http.client.HTTPConnection,
+        body: bytes,
+        headers: Mapping[str, str],
+    ) -> http.client.HTTPResponse:
+        connection.request(
+            "POST",
+            self._path,
+            body=body,
+            headers={**_REQUEST_HEADERS, **headers},
+        )
+        return connection.getresponse()
+
+    @contextmanager
+    def _exchange(
+        self,
+        params: Mapping[str, str],
+        *,
+        headers: Mapping[str, str],
+    ) -> Iterator[http.client.HTTPResponse]:
+        body = urllib.parse.urlencode(params).encode("utf-8")
+        reusable = False
+        connection: Optional[http.client.HTTPConnection] = None
+        self._slots.acquire()
+        try:
+            try:
+                connection, response = self._send(body, headers)
+            except (TimeoutError, socket.timeout) as exc:
+                raise TransportError("Timeout odczytu Panorama XML API.") from exc
+            except (OSError, http.client.HTTPException) as exc:
+                raise TransportError(
+                    f"Błąd HTTPS/XML API: {type(exc).__name__}."
+                ) from exc
+            if 300 <= response.status < 400:
+                raise TransportError(
+                    "Panorama zwróciła redirect; przerwano, aby nie przekazać poświadczeń."
+                )
+            if not 200 <= response.status < 300:
+                raise _status_error(response.status, response.getheader("Retry-After"))
+            try:
+                yield response
+            except (TimeoutError, socket.timeout) as exc:
+                raise TransportError("Timeout odczytu Panorama XML API.") from exc
+            except (OSError, http.client.HTTPException) as exc:
+                raise TransportError(
+                    f"Błąd lokalnego transportu: {type(exc).__name__}."
+                ) from exc
+            # Only a response read to its end leaves the socket at a request
+            # boundary; anything else (bounded-body abort, parser error) must
+            # not be handed to the next caller.
+            reusable = response.isclosed() and not response.will_close
+        finally:
+            if connection is not None:
+                if reusable:
+                    self._checkin(connection)
+                else:
+                    connection.close()
+            self._slots.release()
+
+
+DEFAULT_HOST_CONCURRENCY = 8
+MAX_HOST_CONCURRENCY = 16
+SLOW_RESPONSE_SECONDS = 15.0
+MAX_BUSY_PAUSE_SECONDS = 30.0
+MAX_BUSY_RETRIES = 3
+_MAX_RESPONSE_HEADERS = 100
+
+
+class HostBudget:
+    """Adaptive limit on concurrent read-only requests to one Panorama.
+
+    Every fan-out path (point lookup, last-hit collection, targeted
+    verification, existence checks) draws from the same budget, so parallel
+    jobs against one appliance cannot multiply its load.  The limit grows by
+    one after a full window of prompt answers and is halved when a request is
+    slow or Panorama answers HTTP 429/503; a busy answer also pauses new
+    requests, for ``Retry-After`` when given, otherwise exponentially.
+
+    Waiters may belong to different event loops, so slots are handed over
+    with ``call_soon_threadsafe`` under a thread lock.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = DEFAULT_HOST_CONCURRENCY,
+        maximum: int = MAX_HOST_CONCURRENCY,
+        slow_after: float = SLOW_RESPONSE_SECONDS,
+    ) -> None:
+        if not 1 <= initial <= maximum:
+            raise ValueError("initial must be in 1..maximum")
+        self.limit = initial
+        self.maximum = maximum
+        self.slow_after = slow_after
+        self.active = 0
+        self._prompt = 0
+        self._busy_streak = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._waiters: collections.deque[
+            tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = collections.deque()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        waiter: Optional[asyncio.Future[None]] = None
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+            else:
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+        if waiter is not None:
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                raise
+        try:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0:
+                    return
+                await asyncio.sleep(pause)
+        except asyncio.CancelledError:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        # Called with the lock held.
+        while self._waiters and self.active < self.limit:
+            loop, waiter = self._waiters.popleft()
+            self.active += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:  # the waiting loop has been closed
+                self.active -= 1
+
+    def _grant(self, waiter: asyncio.Future[None]) -> None:
+        if waiter.done():  # cancelled while queued
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def observe(self, elapsed: float) -> None:
+        """Feed back the duration of one completed request."""
+
+        with self._lock:
+            if elapsed >= self.slow_after:
+                self.limit = max(1, self.limit // 2)
+                self._prompt = 0
+                return
+            self._busy_streak = 0
+            self._prompt += 1
+            if self._prompt >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._prompt = 0
+                self._wake()
+
+    def busy(self, retry_after: Optional[float]) -> float:
+        """Back off after HTTP 429/503 and return the pause in seconds."""
+
+        with self._lock:
+            self.limit = max(1, self.limit // 2)
+            self._prompt = 0
+            self._busy_streak += 1
+            if retry_after is None:
+                retry_after = 0.5 * 2 ** min(self._busy_streak - 1, 8)
+            pause = min(MAX_BUSY_PAUSE_SECONDS, retry_after)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            return pause
+
+
+_host_budgets: dict[str, HostBudget] = {}
+_host_budgets_guard = threading.Lock()
+
+
+def host_budget(host: str) -> HostBudget:
+    """Return the process-wide request budget for one Panorama host."""
+
+    key = host.strip().casefold()
+    with _host_budgets_guard:
+        budget = _host_budgets.get(key)
+        if budget is None:
+            budget = _host_budgets[key] = HostBudget()
+        return budget
+
+
+class _SharedLoop:
+    """Background event loop that serves the synchronous client API."""
+
+    _guard = threading.Lock()
+    _instance: Optional["_SharedLoop"] = None
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self.loop.run_forever, name="panos-xml-api", daemon=True
+        ).start()
+
+    @classmethod
+    def submit(cls, coroutine: Coroutine[Any, Any, _T]) -> concurrent.futures.Future[_T]:
+        with cls._guard:
+            if cls._instance is None or cls._instance.pid != os.getpid():
+                cls._instance = cls()
+            loop = cls._instance.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coroutine.close()
+            raise RuntimeError("synchronous Panorama client used from its own event loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+
+def _run_shared(coroutine: Coroutine[Any, Any, _T]) -> _T:
+    return _SharedLoop.submit(coroutine).result()
+
+
+class AsyncXMLTransportProtocol(Protocol):
+    async def post(
+        self, params: Mapping[str, str], *, headers: Mapping[str, str]
+    ) -> bytes: ...
+
+
+class _NoResponse(Exception):
+    """A kept-alive connection was closed before any response byte arrived."""
+
+
+class AsyncXMLTransport:
+    """Non-blocking keep-alive HTTP/1.1 transport for read-only XML API calls.
+
+    Gives the guarantees of :class:`PooledXMLTransport` on asyncio streams:
+    redirects are refused, bodies are bounded, and a request that fails on a
+    reused connection before a response arrives is retried once on a new one.
+    Streams connect directly, so a host covered by the proxy settings is
+    served by :class:`UrllibXMLTransport` on a worker thread instead.
+    """
+
+    def __init__(
+        self,
+        profile: PanoramaProfile,
+        *,
+        ca_bundle: Optional[str] = None,
+        timeout: float = 300.0,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        self.profile = profile
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._context = _ssl_context(profile, ca_bundle)
+        location = urllib.parse.urlsplit(profile.base_url)
+        self._host = location.hostname or profile.host
+        self._port = location.port or (443 if location.scheme == "https" else 80)
+        self._authority = location.netloc.rpartition("@")[2]
+        self._path = location.path or "/api/"
+        self.proxy_transport: Optional[UrllibXMLTransport] = None
+        if _proxy_applies(location.scheme, self._host):
+            self.proxy_transport = UrllibXMLTransport(
+                profile, ca_bundle=ca_bundle, timeout=timeout
+            )
+        self._idle: list[
+            tuple[float, asyncio.AbstractEventLoop, asyncio.StreamReader, asyncio.StreamWriter]
+        ] = []
+        self._idle_lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for _released, loop, _reader, writer in idle:
+            if not loop.is_closed():
+                try:
+                    loop.call_soon_threadsafe(writer.close)
+                except RuntimeError:
+                    pass
+
+    def _request(self, params: Mapping[str, str], headers: Mapping[str, str]) -> bytes:
+        body = urllib.parse.urlencode(params).encode("utf-8")
+        lines = [
+            f"POST {self._path} HTTP/1.1",
+            f"Host: {self._authority}",
+            f"Content-Length: {len(body)}",
+        ]
+        for name, value in {**_REQUEST_HEADERS, **headers}.items():
+            if any(character in f"{name}{value}" for character in "\r\n\0"):
+                raise ValueError(f"invalid HTTP header {name!r}")
+            lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    def _checkout(
+        self, loop: asyncio.AbstractEventLoop
+    ) -> Optional[tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        now = time.monotonic()
+        with self._idle_lock:
+            foreign = []
+            found = None
+            while self._idle:
+                released, owner, reader, writer = self._idle.pop()
+                if owner is not loop:
+                    foreign.append((released, owner, reader, writer))
+                elif now - released <= self.idle_timeout and not reader.at_eof():
+                    found = (reader, writer)
+                    break
+                else:
+                    writer.close()
+            self._idle.extend(reversed(foreign))
+        return found
+
+    async def post(
+        self, params: Mapping[str, str], *, headers: Mapping[str, str]
+    ) -> bytes:
+        if self.proxy_transport is not None:
+            return await asyncio.to_thread(
+                self.proxy_transport.post, params, headers=headers, mutating=False
+            )
+        request = self._request(params, headers)
+        loop = asyncio.get_running_loop()
+        connection = self._checkout(loop)
+        if connection is not None:
+            try:
+                return await self._post_on(loop, connection, request)
+            except _NoResponse:
+                # Panorama closed the kept-alive socket; the other idle ones
+                # on this loop are at least as old, so go straight to a new
+                # connection rather than another checkout.
+                self._drain_idle(loop)
+        try:
+            return await self._post_on(loop, None, request)
+        except _NoResponse as exc:
+            raise TransportError("Błąd HTTPS/XML API: RemoteDisconnected.") from exc
+
+    def _drain_idle(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._idle_lock:
+            stale = [entry for entry in self._idle if entry[1] is loop]
+            self._idle = [entry for entry in self._idle if entry[1] is not loop]
+        for _released, _owner, _reader, writer in stale:
+            writer.close()
+
+    async def _post_on(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        connection: Optional[tuple[asyncio.StreamReader, asyncio.StreamWriter]],
+        request: bytes,
+    ) -> bytes:
+        opened: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        reusable = False
+        try:
+            payload, reusable = await asyncio.wait_for(
+                self._attempt(connection, request, opened), self.timeout
+            )
+            return payload
+        except (asyncio.TimeoutError, TimeoutError) as exc:
+            raise TransportError("Timeout odczytu Panorama XML API.") from exc
+        except (OSError, EOFError, ValueError) as exc:
+            raise TransportError(f"Błąd HTTPS/XML API: {type(exc).__name__}.") from exc
+        finally:
+            for reader, writer in opened:
+                if reusable:
+                    with self._idle_lock:
+                        self._idle.append((time.monotonic(), loop, reader, writer))
+                else:
+                    writer.close()
+
+    async def _attempt(
+        self,
+        connection: Optional[tuple[asyncio.StreamReader, asyncio.StreamWriter]],
+        request: bytes,
+        opened: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]],
+    ) -> tuple[bytes, bool]:
+        if connection is None:
+            connection = await asyncio.open_connection(
+                self._host, self._port, ssl=self._context
+            )
+        opened.append(connection)
+        return await self._exchange(*connection, request)
+
+    async def _exchange(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        request: bytes,
+    ) -> tuple[bytes, bool]:
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+        except (ConnectionResetError, BrokenPipeError) as exc:
+            raise _NoResponse() from exc
+        if not status_line:
+            raise _NoResponse()
+        version, _, rest = status_line.decode("latin-1").rstrip("\r\n").partition(" ")
+        code = rest[:3]
+        if not version.startswith("HTTP/1.") or not code.isdigit():
+            raise TransportError("Panorama XML API zwróciła niepoprawną odpowiedź HTTP.")
+        status = int(code)
+        headers = await _read_headers(reader)
+        if 300 <= status < 400:
+            raise TransportError(
+                "Panorama zwróciła redirect; przerwano, aby nie przekazać poświadczeń."
+            )
+        if not 200 <= status < 300:
+            raise _status_error(status, headers.get("retry-after"))
+        keep_alive = (
+            version == "HTTP/1.1"
+            and "close" not in headers.get("connection", "").casefold()
+        )
+        if "chunked" in headers.get("transfer-encoding", "").casefold():
+            return await _read_chunked(reader), keep_alive
+        if "content-length" in headers:
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise TransportError("Panorama XML API zwróciła niepoprawny Content-Length.")
+            if length > MAX_XML_RESPONSE_BYTES:
+                raise _oversized(mutating=False)
+            return await reader.readexactly(length), keep_alive
+        chunks: list[bytes] = []
+        received = 0
+        while chunk := await reader.read(64 * 1024):
+            received += len(chunk)
+            if received > MAX_XML_RESPONSE_BYTES:
+                raise _oversized(mutating=False)
+            chunks.append(chunk)
+        return b"".join(chunks), False
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    for _ in range(_MAX_RESPONSE_HEADERS):
+        line = await reader.readline()
+        if not line:
+            raise EOFError("connection closed inside response headers")
+        if line in (b"\r\n", b"\n"):
+            return headers
+        name, separator, value = line.decode("latin-1").partition(":")
+        if not separator:
+            raise TransportError("Panorama XML API zwróciła niepoprawny nagłówek HTTP.")
+        key = name.strip().casefold()
+        headers[key] = f"{headers[key]}, {value.strip()}" if key in headers else value.strip()
+    raise TransportError("Odpowiedź Panorama XML API ma zbyt wiele nagłówków HTTP.")
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks: list[bytes] = []
+    received = 0
+    while True:
+        size_line = await reader.readline()
+        try:
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise TransportError(
+                "Panorama XML API zwróciła niepoprawne kodowanie chunked."
+            ) from None
+        if size == 0:
+            break
+        received += size
+        if received > MAX_XML_RESPONSE_BYTES:
+            raise _oversized(mutating=False)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass  # trailers carry nothing the XML API relies on
+    return b"".join(chunks)
+
+
+class _ThreadedXMLTransport:
+    """Run an injected synchronous transport on worker threads."""
+
+    def __init__(self, transport: XMLTransport) -> None:
+        self.transport = transport
+
+    async def post(
+        self, params: Mapping[str, str], *, headers: Mapping[str, str]
+    ) -> bytes:
+        return await asyncio.to_thread(
+            self.transport.post, params, headers=headers, mutating=False
+        )
+
+
+class AsyncPanoramaReadClient:
+    """asyncio counterpart of :class:`PanoramaReadClient` for read-only calls.
+
+    Each request holds one slot of the host's :class:`HostBudget`.  HTTP
+    429/503 answers feed the budget's backoff and are retried up to
+    ``MAX_BUSY_RETRIES`` times; reads are idempotent, so this is safe.
+    """
+
+    def __init__(
+        self,
+        profile: PanoramaProfile,
+        transport: Optional[AsyncXMLTransportProtocol] = None,
+        *,
+        budget: Optional[HostBudget] = None,
+    ) -> None:
+        self.profile = profile
+        self.transport = transport or AsyncXMLTransport(profile)
+        self.budget = budget or host_budget(profile.host)
+        self.api_key: Optional[str] = None
+
+    async def post(self, params: Mapping[str, str]) -> bytes:
+        headers = {"X-PAN-KEY": self.api_key} if self.api_key else {}
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.budget.acquire()
+            started = time.monotonic()
+            try:
+                payload = await self.transport.post(params, headers=headers)
+            except PanoramaBusyError as exc:
+                self.budget.busy(exc.retry_after)
+                if attempt > MAX_BUSY_RETRIES:
+                    raise
+                continue
+            except TransportError:
+                elapsed = time.monotonic() - started
+                if elapsed >= self.budget.slow_after:
+                    self.budget.observe(elapsed)
+                raise
+            finally:
+                self.budget.release()
+            self.budget.observe(time.monotonic() - started)
+            return payload
+
+    def assert_authenticated(self) -> None:
+        if not self.api_key:
+            raise TransportError("Klient XML API nie jest uwierzytelniony.")
+
+    async def fetch_xpath(self, xpath: str, *, config_type: str = "running") -> ET.Element:
+        self.assert_authenticated()
+        action = {"running": "show", "candidate": "get"}.get(config_type)
+        if action is None:
+            raise ValueError("config_type must be running or candidate")
+        if not xpath.startswith("/config/"):
+            raise ValueError("targeted xpath must start with /config/")
+        return parse_api_response(
+            await self.post({"type": "config", "action": action, "xpath": xpath})
+        )
+
+    async def fetch_xpaths(
+        self,
+        xpaths: Iterable[str],
+        *,
+        config_type: str = "running",
+        on_result: Optional[Callable[[str, Union[ET.Element, ToolboxError]], None]] = None,
+    ) -> dict[str, Union[ET.Element, ToolboxError]]:
+        """Read many exact XPaths; an individual failure becomes its value."""
+
+        async def read(xpath: str) -> tuple[str, Union[ET.Element, ToolboxError]]:
+            try:
+                return xpath, await self.fetch_xpath(xpath, config_type=config_type)
+            except ToolboxError as exc:
+                return xpath, exc
+
+        results: dict[str, Union[ET.Element, ToolboxError]] = {}
+        for completed in asyncio.as_completed([read(xpath) for xpath in dict.fromkeys(xpaths)]):
+            xpath, result = await completed
+            results[xpath] = result
+            if on_result is not None:
+                on_result(xpath, result)
+        return results
+
+    async def complete_xpath(self, xpath: str) -> ET.Element:
+        self.assert_authenticated()
+        if not xpath.startswith("/config/"):
+            raise ValueError("completion xpath must start with /config/")
+        return parse_api_response(
+            await self.post({"type": "config", "action": "complete", "xpath": xpath})
+        )
+
+    async def run_op_show(self, command: ET.Element) -> ET.Element:
+        self.assert_authenticated()
+        if command.tag != "show":
+            raise CapabilityError("Klient read-only pozwala wyłącznie na operacyjne <show>.")
+        return parse_api_response(
+            await self.post({"type": "op", "cmd": ET.tostring(command, encoding="unicode")})
+        )
+
+    def close(self) -> None:
+        close_transport = getattr(self.transport, "close", None)
+        if callable(close_transport):
+            close_transport()
+
+
 @dataclass(frozen=True)
 class JobResult:
     job_id: str
@@ -169,17 +1020,45 @@ def _job_id(root: ET.Element) -> Optional[str]:
 
 
 class PanoramaReadClient:
-    def __init__(self, profile: PanoramaProfile, transport: Optional[XMLTransport] = None):
+    def __init__(
+        self,
+        profile: PanoramaProfile,
+        transport: Optional[XMLTransport] = None,
+        *,
+        snapshot_cache: Optional[SnapshotCache] = None,
+    ):
         self.profile = profile
-        self.transport: XMLTransport = transport or UrllibXMLTransport(profile)
-        self._api_key: Optional[str] = None
+        self.transport: XMLTransport = transport or PooledXMLTransport(profile)
+        # Read-only calls run on the asyncio client so that every thread and
+        # fan-out shares the host budget; config downloads stream and writes
+        # keep using the synchronous transport.
+        self.asynchronous = AsyncPanoramaReadClient(
+            profile,
+            _ThreadedXMLTransport(transport) if transport is not None else None,
+        )
+        self.snapshot_cache = snapshot_cache
+        # Called before every mutating request, e.g. to make buffered journal
+        # events durable before Panorama can change.
+        self.mutation_barriers: list[Callable[[], None]] = []
         self._config_cache: dict[str, tuple[float, ET.Element]] = {}
         self._config_cache_proof_sha256: Optional[str] = None
         self._device_group_cache: Optional[tuple[str, ...]] = None
 
+    @property
+    def _api_key(self) -> Optional[str]:
+        return self.asynchronous.api_key
+
+    @_api_key.setter
+    def _api_key(self, value: Optional[str]) -> None:
+        self.asynchronous.api_key = value
+
     def _post(self, params: Mapping[str, str], *, mutating: bool = False) -> ET.Element:
+        if not mutating:
+            return parse_api_response(_run_shared(self.asynchronous.post(params)))
+        for barrier in tuple(self.mutation_barriers):
+            barrier()
         headers = {"X-PAN-KEY": self._api_key} if self._api_key else {}
-        payload = self.transport.post(params, headers=headers, mutating=mutating)
+        payload = self.transport.post(params, headers=headers, mutating=True)
         return parse_api_response(payload)
 
     def authenticate(self, password: str) -> None:
@@ -200,11 +1079,20 @@ class PanoramaReadClient:
         action = {"running": "show", "candidate": "get"}.get(config_type)
         if action is None:
             raise ValueError("config_type must be running or candidate")
-        root = self._post(
-            {"type": "config", "action": action, "xpath": "/config"}
-        )
-        config = parse_api_response(ET.tostring(root), expect_config=True)
-        self._config_cache[config_type] = (time.monotonic(), copy.deepcopy(config))
+        params = {"type": "config", "action": action, "xpath": "/config"}
+        headers = {"X-PAN-KEY": self._api_key} if self._api_key else {}
+        post_stream = getattr(self.transport, "post_stream", None)
+        if post_stream is not None:
+            config = post_stream(params, headers=headers, consumer=parse_config_stream)
+        else:
+            config = parse_api_response(
+                self.transport.post(params, headers=headers, mutating=False),
+                expect_config=True,
+            )
+        # The analysis pipeline treats configuration trees as immutable and
+        # every tree-editing caller works on its own deep copy.  Sharing the
+        # freshly parsed tree with the cache keeps exactly one copy in memory.
+        self._config_cache[config_type] = (time.monotonic(), config)
         return config
 
     def fetch_config_cached(
@@ -275,6 +1163,19 @@ class PanoramaReadClient:
                 True,
                 None,
             )
+        persisted = self._load_persisted_pair(before_proof, max_age_seconds)
+        if persisted is not None:
+            callback("cache", 0)
+            running, candidate = persisted
+            # The loaded trees now also back the in-memory cache, so callers
+            # that mutate their copy must not see the shared instances.
+            return (
+                copy.deepcopy(running) if copy_cached else running,
+                copy.deepcopy(candidate) if copy_cached else candidate,
+                before_summary,
+                True,
+                None,
+            )
 
         for attempt in (1, 2):
             callback("running", attempt)
@@ -287,6 +1188,7 @@ class PanoramaReadClient:
             )
             if before_proof == after_proof:
                 self._config_cache_proof_sha256 = after_proof
+                self._store_persisted_pair(after_proof, running, candidate)
                 return running, candidate, after_summary, False, None
             before_summary = after_summary
             before_proof = after_proof
@@ -295,6 +1197,44 @@ class PanoramaReadClient:
             "Candidate zmieniał się podczas pobierania snapshotu; spróbuj ponownie po zakończeniu innych zmian."
         )
 
+    def _load_persisted_pair(
+        self, proof_sha256: str, max_age_seconds: float
+    ) -> Optional[tuple[ET.Element, ET.Element]]:
+        """Adopt a disk-cached pair recorded under the same change-summary proof."""
+
+        if self.snapshot_cache is None:
+            return None
+        try:
+            pair = self.snapshot_cache.load(
+                self.profile.host,
+                self.profile.username,
+                proof_sha256,
+                max_age_seconds=max_age_seconds,
+            )
+        except (OSError, ToolboxError):
+            return None
+        if pair is None:
+            return None
+        loaded_at = time.monotonic()
+        self._config_cache["running"] = (loaded_at, pair[0])
+        self._config_cache["candidate"] = (loaded_at, pair[1])
+        self._config_cache_proof_sha256 = proof_sha256
+        return pair
+
+    def _store_persisted_pair(
+        self, proof_sha256: str, running: ET.Element, candidate: ET.Element
+    ) -> None:
+        if self.snapshot_cache is None:
+            return
+        try:
+            self.snapshot_cache.store(
+                self.profile.host, self.profile.username, proof_sha256, running, candidate
+            )
+        except (OSError, ToolboxError):
+            # The persisted cache is an optimisation; a full disk or locked
+            # directory must never fail an otherwise coherent download.
+            pass
+
     def invalidate_config_cache(self, *config_types: str) -> None:
         """Forget cached trees after a local mutation or commit attempt."""
 
@@ -302,6 +1242,8 @@ class PanoramaReadClient:
         for config_type in targets:
             self._config_cache.pop(config_type, None)
         self._config_cache_proof_sha256 = None
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.discard_host(self.profile.host)
 
     def fetch_xpath(self, xpath: str, *, config_type: str = "running") -> ET.Element:
         """Read one exact configuration XPath without downloading ``/config``.
@@ -312,21 +1254,43 @@ class PanoramaReadClient:
         result rather than a complete ``<config>`` document.
         """
 
-        self.assert_authenticated()
-        action = {"running": "show", "candidate": "get"}.get(config_type)
-        if action is None:
-            raise ValueError("config_type must be running or candidate")
-        if not xpath.startswith("/config/"):
-            raise ValueError("targeted xpath must start with /config/")
-        return self._post({"type": "config", "action": action, "xpath": xpath})
+        return _run_shared(self.asynchronous.fetch_xpath(xpath, config_type=config_type))
+
+    def fetch_xpaths(
+        self, xpaths: Iterable[str], *, config_type: str = "running"
+    ) -> Iterator[tuple[str, Union[ET.Element, ToolboxError]]]:
+        """Read many exact XPaths concurrently, yielding in completion order.
+
+        The reads share the host budget with every other caller.  A failed
+        read is yielded as its :class:`ToolboxError` instead of aborting the
+        rest of the fan-out.
+        """
+
+        completed: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        finished = object()
+
+        async def fan_out() -> None:
+            try:
+                await self.asynchronous.fetch_xpaths(
+                    xpaths,
+                    config_type=config_type,
+                    on_result=lambda xpath, result: completed.put((xpath, result)),
+                )
+            finally:
+                completed.put(finished)
+
+        future = _SharedLoop.submit(fan_out())
+        try:
+            while (item := completed.get()) is not finished:
+                yield item
+            future.result()
+        finally:
+            future.cancel()
 
     def complete_xpath(self, xpath: str) -> ET.Element:
         """Return lightweight XPath completions (used to enumerate DG names)."""
 
-        self.assert_authenticated()
-        if not xpath.startswith("/config/"):
-            raise ValueError("completion xpath must start with /config/")
-        return self._post({"type": "config", "action": "complete", "xpath": xpath})
+        return _run_shared(self.asynchronous.complete_xpath(xpath))
 
     def device_group_names(self) -> tuple[str, ...]:
         """Discover device-group names without retrieving their configuration."""
@@ -354,12 +1318,7 @@ class PanoramaReadClient:
         return self.run_op_show(parse_xml("<show><system><info /></system></show>"))
 
     def run_op_show(self, command: ET.Element) -> ET.Element:
-        self.assert_authenticated()
-        if command.tag != "show":
-            raise CapabilityError("Klient read-only pozwala wyłącznie na operacyjne <show>.")
-        return self._post(
-            {"type": "op", "cmd": ET.tostring(command, encoding="unicode")}
-        )
+        return _run_shared(self.asynchronous.run_op_show(command))
 
     def change_summary(self) -> ET.Element:
         command = parse_xml("<show><config><list><change-summary /></list></config></show>")
@@ -371,28 +1330,76 @@ class PanoramaReadClient:
     def show_commit_locks(self) -> ET.Element:
         return self.run_op_show(parse_xml("<show><commit-locks /></show>"))
 
-    def enable_write(self, lease: WriteLease) -> "PanoramaWriteClient":
+    def enable_write(
+        self, lease: WriteLease, *, multi_config_batch_size: int = 0
+    ) -> "PanoramaWriteClient":
         lease.assert_valid(self.profile, ApiStage.CANDIDATE)
         if not self._api_key:
             raise TransportError("Najpierw uwierzytelnij klienta read-only.")
-        return PanoramaWriteClient(self, lease)
+        return PanoramaWriteClient(
+            self, lease, multi_config_batch_size=multi_config_batch_size
+        )
 
     def close(self) -> None:
         self._api_key = None
+        close_transport = getattr(self.transport, "close", None)
+        if callable(close_transport):
+            close_transport()
+        self.asynchronous.close()
         self._config_cache.clear()
         self._config_cache_proof_sha256 = None
         self._device_group_cache = None
 
 
+def fetch_xpaths(
+    reader: Any, xpaths: Iterable[str], *, config_type: str = "running"
+) -> Iterator[tuple[str, Union[ET.Element, ToolboxError]]]:
+    """Fan exact XPath reads out through ``reader``, in completion order.
+
+    Readers without a fan-out API (offline doubles) are read one by one.
+    """
+
+    fan_out = getattr(reader, "fetch_xpaths", None)
+    if callable(fan_out):
+        return fan_out(xpaths, config_type=config_type)
+    return _fetch_xpaths_sequentially(reader, xpaths, config_type)
+
+
+def _fetch_xpaths_sequentially(
+    reader: Any, xpaths: Iterable[str], config_type: str
+) -> Iterator[tuple[str, Union[ET.Element, ToolboxError]]]:
+    for xpath in dict.fromkeys(xpaths):
+        try:
+            yield xpath, reader.fetch_xpath(xpath, config_type=config_type)
+        except ToolboxError as exc:
+            yield xpath, exc
+
+
 class PanoramaWriteClient:
     _locks_guard = threading.Lock()
     _job_locks: dict[str, threading.Lock] = {}
     _active_jobs: dict[str, str] = {}
 
-    def __init__(self, reader: PanoramaReadClient, lease: WriteLease):
+    def __init__(
+        self,
+        reader: PanoramaReadClient,
+        lease: WriteLease,
+        *,
+        multi_config_batch_size: int = 0,
+    ):
+        """``multi_config_batch_size`` > 1 opts into ``action=multi-config``.
+
+        The default keeps one XML API request per operation.
+        """
+
+        if not 0 <= multi_config_batch_size <= MAX_MULTI_CONFIG_OPERATIONS:
+            raise ValueError(
+                f"multi_config_batch_size must be 0..{MAX_MULTI_CONFIG_OPERATIONS}"
+            )
         self.reader = reader
         self.profile = reader.profile
         self.lease = lease
+        self.multi_config_batch_size = multi_config_batch_size
 
     def _assert(self, stage: ApiStage) -> None:
         self.lease.assert_valid(self.profile, stage)
@@ -423,6 +1430,102 @@ class PanoramaWriteClient:
             # unsafe.  A later analysis must read it again.
             self.reader.invalidate_config_cache("candidate")
 
+    def operation_batches(
+        self, operations: Sequence[MutationOperation]
+    ) -> list[tuple[int, int]]:
+        """Split an ordered operation list into ``[start, end)`` write batches.
+
+        Consecutive set/edit/delete operations are grouped up to the configured
+        size and a bounded request body; move and every other action stays a
+        single request.  With batching disabled every range has length one.
+        """
+
+        batches: list[tuple[int, int]] = []
+        start = 0
+        size = 0
+        open_batchable = False
+        for position, operation in enumerate(operations):
+            batchable = (
+                self.multi_config_batch_size > 1
+                and operation.action in _MULTI_CONFIG_ACTIONS
+            )
+            weight = len(operation.xpath) + len(operation.element or "") + 64
+            if position > start and (
+                not (batchable and open_batchable)
+                or position - start >= self.multi_config_batch_size
+                or size + weight > MAX_MULTI_CONFIG_BYTES
+            ):
+                batches.append((start, position))
+                start = position
+                size = 0
+            if position == start:
+                open_batchable = batchable
+            size += weight
+        if start < len(operations):
+            batches.append((start, len(operations)))
+        return batches
+
+    def apply_operations(
+        self, operations: Sequence[MutationOperation]
+    ) -> list[ET.Element]:
+        """Apply operations in one ``strict-transactional`` multi-config request.
+
+        In strict-transactional mode PAN-OS executes the steps in order and
+        reverts all of them when any step fails.  The mode requires the caller
+        to hold the config lock for the written scopes; the apply engine takes
+        those locks before its first write and only batches when it did.
+        The returned list maps each operation to its own step response.  A
+        success without a success result for every step cannot be mapped back
+        to operations and is reported as an unknown outcome.
+        """
+
+        if len(operations) == 1:
+            return [self.apply_operation(operations[0])]
+        self._assert(ApiStage.CANDIDATE)
+        if not operations:
+            return []
+        if len(operations) > MAX_MULTI_CONFIG_OPERATIONS or any(
+            operation.action not in _MULTI_CONFIG_ACTIONS for operation in operations
+        ):
+            raise ValueError("multi-config przyjmuje wyłącznie set/edit/delete w limicie.")
+        request = ET.Element(
+            "multi-configure-request", {"strict-transactional": "yes"}
+        )
+        for step_id, operation in enumerate(operations, 1):
+            step = ET.SubElement(
+                request,
+                operation.action.value,
+                {"id": str(step_id), "xpath": operation.xpath},
+            )
+            if operation.element is not None:
+                fragment = parse_xml(f"<fragment>{operation.element}</fragment>")
+                step.text = fragment.text
+                step.extend(list(fragment))
+        params = {
+            "type": "config",
+            "action": "multi-config",
+            "element": ET.tostring(request, encoding="unicode"),
+        }
+        try:
+            root = self.reader._post(params, mutating=True)
+        finally:
+            self.reader.invalidate_config_cache("candidate")
+        steps = {
+            item.get("id"): item
+            for item in root.iter("response")
+            if item is not root and item.get("id")
+        }
+        results: list[ET.Element] = []
+        for step_id in range(1, len(operations) + 1):
+            step = steps.get(str(step_id))
+            if step is None or step.get("status") != "success":
+                raise OutcomeUnknownError(
+                    "Panorama przyjęła multi-config bez potwierdzenia kroku "
+                    f"{step_id}/{len(operations)}; wymagane reconciliation candidate."
+                )
+            results.append(step)
+        return results
+
     def apply_recovery_operation(self, operation: MutationOperation) -> ET.Element:
         """Apply an inverse operation admitted by an already-started transaction."""
 
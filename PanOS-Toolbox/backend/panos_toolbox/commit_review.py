@@ -22,6 +22,7 @@ from .models import Mutation, PatchSet
 from .restore import apply_operation_to_tree
 from .xmlutil import (
     VOLATILE_ATTRIBUTES,
+    ConfigIndex,
     fingerprint_element,
     raw_sha256,
     xpath_literal,
@@ -543,9 +544,10 @@ def _scope_guard(
     if patch.kind == "cleanup":
         expected = copy.deepcopy(running)
         try:
+            expected_index = ConfigIndex(expected)
             for mutation in mutations:
                 for operation in mutation.forward:
-                    apply_operation_to_tree(expected, operation)
+                    apply_operation_to_tree(expected, operation, index=expected_index)
             projection_sha256 = fingerprint_element(expected)
             projection_matches = projection_sha256 == fingerprint_element(candidate)
             if not projection_matches:
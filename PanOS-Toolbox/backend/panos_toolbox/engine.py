@@ -2,19 +2,25 @@
 
 from __future__ import annotations
 
-import concurrent.futures
 import copy
 import json
 import hashlib
 import hmac
+import math
 import time
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable, Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from .cleaner_adapter import build_cleanup_patchset
-from .client import PanoramaReadClient, PanoramaWriteClient
+from .client import (
+    DEFAULT_HOST_CONCURRENCY,
+    PanoramaReadClient,
+    PanoramaWriteClient,
+    fetch_xpaths,
+)
 from .commit_review import (
     build_commit_review,
     build_scope_guard,
@@ -29,12 +35,19 @@ from .errors import (
     ToolboxError,
     ValidationError,
 )
-from .models import ApiStage, Mutation, PatchSet, SessionState, utc_now
+from .models import (
+    ApiStage,
+    Mutation,
+    MutationOperation,
+    PatchSet,
+    SessionState,
+    utc_now,
+)
 from .sessions import SessionStore
 from .restore import mutation_owner_xpath
 from .xmlutil import (
+    ConfigIndex,
     device_group_from_xpath,
-    find_xpath,
     fingerprint_element,
     fingerprint_xpath,
     parent_xpath,
@@ -53,6 +66,129 @@ class ApplyResult:
     conflicts: tuple[dict[str, Any], ...]
 
 
+# Post-apply verification cost model, in units of one exact XPath read.  A
+# full /config download pays a fixed round trip plus a share per element of
+# the tree; exact reads draw from the host budget and run that many at once.
+FULL_CONFIG_FIXED_COST = 2.0
+FULL_CONFIG_ELEMENTS_PER_READ = 2000
+
+
+@dataclass(frozen=True)
+class _VerificationPlan:
+    mode: str
+    xpath_reads: int
+    config_elements: int
+    targeted_cost: float
+    full_cost: float
+
+
+def _plan_postcondition_verification(
+    mutations: Iterable[Mutation], candidate: ET.Element
+) -> _VerificationPlan:
+    """Choose exact XPath reads or one full candidate download."""
+
+    xpath_reads = _targeted_xpath_query_count(mutations, expected_state="after")
+    config_elements = sum(1 for _element in candidate.iter())
+    targeted_cost = float(math.ceil(xpath_reads / DEFAULT_HOST_CONCURRENCY))
+    full_cost = round(
+        FULL_CONFIG_FIXED_COST + config_elements / FULL_CONFIG_ELEMENTS_PER_READ, 2
+    )
+    return _VerificationPlan(
+        "targeted" if targeted_cost < full_cost else "full",
+        xpath_reads,
+        config_elements,
+        targeted_cost,
+        full_cost,
+    )
+
+
+def _splice_targeted_responses(
+    candidate: ET.Element,
+    mutations: Iterable[Mutation],
+    responses: dict[str, ET.Element],
+) -> Optional[ET.Element]:
+    """Rebuild the post-apply candidate from exact reads of every touched path.
+
+    The pre-apply candidate was proven current under the config locks; only
+    the touched entries (and the rulebases of written policies) are replaced
+    by what Panorama returned for them.  Returns None when a path cannot be
+    placed, in which case the caller downloads the full candidate.
+    """
+
+    config = copy.deepcopy(candidate)
+    index = ConfigIndex(config)
+    containers: dict[str, ET.Element] = {}
+    for mutation in mutations:
+        container_xpath = parent_xpath(mutation.target_xpath)
+        parent = index.find(container_xpath)
+        if parent is None:
+            return None
+        current = index.find(mutation.target_xpath)
+        live = _target_element_from_response(
+            responses[mutation.target_xpath], mutation
+        )
+        index.invalidate(container_xpath)
+        if current is not None:
+            position = list(parent).index(current)
+            parent.remove(current)
+            if live is not None:
+                parent.insert(position, copy.deepcopy(live))
+        elif live is not None:
+            parent.append(copy.deepcopy(live))
+        if container_xpath in responses:
+            containers[container_xpath] = parent
+    for container_xpath, container in containers.items():
+        response = responses[container_xpath]
+        rules = next(response.iter("rules"), None)
+        result = response.find("./result")
+        source = rules if rules is not None else result
+        index.invalidate(container_xpath)
+        for child in list(container):
+            container.remove(child)
+        if source is not None:
+            container.extend(copy.deepcopy(entry) for entry in source.findall("./entry"))
+    return config
+
+
+@contextmanager
+def _grouped_journal(
+    store: SessionStore, session_id: str, writer: PanoramaWriteClient
+) -> Iterator[None]:
+    """Group-commit journal events, flushing before every mutating request.
+
+    Writers whose reader has no mutation barriers (offline doubles) keep one
+    fsync per event, because nothing would flush the journal ahead of a write.
+    """
+
+    barriers = getattr(getattr(writer, "reader", None), "mutation_barriers", None)
+    if not isinstance(barriers, list):
+        yield
+        return
+    with store.journal_group_commit(session_id) as flush:
+        barriers.append(flush)
+        try:
+            yield
+        finally:
+            barriers.remove(flush)
+
+
+@contextmanager
+def _compact_when_finished(store: SessionStore, session_id: str) -> Iterator[None]:
+    """Compact snapshots after the wrapped operation left its Panorama locks.
+
+    Re-projecting full snapshots can take a while on large configurations, so
+    it never runs while config locks or the host job mutex are held.  It is
+    best-effort and skipped on an interrupt.
+    """
+
+    try:
+        yield
+    except Exception:
+        store.compact_finished_session(session_id)
+        raise
+    store.compact_finished_session(session_id)
+
+
 def server_snapshot_filename(session_id: str) -> str:
     """Return a human-recognisable PAN-OS config name within its 32-char limit."""
 
@@ -84,7 +220,7 @@ def reconcile_external_execution(
 
     if source not in {"CLI", "API"}:
         raise ValidationError("Źródło wykonania zewnętrznego musi być CLI albo API.")
-    with store.operation_lock(session_id):
+    with store.operation_lock(session_id), _compact_when_finished(store, session_id):
         with store.panorama_job_lock(reader.profile.host, session_id):
             manifest = store.load_manifest(session_id)
             if manifest["state"] not in {
@@ -235,8 +371,9 @@ def _precondition_conflicts(
 ) -> tuple[set[str], list[dict[str, Any]]]:
     components: set[str] = set()
     conflicts: list[dict[str, Any]] = []
+    index = ConfigIndex(candidate)
     for mutation in patch.mutations:
-        current = fingerprint_xpath(candidate, mutation.target_xpath)
+        current = fingerprint_xpath(index, mutation.target_xpath)
         if current != mutation.before_sha256:
             components.add(mutation.component_id)
             conflicts.append(
@@ -252,7 +389,7 @@ def _precondition_conflicts(
             continue
         if mutation.order_context_sha256 is not None:
             current_order_context = rule_order_context_sha256(
-                candidate,
+                index,
                 mutation.target_xpath,
                 mutation.order_previous,
                 mutation.order_next,
@@ -428,12 +565,11 @@ def _restore_history_conflicts(
 
     # An OUTCOME_UNKNOWN cleanup may have changed candidate even though no
     # applied-mutation list exists.  Its scope cannot be proven safely.
-    for item in store.list_sessions_strict():
-        if (
-            item.get("operation_kind") != "cleanup"
-            or item.get("state") != SessionState.OUTCOME_UNKNOWN.value
-        ):
-            continue
+    for item in store.query_sessions(
+        strict=True,
+        operation_kind="cleanup",
+        states=(SessionState.OUTCOME_UNKNOWN.value,),
+    ):
         unknown = store.load_manifest(str(item["session_id"]))
         profile = unknown.get("profile") or {}
         if (
@@ -487,8 +623,9 @@ def _postcondition_failures(
     mutations: Iterable[Mutation], candidate: ET.Element
 ) -> list[dict[str, Any]]:
     failures: list[dict[str, Any]] = []
+    index = ConfigIndex(candidate)
     for mutation in mutations:
-        current = fingerprint_xpath(candidate, mutation.target_xpath)
+        current = fingerprint_xpath(index, mutation.target_xpath)
         if current != mutation.after_sha256:
             failures.append(
                 {
@@ -500,7 +637,7 @@ def _postcondition_failures(
             )
             continue
         order_problem = _rule_order_problem(
-            mutation, candidate, expect_xml=mutation.after_xml
+            mutation, index, expect_xml=mutation.after_xml
         )
         if order_problem:
             failures.append(
@@ -515,32 +652,33 @@ def _postcondition_failures(
 
 def _rule_order_problem(
     mutation: Mutation,
-    config: ET.Element,
+    config: ConfigIndex,
     *,
     expect_xml: Optional[str],
 ) -> Optional[str]:
     if mutation.entity_type != "policy" or expect_xml is None:
         return None
-    rule = find_xpath(config, mutation.target_xpath)
-    container = find_xpath(config, parent_xpath(mutation.target_xpath))
+    rule = config.find(mutation.target_xpath)
+    container = config.find(parent_xpath(mutation.target_xpath))
     if rule is None or container is None or not rule.get("name"):
         return "Nie można potwierdzić pozycji odtworzonej polityki."
-    names = [entry.get("name") for entry in container.findall("./entry")]
+    names = config.entry_names(container)
+    positions = config.entry_positions(container)
     name = rule.get("name")
-    if name not in names:
+    if name not in positions:
         return "Odtworzona polityka nie występuje w kolejności rulebase."
-    index = names.index(name)
+    index = positions[name]
     if mutation.order_previous:
-        if mutation.order_previous not in names:
+        if mutation.order_previous not in positions:
             return f"Brakuje historycznego poprzednika {mutation.order_previous}."
-        if names.index(mutation.order_previous) + 1 != index:
+        if positions[mutation.order_previous] + 1 != index:
             return f"Polityka nie znajduje się bezpośrednio po {mutation.order_previous}."
     elif index != 0:
         return "Polityka bez poprzednika nie została odtworzona na pozycji top."
     if mutation.order_next:
-        if mutation.order_next not in names:
+        if mutation.order_next not in positions:
             return f"Brakuje historycznego następnika {mutation.order_next}."
-        if index + 1 != names.index(mutation.order_next):
+        if index + 1 != positions[mutation.order_next]:
             return f"Polityka nie znajduje się bezpośrednio przed {mutation.order_next}."
     elif index != len(names) - 1:
         return "Polityka bez następnika nie została odtworzona na pozycji bottom."
@@ -577,6 +715,27 @@ def _direct_lock_scopes(patch: PatchSet) -> list[Optional[str]]:
     )
 
 
+def _record_partial_batch(
+    writer: PanoramaWriteClient,
+    chunk: list[tuple[Mutation, MutationOperation]],
+    applied: list[Mutation],
+) -> None:
+    """Add every mutation of a failed batch that changed candidate to ``applied``."""
+
+    try:
+        candidate = ConfigIndex(writer.reader.fetch_config("candidate"))
+    except Exception as exc:
+        raise OutcomeUnknownError(
+            "multi-config zakończył się błędem, a candidate nie dało się odczytać; "
+            "wymagane ręczne reconciliation."
+        ) from exc
+    for mutation, _operation in chunk:
+        if mutation in applied:
+            continue
+        if fingerprint_xpath(candidate, mutation.target_xpath) != mutation.before_sha256:
+            applied.append(mutation)
+
+
 def _rollback(
     store: SessionStore,
     session_id: str,
@@ -599,7 +758,7 @@ def _rollback(
                     "operation": operation.to_dict(),
                 },
             )
-    candidate = writer.reader.fetch_config("candidate")
+    candidate = ConfigIndex(writer.reader.fetch_config("candidate"))
     failures = []
     for mutation in applied:
         current = fingerprint_xpath(candidate, mutation.target_xpath)
@@ -866,21 +1025,22 @@ def apply_candidate(
         Callable[[int, str, Optional[dict[str, Any]]], None]
     ] = None,
 ) -> ApplyResult:
-    with store.operation_lock(session_id):
+    with store.operation_lock(session_id), _compact_when_finished(store, session_id):
         # One durable host-wide transaction mutex serializes every Toolbox
         # candidate apply, commit and push.  The restore history watermark is
         # rechecked while this mutex and the Panorama config locks are held,
         # closing the plan/apply TOCTOU window against another Toolbox process.
         with store.panorama_job_lock(reader.profile.host, session_id):
-            return _apply_candidate_unlocked(
-                store,
-                session_id,
-                reader,
-                writer,
-                save_server_snapshot=save_server_snapshot,
-                acquire_locks=acquire_locks,
-                progress_callback=progress_callback,
-            )
+            with _grouped_journal(store, session_id, writer):
+                return _apply_candidate_unlocked(
+                    store,
+                    session_id,
+                    reader,
+                    writer,
+                    save_server_snapshot=save_server_snapshot,
+                    acquire_locks=acquire_locks,
+                    progress_callback=progress_callback,
+                )
 
 
 def _apply_candidate_unlocked(
@@ -1121,6 +1281,21 @@ def _apply_candidate_unlocked(
                 store.append_event(session_id, "SERVER_CANDIDATE_SNAPSHOT_SAVED", {})
             total_operations = sum(len(mutation.forward) for mutation in safe)
             completed_operations = 0
+            write_requests = 0
+            steps = [
+                (mutation, operation)
+                for mutation in safe
+                for operation in mutation.forward
+            ]
+            # Batching is an explicit writer opt-in; by default each operation
+            # stays its own XML API request exactly as before.
+            batch_size = getattr(writer, "multi_config_batch_size", 0)
+            # strict-transactional mode needs the config locks taken above.
+            batches = (
+                writer.operation_batches([operation for _mutation, operation in steps])
+                if batch_size > 1 and acquire_locks
+                else [(position, position + 1) for position in range(len(steps))]
+            )
             store.append_event(
                 session_id,
                 "CANDIDATE_BATCH_START",
@@ -1128,27 +1303,47 @@ def _apply_candidate_unlocked(
                     "mutation_ids": [mutation.mutation_id for mutation in safe],
                     "mutation_count": len(safe),
                     "operation_count": total_operations,
+                    "multi_config_batch_size": batch_size,
                 },
             )
-            for mutation in safe:
-                progress(
-                    45 + int(38 * completed_operations / max(1, total_operations)),
-                    f"Przygotowanie: {mutation.entity_key}",
-                    {
-                        "event": "mutation-start",
-                        "mutationId": mutation.mutation_id,
-                        "entityType": mutation.entity_type,
-                        "entityKey": mutation.entity_key,
-                        "completedOperations": completed_operations,
-                        "totalOperations": total_operations,
-                    },
-                )
-                started = False
-                for operation in mutation.forward:
-                    writer.apply_operation(operation)
-                    if not started:
+            announced: Optional[str] = None
+            for batch_start, batch_end in batches:
+                chunk = steps[batch_start:batch_end]
+                for mutation, _operation in chunk:
+                    if mutation.mutation_id == announced:
+                        continue
+                    announced = mutation.mutation_id
+                    progress(
+                        45 + int(38 * completed_operations / max(1, total_operations)),
+                        f"Przygotowanie: {mutation.entity_key}",
+                        {
+                            "event": "mutation-start",
+                            "mutationId": mutation.mutation_id,
+                            "entityType": mutation.entity_type,
+                            "entityKey": mutation.entity_key,
+                            "completedOperations": completed_operations,
+                            "totalOperations": total_operations,
+                        },
+                    )
+                if len(chunk) == 1:
+                    writer.apply_operation(chunk[0][1])
+                else:
+                    # strict-transactional multi-config is all-or-nothing, but
+                    # an error response is not taken on trust: any step whose
+                    # target moved off its precondition joins the rollback.
+                    try:
+                        writer.apply_operations(
+                            [operation for _mutation, operation in chunk]
+                        )
+                    except OutcomeUnknownError:
+                        raise
+                    except Exception:
+                        _record_partial_batch(writer, chunk, applied)
+                        raise
+                write_requests += 1
+                for mutation, operation in chunk:
+                    if not applied or applied[-1] is not mutation:
                         applied.append(mutation)
-                        started = True
                     completed_operations += 1
                     progress(
                         45
@@ -1198,8 +1393,57 @@ def _apply_candidate_unlocked(
                         f"Walidacja candidate zakończyła się {validation.result}."
                     )
             progress(90, "Kontrola wyniku każdej dotkniętej ścieżki", None)
-            post_candidate = reader.fetch_config("candidate")
-            full_config_reads += 1
+            verification = _plan_postcondition_verification(safe, candidate)
+            post_candidate: Optional[ET.Element] = None
+            fallback_reason: Optional[str] = None
+            if verification.mode == "targeted":
+                def postcondition_progress(done: int, total: int, xpath: str) -> None:
+                    progress(
+                        90 + int(3 * done / max(1, total)),
+                        f"Punktowa kontrola wyniku XPath {done}/{total}",
+                        {
+                            "event": "candidate-targeted-postcheck",
+                            "completedOperations": done,
+                            "totalOperations": total,
+                            "xpath": xpath,
+                        },
+                    )
+
+                try:
+                    responses = _targeted_responses(
+                        reader,
+                        tuple(safe),
+                        expected_state="after",
+                        progress_callback=postcondition_progress,
+                    )
+                except ToolboxError as exc:
+                    fallback_reason = f"{type(exc).__name__}: {exc}"
+                else:
+                    targeted_xpath_reads += len(responses)
+                    post_candidate = _splice_targeted_responses(
+                        candidate, safe, responses
+                    )
+                    if post_candidate is None:
+                        fallback_reason = "Ścieżka rodzica nie istnieje w snapshot candidate."
+            postcondition_mode = "targeted"
+            if post_candidate is None:
+                postcondition_mode = "full"
+                post_candidate = reader.fetch_config("candidate")
+                full_config_reads += 1
+            store.append_event(
+                session_id,
+                "POSTCONDITION_VERIFICATION",
+                {
+                    "planned_mode": verification.mode,
+                    "mode": postcondition_mode,
+                    "fallback_reason": fallback_reason,
+                    "xpath_reads": verification.xpath_reads,
+                    "config_elements": verification.config_elements,
+                    "estimated_targeted_cost": verification.targeted_cost,
+                    "estimated_full_cost": verification.full_cost,
+                    "full_config_reads_avoided": int(postcondition_mode == "targeted"),
+                },
+            )
             post_failures = _postcondition_failures(safe, post_candidate)
             if post_failures:
                 raise ValidationError(
@@ -1290,8 +1534,10 @@ def _apply_candidate_unlocked(
                     "total_duration_seconds": total_duration,
                     "full_config_reads": full_config_reads,
                     "targeted_xpath_reads": targeted_xpath_reads,
+                    "postcondition_mode": postcondition_mode,
                     "plan_snapshots_reused": bool(local_plan_snapshots),
                     "completed_operations": completed_operations,
+                    "write_requests": write_requests,
                     "validation_job_id": validation_job,
                 },
             )
@@ -1486,32 +1732,13 @@ def _targeted_candidate_state_failures(
         raise ValueError("config_type must be running or candidate")
 
     selected = tuple(mutations)
-    queries = {mutation.target_xpath for mutation in selected}
-    queries.update(
-        parent_xpath(mutation.target_xpath)
-        for mutation in selected
-        if expected_state == "after"
-        and mutation.entity_type == "policy"
-        and mutation.after_xml is not None
+    responses = _targeted_responses(
+        reader,
+        selected,
+        expected_state=expected_state,
+        config_type=config_type,
+        progress_callback=progress_callback,
     )
-    responses: dict[str, ET.Element] = {}
-
-    def fetch(xpath: str) -> tuple[str, ET.Element]:
-        return xpath, reader.fetch_xpath(xpath, config_type=config_type)
-
-    total = len(queries)
-    completed = 0
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=min(8, max(1, total))
-    ) as pool:
-        futures = [pool.submit(fetch, xpath) for xpath in sorted(queries)]
-        for future in concurrent.futures.as_completed(futures):
-            xpath, response = future.result()
-            responses[xpath] = response
-            completed += 1
-            if progress_callback is not None:
-                progress_callback(completed, total, xpath)
-
     failures: list[dict[str, Any]] = []
     for mutation in selected:
         current = _target_element_from_response(
@@ -1552,6 +1779,37 @@ def _targeted_candidate_state_failures(
     return failures
 
 
+def _targeted_responses(
+    reader: PanoramaReadClient,
+    mutations: tuple[Mutation, ...],
+    *,
+    expected_state: str,
+    config_type: str = "candidate",
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+) -> dict[str, ET.Element]:
+    """Read every touched XPath, plus the rulebase of each written policy."""
+
+    queries = {mutation.target_xpath for mutation in mutations}
+    queries.update(
+        parent_xpath(mutation.target_xpath)
+        for mutation in mutations
+        if expected_state == "after"
+        and mutation.entity_type == "policy"
+        and mutation.after_xml is not None
+    )
+    responses: dict[str, ET.Element] = {}
+    total = len(queries)
+    for completed, (xpath, response) in enumerate(
+        fetch_xpaths(reader, sorted(queries), config_type=config_type), start=1
+    ):
+        if isinstance(response, ToolboxError):
+            raise response
+        responses[xpath] = response
+        if progress_callback is not None:
+            progress_callback(completed, total, xpath)
+    return responses
+
+
 def _targeted_xpath_query_count(
     mutations: Iterable[Mutation], *, expected_state: str
 ) -> int:
@@ -1657,20 +1915,21 @@ def commit_session(
         Callable[[int, str, Optional[dict[str, Any]]], None]
     ] = None,
 ) -> dict[str, Any]:
-    with store.operation_lock(session_id):
+    with store.operation_lock(session_id), _compact_when_finished(store, session_id):
         with store.panorama_job_lock(reader.profile.host, session_id):
-            return _commit_session_unlocked(
-                store,
-                session_id,
-                reader,
-                writer,
-                partial=partial,
-                allow_unisolated_commit=allow_unisolated_commit,
-                allow_full_commit=allow_full_commit,
-                allow_scope_guard_override=allow_scope_guard_override,
-                acknowledged_scope_guard_digest=acknowledged_scope_guard_digest,
-                progress_callback=progress_callback,
-            )
+            with _grouped_journal(store, session_id, writer):
+                return _commit_session_unlocked(
+                    store,
+                    session_id,
+                    reader,
+                    writer,
+                    partial=partial,
+                    allow_unisolated_commit=allow_unisolated_commit,
+                    allow_full_commit=allow_full_commit,
+                    allow_scope_guard_override=allow_scope_guard_override,
+                    acknowledged_scope_guard_digest=acknowledged_scope_guard_digest,
+                    progress_callback=progress_callback,
+                )
 
 
 def _commit_session_unlocked(
@@ -2309,16 +2568,17 @@ def push_session(
         Callable[[int, str, Optional[dict[str, Any]]], None]
     ] = None,
 ) -> dict[str, Any]:
-    with store.operation_lock(session_id):
+    with store.operation_lock(session_id), _compact_when_finished(store, session_id):
         with store.panorama_job_lock(reader.profile.host, session_id):
-            return _push_session_unlocked(
-                store,
-                session_id,
-                reader,
-                writer,
-                device_groups=device_groups,
-                progress_callback=progress_callback,
-            )
+            with _grouped_journal(store, session_id, writer):
+                return _push_session_unlocked(
+                    store,
+                    session_id,
+                    reader,
+                    writer,
+                    device_groups=device_groups,
+                    progress_callback=progress_callback,
+                )
 
 
 def _push_session_unlocked(
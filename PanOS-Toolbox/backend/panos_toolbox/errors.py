@@ -1,5 +1,9 @@
 """Expected, operator-facing Toolbox failures."""
 
+from __future__ import annotations
+
+from typing import Optional
+
 
 class ToolboxError(Exception):
     """Base class for failures that may be safely shown to an operator."""
@@ -27,6 +31,14 @@ class PanoramaResponseError(TransportError):
     pass
 
 
+class PanoramaBusyError(TransportError):
+    """Panorama answered HTTP 429/503; a read may be repeated after a pause."""
+
+    def __init__(self, message: str, *, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class OutcomeUnknownError(TransportError):
     """A mutating request timed out after dispatch and must not be replayed."""
 
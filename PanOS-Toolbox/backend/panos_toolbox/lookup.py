@@ -7,13 +7,13 @@ small number of objects without downloading the complete running config.
 
 from __future__ import annotations
 
-import concurrent.futures
 import time
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass
 from typing import Any, Iterable, Optional
 
 from .cleaner_adapter import _legacy_root
+from .client import MAX_HOST_CONCURRENCY, fetch_xpaths
 from .errors import InputError, ToolboxError
 from .xmlutil import xpath_literal
 
@@ -286,14 +286,24 @@ def _attach_hit_counts(reader: Any, items: list[dict[str, Any]], recent_days: in
     if not policy_items:
         return
     _legacy_root()
-    from panorama_cleanup.hitcounts import collect_rule_hit_counts  # type: ignore[import-not-found]
+    from panorama_cleanup.hitcounts import (  # type: ignore[import-not-found]
+        DEFAULT_HIT_COUNT_BATCH_SIZE,
+        collect_rule_hit_counts,
+    )
     from panorama_cleanup.models import RuleKey  # type: ignore[import-not-found]
 
     keys = {
         RuleKey(item["scope"], item["rulebase"], item["policyType"], item["name"])
         for item in policy_items
     }
-    results = collect_rule_hit_counts(reader, keys, recent_days=recent_days)
+    # The reader's host budget, not the collector's pool, bounds the load.
+    results = collect_rule_hit_counts(
+        reader,
+        keys,
+        recent_days=recent_days,
+        workers=MAX_HOST_CONCURRENCY,
+        batch_size=DEFAULT_HIT_COUNT_BATCH_SIZE,
+    )
     for item in policy_items:
         key = RuleKey(item["scope"], item["rulebase"], item["policyType"], item["name"])
         hit = results[key]
@@ -337,19 +347,17 @@ def lookup_exact(
     tasks = _queries(kind, names, scopes)
     found: dict[str, dict[str, Any]] = {}
 
-    def execute(query: _Query) -> tuple[_Query, ET.Element]:
-        return query, reader.fetch_xpath(query.xpath, config_type="running")
+    by_xpath: dict[str, list[_Query]] = {}
+    for query in tasks:
+        by_xpath.setdefault(query.xpath, []).append(query)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, max(1, len(tasks)))) as pool:
-        futures = [pool.submit(execute, query) for query in tasks]
-        for future in concurrent.futures.as_completed(futures):
-            api_calls += 1
-            try:
-                query, response = future.result()
-            except ToolboxError as exc:
-                partial = True
-                warnings.append(str(exc))
-                continue
+    for xpath, response in fetch_xpaths(reader, by_xpath, config_type="running"):
+        api_calls += 1
+        if isinstance(response, ToolboxError):
+            partial = True
+            warnings.append(str(response))
+            continue
+        for query in by_xpath[xpath]:
             for entry in _matching_entries(response, query):
                 item = _wire_entry(entry, query)
                 found[item["id"]] = item
@@ -10,7 +10,6 @@ as the normal durable ``PatchSet`` used by Candidate/Commit/Push.
 from __future__ import annotations
 
 import ast
-import concurrent.futures
 import hashlib
 import ipaddress
 import json
@@ -19,8 +18,8 @@ import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from typing import Any, Callable, Iterable, Mapping, Optional
 
-from .client import PanoramaReadClient
-from .errors import InputError
+from .client import PanoramaReadClient, fetch_xpaths
+from .errors import InputError, ToolboxError
 from .models import Mutation, MutationAction, MutationOperation, PatchSet
 from .xmlutil import parent_xpath, parse_xml, xpath_literal
 
@@ -362,12 +361,26 @@ def _policy_xml(flow: RequestFlow, name: str, source_name: str, destination_name
     return ET.tostring(entry, encoding="unicode")
 
 
-def _exists(reader: PanoramaReadClient, xpath: str) -> bool:
+def _existing(
+    reader: PanoramaReadClient,
+    xpaths: Iterable[str],
+    on_checked: Callable[[str, bool], None],
+) -> None:
+    """Report for each XPath whether running or candidate already has it."""
+
+    pending: Iterable[str] = dict.fromkeys(xpaths)
     for config_type in ("running", "candidate"):
-        root = reader.fetch_xpath(xpath, config_type=config_type)
-        if any(element.tag == "entry" and element.get("name") for element in root.iter()):
-            return True
-    return False
+        absent: list[str] = []
+        for xpath, root in fetch_xpaths(reader, pending, config_type=config_type):
+            if isinstance(root, ToolboxError):
+                raise root
+            if any(element.tag == "entry" and element.get("name") for element in root.iter()):
+                on_checked(xpath, True)
+            elif config_type == "running":
+                absent.append(xpath)
+            else:
+                on_checked(xpath, False)
+        pending = absent
 
 
 def build_policy_creation_plan(
@@ -474,23 +487,16 @@ def build_policy_creation_plan(
         f"Równoległe sprawdzanie {len(pending_creates)} encji punktowym XPath API",
     )
     existing_by_xpath: dict[str, bool] = {}
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=min(8, max(1, len(pending_creates))),
-        thread_name_prefix="panos-create-lookup",
-    ) as pool:
-        futures = {
-            pool.submit(_exists, reader, record["xpath"]): record["xpath"]
-            for record in pending_creates
-        }
-        for completed, future in enumerate(
-            concurrent.futures.as_completed(futures), start=1
-        ):
-            xpath = futures[future]
-            existing_by_xpath[xpath] = future.result()
-            progress(
-                40 + int(completed / max(1, len(futures)) * 45),
-                f"Sprawdzono encję {completed}/{len(futures)}",
-            )
+    checked_total = len({record["xpath"] for record in pending_creates})
+
+    def checked(xpath: str, exists: bool) -> None:
+        existing_by_xpath[xpath] = exists
+        progress(
+            40 + int(len(existing_by_xpath) / max(1, checked_total) * 45),
+            f"Sprawdzono encję {len(existing_by_xpath)}/{checked_total}",
+        )
+
+    _existing(reader, (record["xpath"] for record in pending_creates), checked)
 
     for record in pending_creates:
         if existing_by_xpath.get(record["xpath"], False):
@@ -13,6 +13,7 @@ from typing import Iterable, Mapping, Optional, Sequence
 from .errors import ValidationError
 from .models import Mutation, MutationAction, MutationOperation, PatchSet
 from .xmlutil import (
+    ConfigIndex,
     element_xml,
     find_xpath,
     fingerprint_xpath,
@@ -322,24 +323,46 @@ def _same_child(left: ET.Element, right: ET.Element) -> bool:
     return False
 
 
-def apply_operation_to_tree(config: ET.Element, operation: MutationOperation) -> None:
-    """Apply the conservative PatchSet operation subset without an API call."""
+def _existing_child(
+    parent: ET.Element, fragment: ET.Element, index: Optional[ConfigIndex]
+) -> Optional[ET.Element]:
+    if index is None:
+        return next((child for child in parent if _same_child(child, fragment)), None)
+    if fragment.get("name") is not None:
+        return index.child(parent, fragment.tag, "name", fragment.get("name"))
+    if fragment.tag == "member":
+        return index.child(parent, "member", "text", (fragment.text or "").strip())
+    return None
+
+
+def apply_operation_to_tree(
+    config: ET.Element,
+    operation: MutationOperation,
+    *,
+    index: Optional[ConfigIndex] = None,
+) -> None:
+    """Apply the conservative PatchSet operation subset without an API call.
+
+    ``index`` must be built over ``config``; it is used for lookups and kept
+    current by invalidating the one parent path each operation edits.
+    """
+
+    def resolve(xpath: str) -> Optional[ET.Element]:
+        return index.find(xpath) if index is not None else find_xpath(config, xpath)
 
     if operation.action is MutationAction.SET:
-        parent = find_xpath(config, operation.xpath)
+        parent = resolve(operation.xpath)
         if parent is None:
             raise ValidationError(f"SET wskazuje brakujący parent {operation.xpath}.")
         assert operation.element is not None
         pending: list[ET.Element] = []
         for fragment in _fragment_nodes(operation.element):
-            existing = next(
-                (
-                    child
-                    for child in [*list(parent), *pending]
-                    if _same_child(child, fragment)
-                ),
-                None,
-            )
+            existing = _existing_child(parent, fragment, index)
+            if existing is None:
+                existing = next(
+                    (child for child in pending if _same_child(child, fragment)),
+                    None,
+                )
             if existing is not None:
                 if ET.tostring(existing) != ET.tostring(fragment):
                     raise ValidationError(
@@ -347,12 +370,18 @@ def apply_operation_to_tree(config: ET.Element, operation: MutationOperation) ->
                     )
                 continue
             pending.append(fragment)
+        if index is not None and pending:
+            index.invalidate(operation.xpath)
         for fragment in pending:
             parent.append(copy.deepcopy(fragment))
         return
 
-    target = find_xpath(config, operation.xpath)
-    parent = find_xpath(config, parent_xpath(operation.xpath))
+    target = resolve(operation.xpath)
+    parent = resolve(parent_xpath(operation.xpath))
+    if parent is not None and index is not None:
+        # Every branch below edits the direct children of ``parent`` or
+        # raises before touching the tree; dropping the cache early is safe.
+        index.invalidate(parent_xpath(operation.xpath))
     if operation.action is MutationAction.DELETE:
         if target is None or parent is None:
             raise ValidationError(f"DELETE wskazuje brakujący XPath {operation.xpath}.")
@@ -365,9 +394,9 @@ def apply_operation_to_tree(config: ET.Element, operation: MutationOperation) ->
         fragments = _fragment_nodes(operation.element)
         if len(fragments) != 1:
             raise ValidationError("EDIT w simulatorze wymaga dokładnie jednego elementu.")
-        index = list(parent).index(target)
+        position = list(parent).index(target)
         parent.remove(target)
-        parent.insert(index, copy.deepcopy(fragments[0]))
+        parent.insert(position, copy.deepcopy(fragments[0]))
         return
     if operation.action is MutationAction.MOVE:
         if target is None or parent is None:
@@ -393,17 +422,17 @@ def apply_operation_to_tree(config: ET.Element, operation: MutationOperation) ->
             parent.append(target)
         else:
             assert destination is not None
-            index = list(parent).index(destination)
+            position = list(parent).index(destination)
             if operation.where == "after":
-                index += 1
-            parent.insert(index, target)
+                position += 1
+            parent.insert(position, target)
         return
     raise ValidationError(f"Nieobsługiwana operacja simulatora: {operation.action}.")
 
 
 def _policy_step_is_safe(
     mutation: Mutation,
-    config: ET.Element,
+    config: ConfigIndex,
     selected_policy_anchors: set[tuple[str, str]],
 ) -> bool:
     """Validate anchors available at this point in reverse chronology.
@@ -415,27 +444,28 @@ def _policy_step_is_safe(
 
     if mutation.entity_type != "policy":
         return True
-    rule = find_xpath(config, mutation.target_xpath)
+    rule = config.find(mutation.target_xpath)
     container_xpath = parent_xpath(mutation.target_xpath)
-    container = find_xpath(config, container_xpath)
+    container = config.find(container_xpath)
     if rule is None or container is None or not rule.get("name"):
         return False
-    names = [entry.get("name") for entry in container.findall("./entry")]
+    names = config.entry_names(container)
+    positions = config.entry_positions(container)
     name = rule.get("name")
-    if name not in names:
+    if name not in positions:
         return False
-    index = names.index(name)
+    index = positions[name]
     if mutation.order_previous:
-        if mutation.order_previous in names:
-            if names.index(mutation.order_previous) + 1 != index:
+        if mutation.order_previous in positions:
+            if positions[mutation.order_previous] + 1 != index:
                 return False
         elif (container_xpath, mutation.order_previous) not in selected_policy_anchors:
             return False
     elif index != 0:
         return False
     if mutation.order_next:
-        if mutation.order_next in names:
-            if index + 1 != names.index(mutation.order_next):
+        if mutation.order_next in positions:
+            if index + 1 != positions[mutation.order_next]:
                 return False
         elif (container_xpath, mutation.order_next) not in selected_policy_anchors:
             return False
@@ -445,18 +475,18 @@ def _policy_step_is_safe(
 
 
 def _final_policy_anchors(
-    mutation: Mutation, config: ET.Element
+    mutation: Mutation, config: ConfigIndex
 ) -> tuple[Optional[str], Optional[str]]:
     if mutation.entity_type != "policy":
         return mutation.order_previous, mutation.order_next
-    rule = find_xpath(config, mutation.target_xpath)
-    container = find_xpath(config, parent_xpath(mutation.target_xpath))
+    rule = config.find(mutation.target_xpath)
+    container = config.find(parent_xpath(mutation.target_xpath))
     if rule is None or container is None or not rule.get("name"):
         raise ValidationError(
             f"Nie można wyprowadzić końcowej pozycji polityki {mutation.entity_key}."
         )
-    names = [entry.get("name") for entry in container.findall("./entry")]
-    index = names.index(rule.get("name"))
+    names = config.entry_names(container)
+    index = config.entry_positions(container)[rule.get("name")]
     previous = names[index - 1] if index else None
     following = names[index + 1] if index + 1 < len(names) else None
     return previous, following
@@ -487,6 +517,8 @@ def build_restore_patchset_history(
     # A component that fails its three-way/order checks is rewound locally with
     # the original cleanup forward operations before processing continues.
     working = copy.deepcopy(current_config)
+    working_index = ConfigIndex(working)
+    current_index = ConfigIndex(current_config)
     for component, records in sorted(by_component.items()):
         component_findings: list[RestoreFinding] = []
         component_applied: list[HistoricalMutation] = []
@@ -513,7 +545,7 @@ def build_restore_patchset_history(
                     record.mutation.entity_type
                 )
             opposite = _opposite_namespace_xpath(record.mutation)
-            if opposite and find_xpath(current_config, opposite) is not None:
+            if opposite and current_index.find(opposite) is not None:
                 conflicted.add(component)
         if any(len(types) > 1 for types in namespace_types.values()):
             conflicted.add(component)
@@ -527,7 +559,7 @@ def build_restore_patchset_history(
                     before_sha256=record.mutation.before_sha256,
                     expected_cleanup_sha256=record.mutation.after_sha256,
                     current_sha256=fingerprint_xpath(
-                        working, record.mutation.target_xpath
+                        working_index, record.mutation.target_xpath
                     ),
                 )
                 for record in records
@@ -536,7 +568,7 @@ def build_restore_patchset_history(
             continue
         for record in reversed(records):
             mutation = record.mutation
-            current_hash = fingerprint_xpath(working, mutation.target_xpath)
+            current_hash = fingerprint_xpath(working_index, mutation.target_xpath)
             decision = decide_three_way(
                 before_sha256=mutation.before_sha256,
                 expected_sha256=mutation.after_sha256,
@@ -558,7 +590,7 @@ def build_restore_patchset_history(
                 break
             if decision is RestoreDecision.ALREADY_RESTORED:
                 if not _policy_step_is_safe(
-                    mutation, working, component_policy_anchors
+                    mutation, working_index, component_policy_anchors
                 ):
                     conflicted.add(component)
                     break
@@ -566,7 +598,7 @@ def build_restore_patchset_history(
             operation_applied = False
             try:
                 for operation in mutation.inverse:
-                    apply_operation_to_tree(working, operation)
+                    apply_operation_to_tree(working, operation, index=working_index)
                     operation_applied = True
             except ValidationError:
                 if operation_applied:
@@ -575,7 +607,7 @@ def build_restore_patchset_history(
                 break
             component_applied.append(record)
             if not _policy_step_is_safe(
-                mutation, working, component_policy_anchors
+                mutation, working_index, component_policy_anchors
             ):
                 conflicted.add(component)
                 break
@@ -584,7 +616,7 @@ def build_restore_patchset_history(
             try:
                 for record in reversed(component_applied):
                     for operation in record.mutation.forward:
-                        apply_operation_to_tree(working, operation)
+                        apply_operation_to_tree(working, operation, index=working_index)
             except ValidationError as exc:
                 raise ValidationError(
                     "Simulator restore nie zdołał wycofać konfliktowego komponentu "
@@ -603,7 +635,7 @@ def build_restore_patchset_history(
                             before_sha256=mutation.before_sha256,
                             expected_cleanup_sha256=mutation.after_sha256,
                             current_sha256=fingerprint_xpath(
-                                working, mutation.target_xpath
+                                working_index, mutation.target_xpath
                             ),
                         )
                     )
@@ -624,7 +656,7 @@ def build_restore_patchset_history(
         findings.extend(component_findings)
 
     # ``working`` is now the combined final state of every safe component.
-    final_tree = working
+    final_tree = working_index
 
     restore_mutations: list[Mutation] = []
     previous_by_component: dict[str, str] = {}
@@ -640,8 +672,8 @@ def build_restore_patchset_history(
                 entity_type=source.entity_type,
                 entity_key=source.entity_key,
                 target_xpath=source.target_xpath,
-                before_xml=element_xml(find_xpath(current_config, source.target_xpath)),
-                after_xml=element_xml(find_xpath(final_tree, source.target_xpath)),
+                before_xml=element_xml(current_index.find(source.target_xpath)),
+                after_xml=element_xml(final_tree.find(source.target_xpath)),
                 forward=source.inverse,
                 inverse=source.forward,
                 causes=source.causes,
@@ -650,7 +682,7 @@ def build_restore_patchset_history(
                 order_next=final_next,
                 order_context_sha256=(
                     rule_order_context_sha256(
-                        current_config,
+                        current_index,
                         source.target_xpath,
                         final_previous,
                         final_next,
@@ -717,8 +749,9 @@ def build_restore_patchset(
         if mutation.entity_type == "policy":
             original_rule_by_name[(parent_xpath(mutation.target_xpath), mutation.entity_key.rsplit("/", 1)[-1])] = mutation
 
+    current_index = ConfigIndex(current_config)
     for mutation in original.mutations:
-        current_hash = fingerprint_xpath(current_config, mutation.target_xpath)
+        current_hash = fingerprint_xpath(current_index, mutation.target_xpath)
         decision = decide_three_way(
             before_sha256=mutation.before_sha256,
             expected_sha256=mutation.after_sha256,
@@ -748,9 +781,9 @@ def build_restore_patchset(
             if mutation.entity_type != "policy" or mutation.component_id in conflicted:
                 continue
             container_xpath = parent_xpath(mutation.target_xpath)
-            container = find_xpath(current_config, container_xpath)
+            container = current_index.find(container_xpath)
             current_names = (
-                [entry.get("name") for entry in container.findall("./entry")]
+                list(current_index.entry_names(container))
                 if container is not None
                 else []
             )
@@ -830,7 +863,7 @@ def build_restore_patchset(
                 order_next=mutation.order_next,
                 order_context_sha256=(
                     rule_order_context_sha256(
-                        current_config,
+                        current_index,
                         mutation.target_xpath,
                         mutation.order_previous,
                         mutation.order_next,
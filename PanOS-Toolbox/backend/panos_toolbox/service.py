@@ -14,7 +14,7 @@ import xml.etree.ElementTree as ET
 from contextlib import ExitStack
 from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Callable, Iterable, Optional, Sequence
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
 
 from .cleaner_adapter import (
     CleanerPlanResult,
@@ -22,7 +22,12 @@ from .cleaner_adapter import (
     _legacy_root,
     build_cleanup_patchset,
 )
-from .client import PanoramaReadClient, PanoramaWriteClient
+from .client import (
+    MAX_HOST_CONCURRENCY,
+    MAX_MULTI_CONFIG_OPERATIONS,
+    PanoramaReadClient,
+    PanoramaWriteClient,
+)
 from .diffing import compare_configs
 from .engine import ApplyResult, apply_candidate, commit_session, push_session
 from .errors import InputError, SessionError, ToolboxError
@@ -42,8 +47,8 @@ from .restore import (
 )
 from .sessions import AppliedCleanup, SessionStore
 from .xmlutil import (
+    ConfigIndex,
     device_group_from_xpath,
-    find_xpath,
     parent_xpath,
     parse_xml,
     xpath_literal,
@@ -92,7 +97,17 @@ def normalize_names(values: Iterable[str], *, label: str) -> tuple[str, ...]:
     return tuple(result)
 
 
-def _ping_one(ip: str, timeout_ms: int) -> PingObservation:
+def _ping_environment() -> dict[str, str]:
+    return {
+        key: value
+        for key, value in os.environ.items()
+        if "PASSWORD" not in key.upper() and "TOKEN" not in key.upper()
+    }
+
+
+def _ping_one(
+    ip: str, timeout_ms: int, environment: Optional[Mapping[str, str]] = None
+) -> PingObservation:
     parsed = ipaddress.ip_address(ip)
     if os.name == "nt":
         command = ["ping", "-n", "1", "-w", str(timeout_ms)]
@@ -113,11 +128,7 @@ def _ping_one(ip: str, timeout_ms: int) -> PingObservation:
             stderr=subprocess.PIPE,
             timeout=timeout_ms / 1000 + 3,
             check=False,
-            env={
-                key: value
-                for key, value in os.environ.items()
-                if "PASSWORD" not in key.upper() and "TOKEN" not in key.upper()
-            },
+            env=dict(environment) if environment is not None else _ping_environment(),
         )
     except FileNotFoundError:
         return PingObservation(ip, "ERROR", "Program ping nie jest dostępny", time.perf_counter() - started)
@@ -162,11 +173,33 @@ def ping_ips(
     if not 100 <= timeout_ms <= 60_000 or not 1 <= workers <= 128:
         raise InputError("Niepoprawny timeout/workers ICMP.")
     result: dict[str, PingObservation] = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(values))) as pool:
-        futures = {pool.submit(_ping_one, ip, timeout_ms): ip for ip in values}
-        for future in concurrent.futures.as_completed(futures):
-            observation = future.result()
-            result[observation.ip] = observation
+    # The shared cleaner's in-process ICMP engine answers what unprivileged
+    # ICMP sockets allow and re-probes silent addresses before NO_REPLY.
+    # `ping` only covers what the engine could not serve.
+    try:
+        _legacy_root()
+        from panorama_cleanup.icmp import probe_echo  # type: ignore[import-not-found]
+
+        probed = probe_echo(values, timeout_ms=timeout_ms)
+    except Exception:  # the subprocess path stays authoritative
+        probed = {}
+    for ip, probe in probed.items():
+        result[ip] = PingObservation(
+            ip, probe.status.value, probe.detail, probe.elapsed_seconds
+        )
+    remaining = [ip for ip in values if ip not in result]
+    if remaining:
+        environment = _ping_environment()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(remaining))
+        ) as pool:
+            futures = {
+                pool.submit(_ping_one, ip, timeout_ms, environment): ip
+                for ip in remaining
+            }
+            for future in concurrent.futures.as_completed(futures):
+                observation = future.result()
+                result[observation.ip] = observation
     return {ip: result[ip] for ip in values}
 
 
@@ -178,7 +211,10 @@ def _last_hit_summary(
     progress_callback: Optional[Callable[[int, int, Any], None]] = None,
 ) -> dict[str, Any]:
     _legacy_root()
-    from panorama_cleanup.hitcounts import collect_rule_hit_counts  # type: ignore[import-not-found]
+    from panorama_cleanup.hitcounts import (  # type: ignore[import-not-found]
+        DEFAULT_HIT_COUNT_BATCH_SIZE,
+        collect_rule_hit_counts,
+    )
 
     # A policy can remain in place while only one source/destination member is
     # detached.  It is still relevant to the operator and therefore needs a
@@ -203,6 +239,8 @@ def _last_hit_summary(
         reader,
         relevant_rules,
         recent_days=recent_days,
+        workers=MAX_HOST_CONCURRENCY,
+        batch_size=DEFAULT_HIT_COUNT_BATCH_SIZE,
         progress_callback=progress_callback,
     )
     records = []
@@ -671,6 +709,7 @@ def plan_cleanup_session(
     nat_translation_action: str = "delete-rule",
     recent_hit_days: int = 14,
     allow_default_policy_override: bool = False,
+    plan_workers: int = 1,
     progress_callback: Optional[Callable[[int, str], None]] = None,
 ) -> dict[str, Any]:
     started_at = time.monotonic()
@@ -684,6 +723,8 @@ def plan_cleanup_session(
         raise InputError("nat_translation_action musi być delete-rule albo block.")
     if not 1 <= recent_hit_days <= 3650:
         raise InputError("recent_hit_days musi być w zakresie 1..3650.")
+    if not 1 <= plan_workers <= 32:
+        raise InputError("plan_workers musi być w zakresie 1..32.")
     ips = normalize_ips(raw_ips, allow_empty=True)
     object_names = normalize_names(address_objects, label="obiektu")
     group_names = normalize_names(address_groups, label="grupy")
@@ -772,6 +813,7 @@ def plan_cleanup_session(
             panorama_username=reader.profile.username,
             nat_translation_action=nat_translation_action,
             allow_default_policy_override=allow_default_policy_override,
+            workers=plan_workers,
         )
         patch = result.patchset
         progress(84, "Sprawdzanie Last Hit znalezionych polityk")
@@ -955,7 +997,11 @@ def _historical_dependency_graph(
 
     for cleanup in history:
         try:
-            model = parse_config(store.load_snapshot(cleanup.session_id, "pre_candidate"))
+            # A delta snapshot keeps every entry this graph and the restore
+            # checks read, so it parses to the same resolutions.
+            model = parse_config(
+                store.load_snapshot(cleanup.session_id, "pre_candidate", allow_delta=True)
+            )
         except Exception as exc:
             raise SessionError(
                 f"Sesja {cleanup.session_id} nie ma integralnego pre_candidate potrzebnego "
@@ -1150,12 +1196,13 @@ def _forward_dependency_conflicts(
         if record.mutation.entity_type in {"address", "group", "policy"}:
             full_restore_owners.add(owner)
     conflicts: set[str] = set()
+    index = ConfigIndex(candidate)
     for owner, components in by_owner.items():
         if owner in graph.unresolved_owners:
             conflicts.update(components)
         for dependency in graph.forward_dependencies.get(owner, ()):
             if (
-                find_xpath(candidate, dependency) is None
+                index.find(dependency) is None
                 and dependency not in full_restore_owners
             ):
                 conflicts.update(components)
@@ -1200,9 +1247,10 @@ def _final_resolution_conflicts(
         return conflicts
     final = copy.deepcopy(current)
     try:
+        final_index = ConfigIndex(final)
         for mutation in patch.mutations:
             for operation in mutation.forward:
-                apply_operation_to_tree(final, operation)
+                apply_operation_to_tree(final, operation, index=final_index)
         _legacy_root()
         from panorama_cleanup.panos import (  # type: ignore[import-not-found]
             parse_config,
@@ -1276,12 +1324,11 @@ def _guard_unknown_restore_source(
     store: SessionStore,
     reader: PanoramaReadClient,
 ) -> None:
-    for item in store.list_sessions_strict():
-        if (
-            item.get("operation_kind") != "cleanup"
-            or item.get("state") != SessionState.OUTCOME_UNKNOWN.value
-        ):
-            continue
+    for item in store.query_sessions(
+        strict=True,
+        operation_kind="cleanup",
+        states=(SessionState.OUTCOME_UNKNOWN.value,),
+    ):
         session_id = str(item.get("session_id") or "")
         manifest = store.load_manifest(session_id)
         profile = manifest.get("profile") or {}
@@ -1669,6 +1716,7 @@ def plan_restore_session(
     if not result.patchset.mutations:
         if result.conflicted_components:
             store.transition(session_id, SessionState.CONFLICT)
+            store.compact_finished_session(session_id)
         else:
             store.transition(session_id, SessionState.RESTORED)
     return {
@@ -1688,7 +1736,12 @@ def make_writer(
     *,
     enable_api_write: bool,
     operator_authorized_stage: Optional[ApiStage] = None,
+    multi_config_batch_size: int = 0,
 ) -> PanoramaWriteClient:
+    if not 0 <= multi_config_batch_size <= MAX_MULTI_CONFIG_OPERATIONS:
+        raise InputError(
+            f"Rozmiar paczki multi-config musi być w zakresie 0..{MAX_MULTI_CONFIG_OPERATIONS}."
+        )
     authorization_profile = reader.profile
     if operator_authorized_stage is not None:
         if operator_authorized_stage is ApiStage.READ_ONLY:
@@ -1711,4 +1764,4 @@ def make_writer(
         enable_api_write=enable_api_write,
         ttl_seconds=3600,
     )
-    return reader.enable_write(lease)
+    return reader.enable_write(lease, multi_config_batch_size=multi_config_batch_size)
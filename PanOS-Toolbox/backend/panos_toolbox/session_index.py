@@ -0,0 +1,632 @@
+"""Persistent SQLite index of session summaries for the local session store.
+
+Listing sessions used to decode every manifest (and, for the history tab,
+every PatchSet and journal) on each request.  This index keeps one row per
+session with the list summary, the filter columns used by restore planning
+and lookups (kind, state, PatchSet host/account, targets, touched XPaths), the
+snapshot blobs the session references and the last built history record
+together with the columns and search rows the history tab filters on.  List
+and history pages are keyset-paginated on the session id, which sorts
+chronologically, so a page costs the same at the 10th and the 10 000th
+session.
+``SessionStore`` writes rows through on every manifest and journal write; each
+row also carries a stat fingerprint of the session directory, so a session
+changed by another process, copied in by a migration or removed by hand is
+re-read or dropped at the next query instead of being served stale.
+
+The index is a cache: the session directories remain the source of truth, an
+unreadable database file is discarded and rebuilt from them, and a failing
+write-through leaves the old fingerprint behind, which the next query sees as
+stale.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence
+
+
+INDEX_FILE = "index.sqlite3"
+INDEX_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    fingerprint TEXT,
+    error TEXT,
+    operation_kind TEXT,
+    state TEXT,
+    panorama_host TEXT,
+    panorama_username TEXT,
+    created_utc TEXT,
+    summary TEXT,
+    history_fingerprint TEXT,
+    history TEXT,
+    history_error TEXT,
+    history_kind TEXT,
+    history_state TEXT,
+    history_host TEXT,
+    history_created TEXT,
+    history_mutations INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_kind_state ON sessions(operation_kind, state);
+CREATE INDEX IF NOT EXISTS sessions_history_kind ON sessions(history_kind, history_state);
+CREATE TABLE IF NOT EXISTS session_targets (
+    session_id TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (session_id, target)
+);
+CREATE INDEX IF NOT EXISTS session_targets_target ON session_targets(target);
+CREATE TABLE IF NOT EXISTS session_xpaths (
+    session_id TEXT NOT NULL,
+    xpath TEXT NOT NULL,
+    PRIMARY KEY (session_id, xpath)
+);
+CREATE INDEX IF NOT EXISTS session_xpaths_xpath ON session_xpaths(xpath);
+CREATE TABLE IF NOT EXISTS session_snapshots (
+    session_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (session_id, sha256)
+);
+CREATE TABLE IF NOT EXISTS history_targets (
+    session_id TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (session_id, target)
+);
+CREATE INDEX IF NOT EXISTS history_targets_target ON history_targets(target);
+CREATE TABLE IF NOT EXISTS history_search (
+    session_id TEXT NOT NULL,
+    item INTEGER NOT NULL,
+    haystack TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_search_session ON history_search(session_id);
+"""
+
+_DELETE_SESSION_ROWS = (
+    "DELETE FROM sessions WHERE session_id = ?",
+    "DELETE FROM session_targets WHERE session_id = ?",
+    "DELETE FROM session_xpaths WHERE session_id = ?",
+    "DELETE FROM session_snapshots WHERE session_id = ?",
+    "DELETE FROM history_targets WHERE session_id = ?",
+    "DELETE FROM history_search WHERE session_id = ?",
+)
+
+
+def utc_timestamp(value: Any) -> Optional[str]:
+    """Normalise an ISO timestamp to the ``utc_now`` form, or None.
+
+    Normalised values compare chronologically as plain strings, which is what
+    the date-range filters rely on.  Naive values are taken as UTC.
+    """
+
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    if text[-1:] in ("Z", "z"):
+        text = text[:-1] + "+00:00"
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _history_haystacks(record: Mapping[str, Any]) -> list[tuple[int, str]]:
+    """Lower-cased search text of the session and of each history item.
+
+    Mirrors the history tab: a session matches when its own values contain
+    every token or when a single item does.
+    """
+
+    def haystack(values: Iterable[Any]) -> str:
+        return " ".join(str(value) for value in values if value).lower()
+
+    rows = [
+        (
+            0,
+            haystack(
+                [
+                    record.get("id"),
+                    record.get("description"),
+                    record.get("operator"),
+                    record.get("panoramaHost"),
+                    record.get("state"),
+                    *(record.get("affectedDeviceGroups") or ()),
+                    *(record.get("targets") or ()),
+                    *(record.get("searchValues") or ()),
+                ]
+            ),
+        )
+    ]
+    for item in record.get("historyItems") or ():
+        rows.append(
+            (
+                1,
+                haystack(
+                    [
+                        item.get("entityName"),
+                        item.get("entityKey"),
+                        item.get("entityType"),
+                        item.get("scope"),
+                        item.get("rulebase"),
+                        item.get("policyType"),
+                        item.get("xpath"),
+                        *(item.get("targets") or ()),
+                        *(item.get("searchValues") or ()),
+                    ]
+                ),
+            )
+        )
+    return rows
+
+
+def _like_pattern(token: str) -> str:
+    escaped = token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def session_fingerprint(directory: Path, journal_file: str) -> str:
+    """Stat signature that changes with every manifest, journal or file write.
+
+    Manifests are replaced atomically (new inode), the journal only grows and
+    every artifact/snapshot rename touches the directory itself.
+    """
+
+    parts: list[str] = []
+    for path in (directory / "manifest.json", directory / journal_file, directory):
+        try:
+            result = path.stat()
+        except FileNotFoundError:
+            parts.append("-")
+            continue
+        parts.append(f"{result.st_ino}:{result.st_size}:{result.st_mtime_ns}")
+    return "|".join(parts)
+
+
+class SessionIndex:
+    """Row-per-session SQLite cache kept next to the session directories."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                with self._lock:
+                    version = connection.execute("PRAGMA user_version").fetchone()[0]
+                    if version not in (0, INDEX_SCHEMA_VERSION):
+                        raise sqlite3.DatabaseError("unsupported index schema")
+                    connection.executescript(_SCHEMA)
+                    connection.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+                    connection.commit()
+                    if os.name != "nt":
+                        os.chmod(self.path, 0o600)
+                    self._ready = True
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with closing(self._open()) as connection:
+            with connection:
+                yield connection
+
+    def discard(self) -> None:
+        self._ready = False
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(f"{self.path}{suffix}")
+            except FileNotFoundError:
+                pass
+
+    def fingerprints(self) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        with self._connection() as connection:
+            return {
+                row[0]: (row[1], row[2])
+                for row in connection.execute(
+                    "SELECT session_id, fingerprint, error FROM sessions"
+                )
+            }
+
+    def patch_identity(self, session_id: str) -> Optional[tuple[str, str]]:
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT panorama_host, panorama_username FROM sessions "
+                "WHERE session_id = ? AND panorama_host IS NOT NULL",
+                (session_id,),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def store_summary(
+        self,
+        session_id: str,
+        fingerprint: str,
+        summary: Mapping[str, Any],
+        *,
+        panorama_host: str,
+        panorama_username: str,
+        touched_xpaths: Iterable[str],
+        snapshot_blobs: Iterable[str] = (),
+    ) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO sessions (session_id, fingerprint, error, operation_kind, "
+                "state, panorama_host, panorama_username, created_utc, summary) "
+                "VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "error = NULL, operation_kind = excluded.operation_kind, "
+                "state = excluded.state, panorama_host = excluded.panorama_host, "
+                "panorama_username = excluded.panorama_username, "
+                "created_utc = excluded.created_utc, summary = excluded.summary",
+                (
+                    session_id,
+                    fingerprint,
+                    summary.get("operation_kind"),
+                    summary.get("state"),
+                    panorama_host,
+                    panorama_username,
+                    utc_timestamp(summary.get("created_utc")),
+                    json.dumps(summary, ensure_ascii=False, sort_keys=True),
+                ),
+            )
+            connection.execute(
+                "DELETE FROM session_targets WHERE session_id = ?", (session_id,)
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO session_targets VALUES (?, ?)",
+                [(session_id, str(target)) for target in summary.get("targets") or ()],
+            )
+            connection.execute(
+                "DELETE FROM session_xpaths WHERE session_id = ?", (session_id,)
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO session_xpaths VALUES (?, ?)",
+                [(session_id, str(xpath)) for xpath in touched_xpaths],
+            )
+            connection.execute(
+                "DELETE FROM session_snapshots WHERE session_id = ?", (session_id,)
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO session_snapshots VALUES (?, ?)",
+                [(session_id, sha256) for sha256 in snapshot_blobs],
+            )
+
+    def store_error(self, session_id: str, fingerprint: str, message: str) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO sessions (session_id, fingerprint, error) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "error = excluded.error",
+                (session_id, fingerprint, message),
+            )
+
+    def touch(
+        self, session_id: str, fingerprint: str, *, updated_utc: Optional[str]
+    ) -> None:
+        """Record a journal append without re-reading the manifest."""
+
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT summary FROM sessions WHERE session_id = ? AND error IS NULL",
+                (session_id,),
+            ).fetchone()
+            if row is None or row[0] is None:
+                return
+            summary = json.loads(row[0])
+            if updated_utc:
+                summary["updated_utc"] = max(
+                    str(summary.get("updated_utc") or ""), updated_utc
+                )
+            connection.execute(
+                "UPDATE sessions SET fingerprint = ?, summary = ? WHERE session_id = ?",
+                (
+                    fingerprint,
+                    json.dumps(summary, ensure_ascii=False, sort_keys=True),
+                    session_id,
+                ),
+            )
+
+    def remove(self, session_ids: Iterable[str]) -> None:
+        identifiers = [(session_id,) for session_id in session_ids]
+        if not identifiers:
+            return
+        with self._connection() as connection:
+            for statement in _DELETE_SESSION_ROWS:
+                connection.executemany(statement, identifiers)
+
+    def query(
+        self,
+        *,
+        operation_kind: Optional[str] = None,
+        states: Iterable[str] = (),
+        panorama_host: Optional[str] = None,
+        panorama_username: Optional[str] = None,
+        target: Optional[str] = None,
+        touched_xpath: Optional[str] = None,
+        created_since: Optional[str] = None,
+        created_until: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """Summaries matching every given filter, newest first.
+
+        ``created_since`` is inclusive and ``created_until`` exclusive, both
+        in ``utc_timestamp`` form; ``before`` is the keyset cursor (the last
+        session id of the previous page).
+        """
+
+        clauses = ["error IS NULL", "summary IS NOT NULL"]
+        parameters: list[Any] = []
+        for column, value in (
+            ("operation_kind", operation_kind),
+            ("panorama_host", panorama_host),
+            ("panorama_username", panorama_username),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                parameters.append(value)
+        states = list(states)
+        if states:
+            clauses.append(f"state IN ({', '.join('?' for _ in states)})")
+            parameters.extend(states)
+        if target is not None:
+            clauses.append(
+                "session_id IN (SELECT session_id FROM session_targets WHERE target = ?)"
+            )
+            parameters.append(target)
+        if touched_xpath is not None:
+            clauses.append(
+                "session_id IN (SELECT session_id FROM session_xpaths WHERE xpath = ?)"
+            )
+            parameters.append(touched_xpath)
+        _page_clauses(
+            clauses,
+            parameters,
+            created_column="created_utc",
+            created_since=created_since,
+            created_until=created_until,
+            before=before,
+        )
+        # Clauses are literal fragments of this module with "?" placeholders;
+        # every filter value is bound as a parameter.
+        where = " AND ".join(clauses)
+        sql = f"SELECT summary FROM sessions WHERE {where} ORDER BY session_id DESC"  # nosec B608
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self._connection() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def snapshot_references(self) -> dict[str, int]:
+        """Number of indexed sessions referencing each snapshot blob."""
+
+        with self._connection() as connection:
+            return {
+                row[0]: row[1]
+                for row in connection.execute(
+                    "SELECT sha256, COUNT(*) FROM session_snapshots GROUP BY sha256"
+                )
+            }
+
+    def history_issues(self) -> list[dict[str, str]]:
+        with self._connection() as connection:
+            return [
+                {"sessionId": row[0], "message": row[1]}
+                for row in connection.execute(
+                    "SELECT session_id, history_error FROM sessions "
+                    "WHERE history_error IS NOT NULL ORDER BY session_id DESC"
+                )
+            ]
+
+    def history_page(
+        self,
+        *,
+        kind: Optional[str] = None,
+        states: Iterable[str] = (),
+        panorama_host: Optional[str] = None,
+        target: Optional[str] = None,
+        created_since: Optional[str] = None,
+        created_until: Optional[str] = None,
+        search: Sequence[str] = (),
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> tuple[list[tuple[dict[str, Any], Optional[int]]], int, int, Optional[int]]:
+        """One page of stored history records and the totals of the filter.
+
+        Returns ``(page, session_count, mutation_count, match_count)``.  Each
+        page entry carries the number of history items matching ``search``
+        (None without a search), as does ``match_count`` for the whole
+        filter.  Bounds and cursor work as in ``query``.
+        """
+
+        clauses = ["history IS NOT NULL"]
+        parameters: list[Any] = []
+        for column, value in (("history_kind", kind), ("history_host", panorama_host)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                parameters.append(value)
+        states = list(states)
+        if states:
+            clauses.append(f"history_state IN ({', '.join('?' for _ in states)})")
+            parameters.extend(states)
+        if target is not None:
+            clauses.append(
+                "session_id IN (SELECT session_id FROM history_targets WHERE target = ?)"
+            )
+            parameters.append(target)
+        _page_clauses(
+            clauses,
+            parameters,
+            created_column="history_created",
+            created_since=created_since,
+            created_until=created_until,
+        )
+        tokens = [token.lower() for token in search if token]
+        token_clause = " AND ".join("haystack LIKE ? ESCAPE '\\'" for _ in tokens)
+        token_parameters = [_like_pattern(token) for token in tokens]
+        if tokens:
+            clauses.append(
+                f"session_id IN (SELECT session_id FROM history_search WHERE {token_clause})"  # nosec B608
+            )
+            parameters.extend(token_parameters)
+        # As in query(): only literal fragments and "?" placeholders are
+        # joined into the statements below; values are bound as parameters.
+        where = " AND ".join(clauses)
+        page_clauses = list(clauses)
+        page_parameters = list(parameters)
+        if before is not None:
+            page_clauses.append("session_id < ?")
+            page_parameters.append(before)
+        page_where = " AND ".join(page_clauses)
+        sql = (
+            f"SELECT session_id, history FROM sessions WHERE {page_where} "  # nosec B608
+            "ORDER BY session_id DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            page_parameters.append(limit)
+        with self._connection() as connection:
+            rows = connection.execute(sql, page_parameters).fetchall()
+            session_count, mutation_count = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(history_mutations), 0) FROM sessions "  # nosec B608
+                f"WHERE {where}",
+                parameters,
+            ).fetchone()
+            matches: dict[str, int] = {}
+            match_count: Optional[int] = None
+            if tokens:
+                item_clause = f"item = 1 AND {token_clause}"
+                match_count = connection.execute(
+                    f"SELECT COUNT(*) FROM history_search WHERE {item_clause} "  # nosec B608
+                    f"AND session_id IN (SELECT session_id FROM sessions WHERE {where})",
+                    [*token_parameters, *parameters],
+                ).fetchone()[0]
+                identifiers = [row[0] for row in rows]
+                if identifiers:
+                    placeholders = ", ".join("?" for _ in identifiers)
+                    matches = {
+                        row[0]: row[1]
+                        for row in connection.execute(
+                            "SELECT session_id, COUNT(*) FROM history_search "  # nosec B608
+                            f"WHERE {item_clause} AND session_id IN ({placeholders}) "
+                            "GROUP BY session_id",
+                            [*token_parameters, *identifiers],
+                        )
+                    }
+        page = [
+            (json.loads(row[1]), matches.get(row[0], 0) if tokens else None)
+            for row in rows
+        ]
+        return page, session_count, mutation_count, match_count
+
+    def history_fingerprints(self) -> dict[str, Optional[str]]:
+        """Fingerprint of every stored history record or build error."""
+
+        with self._connection() as connection:
+            return {
+                row[0]: row[1]
+                for row in connection.execute(
+                    "SELECT session_id, history_fingerprint FROM sessions "
+                    "WHERE history IS NOT NULL OR history_error IS NOT NULL"
+                )
+            }
+
+    def history_record(self, session_id: str) -> tuple[Optional[str], Optional[str]]:
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT history, history_error FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    def store_history(
+        self,
+        session_id: str,
+        fingerprint: str,
+        *,
+        record: Optional[Mapping[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        record = record or {}
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO sessions (session_id, history_fingerprint, history, "
+                "history_error, history_kind, history_state, history_host, "
+                "history_created, history_mutations) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "history_fingerprint = excluded.history_fingerprint, "
+                "history = excluded.history, history_error = excluded.history_error, "
+                "history_kind = excluded.history_kind, "
+                "history_state = excluded.history_state, "
+                "history_host = excluded.history_host, "
+                "history_created = excluded.history_created, "
+                "history_mutations = excluded.history_mutations",
+                (
+                    session_id,
+                    fingerprint,
+                    json.dumps(record, ensure_ascii=False) if record else None,
+                    error,
+                    record.get("kind"),
+                    record.get("state"),
+                    record.get("panoramaHost"),
+                    utc_timestamp(record.get("createdAt")),
+                    int(record.get("mutationCount") or 0),
+                ),
+            )
+            connection.execute(
+                "DELETE FROM history_targets WHERE session_id = ?", (session_id,)
+            )
+            connection.execute(
+                "DELETE FROM history_search WHERE session_id = ?", (session_id,)
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO history_targets VALUES (?, ?)",
+                [(session_id, str(target)) for target in record.get("targets") or ()],
+            )
+            if record:
+                connection.executemany(
+                    "INSERT INTO history_search VALUES (?, ?, ?)",
+                    [
+                        (session_id, item, haystack)
+                        for item, haystack in _history_haystacks(record)
+                    ],
+                )
+
+
+def _page_clauses(
+    clauses: list[str],
+    parameters: list[Any],
+    *,
+    created_column: str,
+    created_since: Optional[str] = None,
+    created_until: Optional[str] = None,
+    before: Optional[str] = None,
+) -> None:
+    if created_since is not None:
+        clauses.append(f"{created_column} >= ?")
+        parameters.append(created_since)
+    if created_until is not None:
+        clauses.append(f"{created_column} < ?")
+        parameters.append(created_until)
+    if before is not None:
+        clauses.append("session_id < ?")
+        parameters.append(before)
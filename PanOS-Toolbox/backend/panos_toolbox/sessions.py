@@ -3,39 +3,111 @@
 from __future__ import annotations
 
 import getpass
+import gzip
 import hashlib
-import io
 import json
 import mimetypes
 import os
 import secrets
+import sqlite3
 import stat
 import subprocess
 import tempfile
+import time
 import re
 import shutil
 import zipfile
+import zlib
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
 from pathlib import Path, PurePosixPath
-from typing import Any, Callable, Iterable, Mapping, Optional
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Mapping, Optional
 
 from .errors import IntegrityError, SessionError, ToolboxError
 from .models import Mutation, PatchSet, SessionState, canonical_json, json_sha256, utc_now
 from .profile import PanoramaProfile
 from .platform_tools import windows_system_tool
+from .session_index import INDEX_FILE, SessionIndex, session_fingerprint
 from .profile_store import (
     default_toolbox_root,
     is_remote_data_root,
     legacy_toolbox_roots,
 )
-from .xmlutil import device_group_from_xpath, parse_xml, raw_sha256
+from .xmlutil import (
+    ConfigIndex,
+    device_group_from_xpath,
+    fingerprint_element,
+    parse_config_stream,
+    parse_xml,
+    project_config_delta,
+    raw_sha256,
+    xpath_literal,
+)
 
 
 SCHEMA_VERSION = 1
 JOURNAL_LOG_FILE = "journal/events.jsonl"
+JOURNAL_CHECKPOINT_FILE = "journal/head.json"
+JOURNAL_CHECKPOINT_INTERVAL = 128
+JOURNAL_GROUP_COMMIT_EVENTS = 32
+JOURNAL_GROUP_COMMIT_SECONDS = 0.25
+SNAPSHOT_BLOB_DIR = "snapshot-blobs"
+SNAPSHOT_PRUNE_GRACE_SECONDS = 3600.0
+# Evidence snapshots nothing reloads as a full tree; with delta snapshots
+# enabled they are captured as projections straight away.
+DELTA_CAPTURE_SNAPSHOT_LABELS = frozenset(
+    {
+        "pre_running",
+        "post_candidate",
+        "pre_push_running",
+        "external_verified_running",
+        "external_verified_candidate",
+    }
+)
+# Once a session reaches one of these states no stage reloads its working
+# snapshots, so the remaining full trees are compacted to projections.
+DELTA_COMPACTION_STATES = frozenset(
+    {
+        SessionState.COMMITTED,
+        SessionState.PUSHED,
+        SessionState.FAILED,
+        SessionState.CONFLICT,
+    }
+)
+BUNDLE_CHUNK_BYTES = 1024 * 1024
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass(frozen=True)
+class _JournalHead:
+    """Verified prefix of ``events.jsonl``: the chain up to byte ``offset``."""
+
+    identity: tuple[int, int]
+    offset: int
+    line_start: int
+    count: int
+    head_sha256: Optional[str]
+    updated_utc: Optional[str]
+
+    def state(self) -> dict[str, Any]:
+        return {
+            "journal_count": self.count,
+            "journal_head_sha256": self.head_sha256,
+            "updated_utc": self.updated_utc,
+        }
+
+
+@dataclass
+class _JournalGroup:
+    """Events appended inside ``journal_group_commit`` but not yet written."""
+
+    max_events: int
+    max_delay: float
+    lines: list[bytes] = field(default_factory=list)
+    started: float = 0.0
+    state: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass(frozen=True)
@@ -143,6 +215,47 @@ def _decode_envelope(path: Path) -> dict[str, Any]:
     return payload
 
 
+class _HashingWriter:
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        return self._handle.write(data)
+
+
+class _HashingReader:
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._handle.read(size)
+        self.digest.update(data)
+        return data
+
+
+
+class _ChunkSink:
+    """Write-only target without ``seek``/``tell``; ZipFile then streams."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 def _harden_directory(path: Path, *, enforce: bool) -> None:
     path.mkdir(parents=True, exist_ok=True)
     try:
@@ -280,8 +393,58 @@ _TRANSITIONS: dict[SessionState, set[SessionState]] = {
 }
 
 
+def _delta_context(
+    manifest: Mapping[str, Any], config: ET.Element
+) -> tuple[list[str], list[str]]:
+    """Return the XPaths and object names a delta snapshot must keep.
+
+    Besides the touched XPaths, restore planning looks up every object,
+    group and policy the cleanup inventory listed for a target, including
+    containing objects the PatchSet left untouched.
+    """
+
+    xpaths = [str(xpath) for xpath in manifest.get("touched_xpaths") or ()]
+    names: list[str] = []
+    device = config.find("./devices/entry[device-group]")
+    device_xpath = (
+        f"/config/devices/entry[@name={xpath_literal(device.get('name') or '')}]"
+        if device is not None
+        else None
+    )
+    for target in (manifest.get("inventory") or {}).values():
+        if not isinstance(target, dict):
+            continue
+        for record in target.get("objects") or ():
+            if not isinstance(record, dict):
+                continue
+            for item in (record, *(record.get("groups") or ()), *(record.get("policies") or ())):
+                if not isinstance(item, dict) or not item.get("name"):
+                    continue
+                if not item.get("rulebase") or not item.get("policy_type"):
+                    names.append(str(item["name"]))
+                    continue
+                location = str(item.get("location") or "")
+                if location == "shared":
+                    scope = "/config/shared"
+                elif device_xpath is not None and location:
+                    scope = f"{device_xpath}/device-group/entry[@name={xpath_literal(location)}]"
+                else:
+                    continue
+                xpaths.append(
+                    f"{scope}/{item['rulebase']}/{item['policy_type']}/rules/entry"
+                    f"[@name={xpath_literal(str(item['name']))}]"
+                )
+    return xpaths, names
+
+
 class SessionStore:
-    def __init__(self, root: Optional[Path] = None, *, enforce_acl: bool = True):
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        *,
+        enforce_acl: bool = True,
+        delta_snapshots: bool = False,
+    ):
         self._using_default_root = root is None
         candidate = (root or default_session_root()).expanduser()
         if is_remote_data_root(candidate):
@@ -294,10 +457,11 @@ class SessionStore:
         if is_remote_data_root(self.root):
             raise SessionError("Rozwiązana ścieżka magazynu sesji prowadzi na SMB.")
         self.enforce_acl = enforce_acl
-        self._journal_state_cache: dict[
-            str, tuple[tuple[int, int], dict[str, Any]]
-        ] = {}
+        self.delta_snapshots = delta_snapshots
+        self._journal_state_cache: dict[str, _JournalHead] = {}
+        self._journal_groups: dict[str, _JournalGroup] = {}
         _harden_directory(self.root, enforce=enforce_acl)
+        self.index = SessionIndex(self.root / INDEX_FILE)
         if self._using_default_root:
             self._migrate_legacy_sessions()
 
@@ -527,6 +691,17 @@ class SessionStore:
                 raise SessionError(
                     f"Sesja źródłowa nie zawiera snapshotu {label}."
                 )
+            if record.get("storage") == "blob":
+                # Content-addressed: the child references the same blob.
+                if not self._snapshot_blob(str(record.get("sha256") or "")).is_file():
+                    raise IntegrityError(
+                        f"Dziedziczony snapshot {label} nie istnieje w magazynie."
+                    )
+                inherited_snapshots[label] = {
+                    **dict(record),
+                    "inherited_from_session_id": inherit_from_session_id,
+                }
+                continue
             relative = str(record.get("file") or "")
             source = (inherited_directory / PurePosixPath(relative)).resolve()
             if (
@@ -596,51 +771,167 @@ class SessionStore:
         _atomic_write(
             self._directory(session_id) / "manifest.json", _encode_envelope(manifest)
         )
+        self._index_manifest(session_id, manifest)
 
-    def _read_journal_log(
-        self, session_id: str
-    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-        path = self._directory(session_id) / JOURNAL_LOG_FILE
-        events: list[dict[str, Any]] = []
-        previous: Optional[str] = None
+    @staticmethod
+    def _session_summary(manifest: Mapping[str, Any]) -> dict[str, Any]:
+        return {
+            key: manifest.get(key)
+            for key in (
+                "session_id",
+                "created_utc",
+                "updated_utc",
+                "state",
+                "operation_kind",
+                "targets",
+                "affected_device_groups",
+            )
+        }
+
+    def _index_manifest(
+        self,
+        session_id: str,
+        manifest: Mapping[str, Any],
+        *,
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        directory = self._directory(session_id)
+        if fingerprint is None:
+            fingerprint = session_fingerprint(directory, JOURNAL_LOG_FILE)
         try:
-            lines = path.read_text(encoding="utf-8").splitlines()
-        except (OSError, UnicodeError) as exc:
-            raise IntegrityError("Nie można odczytać dziennika JSONL sesji.") from exc
-        for line_number, line in enumerate(lines, start=1):
-            if not line.strip():
-                continue
-            try:
-                envelope = json.loads(line)
-            except json.JSONDecodeError as exc:
-                raise IntegrityError(
-                    f"Niepoprawny JSONL journalu w linii {line_number}."
-                ) from exc
-            payload = envelope.get("payload") if isinstance(envelope, dict) else None
-            if (
-                not isinstance(envelope, dict)
-                or envelope.get("schema_version") != SCHEMA_VERSION
-                or not isinstance(payload, dict)
-                or envelope.get("sha256") != json_sha256(payload)
-            ):
-                raise IntegrityError(
-                    f"Błędna integralność journalu w linii {line_number}."
+            identity = self.index.patch_identity(session_id)
+            if identity is None:
+                patch = _decode_envelope(directory / manifest["patchset_file"])
+                identity = (
+                    str(patch.get("panorama_host") or ""),
+                    str(patch.get("panorama_username") or ""),
                 )
-            expected_sequence = len(events) + 1
+            self.index.store_summary(
+                session_id,
+                fingerprint,
+                self._session_summary(manifest),
+                panorama_host=identity[0],
+                panorama_username=identity[1],
+                touched_xpaths=manifest.get("touched_xpaths") or (),
+                snapshot_blobs=(
+                    str(record.get("sha256"))
+                    for record in (manifest.get("snapshots") or {}).values()
+                    if isinstance(record, Mapping) and record.get("storage") == "blob"
+                ),
+            )
+        except (sqlite3.Error, OSError, ToolboxError, KeyError, TypeError):
+            # The row keeps its old fingerprint, so the next query re-reads
+            # this session from disk.
+            pass
+
+    @staticmethod
+    def _journal_line_payload(line: bytes, line_number: int) -> dict[str, Any]:
+        try:
+            envelope = json.loads(line)
+        except (UnicodeError, json.JSONDecodeError) as exc:
+            raise IntegrityError(
+                f"Niepoprawny JSONL journalu w linii {line_number}."
+            ) from exc
+        payload = envelope.get("payload") if isinstance(envelope, dict) else None
+        if (
+            not isinstance(envelope, dict)
+            or envelope.get("schema_version") != SCHEMA_VERSION
+            or not isinstance(payload, dict)
+            or envelope.get("sha256") != json_sha256(payload)
+        ):
+            raise IntegrityError(
+                f"Błędna integralność journalu w linii {line_number}."
+            )
+        return payload
+
+    def _scan_journal(
+        self,
+        data: bytes,
+        start: _JournalHead,
+        events: Optional[list[dict[str, Any]]] = None,
+    ) -> _JournalHead:
+        """Verify the chain in ``data``, which continues right after ``start``."""
+
+        count = start.count
+        previous = start.head_sha256
+        updated = start.updated_utc
+        line_start = start.line_start
+        position = 0
+        for raw in data.splitlines(keepends=True):
+            line_offset = start.offset + position
+            position += len(raw)
+            if not raw.strip():
+                continue
+            payload = self._journal_line_payload(raw, count + 1)
             if (
-                payload.get("sequence") != expected_sequence
+                payload.get("sequence") != count + 1
                 or payload.get("previous_sha256") != previous
             ):
                 raise IntegrityError("Łańcuch journalu sesji jest przerwany.")
+            count += 1
             previous = json_sha256(payload)
-            events.append(payload)
-        return events, {
-            "journal_count": len(events),
-            "journal_head_sha256": previous,
-            "updated_utc": (
-                events[-1].get("timestamp_utc") if events else None
-            ),
-        }
+            updated = payload.get("timestamp_utc")
+            line_start = line_offset
+            if events is not None:
+                events.append(payload)
+        return _JournalHead(
+            start.identity, start.offset + position, line_start, count, previous, updated
+        )
+
+    def _read_journal_log(
+        self, session_id: str
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Verify the complete hash chain from the first event."""
+
+        path = self._directory(session_id) / JOURNAL_LOG_FILE
+        try:
+            data = path.read_bytes()
+        except OSError as exc:
+            raise IntegrityError("Nie można odczytać dziennika JSONL sesji.") from exc
+        events: list[dict[str, Any]] = []
+        head = self._scan_journal(data, _JournalHead((0, 0), 0, 0, 0, None, None), events)
+        return events, head.state()
+
+    def _journal_checkpoint(
+        self, session_id: str, path: Path, identity: tuple[int, int], size: int
+    ) -> Optional[_JournalHead]:
+        """Adopt the stored head if it still describes the line it points at.
+
+        The checkpoint is trusted for everything before its line; ``verify``
+        still replays the whole chain.  Any mismatch falls back to a full scan.
+        """
+
+        checkpoint_path = self._directory(session_id) / JOURNAL_CHECKPOINT_FILE
+        if not checkpoint_path.exists():
+            return None
+        try:
+            record = _decode_envelope(checkpoint_path)
+            count = int(record["journal_count"])
+            offset = int(record["offset"])
+            line_start = int(record["line_start"])
+            if count < 1 or not 0 <= line_start < offset <= size:
+                return None
+            with path.open("rb") as handle:
+                handle.seek(line_start)
+                line = handle.read(offset - line_start)
+            if not line.endswith(b"\n"):
+                return None
+            payload = self._journal_line_payload(line, count)
+        except (OSError, KeyError, TypeError, ValueError, IntegrityError):
+            return None
+        if (
+            payload.get("sequence") != count
+            or json_sha256(payload) != record.get("journal_head_sha256")
+        ):
+            return None
+        return _JournalHead(
+            identity,
+            offset,
+            line_start,
+            count,
+            record["journal_head_sha256"],
+            payload.get("timestamp_utc"),
+        )
 
     def _journal_state(
         self,
@@ -648,8 +939,14 @@ class SessionStore:
         *,
         manifest: Mapping[str, Any],
     ) -> dict[str, Any]:
-        """Read the append-only JSONL head, falling back to legacy manifest fields."""
+        """Read the append-only JSONL head, falling back to legacy manifest fields.
+
+        Only bytes appended after the last verified head are read: the
+        in-process head while the file keeps its identity and has not
+        shrunk, otherwise the on-disk checkpoint, otherwise the whole log.
+        """
 
+        self.flush_journal(session_id)
         path = self._directory(session_id) / JOURNAL_LOG_FILE
         if not path.exists():
             return {
@@ -658,13 +955,22 @@ class SessionStore:
                 "updated_utc": manifest.get("updated_utc"),
             }
         stat_result = path.stat()
-        signature = (stat_result.st_size, stat_result.st_mtime_ns)
-        cached = self._journal_state_cache.get(session_id)
-        if cached is not None and cached[0] == signature:
-            state = dict(cached[1])
-        else:
-            _events, state = self._read_journal_log(session_id)
-            self._journal_state_cache[session_id] = (signature, dict(state))
+        identity = (stat_result.st_dev, stat_result.st_ino)
+        head = self._journal_state_cache.get(session_id)
+        if head is None or head.identity != identity or head.offset > stat_result.st_size:
+            head = self._journal_checkpoint(
+                session_id, path, identity, stat_result.st_size
+            ) or _JournalHead(identity, 0, 0, 0, None, None)
+        if head.offset < stat_result.st_size:
+            try:
+                with path.open("rb") as handle:
+                    handle.seek(head.offset)
+                    tail = handle.read()
+            except OSError as exc:
+                raise IntegrityError("Nie można odczytać dziennika JSONL sesji.") from exc
+            head = self._scan_journal(tail, head)
+        self._journal_state_cache[session_id] = head
+        state = head.state()
         count = int(state["journal_count"])
         digest = state.get("journal_head_sha256")
         manifest_count = int(manifest.get("journal_count", 0))
@@ -761,6 +1067,7 @@ class SessionStore:
 
         manifest = self.update(session_id, change)
         self.append_event(session_id, "STATE_CHANGED", {"state": new_state.value})
+        self.flush_journal(session_id)
         return manifest
 
     def force_terminal_state(
@@ -779,6 +1086,7 @@ class SessionStore:
 
         self.update(session_id, change)
         self.append_event(session_id, "TERMINAL_STATE", {"state": state.value, "detail": detail})
+        self.flush_journal(session_id)
 
     def record_recoverable_stage_failure(
         self,
@@ -824,14 +1132,95 @@ class SessionStore:
             "STAGE_FAILED_RECOVERABLE",
             {"state": stable_state.value, "detail": detail},
         )
+        self.flush_journal(session_id)
+
+    def _snapshot_blob(self, sha256: str) -> Path:
+        if not _SHA256_HEX.fullmatch(sha256):
+            raise IntegrityError("Niepoprawny adres snapshotu w magazynie blobów.")
+        return self.root / SNAPSHOT_BLOB_DIR / sha256[:2] / f"{sha256}.xml.gz"
+
+    def _store_snapshot_blob(self, config: ET.Element) -> tuple[str, int]:
+        """Stream ``config`` into the gzip blob store, deduplicated by SHA-256."""
+
+        blobs = self.root / SNAPSHOT_BLOB_DIR
+        if not blobs.is_dir():
+            _harden_directory(blobs, enforce=self.enforce_acl)
+        descriptor, temporary = tempfile.mkstemp(prefix=".snapshot-", dir=blobs)
+        try:
+            with os.fdopen(descriptor, "wb") as raw:
+                with gzip.GzipFile(
+                    fileobj=raw, mode="wb", compresslevel=6, mtime=0
+                ) as compressed:
+                    writer = _HashingWriter(compressed)  # type: ignore[arg-type]
+                    ET.ElementTree(config).write(writer, encoding="utf-8")  # type: ignore[arg-type]
+                raw.flush()
+                os.fsync(raw.fileno())
+            sha256 = writer.digest.hexdigest()
+            size = os.path.getsize(temporary)
+            destination = self._snapshot_blob(sha256)
+            destination.parent.mkdir(mode=0o700, exist_ok=True)
+            if destination.is_file() and destination.stat().st_size == size:
+                # Same content, same deterministic gzip stream: keep the stored
+                # blob and refresh its mtime so a concurrent prune spares it.
+                os.unlink(temporary)
+                os.utime(destination)
+            else:
+                os.replace(temporary, destination)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+        return sha256, size
+
+    def _snapshot_path(self, session_id: str, record: Mapping[str, Any]) -> Path:
+        if record.get("storage") == "blob":
+            return self._snapshot_blob(str(record.get("sha256") or ""))
+        directory = self._directory(session_id)
+        path = (directory / PurePosixPath(str(record.get("file") or ""))).resolve()
+        if directory not in path.parents:
+            raise SessionError("Snapshot wychodzi poza katalog sesji.")
+        return path
+
+    @contextmanager
+    def _open_snapshot(
+        self, session_id: str, record: Mapping[str, Any]
+    ) -> Iterator[_HashingReader]:
+        """Yield the uncompressed snapshot stream; the digest covers what is read."""
+
+        path = self._snapshot_path(session_id, record)
+        with path.open("rb") as raw:
+            if record.get("storage") == "blob":
+                with gzip.GzipFile(fileobj=raw, mode="rb") as handle:
+                    yield _HashingReader(handle)  # type: ignore[arg-type]
+            else:
+                yield _HashingReader(raw)
+
+    def _snapshot_sha256(self, session_id: str, record: Mapping[str, Any]) -> str:
+        with self._open_snapshot(session_id, record) as reader:
+            while reader.read(1024 * 1024):
+                pass
+            return reader.digest.hexdigest()
 
     def write_snapshot(self, session_id: str, label: str, config: ET.Element) -> dict[str, Any]:
         if not label.replace("_", "").isalnum():
             raise SessionError("Niepoprawna etykieta snapshotu.")
-        data = ET.tostring(config, encoding="utf-8")
-        relative = f"{label}.xml"
-        _atomic_write(self._directory(session_id) / relative, data)
-        record = {"file": relative, "sha256": raw_sha256(data), "written_utc": utc_now()}
+        self._directory(session_id)
+        if self.delta_snapshots and label in DELTA_CAPTURE_SNAPSHOT_LABELS:
+            record = self._store_delta_snapshot(
+                self.load_manifest(session_id, verify=False), label, config
+            )
+        else:
+            sha256, compressed_bytes = self._store_snapshot_blob(config)
+            record = {
+                "file": f"snapshots/{label}.xml.gz",
+                "storage": "blob",
+                "compression": "gzip",
+                "sha256": sha256,
+                "compressed_bytes": compressed_bytes,
+                "written_utc": utc_now(),
+            }
 
         def change(manifest: dict[str, Any]) -> None:
             manifest.setdefault("snapshots", {})[label] = record
@@ -839,27 +1228,141 @@ class SessionStore:
         self.update(session_id, change)
         return record
 
-    def load_snapshot(self, session_id: str, label: str) -> ET.Element:
+    def _store_delta_snapshot(
+        self, manifest: Mapping[str, Any], label: str, config: ET.Element
+    ) -> dict[str, Any]:
+        """Store the PatchSet-relevant projection of ``config`` as a blob.
+
+        The record keeps the semantic fingerprint of the full tree, i.e. the
+        same proof hash the engine compares live configurations against.
+        """
+
+        index = ConfigIndex(config)
+        xpaths, names = _delta_context(manifest, index.config)
+        projection = project_config_delta(index, xpaths, names=names)
+        sha256, compressed_bytes = self._store_snapshot_blob(projection)
+        return {
+            "file": f"snapshots/{label}.xml.gz",
+            "storage": "blob",
+            "compression": "gzip",
+            "sha256": sha256,
+            "compressed_bytes": compressed_bytes,
+            "written_utc": utc_now(),
+            "projection": "delta",
+            "source_semantic_sha256": fingerprint_element(index.config),
+        }
+
+    def compact_snapshots(self, session_id: str) -> dict[str, Any]:
+        """Replace every full snapshot of a finished session with its delta.
+
+        Unreadable snapshots are left as they are, so integrity verification
+        still reports them.  Blobs no longer referenced are removed by
+        :meth:`prune_snapshots`.
+        """
+
+        manifest = self.load_manifest(session_id, verify=False)
+        compacted: dict[str, dict[str, Any]] = {}
+        skipped: list[str] = []
+        for label, record in sorted((manifest.get("snapshots") or {}).items()):
+            if not isinstance(record, dict) or record.get("projection") == "delta":
+                continue
+            try:
+                config = self.load_snapshot(session_id, label)
+            except ToolboxError:
+                skipped.append(label)
+                continue
+            compacted[label] = {
+                **self._store_delta_snapshot(manifest, label, config),
+                "written_utc": record.get("written_utc"),
+                "compacted_utc": utc_now(),
+                "source_sha256": record.get("sha256"),
+                "source_compressed_bytes": record.get("compressed_bytes"),
+            }
+        if compacted:
+
+            def change(current: dict[str, Any]) -> None:
+                current.setdefault("snapshots", {}).update(compacted)
+
+            self.update(session_id, change)
+        result = {
+            "labels": sorted(compacted),
+            "skipped": skipped,
+            "bytes_before": sum(
+                int(record.get("source_compressed_bytes") or 0)
+                for record in compacted.values()
+            ),
+            "bytes_after": sum(
+                int(record["compressed_bytes"]) for record in compacted.values()
+            ),
+        }
+        if compacted or skipped:
+            self.append_event(session_id, "SNAPSHOTS_COMPACTED", result)
+            self.flush_journal(session_id)
+        return result
+
+    def compact_finished_session(self, session_id: str) -> Optional[dict[str, Any]]:
+        """Best-effort delta compaction once a session reached a final state.
+
+        Callers run it after the operation released its Panorama locks; a
+        failure is journaled and never turns the finished operation into an
+        error.  Returns the :meth:`compact_snapshots` result, or None when
+        nothing was attempted or compaction failed.
+        """
+
+        if not self.delta_snapshots:
+            return None
+        try:
+            state = SessionState(self.load_manifest(session_id, verify=False)["state"])
+            if state not in DELTA_COMPACTION_STATES:
+                return None
+            return self.compact_snapshots(session_id)
+        except Exception as exc:
+            try:
+                self.append_event(
+                    session_id,
+                    "SNAPSHOT_COMPACTION_FAILED",
+                    {"error": f"{type(exc).__name__}: {exc}"},
+                )
+                self.flush_journal(session_id)
+            except Exception:
+                pass  # the session stays valid with its full snapshots
+            return None
+
+    def load_snapshot(
+        self, session_id: str, label: str, *, allow_delta: bool = False
+    ) -> ET.Element:
         manifest = self.load_manifest(session_id)
         record = (manifest.get("snapshots") or {}).get(label)
         if not isinstance(record, dict):
             raise SessionError(f"Sesja nie zawiera snapshotu {label}.")
-        path = (self._directory(session_id) / str(record.get("file", ""))).resolve()
-        if self._directory(session_id) not in path.parents:
-            raise SessionError("Snapshot wychodzi poza katalog sesji.")
+        if record.get("projection") == "delta" and not allow_delta:
+            raise SessionError(
+                f"Snapshot {label} zawiera tylko dotknięte ścieżki, a nie pełną konfigurację."
+            )
         try:
-            return parse_xml(path.read_bytes())
-        except (OSError, ToolboxError) as exc:
+            with self._open_snapshot(session_id, record) as reader:
+                config = parse_config_stream(reader)  # type: ignore[arg-type]
+                while reader.read(1024 * 1024):
+                    pass
+        except (OSError, EOFError, zlib.error, ToolboxError) as exc:
             raise IntegrityError(f"Nie można odczytać snapshotu {label}.") from exc
+        if reader.digest.hexdigest() != record.get("sha256"):
+            raise IntegrityError(f"Błędna integralność snapshotu {label}.")
+        return config
 
     def append_event(
         self, session_id: str, event_type: str, details: Mapping[str, Any]
     ) -> dict[str, Any]:
-        path = self._ensure_journal_log(session_id)
-        journal_state = self._journal_state(
-            session_id,
-            manifest={"journal_count": 0, "journal_head_sha256": None},
-        )
+        group = self._journal_groups.get(session_id)
+        if group is not None and group.lines:
+            path = self._directory(session_id) / JOURNAL_LOG_FILE
+            journal_state = group.state
+        else:
+            path = self._ensure_journal_log(session_id)
+            journal_state = self._journal_state(
+                session_id,
+                manifest={"journal_count": 0, "journal_head_sha256": None},
+            )
         sequence = int(journal_state["journal_count"]) + 1
         payload = {
             "sequence": sequence,
@@ -868,7 +1371,6 @@ class SessionStore:
             "details": dict(details),
             "previous_sha256": journal_state.get("journal_head_sha256"),
         }
-        event_hash = json_sha256(payload)
         line = (
             json.dumps(
                 _envelope(payload),
@@ -878,27 +1380,131 @@ class SessionStore:
             ).encode("utf-8")
             + b"\n"
         )
+        state = {
+            "journal_count": sequence,
+            "journal_head_sha256": json_sha256(payload),
+            "updated_utc": payload["timestamp_utc"],
+        }
+        if group is None:
+            self._write_journal_lines(session_id, path, [line], state)
+            return payload
+        if not group.lines:
+            group.started = time.monotonic()
+        group.lines.append(line)
+        group.state = state
+        if (
+            len(group.lines) >= group.max_events
+            or time.monotonic() - group.started >= group.max_delay
+        ):
+            self.flush_journal(session_id)
+        return payload
+
+    def flush_journal(self, session_id: str) -> None:
+        """Make every event buffered by ``journal_group_commit`` durable."""
+
+        group = self._journal_groups.get(session_id)
+        if group is None or not group.lines:
+            return
+        lines, group.lines = group.lines, []
+        self._write_journal_lines(
+            session_id, self._directory(session_id) / JOURNAL_LOG_FILE, lines, group.state
+        )
+
+    @contextmanager
+    def journal_group_commit(
+        self,
+        session_id: str,
+        *,
+        max_events: int = JOURNAL_GROUP_COMMIT_EVENTS,
+        max_delay: float = JOURNAL_GROUP_COMMIT_SECONDS,
+    ) -> Iterator[Callable[[], None]]:
+        """Coalesce ``append_event`` writes into one write+fsync per group.
+
+        Events are buffered until ``max_events`` are pending or the oldest is
+        ``max_delay`` seconds old, and always before the journal head is read
+        (every manifest update), after a state change and when the block
+        ends.  The caller must invoke the yielded flush before any mutating
+        Panorama request so the journal never trails the appliance.
+        """
+
+        if max_events < 1 or max_delay < 0:
+            raise ValueError("max_events must be positive and max_delay non-negative")
+        if session_id in self._journal_groups:
+            yield lambda: self.flush_journal(session_id)
+            return
+        self._journal_groups[session_id] = _JournalGroup(max_events, max_delay)
+        try:
+            yield lambda: self.flush_journal(session_id)
+        finally:
+            try:
+                self.flush_journal(session_id)
+            finally:
+                self._journal_groups.pop(session_id, None)
+
+    def _write_journal_lines(
+        self,
+        session_id: str,
+        path: Path,
+        lines: list[bytes],
+        state: Mapping[str, Any],
+    ) -> None:
+        data = b"".join(lines)
+        previous_head = self._journal_state_cache.get(session_id)
         descriptor = os.open(path, os.O_WRONLY | os.O_APPEND, 0o600)
         try:
-            view = memoryview(line)
+            view = memoryview(data)
             while view:
                 written = os.write(descriptor, view)
                 if written <= 0:
                     raise OSError("Nie udało się dopisać journalu sesji.")
                 view = view[written:]
             os.fsync(descriptor)
+            stat_result = os.fstat(descriptor)
         finally:
             os.close(descriptor)
-        stat_result = path.stat()
-        self._journal_state_cache[session_id] = (
-            (stat_result.st_size, stat_result.st_mtime_ns),
-            {
-                "journal_count": sequence,
-                "journal_head_sha256": event_hash,
-                "updated_utc": payload["timestamp_utc"],
-            },
+        try:
+            self.index.touch(
+                session_id,
+                session_fingerprint(self._directory(session_id), JOURNAL_LOG_FILE),
+                updated_utc=state.get("updated_utc"),
+            )
+        except (sqlite3.Error, OSError):
+            pass  # a stale fingerprint makes the next query re-read the session
+        if (
+            previous_head is None
+            or previous_head.offset + len(data) != stat_result.st_size
+        ):
+            # Another writer appended concurrently; the next lookup re-reads
+            # the tail instead of trusting a guessed position.
+            self._journal_state_cache.pop(session_id, None)
+            return
+        head = _JournalHead(
+            previous_head.identity,
+            stat_result.st_size,
+            stat_result.st_size - len(lines[-1]),
+            int(state["journal_count"]),
+            state["journal_head_sha256"],
+            state["updated_utc"],
+        )
+        self._journal_state_cache[session_id] = head
+        if (
+            head.count // JOURNAL_CHECKPOINT_INTERVAL
+            > previous_head.count // JOURNAL_CHECKPOINT_INTERVAL
+        ):
+            self._write_journal_checkpoint(session_id, head)
+
+    def _write_journal_checkpoint(self, session_id: str, head: _JournalHead) -> None:
+        _atomic_write(
+            self._directory(session_id) / JOURNAL_CHECKPOINT_FILE,
+            _encode_envelope(
+                {
+                    "journal_count": head.count,
+                    "journal_head_sha256": head.head_sha256,
+                    "offset": head.offset,
+                    "line_start": head.line_start,
+                }
+            ),
         )
-        return payload
 
     def add_job(self, session_id: str, stage: str, job: Mapping[str, Any]) -> None:
         def change(manifest: dict[str, Any]) -> None:
@@ -1359,46 +1965,231 @@ class SessionStore:
             "indexIntegrity": "verified",
         }
 
-    def history_catalog(self) -> dict[str, Any]:
-        """Build an offline catalog; one corrupt session never hides the rest."""
+    def _refresh_history(self, session_ids: Optional[Iterable[str]] = None) -> None:
+        """Rebuild history records whose session directory changed.
 
-        sessions: list[dict[str, Any]] = []
-        issues: list[dict[str, str]] = []
-        for directory in sorted(self.root.glob("session-*"), reverse=True):
-            if not directory.is_dir():
+        Without ``session_ids`` every session is checked and records of
+        removed sessions are dropped; one corrupt session is stored as an
+        issue and never hides the rest.
+        """
+
+        stored = self.index.history_fingerprints()
+        if session_ids is None:
+            current = self._session_fingerprints()
+            self.index.remove(set(stored) - set(current))
+        else:
+            current = {
+                session_id: session_fingerprint(
+                    self._directory(session_id), JOURNAL_LOG_FILE
+                )
+                for session_id in session_ids
+            }
+        for session_id in sorted(current, reverse=True):
+            fingerprint = current[session_id]
+            if stored.get(session_id) == fingerprint:
                 continue
             try:
-                sessions.append(self._history_session(directory.name))
+                built = self._history_session(session_id)
             except (ToolboxError, OSError, ValueError, KeyError, TypeError) as exc:
-                issues.append(
-                    {
-                        "sessionId": directory.name,
-                        "message": str(exc) or exc.__class__.__name__,
-                    }
-                )
-        return {
+                message = str(exc) or exc.__class__.__name__
+                self.index.store_history(session_id, fingerprint, error=message)
+                continue
+            self.index.store_history(session_id, fingerprint, record=built)
+
+    def history_catalog(
+        self,
+        *,
+        kind: Optional[str] = None,
+        states: Iterable[str] = (),
+        panorama_host: Optional[str] = None,
+        target: Optional[str] = None,
+        created_since: Optional[str] = None,
+        created_until: Optional[str] = None,
+        search: Iterable[str] = (),
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Build an offline catalog; one corrupt session never hides the rest.
+
+        Records come from the session index and are rebuilt only for sessions
+        whose directory fingerprint moved since the record was stored.  The
+        filters, the ``search`` tokens and the keyset cursor ``before`` are
+        evaluated by the index (date bounds as in ``query_sessions``); counts
+        cover the whole filter, ``nextCursor`` continues after this page and
+        integrity issues are reported on the first page only.
+        """
+
+        if before is not None:
+            self._directory(before)
+        if limit is not None and limit < 1:
+            raise SessionError("Limit strony historii musi być dodatni.")
+        states = tuple(states)
+        tokens = tuple(token for token in search if token)
+
+        def run() -> tuple[Any, list[dict[str, str]]]:
+            self._refresh_history()
+            page = self.index.history_page(
+                kind=kind,
+                states=states,
+                panorama_host=panorama_host,
+                target=target,
+                created_since=created_since,
+                created_until=created_until,
+                search=tokens,
+                before=before,
+                limit=None if limit is None else limit + 1,
+            )
+            return page, self.index.history_issues() if before is None else []
+
+        (rows, session_count, mutation_count, match_count), issues = self._with_index(run)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1][0]["id"])
+        sessions: list[dict[str, Any]] = []
+        for record, matches in rows:
+            if matches is not None:
+                record["matchCount"] = matches
+            sessions.append(record)
+        catalog = {
             "generatedAt": utc_now(),
             "storage": str(self.root),
-            "sessionCount": len(sessions),
-            "mutationCount": sum(int(item.get("mutationCount") or 0) for item in sessions),
+            "sessionCount": session_count,
+            "mutationCount": mutation_count,
             "issues": issues,
             "sessions": sessions,
+            "nextCursor": next_cursor,
         }
+        if tokens:
+            catalog["matchCount"] = match_count
+        return catalog
+
+    def history_session(self, session_id: str) -> dict[str, Any]:
+        """Return the history record of one session from the index."""
+
+        def run() -> tuple[Optional[str], Optional[str]]:
+            self._refresh_history((session_id,))
+            return self.index.history_record(session_id)
+
+        if not self._directory(session_id).is_dir():
+            raise SessionError(f"Nie istnieje sesja {session_id}.")
+        record, error = self._with_index(run)
+        if record is None:
+            raise SessionError(error or f"Sesja {session_id} nie ma rekordu historii.")
+        return json.loads(record)
 
     def bundle_bytes(self, session_id: str) -> bytes:
         """Return an integrity-checked ZIP containing the complete session."""
 
-        self.verify(session_id)
+        return b"".join(self.iter_bundle(session_id))
+
+    def write_bundle(self, session_id: str, destination: BinaryIO) -> None:
+        """Stream the complete session ZIP into an open binary file."""
+
+        for chunk in self.iter_bundle(session_id):
+            destination.write(chunk)
+
+    def iter_bundle(
+        self, session_id: str, *, chunk_size: int = BUNDLE_CHUNK_BYTES
+    ) -> Iterator[bytes]:
+        """Yield the complete session ZIP incrementally with flat memory use.
+
+        The manifest, PatchSet and journal chain and the presence of every
+        registered file are checked before the first byte.  Backup, artifact
+        and snapshot hashes are checked while each entry is streamed; a
+        mismatch raises before the ZIP central directory is emitted, so a
+        partially sent archive never opens as a valid ZIP.
+        """
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        manifest = self.load_manifest(session_id, verify=False)
         directory = self._directory(session_id)
-        output = io.BytesIO()
-        with zipfile.ZipFile(
-            output, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6
-        ) as archive:
-            for path in sorted(directory.rglob("*")):
-                if not path.is_file() or path.name.startswith("."):
-                    continue
-                archive.write(path, arcname=f"{session_id}/{path.relative_to(directory)}")
-        return output.getvalue()
+        patch = _decode_envelope(directory / manifest["patchset_file"])
+        if json_sha256(patch) != manifest.get("patchset_sha256"):
+            raise IntegrityError("Błędna suma PatchSet.")
+        self.load_journal(session_id, manifest=manifest)
+
+        expected: dict[str, tuple[str, str]] = {}
+        for record in manifest.get("entity_backups", []):
+            expected[str(record["file"])] = (
+                str(record["sha256"]),
+                f"backupu {record.get('entity_key')}",
+            )
+        blobs: list[tuple[Path, str, str, str]] = []
+        for label, record in sorted((manifest.get("snapshots") or {}).items()):
+            if record.get("storage") == "blob":
+                path = self._snapshot_path(session_id, record)
+                if not path.is_file():
+                    raise IntegrityError(f"Błędna integralność snapshotu {label}.")
+                blobs.append(
+                    (path, str(record["file"]), str(record["sha256"]), f"snapshotu {label}")
+                )
+            else:
+                expected[str(record["file"])] = (
+                    str(record["sha256"]),
+                    f"snapshotu {label}",
+                )
+        for record in manifest.get("artifacts", []):
+            expected[str(record["file"])] = (
+                str(record["sha256"]),
+                f"artefaktu {record['file']}",
+            )
+
+        entries: list[tuple[Path, str, Optional[str], str, bool]] = []
+        for path in sorted(directory.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            relative = path.relative_to(directory).as_posix()
+            checksum, description = expected.pop(relative, (None, relative))
+            entries.append((path, relative, checksum, description, False))
+        if expected:
+            _relative, (_checksum, description) = sorted(expected.items())[0]
+            raise IntegrityError(f"Błędna integralność {description}.")
+        entries.extend(
+            (path, relative, checksum, description, True)
+            for path, relative, checksum, description in blobs
+        )
+        return self._bundle_chunks(session_id, entries, chunk_size)
+
+    @staticmethod
+    def _bundle_chunks(
+        session_id: str,
+        entries: list[tuple[Path, str, Optional[str], str, bool]],
+        chunk_size: int,
+    ) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for path, relative, checksum, description, gzipped in entries:
+                info = zipfile.ZipInfo.from_file(path, f"{session_id}/{relative}")
+                # Snapshot blobs are gzip already; deflating them again gains nothing.
+                info.compress_type = zipfile.ZIP_STORED if gzipped else zipfile.ZIP_DEFLATED
+                digest = hashlib.sha256()
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+                with path.open("rb") as source, archive.open(info, "w") as target:
+                    while True:
+                        chunk = source.read(chunk_size)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        if inflater is None:
+                            digest.update(chunk)
+                        else:
+                            pending = chunk
+                            while pending:
+                                digest.update(inflater.decompress(pending, chunk_size))
+                                pending = inflater.unconsumed_tail
+                        data = sink.drain()
+                        if data:
+                            yield data
+                if inflater is not None:
+                    digest.update(inflater.flush())
+                if checksum is not None and digest.hexdigest() != checksum:
+                    raise IntegrityError(f"Błędna integralność {description}.")
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
 
     def write_artifact(
         self, session_id: str, filename: str, content: str, *, kind: str
@@ -1441,6 +2232,7 @@ class SessionStore:
             ".log": "text/plain; charset=utf-8",
             ".csv": "text/csv; charset=utf-8",
             ".zip": "application/zip",
+            ".gz": "application/gzip",
         }
         return explicit.get(
             suffix,
@@ -1466,12 +2258,16 @@ class SessionStore:
             kind: str,
             sha256: Optional[str] = None,
             written_utc: Optional[str] = None,
+            path: Optional[Path] = None,
         ) -> None:
             if filename in seen:
                 return
             seen.add(filename)
-            path = (directory / PurePosixPath(filename)).resolve()
-            if directory not in path.parents or not path.is_file():
+            if path is None:
+                path = (directory / PurePosixPath(filename)).resolve()
+                if directory not in path.parents:
+                    path = None
+            if path is None or not path.is_file():
                 raise IntegrityError(
                     f"Zarejestrowany plik sesji nie istnieje: {filename}."
                 )
@@ -1503,6 +2299,7 @@ class SessionStore:
                 kind=f"snapshot:{label}",
                 sha256=record.get("sha256"),
                 written_utc=record.get("written_utc"),
+                path=self._snapshot_path(session_id, record),
             )
         for record in manifest.get("entity_backups") or ():
             include(
@@ -1544,8 +2341,11 @@ class SessionStore:
             if directory not in path.parents or raw_sha256(path.read_bytes()) != record["sha256"]:
                 raise IntegrityError(f"Błędna integralność backupu {record.get('entity_key')}.")
         for label, record in manifest.get("snapshots", {}).items():
-            path = (directory / record["file"]).resolve()
-            if directory not in path.parents or raw_sha256(path.read_bytes()) != record["sha256"]:
+            try:
+                digest = self._snapshot_sha256(session_id, record)
+            except (SessionError, OSError, EOFError, zlib.error) as exc:
+                raise IntegrityError(f"Błędna integralność snapshotu {label}.") from exc
+            if digest != record["sha256"]:
                 raise IntegrityError(f"Błędna integralność snapshotu {label}.")
         for record in manifest.get("artifacts", []):
             path = (directory / record["file"]).resolve()
@@ -1553,40 +2353,160 @@ class SessionStore:
                 raise IntegrityError(f"Błędna integralność artefaktu {record['file']}.")
         self.load_journal(session_id, manifest=manifest)
 
-    def _list_sessions(self, *, strict: bool) -> list[dict[str, Any]]:
-        result: list[dict[str, Any]] = []
-        for directory in sorted(self.root.glob("session-*"), reverse=True):
+    def _session_fingerprints(self) -> dict[str, str]:
+        return {
+            directory.name: session_fingerprint(directory, JOURNAL_LOG_FILE)
+            for directory in self.root.glob("session-*")
+            if directory.is_dir()
+        }
+
+    def _with_index(self, operation: Callable[[], Any]) -> Any:
+        try:
+            return operation()
+        except sqlite3.OperationalError as exc:
+            raise SessionError(f"Indeks sesji jest niedostępny: {exc}.") from exc
+        except sqlite3.DatabaseError:
+            # Only a cache: drop the damaged file and rebuild from sessions.
+            self.index.discard()
+            try:
+                return operation()
+            except sqlite3.Error as exc:
+                raise SessionError(
+                    f"Nie można odbudować indeksu sesji {self.index.path}: {exc}."
+                ) from exc
+
+    def _refresh_index(self, *, strict: bool) -> None:
+        """Re-read sessions whose directory changed since they were indexed.
+
+        A row written through by this store is trusted as long as the
+        fingerprint matches; callers that act on a session (restore history,
+        apply) still load and verify its manifest themselves.
+        """
+
+        current = self._session_fingerprints()
+        indexed = self.index.fingerprints()
+        self.index.remove(set(indexed) - set(current))
+        for session_id in sorted(current, reverse=True):
+            fingerprint = current[session_id]
+            stored_fingerprint, error = indexed.get(session_id, (None, None))
+            if stored_fingerprint == fingerprint and (error is None or not strict):
+                continue
             try:
-                manifest = self.load_manifest(directory.name)
-            except (SessionError, OSError):
+                manifest = self.load_manifest(session_id)
+            except (SessionError, OSError) as exc:
                 if strict:
                     raise
+                self.index.store_error(
+                    session_id, fingerprint, str(exc) or exc.__class__.__name__
+                )
                 continue
-            result.append(
-                {
-                    key: manifest.get(key)
-                    for key in (
-                        "session_id",
-                        "created_utc",
-                        "updated_utc",
-                        "state",
-                        "operation_kind",
-                        "targets",
-                        "affected_device_groups",
-                    )
-                }
+            self._index_manifest(session_id, manifest, fingerprint=fingerprint)
+
+    def query_sessions(
+        self,
+        *,
+        strict: bool = False,
+        operation_kind: Optional[str] = None,
+        states: Iterable[str] = (),
+        panorama_host: Optional[str] = None,
+        panorama_username: Optional[str] = None,
+        target: Optional[str] = None,
+        touched_xpath: Optional[str] = None,
+        created_since: Optional[str] = None,
+        created_until: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """Filter session summaries through the index, newest first.
+
+        ``panorama_host``/``panorama_username`` match the PatchSet identity.
+        ``created_since`` (inclusive) and ``created_until`` (exclusive) take
+        ``utc_timestamp`` values; ``before`` is the last session id of the
+        previous page.  With ``strict`` a session that cannot be read raises
+        instead of being omitted.
+        """
+
+        if before is not None:
+            self._directory(before)
+        states = tuple(states)
+
+        def run() -> list[dict[str, Any]]:
+            self._refresh_index(strict=strict)
+            return self.index.query(
+                operation_kind=operation_kind,
+                states=states,
+                panorama_host=panorama_host,
+                panorama_username=panorama_username,
+                target=target,
+                touched_xpath=touched_xpath,
+                created_since=created_since,
+                created_until=created_until,
+                before=before,
+                limit=limit,
             )
-        return result
+
+        return self._with_index(run)
 
     def list_sessions(self) -> list[dict[str, Any]]:
         """Best-effort list for the GUI; corrupt entries are omitted."""
 
-        return self._list_sessions(strict=False)
+        return self.query_sessions()
 
     def list_sessions_strict(self) -> list[dict[str, Any]]:
         """Integrity-strict enumeration used by restore safety decisions."""
 
-        return self._list_sessions(strict=True)
+        return self.query_sessions(strict=True)
+
+    def snapshot_references(self) -> dict[str, int]:
+        """Count the sessions that reference each content-addressed snapshot."""
+
+        def run() -> dict[str, int]:
+            self._refresh_index(strict=True)
+            return self.index.snapshot_references()
+
+        return self._with_index(run)
+
+    def prune_snapshots(
+        self, *, grace_seconds: float = SNAPSHOT_PRUNE_GRACE_SECONDS
+    ) -> dict[str, Any]:
+        """Delete snapshot blobs that no session references any more.
+
+        Every session must be readable, because an unreadable manifest may
+        still reference a blob.  Blobs younger than ``grace_seconds`` are kept:
+        ``write_snapshot`` stores the blob before the manifest records it.
+        """
+
+        if grace_seconds < 0:
+            raise ValueError("grace_seconds must be non-negative")
+        references = self.snapshot_references()
+        cutoff = time.time() - grace_seconds
+        blobs = self.root / SNAPSHOT_BLOB_DIR
+        removed: list[str] = []
+        freed = 0
+        for path in sorted(blobs.glob("*/*.xml.gz")):
+            sha256 = path.name[: -len(".xml.gz")]
+            if references.get(sha256):
+                continue
+            try:
+                result = path.stat()
+                if result.st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed.append(sha256)
+            freed += result.st_size
+        for path in blobs.glob(".snapshot-*"):
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+        return {
+            "removed": removed,
+            "freed_bytes": freed,
+            "referenced": len(references),
+        }
 
     @staticmethod
     def manifest_revision(manifest: Mapping[str, Any]) -> tuple[Any, ...]:
@@ -1656,16 +2576,20 @@ class SessionStore:
         self, host: str, username: str
     ) -> tuple[AppliedCleanup, ...]:
         history: list[AppliedCleanup] = []
-        for item in self.list_sessions_strict():
-            session_id = str(item.get("session_id") or "")
-            if not session_id or item.get("operation_kind") != "cleanup":
-                continue
-            if item.get("state") not in {
+        for item in self.query_sessions(
+            strict=True,
+            operation_kind="cleanup",
+            states=(
                 SessionState.CANDIDATE_APPLIED.value,
                 SessionState.PARTIAL.value,
                 SessionState.COMMITTED.value,
                 SessionState.PUSHED.value,
-            }:
+            ),
+            panorama_host=host,
+            panorama_username=username,
+        ):
+            session_id = str(item.get("session_id") or "")
+            if not session_id:
                 continue
             cleanup = self.load_applied_cleanup(session_id)
             if (
@@ -1689,7 +2613,7 @@ class SessionStore:
                 )
 
     def find_by_target(self, target: str) -> list[dict[str, Any]]:
-        return [item for item in self.list_sessions() if target in (item.get("targets") or [])]
+        return self.query_sessions(target=target)
 
     def resolve_download(self, session_id: str, filename: str) -> Path:
         relative = PurePosixPath(filename)
@@ -1712,6 +2636,25 @@ class SessionStore:
         allowed.update(record["file"] for record in manifest.get("entity_backups", []))
         if filename not in allowed:
             raise SessionError("Artefakt nie jest zarejestrowany w manifeście sesji.")
+        snapshot = next(
+            (
+                record
+                for record in manifest.get("snapshots", {}).values()
+                if record.get("file") == filename
+            ),
+            None,
+        )
+        if snapshot is not None:
+            path = self._snapshot_path(session_id, snapshot)
+            if not path.is_file():
+                raise SessionError("Snapshot nie istnieje w magazynie sesji.")
+            try:
+                digest = self._snapshot_sha256(session_id, snapshot)
+            except (OSError, EOFError, zlib.error) as exc:
+                raise IntegrityError(f"Błędna integralność artefaktu {filename}.") from exc
+            if digest != snapshot.get("sha256"):
+                raise IntegrityError(f"Błędna integralność artefaktu {filename}.")
+            return path
         path = (self._directory(session_id) / relative).resolve()
         if self._directory(session_id) not in path.parents or not path.is_file():
             raise SessionError("Artefakt nie istnieje lub wychodzi poza sesję.")
@@ -1727,7 +2670,6 @@ class SessionStore:
             (
                 record.get("sha256")
                 for record in (
-                    *manifest.get("snapshots", {}).values(),
                     *manifest.get("artifacts", []),
                     *manifest.get("entity_backups", []),
                 )
@@ -0,0 +1,218 @@
+"""Persistent, size-bounded cache of proof-matched running/candidate trees.
+
+``PanoramaReadClient.fetch_config_pair_coherent`` already reuses in-memory
+trees only behind an exact native change-summary proof.  This store extends
+that reuse across reconnects and processes: a coherent pair is written as two
+gzip-compressed XML blobs keyed by host, account and proof hash, each
+protected by the SHA-256 of its uncompressed XML.  The account is part of the
+key because an RBAC-limited admin receives a trimmed configuration under the
+same change-summary proof; sharing that tree with a fuller-privilege account
+would hide objects from its plans.  Entries honour the same maximum age as the
+in-memory cache and any local mutation or commit discards every entry for the
+host (every account), so a persisted tree is never trusted on proof alone.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+import secrets
+import shutil
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+from .errors import SessionError, ToolboxError
+from .profile_store import default_toolbox_root, is_remote_data_root
+from .sessions import (
+    _HashingReader,
+    _HashingWriter,
+    _atomic_write,
+    _decode_envelope,
+    _encode_envelope,
+    _harden_directory,
+)
+from .xmlutil import parse_config_stream
+
+
+DEFAULT_SNAPSHOT_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+ENTRY_FILE = "entry.json"
+_PROOF = re.compile(r"^[0-9a-f]{64}$")
+_KINDS = ("running", "candidate")
+
+
+def default_snapshot_cache_root() -> Path:
+    return default_toolbox_root() / "snapshot-cache"
+
+
+class SnapshotCache:
+    """Disk-backed LRU of compressed configuration pairs for one Toolbox root."""
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        *,
+        max_bytes: int = DEFAULT_SNAPSHOT_CACHE_BYTES,
+        enforce_acl: bool = True,
+    ) -> None:
+        candidate = (root or default_snapshot_cache_root()).expanduser()
+        if is_remote_data_root(candidate):
+            raise SessionError(
+                "Cache snapshotów wskazuje udział sieciowy/SMB; pełne configi "
+                "muszą pozostać w lokalnym katalogu Toolbox."
+            )
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.root = candidate.resolve()
+        self.max_bytes = max_bytes
+        self.enforce_acl = enforce_acl
+        _harden_directory(self.root, enforce=enforce_acl)
+
+    @staticmethod
+    def _host_key(host: str) -> str:
+        return hashlib.sha256(host.encode("utf-8")).hexdigest()[:20]
+
+    def _entry_directory(self, host: str, username: str, proof_sha256: str) -> Path:
+        if not _PROOF.fullmatch(proof_sha256):
+            raise ValueError("proof_sha256 must be a SHA-256 hex digest")
+        return self.root / self._host_key(host) / self._host_key(username) / proof_sha256
+
+    def store(
+        self,
+        host: str,
+        username: str,
+        proof_sha256: str,
+        running: ET.Element,
+        candidate: ET.Element,
+    ) -> dict[str, Any]:
+        """Persist one coherent pair and evict least-recently-used entries."""
+
+        destination = self._entry_directory(host, username, proof_sha256)
+        account_directory = destination.parent
+        _harden_directory(account_directory.parent, enforce=self.enforce_acl)
+        _harden_directory(account_directory, enforce=self.enforce_acl)
+        temporary = account_directory / f".{proof_sha256}.{secrets.token_hex(4)}"
+        try:
+            temporary.mkdir(mode=0o700)
+            files: dict[str, dict[str, Any]] = {}
+            for kind, config in zip(_KINDS, (running, candidate)):
+                path = temporary / f"{kind}.xml.gz"
+                with path.open("wb") as raw, gzip.GzipFile(
+                    fileobj=raw, mode="wb", compresslevel=6, mtime=0
+                ) as compressed:
+                    writer = _HashingWriter(compressed)  # type: ignore[arg-type]
+                    ET.ElementTree(config).write(writer, encoding="utf-8")  # type: ignore[arg-type]
+                    compressed.flush()
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                files[kind] = {
+                    "file": path.name,
+                    "sha256": writer.digest.hexdigest(),
+                    "compressed_bytes": path.stat().st_size,
+                }
+            record = {
+                "host": host,
+                "username": username,
+                "proof_sha256": proof_sha256,
+                "written_epoch": time.time(),
+                "files": files,
+            }
+            _atomic_write(temporary / ENTRY_FILE, _encode_envelope(record))
+            shutil.rmtree(destination, ignore_errors=True)
+            os.replace(temporary, destination)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        self._touch(destination / ENTRY_FILE)
+        self._evict()
+        return record
+
+    def load(
+        self,
+        host: str,
+        username: str,
+        proof_sha256: str,
+        *,
+        max_age_seconds: float,
+    ) -> Optional[tuple[ET.Element, ET.Element]]:
+        """Return a verified pair, or ``None`` for a miss, expiry or corruption."""
+
+        directory = self._entry_directory(host, username, proof_sha256)
+        entry_path = directory / ENTRY_FILE
+        if not entry_path.is_file():
+            return None
+        try:
+            record = _decode_envelope(entry_path)
+            age = time.time() - float(record["written_epoch"])
+            if (
+                record.get("host") != host
+                or record.get("username") != username
+                or record.get("proof_sha256") != proof_sha256
+                or not 0 <= age <= max_age_seconds
+            ):
+                shutil.rmtree(directory, ignore_errors=True)
+                return None
+            trees: list[ET.Element] = []
+            for kind in _KINDS:
+                item = record["files"][kind]
+                path = directory / f"{kind}.xml.gz"
+                if item.get("file") != path.name:
+                    raise SessionError(f"Niepoprawny wpis cache snapshotu {kind}.")
+                with gzip.open(path, "rb") as handle:
+                    reader = _HashingReader(handle)  # type: ignore[arg-type]
+                    config = parse_config_stream(reader)  # type: ignore[arg-type]
+                if reader.digest.hexdigest() != item.get("sha256"):
+                    raise SessionError(f"Błędna integralność cache snapshotu {kind}.")
+                trees.append(config)
+        except (OSError, EOFError, zlib.error, KeyError, TypeError, ValueError, ToolboxError):
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        self._touch(entry_path)
+        return trees[0], trees[1]
+
+    def discard_host(self, host: str) -> None:
+        """Forget every persisted pair after a local mutation or commit."""
+
+        directory = self.root / self._host_key(host)
+        if directory.exists():
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _touch(self, entry_path: Path) -> None:
+        # The entry file's mtime is the LRU clock; bumping it is cheaper than
+        # rewriting the integrity envelope.  Coarse filesystem timestamps must
+        # still order two hits within one tick, hence the strict increment.
+        newest = max((used for used, _size, _directory in self._entries()), default=0)
+        stamp = max(time.time_ns(), newest + 1)
+        try:
+            os.utime(entry_path, ns=(stamp, stamp))
+        except OSError:
+            pass
+
+    def _entries(self) -> list[tuple[int, int, Path]]:
+        entries: list[tuple[int, int, Path]] = []
+        for entry_path in self.root.glob(f"*/*/*/{ENTRY_FILE}"):
+            directory = entry_path.parent
+            try:
+                size = sum(
+                    path.stat().st_size for path in directory.iterdir() if path.is_file()
+                )
+                entries.append((entry_path.stat().st_mtime_ns, size, directory))
+            except OSError:
+                continue
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _used, size, _directory in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda item: item[0])
+        total = sum(size for _used, size, _directory in entries)
+        for _used, size, directory in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
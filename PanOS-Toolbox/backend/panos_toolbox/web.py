@@ -8,14 +8,14 @@ import secrets
 import threading
 import time
 import webbrowser
-from dataclasses import asdict, replace
-from datetime import datetime, timezone
-from pathlib import Path
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path, PurePosixPath
 from typing import Any, Iterable, Optional
 from urllib.parse import urlsplit
 
 from .ad_groups import generate_ad_group_definition
-from .client import PanoramaReadClient
+from .client import MAX_MULTI_CONFIG_OPERATIONS, PanoramaReadClient
 from .diffing import compare_configs
 from .doctor import run_doctor
 from .engine import (
@@ -50,7 +50,9 @@ from .service import (
     plan_cleanup_session,
     plan_restore_session,
 )
+from .session_index import utc_timestamp
 from .sessions import SessionStore
+from .snapshot_cache import SnapshotCache
 from .xmlutil import device_group_from_xpath
 
 
@@ -232,6 +234,145 @@ def _wire_session(
     }
 
 
+MAX_PAGE_SIZE = 1000
+
+# Wire fields of a session that the index summary already carries; a list
+# projected onto these is served without loading any manifest.
+_SUMMARY_FIELDS = {
+    "id": lambda summary: summary["session_id"],
+    "kind": lambda summary: summary.get("operation_kind"),
+    "state": lambda summary: summary.get("state"),
+    "createdAt": lambda summary: summary.get("created_utc"),
+    "updatedAt": lambda summary: summary.get("updated_utc"),
+    "targets": lambda summary: list(summary.get("targets") or ()),
+    "itemCount": lambda summary: len(summary.get("targets") or ()),
+    "affectedDeviceGroups": lambda summary: list(
+        summary.get("affected_device_groups") or ()
+    ),
+}
+
+
+def _time_bound(value: Optional[str], name: str, *, end: bool) -> Optional[str]:
+    if not value:
+        return None
+    moment = utc_timestamp(value)
+    if moment is None:
+        raise InputError(f"{name} musi być datą lub czasem ISO 8601.")
+    if end:
+        # ``until`` is inclusive; a bare date covers the whole day.
+        step = timedelta(days=1) if len(value.strip()) == 10 else timedelta(microseconds=1)
+        moment = (datetime.fromisoformat(moment) + step).isoformat(timespec="microseconds")
+    return moment
+
+
+def _page_query(args) -> dict[str, Any]:
+    """Paging and filters shared by the session list and the history catalog.
+
+    Without ``limit`` the whole filtered list is returned, as before paging
+    existed; only a client that asks for a page gets one and a cursor.
+    """
+
+    limit: Optional[int] = None
+    if "limit" in args:
+        try:
+            limit = int(args["limit"])
+        except ValueError as exc:
+            raise InputError("limit musi być liczbą całkowitą.") from exc
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise InputError(f"limit musi mieścić się w zakresie 1–{MAX_PAGE_SIZE}.")
+    return {
+        "limit": limit,
+        "before": args.get("cursor") or None,
+        "states": tuple(
+            state
+            for value in args.getlist("state")
+            for state in value.split(",")
+            if state
+        ),
+        "panorama_host": args.get("host") or None,
+        "target": args.get("target") or None,
+        "created_since": _time_bound(args.get("since"), "since", end=False),
+        "created_until": _time_bound(args.get("until"), "until", end=True),
+    }
+
+
+def _requested_fields(args) -> Optional[set[str]]:
+    fields = {
+        field.strip()
+        for value in args.getlist("fields")
+        for field in value.split(",")
+        if field.strip()
+    }
+    return fields | {"id"} if fields else None
+
+
+def _project(record: dict[str, Any], fields: Optional[set[str]]) -> dict[str, Any]:
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields}
+
+
+@dataclass(frozen=True)
+class _PlanComponents:
+    """Mutations of one PatchSet grouped by atomic component and by cause.
+
+    Child plans are cut from the parent along the component IDs computed by
+    the cleaner adapter, so selections and exclusions only need these two
+    lookups instead of rescanning every mutation for every target.
+    """
+
+    patch: PatchSet
+    by_component: dict[str, tuple[Mutation, ...]]
+    by_cause: dict[str, tuple[Mutation, ...]]
+    position: dict[str, int]
+
+    @classmethod
+    def of(cls, patch: PatchSet) -> "_PlanComponents":
+        by_component: dict[str, list[Mutation]] = {}
+        by_cause: dict[str, list[Mutation]] = {}
+        position: dict[str, int] = {}
+        for index, mutation in enumerate(patch.mutations):
+            position[mutation.mutation_id] = index
+            by_component.setdefault(mutation.component_id, []).append(mutation)
+            for cause in dict.fromkeys(mutation.causes):
+                by_cause.setdefault(cause, []).append(mutation)
+        return cls(
+            patch,
+            {key: tuple(value) for key, value in by_component.items()},
+            {key: tuple(value) for key, value in by_cause.items()},
+            position,
+        )
+
+    def components_of(self, targets: Iterable[str]) -> set[str]:
+        return {
+            mutation.component_id
+            for target in targets
+            for mutation in self.by_cause.get(target, ())
+        }
+
+    def causes_of(self, component_ids: Iterable[str]) -> set[str]:
+        return {
+            cause
+            for component_id in component_ids
+            for mutation in self.by_component.get(component_id, ())
+            for cause in mutation.causes
+        }
+
+    def mutations_of(self, component_ids: Iterable[str]) -> tuple[Mutation, ...]:
+        """Mutations of the given components in the parent's execution order."""
+
+        return tuple(
+            sorted(
+                (
+                    mutation
+                    for component_id in set(component_ids)
+                    for mutation in self.by_component.get(component_id, ())
+                ),
+                key=lambda mutation: self.position[mutation.mutation_id],
+            )
+        )
+
+
 def _wire_cleanup_plan(
     store: SessionStore, session_id: str, *, verify: bool = True
 ) -> dict[str, Any]:
@@ -255,7 +396,7 @@ def _wire_cleanup_plan(
         or manifest.get("targets")
         or []
     )
-    processed = {cause for mutation in patch.mutations for cause in mutation.causes}
+    components = _PlanComponents.of(patch)
     rule_hits: dict[str, dict[str, Any]] = {}
     for record in (manifest.get("last_hit") or {}).get("records", []):
         rule = record["rule"]
@@ -366,10 +507,10 @@ def _wire_cleanup_plan(
             else "blocked"
             if inventory.get("blocked_reasons")
             else "process"
-            if target in processed
+            if target in components.by_cause
             else "not-found"
         )
-        related = [mutation for mutation in patch.mutations if target in mutation.causes]
+        related = components.by_cause.get(target, ())
         entities = [wire_entity(record) for record in inventory.get("entities") or ()]
         reference_by_id: dict[str, dict[str, Any]] = {}
         for entity in entities:
@@ -506,6 +647,7 @@ def _cleanup_exclusion_closure(
     targets: Iterable[str] = (),
     *,
     component_ids: Iterable[str] = (),
+    components: Optional[_PlanComponents] = None,
 ) -> tuple[tuple[Any, ...], tuple[str, ...], tuple[str, ...]]:
     """Remove every atomically connected component for the excluded targets.
 
@@ -516,30 +658,17 @@ def _cleanup_exclusion_closure(
     cannot still retain a mutation in the executable child plan.
     """
 
+    index = components or _PlanComponents.of(patch)
     impacted = {str(target) for target in targets}
     removed_components = {str(component_id) for component_id in component_ids}
-    impacted.update(
-        cause
-        for mutation in patch.mutations
-        if mutation.component_id in removed_components
-        for cause in mutation.causes
-    )
+    impacted.update(index.causes_of(removed_components))
     # The PatchSet already contains connected-component IDs.  Do not perform
     # another cause-based transitive walk here: it made a later exclusion of
     # one row consume unrelated components that happened to share a target
     # label.  A target removes only its own component; a caller that truly
     # wants a larger closure sends explicit component IDs from the inspector.
-    removed_components.update(
-        mutation.component_id
-        for mutation in patch.mutations
-        if impacted.intersection(mutation.causes)
-    )
-    impacted.update(
-        cause
-        for mutation in patch.mutations
-        if mutation.component_id in removed_components
-        for cause in mutation.causes
-    )
+    removed_components.update(index.components_of(impacted))
+    impacted.update(index.causes_of(removed_components))
     remaining = tuple(
         mutation
         for mutation in patch.mutations
@@ -560,6 +689,7 @@ def _create_cleanup_child_plan(
     excluded_targets: Iterable[str] = (),
     exclusion_impacted_targets: Iterable[str] = (),
     excluded_component_ids: Iterable[str] = (),
+    components: Optional[_PlanComponents] = None,
 ) -> str:
     # This is a local, read-only transformation.  The manifest envelope and
     # PatchSet checksum are enough here; full snapshot/entity verification is
@@ -567,7 +697,9 @@ def _create_cleanup_child_plan(
     parent_manifest = store.load_manifest(parent_id, verify=False)
     if parent_manifest["state"] != SessionState.PLANNED.value:
         raise InputError("Podzbiór można wydzielić tylko z planu PLANNED.")
-    parent_patch = store.load_patchset(parent_id)
+    if components is None:
+        components = _PlanComponents.of(store.load_patchset(parent_id))
+    parent_patch = components.patch
     if (
         parent_patch.panorama_host != client.profile.host
         or parent_patch.panorama_username != client.profile.username
@@ -582,11 +714,7 @@ def _create_cleanup_child_plan(
     if not mutations and not allow_empty:
         raise InputError("Wybrany podzbiór nie zawiera bezpiecznych mutacji.")
     selected_components = {mutation.component_id for mutation in mutations}
-    complete = tuple(
-        mutation
-        for mutation in parent_patch.mutations
-        if mutation.component_id in selected_components
-    )
+    complete = components.mutations_of(selected_components)
     if len(complete) != len(mutations):
         raise InputError(
             "Podzbiór narusza atomowy komponent zależności; wybierz cały komponent."
@@ -697,7 +825,9 @@ def _create_cleanup_child_plan(
             if not isinstance(ancestor, str) or not ancestor:
                 break
             root_id = ancestor
-        root_patch = store.load_patchset(root_id)
+        root_patch = (
+            parent_patch if root_id == parent_id else store.load_patchset(root_id)
+        )
         excluded_component_set = set(excluded_components)
         excluded_mutations = tuple(
             mutation
@@ -1035,8 +1165,9 @@ def _contract() -> dict[str, Any]:
             "POST /sessions/{id}/push": "one sequential specific-DG commit-all job",
             "POST /restore/plans": "three-way restore by IP/session",
             "POST /audits": "read-only dependency audit",
-            "GET /history": "offline searchable session, mutation and backup catalog",
-            "GET /sessions": "offline integrity-checked session history",
+            "GET /history": "offline searchable session, mutation and backup catalog; cursor, limit, kind, state, host, target, since, until, q and fields",
+            "GET /history/{id}": "offline history record of one session",
+            "GET /sessions": "offline integrity-checked session history; cursor (X-Next-Cursor), limit, kind, state, host, target, since, until and fields",
             "GET /sessions/{id}": "offline integrity-checked manifest",
             "POST /sessions/{id}/handmode": "append paste-ready CLI artifacts to a legacy local session without Panorama",
             "POST /sessions/{id}/reconcile-external": "verify CLI/API post-state and admit restore history",
@@ -1087,6 +1218,10 @@ def create_app(
         session_store.root.parent if store is not None else None,
         enforce_acl=session_store.enforce_acl,
     )
+    snapshot_cache = SnapshotCache(
+        session_store.root.parent / "snapshot-cache",
+        enforce_acl=session_store.enforce_acl,
+    )
     connections = ConnectionRegistry()
     analysis_jobs: dict[str, dict[str, Any]] = {}
     analysis_jobs_lock = threading.Lock()
@@ -1567,7 +1702,7 @@ def create_app(
         profile_name = value.get("profile_name", value.get("profileName", ""))
         if profile_name is not None and not isinstance(profile_name, str):
             raise InputError("profile_name musi być tekstem.")
-        client = PanoramaReadClient(profile)
+        client = PanoramaReadClient(profile, snapshot_cache=snapshot_cache)
         try:
             client.authenticate(password)
             system_info = client.system_info()
@@ -1834,12 +1969,8 @@ def create_app(
         if not isinstance(target, str) or not target.strip():
             raise InputError("Osobny plan wymaga dokładnego pola target.")
         target = target.strip()
-        parent_patch = session_store.load_patchset(plan_id)
-        selected = tuple(
-            mutation
-            for mutation in parent_patch.mutations
-            if mutation.component_id == component_id
-        )
+        components = _PlanComponents.of(session_store.load_patchset(plan_id))
+        selected = components.by_component.get(component_id, ())
         if not selected or not any(target in mutation.causes for mutation in selected):
             raise InputError("Cel nie należy do wskazanego komponentu planu.")
         child_id = _create_cleanup_child_plan(
@@ -1849,6 +1980,7 @@ def create_app(
             selected,
             note=f"Osobny plan wydzielony z {plan_id}; komponent {component_id}.",
             chosen_targets=(target,),
+            components=components,
         )
         return jsonify(_wire_cleanup_plan(session_store, child_id, verify=False)), 201
 
@@ -1867,17 +1999,9 @@ def create_app(
         unknown = sorted(set(targets) - known_targets)
         if unknown:
             raise InputError("Cele nie należą do planu: " + ", ".join(unknown[:10]))
-        parent_patch = session_store.load_patchset(plan_id)
-        selected_components = {
-            mutation.component_id
-            for mutation in parent_patch.mutations
-            if set(mutation.causes).intersection(targets)
-        }
-        selected = tuple(
-            mutation
-            for mutation in parent_patch.mutations
-            if mutation.component_id in selected_components
-        )
+        components = _PlanComponents.of(session_store.load_patchset(plan_id))
+        selected_components = components.components_of(targets)
+        selected = components.mutations_of(selected_components)
         child_id = _create_cleanup_child_plan(
             session_store,
             plan_id,
@@ -1888,6 +2012,7 @@ def create_app(
                 f"{len(targets)} celów i {len(selected_components)} atomowych komponentów."
             ),
             chosen_targets=targets,
+            components=components,
         )
         return jsonify(_wire_cleanup_plan(session_store, child_id, verify=False)), 201
 
@@ -1923,21 +2048,16 @@ def create_app(
             )
 
         parent_patch = session_store.load_patchset(plan_id)
-        known_components = {
-            mutation.component_id for mutation in parent_patch.mutations
-        }
+        components = _PlanComponents.of(parent_patch)
         unknown_components = sorted(
-            set(requested_components) - known_components
+            set(requested_components) - set(components.by_component)
         )
         if unknown_components:
             raise InputError(
                 "Komponenty nie należą do aktywnego planu: "
                 + ", ".join(unknown_components[:10])
             )
-        processable = {
-            cause for mutation in parent_patch.mutations for cause in mutation.causes
-        }
-        inactive = sorted(set(requested) - processable)
+        inactive = sorted(set(requested) - set(components.by_cause))
         if inactive:
             raise InputError(
                 "Cel nie ma aktywnych operacji do wykluczenia: "
@@ -1948,6 +2068,7 @@ def create_app(
             parent_patch,
             requested,
             component_ids=requested_components,
+            components=components,
         )
         existing_excluded = {
             str(item) for item in parent_manifest.get("excluded_targets") or ()
@@ -1987,17 +2108,40 @@ def create_app(
             excluded_targets=excluded,
             exclusion_impacted_targets=impacted,
             excluded_component_ids=excluded_components,
+            components=components,
         )
         return jsonify(_wire_cleanup_plan(session_store, child_id, verify=False)), 201
 
     @app.get("/api/v1/sessions")
     def sessions_list():
-        return jsonify(
-            [
-                _wire_session(session_store, item["session_id"])
-                for item in session_store.list_sessions()
+        # Newest first; with ``limit`` keyset-paginated, the next page
+        # starting after the cursor returned in X-Next-Cursor.
+        query = _page_query(request.args)
+        limit = query.pop("limit")
+        fields = _requested_fields(request.args)
+        summaries = session_store.query_sessions(
+            operation_kind=request.args.get("kind") or None,
+            limit=None if limit is None else limit + 1,
+            **query,
+        )
+        next_cursor = None
+        if limit is not None and len(summaries) > limit:
+            summaries = summaries[:limit]
+            next_cursor = summaries[-1]["session_id"]
+        if fields is not None and fields <= _SUMMARY_FIELDS.keys():
+            items = [
+                {key: _SUMMARY_FIELDS[key](summary) for key in fields}
+                for summary in summaries
             ]
-        )
+        else:
+            items = [
+                _project(_wire_session(session_store, summary["session_id"]), fields)
+                for summary in summaries
+            ]
+        response = jsonify(items)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
 
     @app.get("/api/v1/sessions/<session_id>")
     def session_get(session_id: str):
@@ -2024,7 +2168,18 @@ def create_app(
         # History belongs to the local Windows user and remains available
         # without a Panorama connection token.  The server is loopback-only;
         # write/reconciliation endpoints continue to require live auth.
-        return jsonify(session_store.history_catalog())
+        fields = _requested_fields(request.args)
+        catalog = session_store.history_catalog(
+            kind=request.args.get("kind") or None,
+            search=(request.args.get("q") or "").split(),
+            **_page_query(request.args),
+        )
+        catalog["sessions"] = [_project(item, fields) for item in catalog["sessions"]]
+        return jsonify(catalog)
+
+    @app.get("/api/v1/history/<session_id>")
+    def history_session_get(session_id: str):
+        return jsonify(session_store.history_session(session_id))
 
     @app.post("/api/v1/sessions/<session_id>/reconcile-external")
     def session_reconcile_external(session_id: str):
@@ -2053,9 +2208,11 @@ def create_app(
         manifest = session_store.load_manifest(session_id, verify=False)
         inline = request.args.get("disposition", "attachment").casefold() == "inline"
         if filename == "bundle":
-            payload = session_store.bundle_bytes(session_id)
+            # Checks that need no hashing run here, before headers are sent;
+            # entry hashes are verified while the ZIP streams.
+            chunks = session_store.iter_bundle(session_id)
             return Response(
-                payload,
+                chunks,
                 content_type="application/zip",
                 headers={
                     "Content-Disposition": (
@@ -2090,7 +2247,8 @@ def create_app(
                 requested = "restore_operations.json" if manifest["operation_kind"] == "restore" else "plan_summary.json"
                 path = session_store.resolve_download(session_id, requested)
             elif filename == "commands" and manifest["operation_kind"] == "restore":
-                path = session_store.resolve_download(session_id, "restore_operations.json")
+                requested = "restore_operations.json"
+                path = session_store.resolve_download(session_id, requested)
             elif filename == "conflicts":
                 return Response(
                     json.dumps(manifest.get("conflicts") or [], ensure_ascii=False, indent=2),
@@ -2105,10 +2263,13 @@ def create_app(
                 )
             else:
                 raise
+        # Snapshots live in the shared blob store under their hash; the
+        # operator still gets the session-relative name.
         return send_file(
             path,
             as_attachment=not inline,
-            download_name=Path(path).name,
+            download_name=PurePosixPath(requested).name,
+            mimetype="application/gzip" if requested.endswith(".gz") else None,
             max_age=0,
         )
 
@@ -2124,6 +2285,14 @@ def create_app(
                 value, "enable_api_write", fallback_key="enableApiWrite", default=False
             ),
             operator_authorized_stage=execution_stage(value),
+            multi_config_batch_size=integer_field(
+                value,
+                "multi_config_batch_size",
+                fallback_key="multiConfigBatchSize",
+                default=0,
+                minimum=0,
+                maximum=MAX_MULTI_CONFIG_OPERATIONS,
+            ),
         )
         result = apply_candidate(
             session_store,
@@ -2159,6 +2328,14 @@ def create_app(
                 value, "enable_api_write", fallback_key="enableApiWrite", default=False
             ),
             operator_authorized_stage=execution_stage(value),
+            multi_config_batch_size=integer_field(
+                value,
+                "multi_config_batch_size",
+                fallback_key="multiConfigBatchSize",
+                default=0,
+                minimum=0,
+                maximum=MAX_MULTI_CONFIG_OPERATIONS,
+            ),
         )
         # Validate the target before detaching work from the request context.
         session_store.load_manifest(session_id)
@@ -2589,6 +2766,7 @@ def run_server(
     static_dir: Path,
     session_dir: Optional[Path],
     profile_path: Optional[Path] = None,
+    delta_snapshots: bool = False,
 ) -> None:
     if not 0 <= port <= 65535:
         raise InputError("Port GUI musi być w zakresie 0..65535.")
@@ -2613,7 +2791,7 @@ def run_server(
     app_token = secrets.token_urlsafe(32)
     app = create_app(
         static_dir=static_dir,
-        store=SessionStore(session_dir),
+        store=SessionStore(session_dir, delta_snapshots=delta_snapshots),
         profile_ceiling=profile_ceiling,
         app_token=app_token,
     )
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import copy
 import hashlib
 import json
 import re
 import xml.etree.ElementTree as ET
-from typing import Iterable, Optional
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Optional
 
 from defusedxml import ElementTree as SafeET
 from defusedxml.common import DefusedXmlException
@@ -35,8 +37,38 @@ def parse_xml(payload: bytes | str) -> ET.Element:
         raise PanoramaResponseError(f"Niepoprawny XML: {exc}.") from exc
 
 
+def parse_config_stream(stream: BinaryIO) -> ET.Element:
+    """Parse a full ``/config`` response incrementally from a byte stream.
+
+    The HTTP body is consumed in parser-sized chunks, so the payload is never
+    buffered as one ``bytes`` object and the resulting ``<config>`` element is
+    the only full tree built.  The ``<response status>`` envelope is enforced
+    with the same rules as :func:`parse_api_response`.
+    """
+
+    root: Optional[ET.Element] = None
+    try:
+        for _event, element in SafeET.iterparse(
+            stream,
+            events=("start",),
+            forbid_dtd=True,
+            forbid_entities=True,
+            forbid_external=True,
+        ):
+            if root is None:
+                root = element
+    except (ET.ParseError, DefusedXmlException) as exc:
+        raise PanoramaResponseError(f"Niepoprawny XML: {exc}.") from exc
+    if root is None:
+        raise PanoramaResponseError("Odpowiedź XML jest pusta lub ucięta.")
+    return _unwrap_api_response(root, expect_config=True)
+
+
 def parse_api_response(payload: bytes | str, *, expect_config: bool = False) -> ET.Element:
-    root = parse_xml(payload)
+    return _unwrap_api_response(parse_xml(payload), expect_config=expect_config)
+
+
+def _unwrap_api_response(root: ET.Element, *, expect_config: bool) -> ET.Element:
     if root.tag == "response" and root.get("status") != "success":
         message = " ".join(text.strip() for text in root.itertext() if text.strip())
         raise PanoramaResponseError(
@@ -58,27 +90,73 @@ def element_xml(element: Optional[ET.Element]) -> Optional[str]:
     return None if element is None else ET.tostring(element, encoding="unicode")
 
 
-def _canonical_tuple(element: ET.Element):
-    attributes = tuple(
-        sorted(
+class _CanonicalDigest:
+    """Stream the canonical form of a subtree into SHA-256.
+
+    The digest is byte-for-byte the historical
+    ``sha256(repr((tag, attributes, text, children)))`` recorded in every
+    stored PatchSet and commit review, but the nested tuple and its ``repr``
+    string are never materialised; pieces are flushed in bounded batches.
+    """
+
+    _FLUSH_PIECES = 4096
+
+    def __init__(self) -> None:
+        self._digest = hashlib.sha256()
+        self._pending: list[str] = []
+
+    def _flush(self) -> None:
+        self._digest.update("".join(self._pending).encode("utf-8"))
+        self._pending.clear()
+
+    def feed(self, element: ET.Element) -> None:
+        write = self._pending.append
+        attributes = sorted(
             (key, value)
             for key, value in element.attrib.items()
             if key not in VOLATILE_ATTRIBUTES
         )
-    )
-    text = (element.text or "").strip()
-    children = tuple(_canonical_tuple(child) for child in list(element))
-    return element.tag, attributes, text, children
+        write("(")
+        write(repr(element.tag))
+        write(", (")
+        for position, (key, value) in enumerate(attributes):
+            if position:
+                write(", ")
+            write(f"({key!r}, {value!r})")
+        if len(attributes) == 1:
+            write(",")
+        write("), ")
+        write(repr((element.text or "").strip()))
+        write(", (")
+        count = 0
+        for child in element:
+            if count:
+                write(", ")
+            self.feed(child)
+            count += 1
+        if count == 1:
+            write(",")
+        write("))")
+        if len(self._pending) >= self._FLUSH_PIECES:
+            self._flush()
+
+    def hexdigest(self) -> str:
+        self._flush()
+        return self._digest.hexdigest()
 
 
 def fingerprint_element(element: Optional[ET.Element]) -> str:
     if element is None:
         return MISSING_FINGERPRINT
-    value = repr(_canonical_tuple(element)).encode("utf-8")
-    return hashlib.sha256(value).hexdigest()
+    digest = _CanonicalDigest()
+    digest.feed(element)
+    return digest.hexdigest()
 
 
+@lru_cache(maxsize=8192)
 def fingerprint_xml(xml: Optional[str]) -> str:
+    # Mutation.before_sha256/after_sha256 are properties over stored XML and
+    # are read many times per session; the string is immutable, so memoise.
     if xml is None:
         return MISSING_FINGERPRINT
     return fingerprint_element(parse_xml(xml))
@@ -173,41 +251,169 @@ def decode_xpath_literal(value: str) -> str:
 
 _PREDICATE = re.compile(r"^([^\[]+)(?:\[(.+)\])?$")
 
+_Segment = tuple[str, Optional[str], Optional[str]]
 
-def find_xpath(config: ET.Element, xpath: str) -> Optional[ET.Element]:
-    """Resolve the conservative XPath subset emitted by Toolbox/cleaner."""
 
-    if config.tag != "config":
-        config = parse_api_response(ET.tostring(config), expect_config=True)
+@lru_cache(maxsize=16384)
+def _parsed_xpath(xpath: str) -> tuple[_Segment, ...]:
+    """Split an XPath into ``(tag, "name"|"text"|None, literal)`` steps."""
+
     parts = _split_xpath(xpath)
     if not parts or parts[0] != "config":
         raise ValidationError("XPath nie wskazuje /config.")
-    current = config
+    segments: list[_Segment] = []
     for raw_segment in parts[1:]:
         match = _PREDICATE.fullmatch(raw_segment)
         if not match:
             raise ValidationError(f"Nieobsługiwany segment XPath: {raw_segment!r}.")
         tag, predicate = match.groups()
-        candidates = current.findall(f"./{tag}")
         if predicate is None:
-            current = candidates[0] if candidates else None  # type: ignore[assignment]
+            segments.append((tag, None, None))
         elif predicate.startswith("@name="):
-            name = decode_xpath_literal(predicate[len("@name=") :])
-            current = next((item for item in candidates if item.get("name") == name), None)  # type: ignore[assignment]
+            segments.append((tag, "name", decode_xpath_literal(predicate[len("@name=") :])))
         elif predicate.startswith("text()="):
-            text = decode_xpath_literal(predicate[len("text()=") :])
+            segments.append((tag, "text", decode_xpath_literal(predicate[len("text()=") :])))
+        else:
+            raise ValidationError(f"Nieobsługiwany predykat XPath: {predicate!r}.")
+    return tuple(segments)
+
+
+def find_xpath(config: ET.Element, xpath: str) -> Optional[ET.Element]:
+    """Resolve the conservative XPath subset emitted by Toolbox/cleaner."""
+
+    if config.tag != "config":
+        config = parse_api_response(ET.tostring(config), expect_config=True)
+    current = config
+    for tag, kind, value in _parsed_xpath(xpath):
+        candidates = current.findall(f"./{tag}")
+        if kind is None:
+            current = candidates[0] if candidates else None  # type: ignore[assignment]
+        elif kind == "name":
+            current = next((item for item in candidates if item.get("name") == value), None)  # type: ignore[assignment]
+        else:
             current = next(
-                (item for item in candidates if (item.text or "").strip() == text),
+                (item for item in candidates if (item.text or "").strip() == value),
                 None,
             )  # type: ignore[assignment]
-        else:
-            raise ValidationError(f"Nieobsługiwany predykat XPath: {predicate!r}.")
         if current is None:
             return None
     return current
 
 
-def fingerprint_xpath(config: ET.Element, xpath: str) -> str:
+class ConfigIndex:
+    """Reusable O(depth) XPath resolver for one configuration tree.
+
+    ``find_xpath`` scans every sibling at every step, which is quadratic when a
+    large PatchSet is checked against the same tree.  The index buckets each
+    parent's children by ``(tag, @name/text())`` on first use and keeps the
+    ordered entry names of rulebase containers.  Lookups return the same
+    first-match element as :func:`find_xpath`.  Subtree fingerprints are
+    memoised per element.  Code that edits the tree must call
+    :meth:`invalidate` with the XPath of every element whose direct children
+    change.
+    """
+
+    def __init__(self, config: ET.Element):
+        if config.tag != "config":
+            config = parse_api_response(ET.tostring(config), expect_config=True)
+        self.config = config
+        # Values keep the parent alive so an ``id()`` key is never reused.
+        self._children: dict[int, tuple[ET.Element, dict[_Segment, ET.Element]]] = {}
+        self._entries: dict[
+            int, tuple[ET.Element, tuple[Optional[str], ...], dict[str, int]]
+        ] = {}
+        self._fingerprints: dict[int, tuple[ET.Element, str]] = {}
+
+    def _child_map(self, parent: ET.Element) -> dict[_Segment, ET.Element]:
+        cached = self._children.get(id(parent))
+        if cached is not None:
+            return cached[1]
+        mapping: dict[_Segment, ET.Element] = {}
+        for child in parent:
+            tag = child.tag
+            mapping.setdefault((tag, None, None), child)
+            name = child.get("name")
+            if name is not None:
+                mapping.setdefault((tag, "name", name), child)
+            mapping.setdefault((tag, "text", (child.text or "").strip()), child)
+        self._children[id(parent)] = (parent, mapping)
+        return mapping
+
+    def child(
+        self, parent: ET.Element, tag: str, kind: Optional[str] = None, value: Optional[str] = None
+    ) -> Optional[ET.Element]:
+        """Return the first direct child matching one parsed XPath step."""
+
+        return self._child_map(parent).get((tag, kind, value))
+
+    def find(self, xpath: str) -> Optional[ET.Element]:
+        current: Optional[ET.Element] = self.config
+        for segment in _parsed_xpath(xpath):
+            current = self._child_map(current).get(segment)  # type: ignore[arg-type]
+            if current is None:
+                return None
+        return current
+
+    def fingerprint_of(self, element: ET.Element) -> str:
+        """Memoised :func:`fingerprint_element` for an element of this tree."""
+
+        cached = self._fingerprints.get(id(element))
+        if cached is not None:
+            return cached[1]
+        value = fingerprint_element(element)
+        self._fingerprints[id(element)] = (element, value)
+        return value
+
+    def fingerprint(self, xpath: str) -> str:
+        element = self.find(xpath)
+        return MISSING_FINGERPRINT if element is None else self.fingerprint_of(element)
+
+    def _ordered_entries(
+        self, container: ET.Element
+    ) -> tuple[tuple[Optional[str], ...], dict[str, int]]:
+        cached = self._entries.get(id(container))
+        if cached is not None:
+            return cached[1], cached[2]
+        names = tuple(entry.get("name") for entry in container.findall("./entry"))
+        positions: dict[str, int] = {}
+        for position, name in enumerate(names):
+            if name is not None:
+                positions.setdefault(name, position)
+        self._entries[id(container)] = (container, names, positions)
+        return names, positions
+
+    def entry_names(self, container: ET.Element) -> tuple[Optional[str], ...]:
+        """Ordered ``entry/@name`` values of a container (``None`` if unnamed)."""
+
+        return self._ordered_entries(container)[0]
+
+    def entry_positions(self, container: ET.Element) -> dict[str, int]:
+        """First position of every entry name, matching ``list.index``."""
+
+        return self._ordered_entries(container)[1]
+
+    def invalidate(self, xpath: str) -> None:
+        """Prepare for an edit of the direct children of ``xpath``.
+
+        Must be called before the edit: the element's child buckets are
+        dropped, and so is the memoised fingerprint of every element on the
+        dirty path up to ``/config``.  Untouched subtrees keep theirs.
+        """
+
+        current: Optional[ET.Element] = self.config
+        self._fingerprints.pop(id(current), None)
+        for segment in _parsed_xpath(xpath):
+            current = self._child_map(current).get(segment)  # type: ignore[arg-type]
+            if current is None:
+                return
+            self._fingerprints.pop(id(current), None)
+        self._children.pop(id(current), None)
+        self._entries.pop(id(current), None)
+
+
+def fingerprint_xpath(config: ET.Element | ConfigIndex, xpath: str) -> str:
+    if isinstance(config, ConfigIndex):
+        return config.fingerprint(xpath)
     return fingerprint_element(find_xpath(config, xpath))
 
 
@@ -219,7 +425,7 @@ def parent_xpath(xpath: str) -> str:
 
 
 def rule_order_context_sha256(
-    config: ET.Element,
+    config: ET.Element | ConfigIndex,
     target_xpath: str,
     order_previous: Optional[str],
     order_next: Optional[str],
@@ -231,12 +437,20 @@ def rule_order_context_sha256(
     ambiguous between plan and apply.
     """
 
-    container = find_xpath(config, parent_xpath(target_xpath))
-    names = (
-        [name for entry in container.findall("./entry") if (name := entry.get("name"))]
-        if container is not None
-        else []
-    )
+    if isinstance(config, ConfigIndex):
+        container = config.find(parent_xpath(target_xpath))
+        names = (
+            [name for name in config.entry_names(container) if name]
+            if container is not None
+            else []
+        )
+    else:
+        container = find_xpath(config, parent_xpath(target_xpath))
+        names = (
+            [name for entry in container.findall("./entry") if (name := entry.get("name"))]
+            if container is not None
+            else []
+        )
     context: dict[str, object] = {
         "container_present": container is not None,
         "ordered_names": names,
@@ -305,3 +519,148 @@ def supported_entities(config: ET.Element) -> dict[str, str]:
             if group_name:
                 collect(group, f"devices/{device_name}/device-group/{group_name}")
     return result
+
+
+_OWNER_CONTAINERS = frozenset({"address", "address-group", "rules"})
+_PRECEDENCE_PATH = "./deviceconfig/setting/management/ancestor-objects-take-precedence"
+
+
+def project_config_delta(
+    config: ET.Element | ConfigIndex,
+    xpaths: Iterable[str],
+    *,
+    names: Iterable[str] = (),
+) -> ET.Element:
+    """Return a ``<config>`` holding only what a PatchSet's history depends on.
+
+    Kept, in source order: every owner entry (address, address-group or rule)
+    containing one of ``xpaths`` with its ancestor skeleton, the previous and
+    next rule around every kept rule, the device-group hierarchy with the
+    ``ancestor-objects-take-precedence`` settings, and every address or
+    address-group entry of any scope whose name is referenced by a kept entry
+    or listed in ``names`` (transitively through static members).  Parsing the
+    projection therefore yields the same scopes and the same name resolution
+    for everything the kept entries reference as the full configuration.
+    """
+
+    index = config if isinstance(config, ConfigIndex) else ConfigIndex(config)
+    root = index.config
+    full: dict[int, ET.Element] = {}
+    path: set[int] = set()
+
+    def keep(chain: list[ET.Element]) -> None:
+        if any(id(element) in full for element in chain):
+            return
+        full[id(chain[-1])] = chain[-1]
+        path.update(id(element) for element in chain[:-1])
+
+    def lookup(segments: Iterable[_Segment]) -> Optional[list[ET.Element]]:
+        chain = [root]
+        for segment in segments:
+            child = index.child(chain[-1], *segment)
+            if child is None:
+                return None
+            chain.append(child)
+        return chain
+
+    scopes: list[list[ET.Element]] = []
+    shared = root.find("./shared")
+    if shared is not None:
+        path.add(id(shared))
+        scopes.append([root, shared])
+    devices = root.find("./devices")
+    for device in devices.findall("./entry") if devices is not None else ():
+        container = device.find("./device-group")
+        if container is None:
+            continue
+        if device.find(_PRECEDENCE_PATH) is not None:
+            keep([root, devices, device, *_ancestors(device, _PRECEDENCE_PATH)])
+        for group in container.findall("./entry"):
+            scope = [root, devices, device, container, group]
+            path.update(id(element) for element in scope)
+            parent = group.find("./parent-dg")
+            if parent is not None:
+                full[id(parent)] = parent
+            scopes.append(scope)
+    if root.find(_PRECEDENCE_PATH) is not None:
+        keep([root, *_ancestors(root, _PRECEDENCE_PATH)])
+
+    owners: list[ET.Element] = []
+    for xpath in dict.fromkeys(xpaths):
+        segments = _parsed_xpath(xpath)
+        for position in range(1, len(segments)):
+            if segments[position - 1][0] in _OWNER_CONTAINERS and segments[position][0] == "entry":
+                segments = segments[: position + 1]
+                break
+        chain = lookup(segments)
+        if chain is None:
+            continue
+        keep(chain)
+        owners.append(chain[-1])
+        if len(chain) > 1 and chain[-2].tag == "rules":
+            container = chain[-2]
+            siblings = container.findall("./entry")
+            position = index.entry_positions(container).get(chain[-1].get("name") or "")
+            if position is None:
+                continue
+            for neighbour in (position - 1, position + 1):
+                if 0 <= neighbour < len(siblings):
+                    keep([*chain[:-1], siblings[neighbour]])
+                    owners.append(siblings[neighbour])
+
+    definitions: dict[str, list[list[ET.Element]]] = {}
+    for scope in scopes:
+        for container_tag in ("address", "address-group"):
+            container = scope[-1].find(f"./{container_tag}")
+            if container is None:
+                continue
+            for entry in container.findall("./entry"):
+                name = entry.get("name")
+                if name:
+                    definitions.setdefault(name, []).append([*scope, container, entry])
+
+    pending = list(dict.fromkeys(names))
+    for owner in owners:
+        pending.extend(
+            text.strip()
+            for member in owner.iter("member")
+            if (text := member.text) and text.strip()
+        )
+        if owner.get("name"):
+            pending.append(owner.get("name") or "")
+    seen: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for chain in definitions.get(name, ()):
+            keep(chain)
+            pending.extend(
+                text.strip()
+                for member in chain[-1].findall("./static/member")
+                if (text := member.text) and text.strip()
+            )
+
+    def project(element: ET.Element) -> ET.Element:
+        projected = ET.Element(element.tag, dict(element.attrib))
+        for child in element:
+            if id(child) in full:
+                projected.append(copy.deepcopy(child))
+            elif id(child) in path:
+                projected.append(project(child))
+        return projected
+
+    return project(root)
+
+
+def _ancestors(element: ET.Element, relative: str) -> list[ET.Element]:
+    chain: list[ET.Element] = []
+    current = element
+    for tag in relative.removeprefix("./").split("/"):
+        found = current.find(f"./{tag}")
+        if found is None:
+            break
+        chain.append(found)
+        current = found
+    return chain
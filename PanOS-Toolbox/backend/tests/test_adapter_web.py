@@ -15,6 +15,7 @@ from panos_toolbox.profile import PanoramaProfile
 from panos_toolbox.service import plan_cleanup_session
 from panos_toolbox.sessions import SessionStore
 from panos_toolbox.web import (
+    _PlanComponents,
     _apply_profile_ceiling,
     _cleanup_exclusion_closure,
     _create_cleanup_child_plan,
@@ -192,6 +193,30 @@ class CleanerAdapterTests(unittest.TestCase):
         self.assertTrue(overridden.patchset.mutations)
         self.assertTrue(any("override polityki DEFAULT" in warning for warning in overridden.patchset.warnings))
 
+    def test_parallel_planning_builds_the_same_patchset(self):
+        ips = ("192.0.2.1", "192.0.2.2", "192.0.2.3")
+        serial, parallel = (
+            build_cleanup_patchset(
+                self.fixture(),
+                ips,
+                policy_names=("SEC-GROUP",),
+                panorama_host="pano",
+                panorama_username="admin",
+                workers=workers,
+            )
+            for workers in (1, 3)
+        )
+        self.assertEqual(
+            [mutation.to_dict() for mutation in serial.patchset.mutations],
+            [mutation.to_dict() for mutation in parallel.patchset.mutations],
+        )
+        self.assertEqual(serial.patchset.targets, parallel.patchset.targets)
+        self.assertEqual(
+            serial.patchset.affected_device_groups,
+            parallel.patchset.affected_device_groups,
+        )
+        self.assertEqual(serial.blocked_ips, parallel.blocked_ips)
+
     def test_exclusion_expands_over_the_whole_atomic_dependency_component(self):
         result = build_cleanup_patchset(
             self.fixture(),
@@ -248,6 +273,34 @@ class CleanerAdapterTests(unittest.TestCase):
             {"192.0.2.1"},
         )
 
+    def test_component_index_slices_plan_in_parent_order(self):
+        patch = build_cleanup_patchset(
+            self.fixture(),
+            ("192.0.2.1", "192.0.2.2", "192.0.2.3"),
+            panorama_host="pano",
+            panorama_username="admin",
+        ).patchset
+        components = _PlanComponents.of(patch)
+        for targets in (("192.0.2.1",), ("192.0.2.3",), ("192.0.2.1", "192.0.2.2")):
+            with self.subTest(targets=targets):
+                selected = components.components_of(targets)
+                self.assertEqual(
+                    components.mutations_of(selected),
+                    tuple(
+                        mutation
+                        for mutation in patch.mutations
+                        if mutation.component_id in selected
+                    ),
+                )
+                self.assertEqual(
+                    _cleanup_exclusion_closure(patch, targets, components=components),
+                    _cleanup_exclusion_closure(patch, targets),
+                )
+        self.assertEqual(
+            set(components.by_cause),
+            {cause for mutation in patch.mutations for cause in mutation.causes},
+        )
+
     def test_policy_exclusion_child_is_local_and_keeps_other_policy_processable(self):
         fixture = self.fixture()
 
@@ -374,7 +427,7 @@ Info Dst
 
     def test_policy_request_endpoint_writes_paste_ready_cli_not_json(self):
         class FakeReadClient:
-            def __init__(self, profile):
+            def __init__(self, profile, snapshot_cache=None):
                 self.profile = profile
 
             def authenticate(self, _password):
@@ -533,6 +586,99 @@ class WebBoundaryTests(unittest.TestCase):
             self.assertIn("X-Toolbox-Session", live_only.json["message"])
             preview.close()
 
+    def test_history_and_session_lists_page_filter_and_project_through_the_index(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary) / "sessions", enforce_acl=False)
+            profile = PanoramaProfile("192.0.2.10", "admin", api_max_stage=ApiStage.PUSH)
+            patch = build_cleanup_patchset(
+                CleanerAdapterTests.fixture(),
+                (),
+                policy_names=("SEC-MIX",),
+                panorama_host=profile.host,
+                panorama_username=profile.username,
+            ).patchset
+            session_ids = sorted(
+                (store.create(patch, profile) for _ in range(3)), reverse=True
+            )
+            app = create_app(
+                test_client_auto_auth=True,
+                static_dir=Path(temporary) / "static",
+                store=store,
+                profile_ceiling=profile,
+            )
+            client = app.test_client()
+            headers = {"Host": "localhost"}
+
+            first = client.get("/api/v1/history?limit=2", headers=headers).json
+            self.assertEqual([item["id"] for item in first["sessions"]], session_ids[:2])
+            self.assertEqual(first["sessionCount"], 3)
+            self.assertEqual(first["nextCursor"], session_ids[1])
+            second = client.get(
+                f"/api/v1/history?limit=2&cursor={first['nextCursor']}", headers=headers
+            ).json
+            self.assertEqual([item["id"] for item in second["sessions"]], session_ids[2:])
+            self.assertIsNone(second["nextCursor"])
+
+            searched = client.get(
+                "/api/v1/history?q=sec-mix&fields=state,matchCount", headers=headers
+            ).json
+            self.assertEqual(searched["sessionCount"], 3)
+            self.assertEqual(set(searched["sessions"][0]), {"id", "state", "matchCount"})
+            self.assertGreater(searched["sessions"][0]["matchCount"], 0)
+            self.assertEqual(searched["matchCount"], 3 * searched["sessions"][0]["matchCount"])
+            for query in ("q=no-such-policy", "kind=restore", "state=PUSHED", "since=2999-01-01"):
+                response = client.get(f"/api/v1/history?{query}", headers=headers).json
+                self.assertEqual(response["sessions"], [], query)
+                self.assertEqual(response["sessionCount"], 0, query)
+            created = store.load_manifest(session_ids[0])["created_utc"]
+            today = client.get(
+                f"/api/v1/history?since={created[:10]}&until={created[:10]}&target=policy:SEC-MIX",
+                headers=headers,
+            ).json
+            self.assertEqual(today["sessionCount"], 3)
+
+            detail = client.get(f"/api/v1/history/{session_ids[1]}", headers=headers)
+            self.assertEqual(detail.status_code, 200)
+            self.assertTrue(detail.json["historyItems"])
+
+            listing = client.get(
+                "/api/v1/sessions?limit=2&fields=state,updatedAt", headers=headers
+            )
+            self.assertEqual(listing.headers["X-Next-Cursor"], session_ids[1])
+            self.assertEqual(
+                listing.json,
+                [
+                    {
+                        "id": session_id,
+                        "state": "PLANNED",
+                        "updatedAt": store.load_manifest(session_id)["updated_utc"],
+                    }
+                    for session_id in session_ids[:2]
+                ],
+            )
+            rest = client.get(
+                f"/api/v1/sessions?cursor={session_ids[1]}&kind=cleanup", headers=headers
+            )
+            self.assertNotIn("X-Next-Cursor", rest.headers)
+            self.assertEqual([item["id"] for item in rest.json], session_ids[2:])
+            self.assertTrue(rest.json[0]["artifacts"])
+
+            unpaged = client.get("/api/v1/sessions?fields=state", headers=headers)
+            self.assertNotIn("X-Next-Cursor", unpaged.headers)
+            self.assertEqual([item["id"] for item in unpaged.json], session_ids)
+            everything = client.get("/api/v1/history", headers=headers).json
+            self.assertEqual([item["id"] for item in everything["sessions"]], session_ids)
+            self.assertIsNone(everything["nextCursor"])
+            with mock.patch.object(
+                store, "query_sessions", wraps=store.query_sessions
+            ) as query_sessions:
+                client.get("/api/v1/sessions?fields=state", headers=headers)
+            self.assertIsNone(query_sessions.call_args.kwargs["limit"])
+
+            for query in ("limit=0", "limit=x", "since=yesterday", "cursor=../x"):
+                response = client.get(f"/api/v1/history?{query}", headers=headers)
+                self.assertEqual(response.status_code, 400, query)
+
     def test_localhost_origin_csp_contract_and_no_cors(self):
         with tempfile.TemporaryDirectory() as temporary:
             app = create_app(
@@ -598,7 +744,7 @@ class WebBoundaryTests(unittest.TestCase):
 
     def test_connection_endpoint_builds_profile_and_keeps_password_out_of_response(self):
         class FakeReadClient:
-            def __init__(self, profile):
+            def __init__(self, profile, snapshot_cache=None):
                 self.profile = profile
                 self.closed = False
 
@@ -677,7 +823,7 @@ class WebBoundaryTests(unittest.TestCase):
         fixture = CleanerAdapterTests.fixture()
 
         class FakeReadClient:
-            def __init__(self, profile):
+            def __init__(self, profile, snapshot_cache=None):
                 self.profile = profile
 
             def authenticate(self, _password):
@@ -777,7 +923,7 @@ class WebBoundaryTests(unittest.TestCase):
 
     def test_every_registered_text_artifact_supports_inline_view_and_download(self):
         class FakeReadClient:
-            def __init__(self, profile):
+            def __init__(self, profile, snapshot_cache=None):
                 self.profile = profile
 
             def authenticate(self, _password):
@@ -929,7 +1075,7 @@ class WebBoundaryTests(unittest.TestCase):
         fixture = CleanerAdapterTests.fixture()
 
         class FakeReadClient:
-            def __init__(self, profile):
+            def __init__(self, profile, snapshot_cache=None):
                 self.profile = profile
 
             def authenticate(self, _password):
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import http.client
+import http.server
 import json
 import io
+import shutil
 import tempfile
+import threading
+import time
 import unittest
 import urllib.error
+import xml.etree.ElementTree as ET
 import zipfile
 from dataclasses import replace
 from unittest import mock
@@ -12,7 +19,10 @@ from pathlib import Path
 
 from panos_toolbox.client import (
     MAX_XML_RESPONSE_BYTES,
+    AsyncXMLTransport,
+    HostBudget,
     PanoramaReadClient,
+    PooledXMLTransport,
     UrllibXMLTransport,
 )
 from panos_toolbox.errors import (
@@ -36,6 +46,7 @@ from panos_toolbox.models import (
 from panos_toolbox.profile import PanoramaProfile, issue_write_lease, load_profile
 from panos_toolbox.service import make_writer
 from panos_toolbox.sessions import SessionStore
+from panos_toolbox.snapshot_cache import SnapshotCache
 from panos_toolbox.xmlutil import parse_xml
 
 
@@ -195,6 +206,152 @@ class ClientSerializationTests(unittest.TestCase):
         self.assertIsNone(error)
         self.assertEqual(len(transport.calls), 5)
 
+    def test_full_config_is_streamed_once_without_rebuffering(self):
+        class StreamingTransport(RecordingTransport):
+            def __init__(self):
+                super().__init__()
+                self.streamed = []
+
+            def post_stream(self, params, *, headers, consumer):
+                self.streamed.append(dict(params))
+                return consumer(io.BytesIO(self.responses.pop(0)))
+
+        transport = StreamingTransport()
+        transport.queue(
+            '<response status="success"><result><config version="10.2">'
+            '<shared><address><entry name="A" /></address></shared>'
+            "</config></result></response>"
+        )
+        reader = PanoramaReadClient(
+            PanoramaProfile("pano", "admin", verify_ssl=False), transport
+        )
+        reader._api_key = "memory-only-test-key"
+        config = reader.fetch_config("running")
+        self.assertEqual(config.tag, "config")
+        self.assertIsNotNone(config.find("./shared/address/entry[@name='A']"))
+        self.assertEqual(transport.streamed[0]["xpath"], "/config")
+        self.assertEqual(transport.calls, [])
+        self.assertIs(reader._config_cache["running"][1], config)
+
+        transport.queue('<response status="error"><msg>denied</msg></response>')
+        with self.assertRaises(PanoramaResponseError):
+            reader.fetch_config("candidate")
+        transport.queue('<response status="success"><result><config><shared>')
+        with self.assertRaises(PanoramaResponseError):
+            reader.fetch_config("candidate")
+
+    def test_streamed_body_is_bounded_while_parsing(self):
+        profile = PanoramaProfile("pano", "admin", verify_ssl=False)
+        transport = UrllibXMLTransport(profile)
+        response = mock.MagicMock()
+        response.headers = {}
+        response.read.side_effect = lambda size: b" " * size
+        response.__enter__.return_value = response
+        opener = mock.Mock()
+        opener.open.return_value = response
+        transport.opener = opener
+
+        with mock.patch("panos_toolbox.client.MAX_XML_RESPONSE_BYTES", 64 * 1024):
+            with self.assertRaises(TransportError):
+                transport.post_stream(
+                    {"type": "config"},
+                    headers={},
+                    consumer=lambda stream: [stream.read(16 * 1024) for _ in range(8)],
+                )
+
+    def test_config_pair_survives_reconnect_through_persistent_snapshot_cache(self):
+        summary = (
+            '<response status="success"><result><change-summary dirtyId="7">'
+            '<change xpath="/config/shared/address" /></change-summary>'
+            '</result></response>'
+        )
+        config_response = (
+            '<response status="success"><result><config version="10.2">'
+            '<shared><address><entry name="A" /></address></shared>'
+            '</config></result></response>'
+        )
+        profile = PanoramaProfile("pano", "admin", verify_ssl=False)
+        with tempfile.TemporaryDirectory() as temp:
+            cache = SnapshotCache(Path(temp) / "snapshot-cache", enforce_acl=False)
+            first_transport = RecordingTransport()
+            for response in (summary, config_response, config_response, summary):
+                first_transport.queue(response)
+            first = PanoramaReadClient(profile, first_transport, snapshot_cache=cache)
+            first._api_key = "memory-only-test-key"
+            _running, _candidate, _native, reused, _error = (
+                first.fetch_config_pair_coherent()
+            )
+            self.assertFalse(reused)
+
+            second_transport = RecordingTransport()
+            second_transport.queue(summary)
+            second = PanoramaReadClient(
+                profile,
+                second_transport,
+                snapshot_cache=SnapshotCache(
+                    Path(temp) / "snapshot-cache", enforce_acl=False
+                ),
+            )
+            second._api_key = "memory-only-test-key"
+            running, candidate, _native, reused, error = (
+                second.fetch_config_pair_coherent()
+            )
+            self.assertTrue(reused)
+            self.assertIsNone(error)
+            self.assertEqual(len(second_transport.calls), 1)
+            self.assertEqual(running.get("version"), "10.2")
+            self.assertIsNotNone(candidate.find("./shared/address/entry[@name='A']"))
+            self.assertIsNot(running, second._config_cache["running"][1])
+
+            limited_transport = RecordingTransport()
+            for response in (summary, config_response, config_response, summary):
+                limited_transport.queue(response)
+            limited = PanoramaReadClient(
+                PanoramaProfile("pano", "read-only", verify_ssl=False),
+                limited_transport,
+                snapshot_cache=cache,
+            )
+            limited._api_key = "memory-only-test-key"
+            _running, _candidate, _native, reused, _error = (
+                limited.fetch_config_pair_coherent()
+            )
+            self.assertFalse(reused)
+            self.assertEqual(len(limited_transport.calls), 4)
+
+            for entry in (Path(temp) / "snapshot-cache").glob("*/*/*/candidate.xml.gz"):
+                entry.write_bytes(entry.read_bytes()[:-12])
+            third_transport = RecordingTransport()
+            for response in (summary, config_response, config_response, summary):
+                third_transport.queue(response)
+            third = PanoramaReadClient(profile, third_transport, snapshot_cache=cache)
+            third._api_key = "memory-only-test-key"
+            _running, _candidate, _native, reused, _error = (
+                third.fetch_config_pair_coherent()
+            )
+            self.assertFalse(reused)
+            self.assertEqual(len(third_transport.calls), 4)
+
+            third.invalidate_config_cache("candidate")
+            self.assertEqual(list(cache.root.iterdir()), [])
+
+    def test_snapshot_cache_evicts_least_recently_used_and_expires_by_age(self):
+        config = parse_xml('<config><shared>' + "<x/>" * 200 + "</shared></config>")
+        proofs = [f"{index:064x}" for index in range(3)]
+        with tempfile.TemporaryDirectory() as temp:
+            cache = SnapshotCache(Path(temp), enforce_acl=False, max_bytes=10**9)
+            cache.store("pano", "admin", proofs[0], config, config)
+            single = cache.size_bytes()
+            cache.max_bytes = single * 2 + single // 2
+            cache.store("pano", "admin", proofs[1], config, config)
+            self.assertIsNotNone(cache.load("pano", "admin", proofs[0], max_age_seconds=60))
+            cache.store("pano", "admin", proofs[2], config, config)
+            self.assertIsNone(cache.load("pano", "admin", proofs[1], max_age_seconds=60))
+            self.assertIsNotNone(cache.load("pano", "admin", proofs[0], max_age_seconds=60))
+            self.assertIsNone(cache.load("other", "admin", proofs[2], max_age_seconds=60))
+            self.assertIsNone(cache.load("pano", "auditor", proofs[2], max_age_seconds=60))
+            self.assertIsNone(cache.load("pano", "admin", proofs[2], max_age_seconds=-1))
+            self.assertIsNone(cache.load("pano", "admin", proofs[2], max_age_seconds=60))
+
     def test_candidate_mutation_invalidates_only_candidate_cache(self):
         profile = PanoramaProfile(
             "pano", "admin", verify_ssl=False, api_max_stage=ApiStage.CANDIDATE
@@ -220,6 +377,308 @@ class ClientSerializationTests(unittest.TestCase):
         reader.fetch_config_cached("candidate")
         self.assertEqual(len(transport.calls), 4)
 
+    def test_multi_config_batches_map_each_operation_result(self):
+        profile = PanoramaProfile(
+            "pano", "admin", verify_ssl=False, api_max_stage=ApiStage.CANDIDATE
+        )
+        transport = RecordingTransport()
+        reader = PanoramaReadClient(profile, transport)
+        reader._api_key = "memory-only-test-key"
+        writer = reader.enable_write(
+            issue_write_lease(profile, ApiStage.CANDIDATE, enable_api_write=True),
+            multi_config_batch_size=2,
+        )
+        delete_a, delete_b, delete_c = (
+            sample_mutation(name).forward[0] for name in ("A", "B", "C")
+        )
+        move = MutationOperation(
+            MutationAction.MOVE,
+            "/config/shared/pre-rulebase/security/rules/entry[@name='R']",
+            where="top",
+        )
+        set_member = MutationOperation(
+            MutationAction.SET,
+            "/config/shared/address-group/entry[@name='G']/static",
+            element="<member>A</member>",
+        )
+        self.assertEqual(
+            writer.operation_batches([delete_a, delete_b, delete_c, move, set_member]),
+            [(0, 2), (2, 3), (3, 4), (4, 5)],
+        )
+
+        transport.queue(
+            '<response status="success"><response id="1" status="success">'
+            '<msg>command succeeded</msg></response><response id="2" status="success">'
+            "<msg>command succeeded</msg></response></response>"
+        )
+        results = writer.apply_operations([delete_a, set_member])
+        self.assertEqual([item.get("id") for item in results], ["1", "2"])
+        params, _headers, mutating = transport.calls[-1]
+        self.assertTrue(mutating)
+        self.assertEqual(params["action"], "multi-config")
+        request = parse_xml(params["element"])
+        self.assertEqual(request.get("strict-transactional"), "yes")
+        self.assertEqual([step.tag for step in request], ["delete", "set"])
+        self.assertEqual(request[1].find("./member").text, "A")
+
+        transport.queue(
+            '<response status="success"><response id="1" status="success" />'
+            "</response>"
+        )
+        with self.assertRaises(OutcomeUnknownError):
+            writer.apply_operations([delete_a, delete_b])
+        transport.queue('<response status="error"><msg>invalid xpath</msg></response>')
+        with self.assertRaises(PanoramaResponseError):
+            writer.apply_operations([delete_a, delete_b])
+        with self.assertRaises(ValueError):
+            writer.apply_operations([delete_a, move])
+
+    def test_pooled_transport_reuses_connections_and_refuses_redirects(self):
+        peers = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                peers.append(self.client_address)
+                if self.headers.get("X-Test") == "redirect":
+                    self.send_response(302)
+                    self.send_header("Location", "http://elsewhere/api/")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = b'<response status="success"/>'
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        profile = PanoramaProfile(
+            f"127.0.0.1:{server.server_address[1]}", "admin", use_ssl=False
+        )
+        transport = PooledXMLTransport(profile, max_connections=2)
+        self.addCleanup(transport.close)
+
+        for _ in range(3):
+            self.assertIn(b"success", transport.post({"type": "op"}, headers={}, mutating=False))
+        self.assertEqual(len(set(peers)), 1)
+        streamed = transport.post_stream(
+            {"type": "config"}, headers={}, consumer=lambda stream: stream.read()
+        )
+        self.assertIn(b"success", streamed)
+        self.assertEqual(len(set(peers)), 1)
+
+        with self.assertRaises(TransportError):
+            transport.post({"type": "op"}, headers={"X-Test": "redirect"}, mutating=False)
+
+        transport.post({"type": "op"}, headers={}, mutating=False)
+        self.assertEqual(len(set(peers)), 2)
+        transport.idle_timeout = -1.0
+        transport.post({"type": "op"}, headers={}, mutating=False)
+        self.assertEqual(len(set(peers)), 3)
+
+        transport.mutating_transport = mock.Mock()
+        transport.mutating_transport.post.return_value = b"<response/>"
+        transport.post({"type": "config"}, headers={}, mutating=True)
+        transport.mutating_transport.post.assert_called_once()
+        self.assertEqual(len(peers), 7)
+
+    def test_pooled_transport_delegates_to_urllib_when_a_proxy_applies(self):
+        profile = PanoramaProfile("pano.example", "admin", verify_ssl=False)
+        proxied_env = {"HTTPS_PROXY": "http://proxy.example:3128", "NO_PROXY": ""}
+        with mock.patch.dict("os.environ", proxied_env, clear=True):
+            transport = PooledXMLTransport(profile)
+        self.assertTrue(transport.proxied)
+        transport.mutating_transport = mock.Mock()
+        transport.mutating_transport.post.return_value = b"<response/>"
+        transport.mutating_transport.post_stream.return_value = "streamed"
+        with mock.patch.object(transport, "_exchange") as exchange:
+            transport.post({"type": "op"}, headers={}, mutating=False)
+            transport.post_stream({"type": "config"}, headers={}, consumer=bytes)
+        exchange.assert_not_called()
+        transport.mutating_transport.post.assert_called_once_with(
+            {"type": "op"}, headers={}, mutating=False
+        )
+        transport.mutating_transport.post_stream.assert_called_once()
+
+        bypass_env = {**proxied_env, "NO_PROXY": "pano.example"}
+        with mock.patch.dict("os.environ", bypass_env, clear=True):
+            self.assertFalse(PooledXMLTransport(profile).proxied)
+        with mock.patch.dict("os.environ", {}, clear=True):
+            self.assertFalse(PooledXMLTransport(profile).proxied)
+
+    def test_pooled_transport_retries_stale_sockets_on_a_fresh_connection(self):
+        profile = PanoramaProfile("127.0.0.1:1", "admin", use_ssl=False)
+        transport = PooledXMLTransport(profile)
+        stale = []
+        for _ in range(2):
+            connection = mock.Mock()
+            connection.request.side_effect = http.client.RemoteDisconnected("closed")
+            stale.append(connection)
+            transport._checkin(connection)
+        fresh = mock.Mock()
+        fresh.request.side_effect = ConnectionRefusedError()
+        with mock.patch.object(transport, "_new_connection", return_value=fresh) as new:
+            with self.assertRaises(TransportError):
+                transport.post({"type": "op"}, headers={}, mutating=False)
+        new.assert_called_once_with()
+        self.assertEqual(transport._idle, [])
+        for connection in (*stale, fresh):
+            connection.close.assert_called()
+
+    def test_async_reads_share_host_budget_and_retry_busy_answers(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0, "busy": 0}
+        peers = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with lock:
+                    peers.append(self.client_address)
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                    busy = state["busy"] == 0
+                    state["busy"] += busy
+                try:
+                    time.sleep(0.05)
+                    if b"REDIRECT" in body:
+                        self.send_response(302)
+                        self.send_header("Location", "http://elsewhere/api/")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    if busy:
+                        self.send_response(429)
+                        self.send_header("Retry-After", "0")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    payload = b'<response status="success"><result><entry name="x"/></result></response>'
+                    self.send_response(200)
+                    if b"A1%27" in body:
+                        self.send_header("Transfer-Encoding", "chunked")
+                        self.end_headers()
+                        for part in (payload[:20], payload[20:]):
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                        self.wfile.write(b"0\r\n\r\n")
+                        return
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with lock:
+                        state["active"] -= 1
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        profile = PanoramaProfile(
+            f"127.0.0.1:{server.server_address[1]}", "admin", use_ssl=False
+        )
+        reader = PanoramaReadClient(profile)
+        self.addCleanup(reader.close)
+        reader.asynchronous.budget = HostBudget(initial=2, maximum=2)
+        reader._api_key = "memory-only-test-key"
+
+        xpaths = [f"/config/shared/address/entry[@name='A{index}']" for index in range(6)]
+        results = dict(reader.fetch_xpaths(xpaths + xpaths[:2]))
+        self.assertEqual(set(results), set(xpaths))
+        for response in results.values():
+            self.assertIsNotNone(response.find("./result/entry[@name='x']"))
+        self.assertEqual(state["busy"], 1)
+        self.assertLessEqual(state["peak"], 2)
+        self.assertEqual(len(peers), 7)
+        self.assertLess(len(set(peers)), 7)
+        self.assertEqual(reader.asynchronous.budget.active, 0)
+
+        with self.assertRaisesRegex(TransportError, "redirect"):
+            reader.fetch_xpath("/config/shared/address/entry[@name='REDIRECT']")
+        self.assertIsNotNone(
+            reader.run_op_show(parse_xml("<show><system><info/></system></show>"))
+        )
+
+    def test_async_transport_retries_closed_keepalive_on_a_fresh_connection(self):
+        profile = PanoramaProfile("127.0.0.1:1", "admin", use_ssl=False)
+        transport = AsyncXMLTransport(profile)
+        writers = []
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            for _ in range(2):
+                reader = mock.Mock()
+                reader.at_eof.return_value = False
+                reader.readline = mock.AsyncMock(return_value=b"")
+                writer = mock.Mock()
+                writer.drain = mock.AsyncMock()
+                writers.append(writer)
+                transport._idle.append((time.monotonic(), loop, reader, writer))
+            with mock.patch(
+                "asyncio.open_connection", side_effect=ConnectionRefusedError()
+            ) as connect:
+                with self.assertRaises(TransportError):
+                    await transport.post({"type": "op"}, headers={})
+            connect.assert_called_once()
+
+        asyncio.run(scenario())
+        self.assertEqual(transport._idle, [])
+        for writer in writers:
+            writer.close.assert_called()
+
+    def test_host_budget_backs_off_on_busy_and_grows_after_prompt_answers(self):
+        budget = HostBudget(initial=1, maximum=4, slow_after=10.0)
+        lock = threading.Lock()
+        counters = {"active": 0, "peak": 0}
+
+        async def work():
+            await budget.acquire()
+            try:
+                with lock:
+                    counters["active"] += 1
+                    counters["peak"] = max(counters["peak"], counters["active"])
+                await asyncio.sleep(0.001)
+                with lock:
+                    counters["active"] -= 1
+            finally:
+                budget.release()
+
+        async def many():
+            await asyncio.gather(*(work() for _ in range(20)))
+
+        threads = [threading.Thread(target=asyncio.run, args=(many(),)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(counters["peak"], 1)
+        self.assertEqual(budget.active, 0)
+
+        budget.observe(0.1)
+        self.assertEqual(budget.limit, 2)
+        budget.observe(0.1)
+        budget.observe(0.1)
+        self.assertEqual(budget.limit, 3)
+        budget.observe(30.0)
+        self.assertEqual(budget.limit, 1)
+        self.assertEqual(budget.busy(None), 0.5)
+        self.assertEqual(budget.busy(None), 1.0)
+        self.assertEqual(budget.busy(120.0), 30.0)
+        self.assertEqual(budget.limit, 1)
+
     def test_mutating_transport_failure_is_never_retried(self):
         profile = PanoramaProfile("pano", "admin", verify_ssl=False)
         transport = UrllibXMLTransport(profile)
@@ -505,6 +964,67 @@ class SessionIntegrityTests(unittest.TestCase):
             self.assertEqual([item["id"] for item in catalog["sessions"]], [valid])
             self.assertEqual(catalog["issues"][0]["sessionId"], "session-corrupt")
 
+    def test_session_index_serves_queries_and_rebuilds_only_changed_sessions(self):
+        profile = PanoramaProfile("pano", "admin")
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host="pano",
+            panorama_username="admin",
+            mutations=(sample_mutation(),),
+            targets=("192.0.2.1",),
+            affected_device_groups=(),
+        )
+        with tempfile.TemporaryDirectory() as temporary:
+            root = Path(temporary)
+            store = SessionStore(root, enforce_acl=False)
+            first = store.create(patch, profile)
+            second = store.create(patch, profile)
+            store.transition(second, SessionState.WRITING_CANDIDATE)
+
+            self.assertEqual(
+                [item["session_id"] for item in store.find_by_target("192.0.2.1")],
+                sorted([first, second], reverse=True),
+            )
+            self.assertEqual(
+                [
+                    item["session_id"]
+                    for item in store.query_sessions(
+                        states=(SessionState.WRITING_CANDIDATE.value,),
+                        panorama_host="pano",
+                        touched_xpath=sample_mutation().target_xpath,
+                    )
+                ],
+                [second],
+            )
+            self.assertEqual(store.query_sessions(panorama_username="other"), [])
+
+            built: list[str] = []
+            original = store._history_session
+
+            def spy(session_id):
+                built.append(session_id)
+                return original(session_id)
+
+            with mock.patch.object(store, "_history_session", side_effect=spy):
+                store.history_catalog()
+                store.history_catalog()
+                self.assertEqual(sorted(built), sorted([first, second]))
+                built.clear()
+                store.transition(first, SessionState.WRITING_CANDIDATE)
+                catalog = store.history_catalog()
+                self.assertEqual(built, [first])
+            states = {item["id"]: item["state"] for item in catalog["sessions"]}
+            self.assertEqual(states[first], SessionState.WRITING_CANDIDATE.value)
+
+            shutil.rmtree(root / second)
+            (root / "index.sqlite3").write_bytes(b"not a database" * 100)
+            for suffix in ("-wal", "-shm"):
+                (root / f"index.sqlite3{suffix}").unlink(missing_ok=True)
+            fresh = SessionStore(root, enforce_acl=False)
+            self.assertEqual(
+                [item["session_id"] for item in fresh.list_sessions()], [first]
+            )
+
     def test_single_backup_preview_does_not_rehash_unrelated_snapshot(self):
         profile = PanoramaProfile("pano", "admin")
         patch = PatchSet.new(
@@ -524,7 +1044,8 @@ class SessionIntegrityTests(unittest.TestCase):
                 planning_running=parse_xml("<config><shared /></config>"),
             )
             manifest = store.load_manifest(session_id)
-            snapshot = root / session_id / manifest["snapshots"]["plan_running"]["file"]
+            digest = manifest["snapshots"]["plan_running"]["sha256"]
+            snapshot = root / "snapshot-blobs" / digest[:2] / f"{digest}.xml.gz"
             snapshot.write_text("tampered unrelated snapshot", encoding="utf-8")
             backup = manifest["entity_backups"][0]["file"]
 
@@ -532,6 +1053,59 @@ class SessionIntegrityTests(unittest.TestCase):
             with self.assertRaises(IntegrityError):
                 store.verify(session_id)
 
+    def test_snapshots_are_compressed_shared_blobs_pruned_by_reference_count(self):
+        profile = PanoramaProfile("pano", "admin")
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host="pano",
+            panorama_username="admin",
+            mutations=(sample_mutation(),),
+            targets=("192.0.2.1",),
+            affected_device_groups=(),
+        )
+        config = parse_xml(
+            "<config><shared><address>"
+            + "".join(
+                f'<entry name="A{index}"><ip-netmask>192.0.2.1/32</ip-netmask></entry>'
+                for index in range(200)
+            )
+            + "</address></shared></config>"
+        )
+        with tempfile.TemporaryDirectory() as temporary:
+            root = Path(temporary)
+            store = SessionStore(root, enforce_acl=False)
+            first = store.create(patch, profile, planning_running=config)
+            second = store.create(patch, profile, planning_running=config)
+            store.write_snapshot(second, "pre_running", config)
+
+            record = store.load_manifest(second)["snapshots"]["pre_running"]
+            blobs = list((root / "snapshot-blobs").glob("*/*.xml.gz"))
+            self.assertEqual([path.name for path in blobs], [f"{record['sha256']}.xml.gz"])
+            self.assertLess(record["compressed_bytes"], len(ET.tostring(config)) // 5)
+            self.assertFalse((root / second / "pre_running.xml").exists())
+            self.assertEqual(
+                len(store.load_snapshot(second, "pre_running").find("./shared/address")),
+                200,
+            )
+            self.assertEqual(store.snapshot_references(), {record["sha256"]: 2})
+            self.assertEqual(
+                store.resolve_download(second, record["file"]), blobs[0]
+            )
+            with zipfile.ZipFile(io.BytesIO(store.bundle_bytes(second))) as archive:
+                self.assertIn(f"{second}/snapshots/pre_running.xml.gz", archive.namelist())
+
+            replacement = parse_xml("<config><shared /></config>")
+            for session_id in (first, second):
+                for label in ("plan_running", "pre_running"):
+                    if label in store.load_manifest(session_id)["snapshots"]:
+                        store.write_snapshot(session_id, label, replacement)
+            self.assertEqual(store.prune_snapshots()["removed"], [])
+            result = store.prune_snapshots(grace_seconds=0)
+            self.assertEqual(result["removed"], [record["sha256"]])
+            self.assertFalse(blobs[0].exists())
+            store.verify(first)
+            store.verify(second)
+
     def test_restore_source_session_list_is_backward_compatible(self):
         patch = PatchSet.new(
             kind="restore",
@@ -642,6 +1216,121 @@ class SessionIntegrityTests(unittest.TestCase):
             with self.assertRaises(IntegrityError):
                 SessionStore(root, enforce_acl=False).verify(session_id)
 
+    @mock.patch("panos_toolbox.sessions.JOURNAL_CHECKPOINT_INTERVAL", 4)
+    def test_journal_head_is_tracked_from_checkpoint_and_appended_tail(self):
+        profile = PanoramaProfile("pano", "admin")
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host="pano",
+            panorama_username="admin",
+            mutations=(sample_mutation(),),
+            targets=("192.0.2.1",),
+            affected_device_groups=(),
+        )
+        with tempfile.TemporaryDirectory() as temporary:
+            root = Path(temporary)
+            store = SessionStore(root, enforce_acl=False)
+            session_id = store.create(patch, profile)
+            for index in range(10):
+                store.append_event(session_id, "operation-ok", {"index": index})
+            directory = root / session_id
+            log_path = directory / "journal" / "events.jsonl"
+            self.assertTrue((directory / "journal" / "head.json").is_file())
+
+            scanned = []
+            original_scan = SessionStore._scan_journal
+
+            def recording_scan(self, data, start, events=None):
+                scanned.append((start.count, len(data)))
+                return original_scan(self, data, start, events)
+
+            with mock.patch.object(SessionStore, "_scan_journal", recording_scan):
+                reopened = SessionStore(root, enforce_acl=False)
+                event = reopened.append_event(session_id, "operation-ok", {"index": 10})
+                reopened.append_event(session_id, "operation-ok", {"index": 11})
+                manifest = reopened.load_manifest(session_id, verify=False)
+            self.assertEqual(event["sequence"], 12)
+            self.assertEqual(manifest["journal_count"], 13)
+            # Checkpoint at event 8: only events 9..11 are read, then nothing.
+            self.assertEqual([count for count, _size in scanned], [8])
+            self.assertLess(scanned[0][1], log_path.stat().st_size // 2)
+            self.assertEqual(len(reopened.load_journal(session_id)), 13)
+
+            lines = log_path.read_bytes().splitlines(keepends=True)
+            lines[1] = lines[1].replace(b"operation-ok", b"operation-KO")
+            log_path.write_bytes(b"".join(lines))
+            trusting = SessionStore(root, enforce_acl=False)
+            self.assertEqual(
+                trusting.load_manifest(session_id, verify=False)["journal_count"], 13
+            )
+            with self.assertRaises(IntegrityError):
+                trusting.verify(session_id)
+
+            (directory / "journal" / "head.json").write_bytes(b"{}")
+            with self.assertRaises(IntegrityError):
+                SessionStore(root, enforce_acl=False).load_manifest(
+                    session_id, verify=False
+                )
+
+    def test_journal_group_commit_coalesces_fsyncs_and_flushes_before_writes(self):
+        profile = PanoramaProfile("pano", "admin")
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host="pano",
+            panorama_username="admin",
+            mutations=(sample_mutation(),),
+            targets=("192.0.2.1",),
+            affected_device_groups=(),
+        )
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary), enforce_acl=False)
+            session_id = store.create(patch, profile)
+            log_path = Path(temporary) / session_id / "journal" / "events.jsonl"
+
+            def logged() -> int:
+                return len(log_path.read_bytes().splitlines())
+
+            seen_by_panorama = []
+
+            class JournalCheckingTransport(RecordingTransport):
+                def post(self, params, *, headers, mutating):
+                    seen_by_panorama.append(logged())
+                    return super().post(params, headers=headers, mutating=mutating)
+
+            transport = JournalCheckingTransport()
+            transport.queue('<response status="success"><result /></response>')
+            reader = PanoramaReadClient(profile, transport)
+            with mock.patch("panos_toolbox.sessions.os.fsync") as fsync:
+                with store.journal_group_commit(
+                    session_id, max_events=10, max_delay=60.0
+                ) as flush:
+                    for index in range(5):
+                        store.append_event(session_id, "operation-ok", {"index": index})
+                    self.assertEqual(fsync.call_count, 0)
+                    self.assertEqual(logged(), 1)
+                    reader.mutation_barriers.append(flush)
+                    reader._post({"type": "config", "action": "set"}, mutating=True)
+                    self.assertEqual(seen_by_panorama, [6])
+                    self.assertEqual(fsync.call_count, 1)
+
+                    for index in range(3):
+                        store.append_event(session_id, "operation-ok", {"index": index})
+                    manifest = store.load_manifest(session_id, verify=False)
+                    self.assertEqual(manifest["journal_count"], 9)
+                    self.assertEqual(fsync.call_count, 2)
+
+                    for index in range(10):
+                        store.append_event(session_id, "operation-ok", {"index": index})
+                    self.assertEqual(fsync.call_count, 3)
+                    store.append_event(session_id, "operation-ok", {"index": 10})
+                self.assertEqual(fsync.call_count, 4)
+            self.assertEqual(logged(), 20)
+            store.verify(session_id)
+            self.assertEqual(
+                [event["sequence"] for event in store.load_journal(session_id)],
+                list(range(1, 21)),
+            )
+
     def test_default_store_imports_redirected_documents_sessions_locally(self):
         profile = PanoramaProfile("pano", "admin")
         patch = PatchSet.new(
@@ -723,6 +1412,50 @@ class SessionIntegrityTests(unittest.TestCase):
             self.assertTrue(any(name.startswith(prefix + "entities/") for name in names))
             self.assertTrue(any(name.startswith(prefix + "journal/") for name in names))
 
+    def test_session_bundle_streams_in_chunks_and_checks_hashes_on_the_fly(self):
+        profile = PanoramaProfile("pano", "admin")
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host="pano",
+            panorama_username="admin",
+            mutations=(sample_mutation(),),
+            targets=("192.0.2.1",),
+            affected_device_groups=(),
+        )
+        with tempfile.TemporaryDirectory() as temporary:
+            root = Path(temporary)
+            store = SessionStore(root, enforce_acl=False)
+            session_id = store.create(
+                patch,
+                profile,
+                planning_running=parse_xml("<config><shared /></config>"),
+            )
+            chunks = list(store.iter_bundle(session_id, chunk_size=64))
+            self.assertGreater(len(chunks), 3)
+            target = io.BytesIO()
+            store.write_bundle(session_id, target)
+            self.assertEqual(target.getvalue(), b"".join(chunks))
+            with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+                self.assertIsNone(archive.testzip())
+                self.assertIn(
+                    f"{session_id}/snapshots/plan_running.xml.gz", archive.namelist()
+                )
+
+            manifest = store.load_manifest(session_id)
+            backup = root / session_id / manifest["entity_backups"][0]["file"]
+            backup.write_text(backup.read_text(encoding="utf-8") + " ", encoding="utf-8")
+            sent = bytearray()
+            stream = store.iter_bundle(session_id, chunk_size=64)
+            with self.assertRaises(IntegrityError):
+                for chunk in stream:
+                    sent.extend(chunk)
+            with self.assertRaises(zipfile.BadZipFile):
+                zipfile.ZipFile(io.BytesIO(bytes(sent)))
+
+            backup.unlink()
+            with self.assertRaises(IntegrityError):
+                store.iter_bundle(session_id)
+
     def test_restore_history_enumeration_fails_closed_on_corrupt_session(self):
         with tempfile.TemporaryDirectory() as temporary:
             root = Path(temporary)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import tempfile
 import unittest
 import xml.etree.ElementTree as ET
+from unittest import mock
 from pathlib import Path
 
+from panos_toolbox import engine
 from panos_toolbox.cleaner_adapter import build_cleanup_patchset
-from panos_toolbox.client import JobResult
+from panos_toolbox.client import JobResult, PanoramaWriteClient
 from panos_toolbox.diffing import compare_configs
 from panos_toolbox.engine import (
     _cleanup_candidate_replan_conflicts,
@@ -49,7 +52,13 @@ from panos_toolbox.restore import (
     select_history,
 )
 from panos_toolbox.sessions import SessionStore
-from panos_toolbox.xmlutil import find_xpath, fingerprint_element, parent_xpath, parse_xml
+from panos_toolbox.xmlutil import (
+    ConfigIndex,
+    find_xpath,
+    fingerprint_element,
+    parent_xpath,
+    parse_xml,
+)
 
 
 class FakeLease:
@@ -168,6 +177,36 @@ class StatefulWriter:
         return JobResult(job_id, "FIN", "OK", "done")
 
 
+class MultiConfigWriter(StatefulWriter):
+    multi_config_batch_size = 50
+    operation_batches = PanoramaWriteClient.operation_batches
+
+    def __init__(self, reader, fail_on_operation=None):
+        super().__init__(reader, fail_on_operation)
+        self.batches = []
+
+    def apply_operations(self, operations):
+        # Mirror PAN-OS all-or-nothing semantics on the local candidate.
+        snapshot = copy.deepcopy(self.reader.candidate)
+        self.batches.append(len(operations))
+        try:
+            for operation in operations:
+                self.apply_operation(operation)
+        except ValidationError:
+            self.reader.candidate = snapshot
+            raise
+        return [ET.Element("response", {"status": "success"}) for _ in operations]
+
+
+class PartialMultiConfigWriter(MultiConfigWriter):
+    def apply_operations(self, operations):
+        # A batch that fails part-way without reverting its earlier steps.
+        self.batches.append(len(operations))
+        for operation in operations:
+            self.apply_operation(operation)
+        return [ET.Element("response", {"status": "success"}) for _ in operations]
+
+
 class FailedCommitWriter(StatefulWriter):
     def commit(self, **kwargs):
         self.events.append("commit")
@@ -267,6 +306,85 @@ class EngineTests(unittest.TestCase):
             self.assertEqual(result.state, SessionState.CANDIDATE_APPLIED)
             self.assertIsNone(find_xpath(reader2.candidate, "/config/shared/address/entry[@name='A']"))
 
+    def test_opt_in_multi_config_batches_keep_operation_events_and_rollback(self):
+        profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
+        names = ("A", "B", "C")
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary), enforce_acl=False)
+            reader = StatefulReader(profile, config(*names))
+            session_id, _ = self.make_session(
+                store,
+                profile,
+                tuple(mutation(index, name) for index, name in enumerate(names, 1)),
+            )
+            writer = MultiConfigWriter(reader)
+            updates = []
+            result = apply_candidate(
+                store,
+                session_id,
+                reader,
+                writer,
+                progress_callback=lambda value, message, detail: updates.append(detail),
+            )
+            self.assertEqual(result.state, SessionState.CANDIDATE_APPLIED)
+            self.assertEqual(writer.batches, [3])
+            self.assertEqual(
+                sum(
+                    1
+                    for detail in updates
+                    if detail and detail.get("event") == "operation-ok"
+                ),
+                3,
+            )
+            performance = next(
+                event
+                for event in reversed(store.load_journal(session_id))
+                if event["event_type"] == "CANDIDATE_PERFORMANCE"
+            )["details"]
+            self.assertEqual(performance["write_requests"], 1)
+            self.assertEqual(performance["completed_operations"], 3)
+
+            failing = StatefulReader(profile, config(*names))
+            session2, _ = self.make_session(
+                store,
+                profile,
+                tuple(mutation(index, name) for index, name in enumerate(names, 1)),
+            )
+            with self.assertRaises(ValidationError):
+                apply_candidate(
+                    store, session2, failing, MultiConfigWriter(failing, fail_on_operation=2)
+                )
+            for name in names:
+                self.assertIsNotNone(
+                    find_xpath(failing.candidate, f"/config/shared/address/entry[@name='{name}']")
+                )
+            self.assertEqual(store.load_manifest(session2)["state"], "FAILED")
+
+            partial = StatefulReader(profile, config(*names))
+            session3, _ = self.make_session(
+                store,
+                profile,
+                tuple(mutation(index, name) for index, name in enumerate(names, 1)),
+            )
+            with self.assertRaises(ValidationError):
+                apply_candidate(
+                    store,
+                    session3,
+                    partial,
+                    PartialMultiConfigWriter(partial, fail_on_operation=2),
+                )
+            for name in names:
+                self.assertIsNotNone(
+                    find_xpath(partial.candidate, f"/config/shared/address/entry[@name='{name}']")
+                )
+            rolled_back = [
+                event["details"]["mutation"]["entity_key"]
+                for event in store.load_journal(session3)
+                if event["event_type"] == "ROLLBACK_MUTATION_START"
+            ]
+            self.assertEqual(len(rolled_back), 1)
+            self.assertEqual(store.load_manifest(session3)["state"], "FAILED")
+
     def test_server_snapshot_filename_respects_panorama_32_character_limit(self):
         session_id = "session-20260806T110947Z-b68dfb0b"
         filename = server_snapshot_filename(session_id)
@@ -304,48 +422,88 @@ class EngineTests(unittest.TestCase):
             self.assertEqual(operation_updates[-1]["completedOperations"], 2)
             self.assertEqual(operation_updates[-1]["totalOperations"], 2)
 
-    def test_candidate_reuses_proven_plan_snapshots_and_reads_full_config_once(self):
+    def _apply_proven_plan(self, store, profile, reader):
+        patch = PatchSet.new(
+            kind="cleanup",
+            panorama_host=profile.host,
+            panorama_username=profile.username,
+            mutations=(mutation(1, "A"), mutation(2, "B")),
+            targets=("192.0.2.1", "192.0.2.2"),
+            affected_device_groups=("DG-A",),
+        )
+        native = reader.change_summary()
+        session_id = store.create(
+            patch,
+            profile,
+            planning_running=reader.running,
+            planning_candidate=reader.candidate,
+            diff_summary=compare_configs(reader.running, reader.candidate, native),
+        )
+        reader.events.clear()
+        result = apply_candidate(store, session_id, reader, StatefulWriter(reader))
+        self.assertEqual(result.state, SessionState.CANDIDATE_APPLIED)
+        journal = store.load_journal(session_id)
+        verification, performance = (
+            next(
+                event["details"]
+                for event in reversed(journal)
+                if event["event_type"] == event_type
+            )
+            for event_type in ("POSTCONDITION_VERIFICATION", "CANDIDATE_PERFORMANCE")
+        )
+        return session_id, verification, performance
+
+    def test_candidate_reuses_proven_plan_snapshots_and_verifies_touched_xpaths_only(self):
         profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
         with tempfile.TemporaryDirectory() as temporary:
             store = SessionStore(Path(temporary), enforce_acl=False)
-            reader = StatefulReader(profile, config("A", "B"))
-            patch = PatchSet.new(
-                kind="cleanup",
-                panorama_host=profile.host,
-                panorama_username=profile.username,
-                mutations=(mutation(1, "A"), mutation(2, "B")),
-                targets=("192.0.2.1", "192.0.2.2"),
-                affected_device_groups=("DG-A",),
+            reader = StatefulReader(
+                profile, config("A", "B", *(f"KEEP-{index}" for index in range(20)))
             )
-            native = reader.change_summary()
-            session_id = store.create(
-                patch,
-                profile,
-                planning_running=reader.running,
-                planning_candidate=reader.candidate,
-                diff_summary=compare_configs(
-                    reader.running, reader.candidate, native
-                ),
+
+            session_id, verification, performance = self._apply_proven_plan(
+                store, profile, reader
             )
-            reader.events.clear()
 
-            result = apply_candidate(
-                store, session_id, reader, StatefulWriter(reader)
+            self.assertEqual(
+                [event for event in reader.events if event.startswith("fetch:")], []
+            )
+            self.assertEqual(verification["planned_mode"], "targeted")
+            self.assertEqual(verification["mode"], "targeted")
+            self.assertEqual(verification["xpath_reads"], 2)
+            self.assertEqual(verification["full_config_reads_avoided"], 1)
+            self.assertEqual(performance["full_config_reads"], 0)
+            self.assertEqual(performance["postcondition_mode"], "targeted")
+            self.assertGreater(performance["targeted_xpath_reads"], 2)
+            self.assertTrue(performance["plan_snapshots_reused"])
+            # The spliced post-apply tree is exactly the live candidate.
+            self.assertEqual(
+                fingerprint_element(store.load_snapshot(session_id, "post_candidate")),
+                fingerprint_element(reader.candidate),
             )
 
-            self.assertEqual(result.state, SessionState.CANDIDATE_APPLIED)
+    def test_candidate_verification_downloads_once_when_cheaper_than_xpath_reads(self):
+        profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary), enforce_acl=False)
+            reader = StatefulReader(profile, config("A", "B"))
+
+            with mock.patch.object(engine, "FULL_CONFIG_FIXED_COST", 0.0):
+                _session_id, verification, performance = self._apply_proven_plan(
+                    store, profile, reader
+                )
+
             self.assertEqual(
                 [event for event in reader.events if event.startswith("fetch:")],
                 ["fetch:candidate"],
             )
-            performance = next(
-                event
-                for event in reversed(store.load_journal(session_id))
-                if event["event_type"] == "CANDIDATE_PERFORMANCE"
-            )["details"]
+            self.assertEqual(verification["mode"], "full")
+            self.assertEqual(verification["full_config_reads_avoided"], 0)
+            self.assertLess(
+                verification["estimated_full_cost"],
+                verification["estimated_targeted_cost"],
+            )
             self.assertEqual(performance["full_config_reads"], 1)
-            self.assertGreater(performance["targeted_xpath_reads"], 0)
-            self.assertTrue(performance["plan_snapshots_reused"])
 
     def test_external_cli_execution_requires_complete_live_postconditions(self):
         profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
@@ -459,6 +617,41 @@ class EngineTests(unittest.TestCase):
             self.assertEqual(push_updates[-1][0], 100)
             self.assertIn("stage-finished", push_result["phase_timeline_seconds"])
 
+    def test_snapshot_compaction_runs_after_locks_and_never_fails_the_commit(self):
+        profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary), enforce_acl=False, delta_snapshots=True)
+            reader = StatefulReader(profile, config("A"))
+            session_id, _ = self.make_session(store, profile, (mutation(1, "A"),))
+            writer = StatefulWriter(reader)
+            apply_candidate(store, session_id, reader, writer)
+            seen = []
+
+            def failing_compaction(compacted_id):
+                seen.append(list(writer.events))
+                raise OSError("disk full")
+
+            with mock.patch.object(store, "compact_snapshots", side_effect=failing_compaction):
+                commit_session(
+                    store, session_id, reader, writer, allow_unisolated_commit=True
+                )
+            self.assertEqual(store.load_manifest(session_id)["state"], "COMMITTED")
+            self.assertEqual(len(seen), 1)
+            locks = [event for event in seen[0] if event.startswith("lock:")]
+            unlocks = [event for event in seen[0] if event.startswith("unlock:")]
+            self.assertTrue(seen[0][-1].startswith("unlock:"))
+            self.assertEqual(sorted(locks), sorted(f"lock:{event[7:]}" for event in unlocks))
+            failures = [
+                event["details"]
+                for event in store.load_journal(session_id)
+                if event["event_type"] == "SNAPSHOT_COMPACTION_FAILED"
+            ]
+            self.assertEqual(failures, [{"error": "OSError: disk full"}])
+
+            compacted = store.compact_finished_session(session_id)
+            self.assertTrue(compacted["labels"])
+            store.verify(session_id)
+
     def test_partial_apply_blocks_commit_when_candidate_contains_outside_change(self):
         profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
         with tempfile.TemporaryDirectory() as temporary:
@@ -860,6 +1053,93 @@ class RestorePrimitiveTests(unittest.TestCase):
             ("A", "B", "NEW"),
         )
 
+    def test_streamed_fingerprint_keeps_stored_canonical_repr_format(self):
+        element = parse_xml(
+            "<entry name=\"it's\" admin=\"x\" b='\"q\"'> żółw\\ "
+            "<member>A</member><static><member /></static></entry>"
+        )
+
+        def canonical(node):
+            attributes = tuple(
+                sorted(
+                    (key, value)
+                    for key, value in node.attrib.items()
+                    if key not in {"admin", "dirtyId", "time", "last-modified"}
+                )
+            )
+            children = tuple(canonical(child) for child in node)
+            return node.tag, attributes, (node.text or "").strip(), children
+
+        expected = hashlib.sha256(repr(canonical(element)).encode("utf-8")).hexdigest()
+        self.assertEqual(fingerprint_element(element), expected)
+        single = parse_xml('<entry name="A"><member>B</member></entry>')
+        self.assertEqual(
+            fingerprint_element(single),
+            hashlib.sha256(repr(canonical(single)).encode("utf-8")).hexdigest(),
+        )
+
+    def test_config_index_matches_find_xpath_and_follows_tree_edits(self):
+        tree = parse_xml(
+            "<config><shared><address>"
+            '<entry name="A"><ip-netmask>192.0.2.1/32</ip-netmask></entry>'
+            '<entry name="A"><ip-netmask>192.0.2.9/32</ip-netmask></entry>'
+            '<entry name="B" />'
+            "</address><address-group>"
+            '<entry name="G"><static><member>A</member><member> B </member></static></entry>'
+            "</address-group></shared></config>"
+        )
+        index = ConfigIndex(tree)
+        for xpath in (
+            "/config/shared/address/entry[@name='A']",
+            "/config/shared/address/entry[@name='B']",
+            "/config/shared/address/entry[@name='missing']",
+            "/config/shared/address-group/entry[@name='G']/static/member[text()='B']",
+            "/config/shared/address",
+            "/config/devices/entry[@name='localhost.localdomain']",
+        ):
+            self.assertIs(index.find(xpath), find_xpath(tree, xpath))
+        container = index.find("/config/shared/address")
+        self.assertEqual(index.entry_names(container), ("A", "A", "B"))
+        self.assertEqual(index.entry_positions(container), {"A": 0, "B": 2})
+
+        operations = (
+            MutationOperation(
+                MutationAction.DELETE, "/config/shared/address/entry[@name='B']"
+            ),
+            MutationOperation(
+                MutationAction.SET, "/config/shared/address", '<entry name="C" />'
+            ),
+            MutationOperation(
+                MutationAction.MOVE,
+                "/config/shared/address/entry[@name='C']",
+                where="top",
+            ),
+        )
+        group_xpath = "/config/shared/address-group/entry[@name='G']"
+        group_fingerprint = index.fingerprint(group_xpath)
+        root_fingerprint = index.fingerprint_of(tree)
+        for operation in operations:
+            apply_operation_to_tree(tree, operation, index=index)
+        self.assertEqual(index.fingerprint(group_xpath), group_fingerprint)
+        self.assertNotEqual(index.fingerprint_of(tree), root_fingerprint)
+        self.assertEqual(index.fingerprint_of(tree), fingerprint_element(tree))
+        self.assertIsNone(index.find("/config/shared/address/entry[@name='B']"))
+        self.assertIs(
+            index.find("/config/shared/address/entry[@name='C']"),
+            find_xpath(tree, "/config/shared/address/entry[@name='C']"),
+        )
+        self.assertEqual(index.entry_names(container), ("C", "A", "A"))
+        with self.assertRaises(ValidationError):
+            apply_operation_to_tree(
+                tree,
+                MutationOperation(
+                    MutationAction.SET,
+                    "/config/shared/address",
+                    '<entry name="C"><fqdn>example.com</fqdn></entry>',
+                ),
+                index=index,
+            )
+
     def test_restore_safe_already_conflict_and_rule_order_anchor(self):
         original_mutation = mutation(1, "A")
         patch = PatchSet.new(
@@ -4,9 +4,11 @@ import subprocess
 import copy
 import tempfile
 import unittest
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from unittest import mock
 
+from panos_toolbox.cleaner_adapter import _legacy_root
 from panos_toolbox.diffing import compare_configs
 from panos_toolbox.errors import SessionError
 from panos_toolbox.models import (
@@ -21,12 +23,13 @@ from panos_toolbox.profile import PanoramaProfile
 from panos_toolbox.service import (
     PingObservation,
     _ping_one,
+    ping_ips,
     plan_cleanup_session,
     plan_restore_session,
 )
 from panos_toolbox.sessions import SessionStore
 from panos_toolbox.web import _wire_cleanup_plan
-from panos_toolbox.xmlutil import parse_xml
+from panos_toolbox.xmlutil import find_xpath, fingerprint_element, parse_xml
 
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
@@ -78,6 +81,32 @@ class IcmpClassificationTests(unittest.TestCase):
         self.assertEqual(_ping_one("192.0.2.1", 1000).status, "NO_REPLY")
 
 
+    def test_socket_engine_results_are_used_and_ping_covers_the_rest(self):
+        _legacy_root()
+        from panorama_cleanup.models import PingResult, PingStatus
+
+        probed = {
+            "192.0.2.1": PingResult("192.0.2.1", PingStatus.REPLIED, "Odebrano odpowiedź ICMP", 0.01),
+            "192.0.2.2": PingResult("192.0.2.2", PingStatus.NO_REPLY, "Brak odpowiedzi ICMP", 1.0),
+        }
+        run = mock.Mock(return_value=subprocess.CompletedProcess(["ping"], 1, stdout=b"", stderr=b""))
+        with mock.patch("panorama_cleanup.icmp.probe_echo", return_value=probed), mock.patch(
+            "panos_toolbox.service.subprocess.run", run
+        ), mock.patch.dict("os.environ", {"PANORAMA_PASSWORD": "secret"}):
+            result = ping_ips(["192.0.2.1", "192.0.2.2", "192.0.2.3"], bypass=False)
+
+        self.assertEqual(result["192.0.2.1"].status, "REPLIED")
+        self.assertEqual(result["192.0.2.2"].status, "NO_REPLY")
+        self.assertEqual(result["192.0.2.3"].status, "NO_REPLY")
+        self.assertEqual(
+            ["192.0.2.3"],
+            sorted(call.args[0][-1] for call in run.mock_calls),
+        )
+        self.assertTrue(
+            all("PANORAMA_PASSWORD" not in call.kwargs["env"] for call in run.mock_calls)
+        )
+
+
 class InformationalDiffTests(unittest.TestCase):
     def test_native_semantic_mismatch_never_blocks(self):
         running = parse_xml("<config><shared /></config>")
@@ -233,6 +262,29 @@ class PlanningReportTests(unittest.TestCase):
             self.assertEqual(wire["addresses"][0]["lastHitStatus"], "STALE")
 
 
+    def test_last_hit_requests_rules_of_one_rulebase_in_bulk(self):
+        reader = PlanningReader(self.fixture())
+        commands = []
+        answer = reader.run_op_show
+
+        def run_op_show(command):
+            commands.append(ET.tostring(command, encoding="unicode"))
+            return answer(command)
+
+        reader.run_op_show = run_op_show
+        names = ("SEC-B-ONLY", "SEC-BATCH", "SEC-MIX")
+        with tempfile.TemporaryDirectory() as temporary:
+            store = SessionStore(Path(temporary), enforce_acl=False)
+            result = plan_cleanup_session(
+                store, reader, (), policies=names, no_ping=True
+            )
+            records = store.load_manifest(result["session_id"])["last_hit"]["records"]
+        self.assertEqual(sorted(record["rule"]["name"] for record in records), list(names))
+        self.assertTrue(
+            any(all(name in command for name in names) for command in commands)
+        )
+
+
 class RestoreSessionSelectionTests(unittest.TestCase):
     @staticmethod
     def address_mutation(index, name, cause, component, depends=()):
@@ -430,6 +482,144 @@ class RestoreSessionSelectionTests(unittest.TestCase):
             )
             self.assertIn(">A<", restore.mutations[0].after_xml or "")
 
+    def test_restore_plans_identically_from_delta_snapshots(self):
+        profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
+        dg = "/config/devices/entry[@name='localhost.localdomain']/device-group"
+        group_xpath = f"{dg}/entry[@name='branch']/address-group/entry[@name='G']"
+        member_xpath = f"{group_xpath}/static/member[text()='A']"
+        member = Mutation(
+            mutation_id="mutation-00001",
+            component_id="component-member",
+            entity_type="group-member",
+            entity_key="branch/G:A",
+            target_xpath=member_xpath,
+            before_xml="<member>A</member>",
+            after_xml=None,
+            forward=(MutationOperation(MutationAction.DELETE, member_xpath),),
+            inverse=(
+                MutationOperation(
+                    MutationAction.SET,
+                    f"{group_xpath}/static",
+                    element="<member>A</member>",
+                ),
+            ),
+            causes=("192.0.2.1",),
+        )
+        filler = "".join(
+            f'<entry name="F{index}"><ip-netmask>198.51.100.{index}/32</ip-netmask></entry>'
+            for index in range(200)
+        )
+        rules = "".join(
+            f'<entry name="R{index}"><source><member>F{index}</member></source>'
+            "<destination><member>any</member></destination></entry>"
+            for index in range(50)
+        )
+
+        def config(members):
+            return parse_xml(
+                "<config><devices><entry name='localhost.localdomain'>"
+                "<deviceconfig><setting><management>"
+                "<ancestor-objects-take-precedence>yes</ancestor-objects-take-precedence>"
+                "</management></setting></deviceconfig><device-group>"
+                "<entry name='hq'><pre-rulebase><security><rules>" + rules
+                + "</rules></security></pre-rulebase></entry>"
+                "<entry name='branch'><parent-dg>hq</parent-dg><address>"
+                '<entry name="B"><ip-netmask>192.0.2.2/32</ip-netmask></entry>'
+                "</address><address-group><entry name='G'><static>" + members
+                + "</static></entry></address-group></entry>"
+                "</device-group></entry></devices><shared><address>"
+                '<entry name="A"><ip-netmask>192.0.2.1/32</ip-netmask></entry>'
+                '<entry name="B"><ip-netmask>192.0.2.9/32</ip-netmask></entry>'
+                + filler + "</address></shared></config>"
+            )
+
+        before = config("<member>A</member><member>B</member>")
+        current = config("<member>B</member>")
+        results = []
+        for delta in (False, True):
+            with tempfile.TemporaryDirectory() as temporary:
+                store = SessionStore(
+                    Path(temporary), enforce_acl=False, delta_snapshots=delta
+                )
+                patch = PatchSet.new(
+                    kind="cleanup",
+                    panorama_host=profile.host,
+                    panorama_username=profile.username,
+                    mutations=(member,),
+                    targets=member.causes,
+                    affected_device_groups=("branch",),
+                )
+                source_id = store.create(
+                    patch,
+                    profile,
+                    planning_running=before,
+                    planning_candidate=before,
+                )
+                store.write_snapshot(source_id, "pre_candidate", before)
+                store.record_candidate_application(
+                    source_id,
+                    applied_mutation_ids=(member.mutation_id,),
+                    skipped_components=(),
+                )
+                for state in (
+                    SessionState.WRITING_CANDIDATE,
+                    SessionState.CANDIDATE_APPLIED,
+                    SessionState.COMMITTING,
+                    SessionState.COMMITTED,
+                ):
+                    store.transition(source_id, state)
+                self.assertNotIn(
+                    "projection",
+                    store.load_manifest(source_id)["snapshots"]["pre_candidate"],
+                )
+                compacted = store.compact_finished_session(source_id)
+                if delta:
+                    self.assertIn("pre_candidate", compacted["labels"])
+                else:
+                    self.assertIsNone(compacted)
+                snapshots = store.load_manifest(source_id)["snapshots"]
+                record = snapshots["pre_candidate"]
+                if delta:
+                    self.assertEqual(record["projection"], "delta")
+                    self.assertEqual(
+                        record["source_semantic_sha256"], fingerprint_element(before)
+                    )
+                    self.assertLess(
+                        record["compressed_bytes"], record["source_compressed_bytes"] / 4
+                    )
+                    self.assertEqual(
+                        {item.get("projection") for item in snapshots.values()},
+                        {"delta"},
+                    )
+                    with self.assertRaises(SessionError):
+                        store.load_snapshot(source_id, "plan_candidate")
+                    projected = store.load_snapshot(
+                        source_id, "pre_candidate", allow_delta=True
+                    )
+                    self.assertIsNotNone(find_xpath(projected, group_xpath))
+                    self.assertIsNone(
+                        find_xpath(projected, f"{dg}/entry[@name='hq']/pre-rulebase")
+                    )
+                    self.assertEqual(
+                        projected.findtext(".//entry[@name='branch']/parent-dg"), "hq"
+                    )
+                else:
+                    self.assertNotIn("projection", record)
+                store.verify(source_id)
+
+                result = plan_restore_session(
+                    store, PlanningReader(current), ip="192.0.2.1"
+                )
+                restore = store.load_patchset(result["session_id"])
+                results.append(
+                    [
+                        (item.entity_type, item.target_xpath, item.after_xml)
+                        for item in restore.mutations
+                    ]
+                )
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(results[0])
+
     def test_committed_restore_does_not_undo_new_candidate_cleanup_state(self):
         profile = PanoramaProfile("pano", "admin", api_max_stage=ApiStage.PUSH)
         source_mutation = self.address_mutation(
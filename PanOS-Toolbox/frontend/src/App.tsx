@@ -16,6 +16,7 @@ import type {
   EntityDependency,
   ExecutionJob,
   HistoryCatalog,
+  HistoryQuery,
   RestorePlan,
   SavedProfile,
   ToolboxNotice,
@@ -55,6 +56,10 @@ type StageBusy = "candidate" | "review" | "commit" | "push" | "download" | null;
 type RestoreBusy = "plan" | "candidate" | "commit" | "push" | "download" | null;
 type DemoModule = typeof import("./demo");
 
+// The backend filters and pages history through its session index; the GUI
+// only ever holds the pages the operator has scrolled to.
+const HISTORY_PAGE_SIZE = 100;
+
 const wait = (milliseconds: number) => new Promise((resolve) => window.setTimeout(resolve, milliseconds));
 
 async function waitForExecutionJob(initial: ExecutionJob, onUpdate: (job: ExecutionJob) => void): Promise<ExecutionJob & { session: ToolboxSession }> {
@@ -162,6 +167,7 @@ export default function App() {
   const [sessions, setSessions] = useState<ToolboxSession[]>([]);
   const [selectedSession, setSelectedSession] = useState<ToolboxSession | null>(null);
   const [historyCatalog, setHistoryCatalog] = useState<HistoryCatalog | null>(null);
+  const [historyQuery, setHistoryQuery] = useState<HistoryQuery>({});
   const [returnAfterConnect, setReturnAfterConnect] = useState<ViewId | null>(null);
 
   const [restoreQuery, setRestoreQuery] = useState("");
@@ -638,12 +644,12 @@ export default function App() {
     } catch (auditError) { setError(getErrorMessage(auditError)); } finally { setMainBusy(null); }
   };
 
-  async function refreshHistory() {
+  async function refreshHistory(query: HistoryQuery = historyQuery) {
     setMainBusy("history"); setError(null);
     try {
       const catalog = demoMode && demoApi
         ? { generatedAt: new Date().toISOString(), storage: "Tryb demo", sessionCount: demoApi.demoSessions.length, mutationCount: 0, issues: [], sessions: demoApi.demoSessions }
-        : await api.history();
+        : await api.history({ ...query, limit: HISTORY_PAGE_SIZE });
       setHistoryCatalog(catalog);
       setSessions(catalog.sessions);
       const current = selectedSession ? catalog.sessions.find((session) => session.id === selectedSession.id) : undefined;
@@ -651,6 +657,23 @@ export default function App() {
     } catch (historyError) { setError(getErrorMessage(historyError)); } finally { setMainBusy(null); }
   }
 
+  const filterHistory = (query: HistoryQuery) => {
+    setHistoryQuery(query);
+    // Demo sessions are filtered by the page itself.
+    if (!demoMode) void refreshHistory(query);
+  };
+
+  async function loadMoreHistory() {
+    const cursor = historyCatalog?.nextCursor;
+    if (!cursor || demoMode) return;
+    setMainBusy("history"); setError(null);
+    try {
+      const page = await api.history({ ...historyQuery, cursor, limit: HISTORY_PAGE_SIZE });
+      setHistoryCatalog((current) => current ? { ...current, nextCursor: page.nextCursor } : page);
+      setSessions((current) => [...current, ...page.sessions.filter((session) => !current.some((item) => item.id === session.id))]);
+    } catch (historyError) { setError(getErrorMessage(historyError)); } finally { setMainBusy(null); }
+  }
+
   const openRestoreForSession = (session: ToolboxSession) => {
     setRestoreQuery(session.id);
     setRestorePlan(null);
@@ -811,7 +834,7 @@ export default function App() {
   else if (view === "policy-requests") page = <PolicyRequestsPage connection={Boolean(connection)} busy={mainBusy === "policy-request"} error={error} plan={policyRequestPlan} onCreatePlan={(text) => void createPolicyRequestPlan(text)} onOpenConnection={() => navigate("connection")} onOpenPlan={() => navigate("plan")} />;
   else if (view === "plan" || view === "execute") page = <PlanPage focus={view} plan={cleanupPlan} executionSession={executionSession} executionJob={executionJob} writeEnabled={writeEnabled} busy={stageBusy} singlePlanBusy={singlePlanBusy} error={error} onOpenCleanup={() => navigate("cleanup")} onCreateSinglePlan={(target) => void createSinglePlan(target)} onCreateSelectionPlan={(targets) => void createSelectionPlan(targets)} onExcludeTargets={(targets) => void excludeTargets(targets)} onExcludeComponents={(componentIds) => void excludeComponents(componentIds)} onUndoLastExclusion={() => void undoLastExclusion()} onPlanDependencies={planDependencies} onRestoreTarget={openRestoreForTarget} onApplyCandidate={() => void applyCandidate()} onPrepareCommitReview={() => void prepareCommitReview()} onCommit={(scopeGuardOverrideDigest) => void commitCleanup(true, false, scopeGuardOverrideDigest)} onPush={() => void pushCleanup()} onViewArtifact={viewCleanupArtifact} onDownload={(artifact) => void downloadCleanup(artifact)} />;
   else if (view === "audit") page = <AuditPage connection={connection} query={auditQuery} onQueryChange={setAuditQuery} result={auditResult} busy={mainBusy === "audit"} error={error} onAudit={() => void runAudit()} onOpenConnection={() => navigate("connection")} />;
-  else if (view === "history") page = <HistoryPage sessions={sessions} selected={selectedSession} storage={historyCatalog?.storage ?? ""} issues={historyCatalog?.issues ?? []} connected={Boolean(connection)} busy={mainBusy === "history"} error={error} onRefresh={() => void refreshHistory()} onSelect={setSelectedSession} onRestore={openRestoreForSession} onRestoreTargets={openRestoreForTargets} onDownloadBundle={(session) => void downloadSessionBundle(session)} onViewArtifact={viewHistoryArtifact} onDownloadArtifact={(sessionId, artifact) => void downloadHistoryArtifact(sessionId, artifact)} onMaterializeHandMode={(session) => void materializeSessionHandMode(session)} onReconcileExternal={(session) => void reconcileExternalSession(session)} />;
+  else if (view === "history") page = <HistoryPage sessions={sessions} selected={selectedSession} storage={historyCatalog?.storage ?? ""} issues={historyCatalog?.issues ?? []} connected={Boolean(connection)} busy={mainBusy === "history"} error={error} onRefresh={() => void refreshHistory()} onFilterChange={filterHistory} totalSessions={demoMode ? undefined : historyCatalog?.sessionCount} totalMatches={demoMode ? undefined : historyCatalog?.matchCount ?? historyCatalog?.mutationCount} hasMore={Boolean(historyCatalog?.nextCursor)} onLoadMore={() => void loadMoreHistory()} onSelect={setSelectedSession} onRestore={openRestoreForSession} onRestoreTargets={openRestoreForTargets} onDownloadBundle={(session) => void downloadSessionBundle(session)} onViewArtifact={viewHistoryArtifact} onDownloadArtifact={(sessionId, artifact) => void downloadHistoryArtifact(sessionId, artifact)} onMaterializeHandMode={(session) => void materializeSessionHandMode(session)} onReconcileExternal={(session) => void reconcileExternalSession(session)} />;
   else page = <RestorePage query={restoreQuery} onQueryChange={setRestoreQuery} plan={restorePlan} executionSession={restoreSession} executionJob={restoreExecutionJob} writeEnabled={writeEnabled} connected={Boolean(connection)} busy={restoreBusy} error={error} onCreatePlan={(mode) => void createRestorePlan(mode)} onApplyCandidate={() => void applyRestoreCandidate()} onCommit={() => void commitRestore(true, false)} onPush={() => void pushRestore()} onDownloadConflicts={() => void downloadConflicts()} onViewArtifact={viewRestoreArtifact} onDownloadArtifact={(artifact) => void downloadRestoreArtifact(artifact)} onOpenConnection={() => { setReturnAfterConnect("restore"); navigate("connection"); }} onOpenWarnings={() => navigate("warnings")} />;
 
   return (
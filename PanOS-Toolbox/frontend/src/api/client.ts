@@ -6,6 +6,7 @@ import type {
   AuditResult,
   ExecutionJob,
   HistoryCatalog,
+  HistoryQuery,
   CapabilityStage,
   CleanupPlan,
   ConnectionDraft,
@@ -127,6 +128,20 @@ async function request<T>(path: string, options: JsonOptions = {}): Promise<T> {
   return payload as T;
 }
 
+function historySearch(query: HistoryQuery): string {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(query)) {
+    if (value === undefined || value === null || value === "") continue;
+    if (Array.isArray(value)) {
+      if (value.length) params.set(key, value.join(","));
+    } else {
+      params.set(key, String(value));
+    }
+  }
+  const search = params.toString();
+  return search ? `?${search}` : "";
+}
+
 async function download(path: string): Promise<Blob> {
   const headers = new Headers({ Accept: "application/octet-stream" });
   headers.set(APP_TOKEN_HEADER, requireAppToken());
@@ -447,8 +462,12 @@ export const api = {
     return request("/sessions");
   },
 
-  async history(): Promise<HistoryCatalog> {
-    return request("/history");
+  async history(query: HistoryQuery = {}): Promise<HistoryCatalog> {
+    return request(`/history${historySearch(query)}`);
+  },
+
+  async historySession(sessionId: string): Promise<ToolboxSession> {
+    return request(`/history/${encodeURIComponent(sessionId)}`);
   },
 
   async getSession(sessionId: string): Promise<ToolboxSession> {
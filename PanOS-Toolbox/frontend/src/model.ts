@@ -515,8 +515,23 @@ export interface HistoryCatalog {
   storage: string;
   sessionCount: number;
   mutationCount: number;
+  matchCount?: number;
   issues: HistoryIssue[];
   sessions: ToolboxSession[];
+  nextCursor?: string | null;
+}
+
+export interface HistoryQuery {
+  q?: string;
+  kind?: ToolboxSession["kind"];
+  state?: SessionState[];
+  host?: string;
+  target?: string;
+  since?: string;
+  until?: string;
+  fields?: string[];
+  cursor?: string;
+  limit?: number;
 }
 
 export interface ToolboxSession {
@@ -546,6 +561,7 @@ export interface ToolboxSession {
   timeline?: HistoryTimelineEvent[];
   historyItems?: HistoryMutation[];
   searchValues?: string[];
+  matchCount?: number;
   indexIntegrity?: string;
 }
 
@@ -18,8 +18,8 @@ import {
   SquareTerminal,
   X,
 } from "lucide-react";
-import { useEffect, useMemo, useState } from "react";
-import type { HistoryIssue, HistoryMutation, SessionState, ToolboxSession } from "../model";
+import { useEffect, useMemo, useRef, useState } from "react";
+import type { HistoryIssue, HistoryMutation, HistoryQuery, SessionState, ToolboxSession } from "../model";
 import { formatDate, shortId } from "../model";
 import { Button, Callout, Card, EmptyState, PageHeader, ProgressBar, StatusPill } from "../components/Primitives";
 
@@ -32,6 +32,11 @@ interface HistoryPageProps {
   busy: boolean;
   error: string | null;
   onRefresh: () => void;
+  onFilterChange?: (query: HistoryQuery) => void;
+  totalSessions?: number;
+  totalMatches?: number;
+  hasMore?: boolean;
+  onLoadMore?: () => void;
   onSelect: (session: ToolboxSession) => void;
   onRestore: (session: ToolboxSession) => void;
   onRestoreTargets: (targets: string[]) => void;
@@ -133,6 +138,11 @@ export function HistoryPage({
   busy,
   error,
   onRefresh,
+  onFilterChange,
+  totalSessions,
+  totalMatches: serverMatches,
+  hasMore,
+  onLoadMore,
   onSelect,
   onRestore,
   onRestoreTargets,
@@ -151,6 +161,16 @@ export function HistoryPage({
   const [confirmRiskyCopy, setConfirmRiskyCopy] = useState<{ sessionId: string; file: string } | null>(null);
   const [copyError, setCopyError] = useState<string | null>(null);
   const tokens = useMemo(() => queryTokens(query), [query]);
+  const filterMounted = useRef(false);
+  useEffect(() => {
+    // The server filters the whole index; the local pass below only keeps
+    // per-mutation highlighting on the pages already loaded.
+    if (!filterMounted.current) { filterMounted.current = true; return; }
+    if (!onFilterChange) return;
+    const timer = window.setTimeout(() => onFilterChange({ q: query.trim() || undefined, kind: kind === "all" ? undefined : kind }), 300);
+    return () => window.clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [query, kind]);
   const filtered = useMemo(() => sessions.filter((session) => {
     if (kind !== "all" && session.kind !== kind) return false;
     return sessionMatches(session, tokens);
@@ -231,15 +251,16 @@ export function HistoryPage({
           <div className="table-search"><Search size={16} /><input value={query} onChange={(event) => setQuery(event.target.value)} placeholder="IP, polityka, obiekt, grupa, XPath, sesja…" /></div>
           <div className="segmented-control"><button className={kind === "all" ? "is-active" : ""} onClick={() => setKind("all")}>Wszystkie</button><button className={kind === "cleanup" ? "is-active" : ""} onClick={() => setKind("cleanup")}>Cleanup</button><button className={kind === "restore" ? "is-active" : ""} onClick={() => setKind("restore")}>Restore</button></div>
         </div>
-        <div className="history-match-summary"><Database size={14} /><span>{filtered.length} sesji · {totalMatches} {tokens.length ? "pasujących operacji" : "zapisanych operacji"}</span></div>
+        <div className="history-match-summary"><Database size={14} /><span>{totalSessions ?? filtered.length} sesji · {serverMatches ?? totalMatches} {tokens.length ? "pasujących operacji" : "zapisanych operacji"}</span></div>
         {!filtered.length ? <EmptyState icon={<History size={27} />} title="Brak trafień w lokalnej historii" description="Sprawdź nazwę lub usuń część filtrów. Przeszukiwane są również wartości wewnątrz backupów XML." /> : <div className="session-list">{filtered.map((session) => {
-          const matches = tokens.length ? (session.historyItems ?? []).filter((item) => itemMatches(item, tokens)).length : (session.historyItems?.length ?? session.mutationCount ?? 0);
+          const matches = tokens.length ? session.matchCount ?? (session.historyItems ?? []).filter((item) => itemMatches(item, tokens)).length : (session.historyItems?.length ?? session.mutationCount ?? 0);
           return <button key={session.id} className={active?.id === session.id ? "is-selected" : ""} onClick={() => onSelect(session)}>
             <span className={`session-kind session-kind--${session.kind}`}>{session.kind === "restore" ? <RotateCcw size={18} /> : <FileArchive size={18} />}</span>
             <span className="session-list__copy"><span><strong>{session.description}</strong><StatusPill tone={sessionTone[session.state] ?? "neutral"}>{session.state}</StatusPill>{latestRestorable === session.id && <StatusPill tone="success">ostatnia do Restore</StatusPill>}</span><small>{formatDate(session.updatedAt)} · {session.operator} · {session.executionSource ?? "GUI"}</small><code>{shortId(session.id)} · {matches} operacji</code></span>
             <ChevronRight size={17} />
           </button>;
         })}</div>}
+        {hasMore && onLoadMore && <Button onClick={onLoadMore} loading={busy}>Załaduj więcej sesji</Button>}
       </Card>
 
       <Card className="session-detail-card">
@@ -24,6 +24,19 @@ describe("typed API client", () => {
     expect(headers.get("X-Toolbox-App-Token")).toBe("test-app-token");
   });
 
+  it("przekazuje filtry i kursor historii do indeksu backendu", async () => {
+    const fetchMock = vi.spyOn(globalThis, "fetch").mockResolvedValue(
+      new Response(JSON.stringify({ generatedAt: "2026-08-10T10:00:00Z", storage: "", sessionCount: 0, mutationCount: 0, issues: [], sessions: [], nextCursor: null }), {
+        status: 200,
+        headers: { "Content-Type": "application/json" },
+      }),
+    );
+
+    await api.history({ q: "10.0.0.1 SEC", kind: "cleanup", state: ["PUSHED", "COMMITTED"], cursor: "session-20260810T100000Z-abcdef12", limit: 100, target: "" });
+
+    expect(fetchMock.mock.calls[0][0]).toBe("/api/v1/history?q=10.0.0.1+SEC&kind=cleanup&state=PUSHED%2CCOMMITTED&cursor=session-20260810T100000Z-abcdef12&limit=100");
+  });
+
   it("trzyma token sesji wyłącznie w pamięci modułu", async () => {
     const storageWrite = vi.spyOn(Storage.prototype, "setItem");
     const fetchMock = vi.spyOn(globalThis, "fetch")
@@ -7,12 +7,16 @@ import csv
 import io
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-from typing import Callable, Dict, Iterable, List, Mapping, Optional
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from .models import RuleHitCount, RuleKey, SnapshotError, TransportError
 
 
 DEFAULT_RECENT_DAYS = 14
+DEFAULT_HIT_COUNT_BATCH_SIZE = 100
+MAX_HIT_COUNT_BATCH_SIZE = 1000
+
+_BatchOutcome = Tuple[Dict[RuleKey, RuleHitCount], List[RuleKey]]
 
 
 def collect_rule_hit_counts(
@@ -22,14 +26,26 @@ def collect_rule_hit_counts(
     now: Optional[datetime] = None,
     recent_days: int = DEFAULT_RECENT_DAYS,
     workers: int = 8,
+    batch_size: int = 1,
     progress_callback: Optional[Callable[[int, int, RuleKey], None]] = None,
 ) -> Dict[RuleKey, RuleHitCount]:
-    """Query relevant policies concurrently with a bounded Panorama load."""
+    """Query relevant policies concurrently with a bounded Panorama load.
+
+    With ``batch_size > 1`` rules sharing a location, rulebase and policy type
+    are requested together, up to ``batch_size`` rule-name entries per
+    command.  Only observations that sit under an explicit per-rule entry of
+    the combined response are attributed; every rule the bulk answer does not
+    cover unambiguously is re-read with the single-rule command.
+    """
 
     if recent_days < 1 or recent_days > 3650:
         raise ValueError("recent_days musi być w zakresie 1..3650")
     if workers < 1 or workers > 16:
         raise ValueError("workers musi być w zakresie 1..16")
+    if batch_size < 1 or batch_size > MAX_HIT_COUNT_BATCH_SIZE:
+        raise ValueError(
+            f"batch_size musi być w zakresie 1..{MAX_HIT_COUNT_BATCH_SIZE}"
+        )
     current = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
     selected = tuple(sorted(set(rules)))
     if not selected:
@@ -61,36 +77,103 @@ def collect_rule_hit_counts(
             )
             return rule, _error_result(rule, detail)
 
+    def read_single(rule: RuleKey) -> _BatchOutcome:
+        rule, result = read_one(rule)
+        return {rule: result}, []
+
+    def read_batch(batch: Tuple[RuleKey, ...]) -> _BatchOutcome:
+        first = batch[0]
+        try:
+            response = client.run_op_show(
+                build_bulk_hit_count_command(
+                    first.location,
+                    first.rulebase,
+                    first.policy_type,
+                    [rule.name for rule in batch],
+                )
+            )
+            observed = _split_bulk_response(response, [rule.name for rule in batch])
+        except Exception:  # every rule is re-read and reported individually
+            return {}, list(batch)
+        resolved: Dict[RuleKey, RuleHitCount] = {}
+        missing: List[RuleKey] = []
+        for rule in batch:
+            subtree = observed.get(rule.name)
+            if subtree is None:
+                missing.append(rule)
+            else:
+                resolved[rule] = _parse_rule_response(
+                    subtree, rule, current, recent_days
+                )
+        return resolved, missing
+
     results: Dict[RuleKey, RuleHitCount] = {}
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=min(workers, len(selected)),
-        thread_name_prefix="panos-last-hit",
-    ) as pool:
-        futures = [pool.submit(read_one, rule) for rule in selected]
-        for completed, future in enumerate(
-            concurrent.futures.as_completed(futures), start=1
-        ):
-            rule, result = future.result()
+
+    def record(outcome: _BatchOutcome) -> List[RuleKey]:
+        resolved, missing = outcome
+        for rule, result in resolved.items():
             results[rule] = result
             if progress_callback is not None:
                 try:
-                    progress_callback(completed, len(selected), rule)
+                    progress_callback(len(results), len(selected), rule)
                 except Exception:
                     pass
+        return missing
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(workers, len(selected)),
+        thread_name_prefix="panos-last-hit",
+    ) as pool:
+        futures = [
+            pool.submit(read_batch, batch)
+            if len(batch) > 1
+            else pool.submit(read_single, batch[0])
+            for batch in _hit_count_batches(selected, batch_size)
+        ]
+        fallback: List[RuleKey] = []
+        for future in concurrent.futures.as_completed(futures):
+            fallback.extend(record(future.result()))
+        futures = [pool.submit(read_single, rule) for rule in sorted(fallback)]
+        for future in concurrent.futures.as_completed(futures):
+            record(future.result())
     return {rule: results[rule] for rule in selected}
 
 
+def _hit_count_batches(
+    rules: Sequence[RuleKey], batch_size: int
+) -> List[Tuple[RuleKey, ...]]:
+    groups: Dict[Tuple[str, str, str], List[RuleKey]] = {}
+    for rule in rules:
+        groups.setdefault(
+            (rule.location, rule.rulebase, rule.policy_type), []
+        ).append(rule)
+    return [
+        tuple(members[start:start + batch_size])
+        for members in groups.values()
+        for start in range(0, len(members), batch_size)
+    ]
+
+
 def build_hit_count_command(
     location: str,
     rulebase: str,
     policy_type: str,
     rule_name: str,
+) -> ET.Element:
+    return build_bulk_hit_count_command(location, rulebase, policy_type, [rule_name])
+
+
+def build_bulk_hit_count_command(
+    location: str,
+    rulebase: str,
+    policy_type: str,
+    rule_names: Sequence[str],
 ) -> ET.Element:
     if rulebase not in {"pre-rulebase", "post-rulebase"}:
         raise ValueError(f"Nieobsługiwany rulebase hit-count: {rulebase}")
     if policy_type not in {"security", "nat", "application-override"}:
         raise ValueError(f"Nieobsługiwany typ polityki hit-count: {policy_type}")
-    if not rule_name:
+    if not rule_names or not all(rule_names):
         raise ValueError("Nazwa polityki hit-count nie może być pusta")
     command = ET.Element("show")
     node = ET.SubElement(command, "rule-hit-count")
@@ -103,10 +186,41 @@ def build_hit_count_command(
     node = ET.SubElement(node, "entry", {"name": policy_type})
     node = ET.SubElement(node, "rules")
     requested = ET.SubElement(node, "rule-name")
-    ET.SubElement(requested, "entry", {"name": rule_name})
+    for rule_name in rule_names:
+        ET.SubElement(requested, "entry", {"name": rule_name})
     return command
 
 
+def _owns_hit_fields(element: ET.Element) -> bool:
+    return (
+        element.find("./hit-count") is not None
+        or element.find("./last-hit-timestamp") is not None
+    )
+
+
+def _split_bulk_response(
+    response: ET.Element, names: Sequence[str]
+) -> Dict[str, ET.Element]:
+    """Map requested rule names to their own subtree of a combined response.
+
+    A rule is attributed only through a direct ``rules/entry[@name]`` child
+    named after it.  If any such child carries a name that was not requested,
+    the layout is per firewall/VSYS rather than per rule and nothing is
+    attributed, so every rule falls back to the single-rule query.
+    """
+
+    requested = set(names)
+    owned: Dict[str, ET.Element] = {}
+    for rules in response.iter("rules"):
+        for entry in rules.findall("./entry"):
+            name = entry.get("name")
+            if name not in requested:
+                return {}
+            if any(_owns_hit_fields(element) for element in entry.iter()):
+                owned.setdefault(name, ET.Element("rules")).append(entry)
+    return owned
+
+
 def _parse_rule_response(
     response: ET.Element,
     rule: RuleKey,
@@ -117,12 +231,7 @@ def _parse_rule_response(
     # managed firewall/VSYS.  The enclosing entry names are therefore not
     # necessarily the policy name.  Select only nodes that directly own hit
     # fields and aggregate the newest last-hit conservatively.
-    entries = [
-        element
-        for element in response.iter()
-        if element.find("./hit-count") is not None
-        or element.find("./last-hit-timestamp") is not None
-    ]
+    entries = [element for element in response.iter() if _owns_hit_fields(element)]
     if not entries:
         return RuleHitCount(
             rule=rule,
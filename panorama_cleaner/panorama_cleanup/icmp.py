@@ -0,0 +1,297 @@
+"""In-process ICMP echo over unprivileged datagram sockets.
+
+``ping`` per address forks one process per IP.  Where the kernel allows
+unprivileged ICMP datagram sockets (Linux ``net.ipv4.ping_group_range``,
+macOS) a single event loop can instead keep many echo requests in flight and
+match replies by sequence number, source address and a per-socket payload
+token.  Address families without such a socket are left out of the result so
+the caller can fall back to the ``ping`` subprocess for them.
+
+A lost reply turns a live host into NO_REPLY, the status that clears an IP
+for cleanup.  The window of outstanding requests is therefore kept small, the
+receive buffer is enlarged and replies are drained after every send.  An
+address that stays silent is probed again in further rounds, the last one
+with a narrow window and a longer timeout, before NO_REPLY is reported.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import os
+import secrets
+import selectors
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from .models import PingResult, PingStatus
+
+
+DEFAULT_MAX_IN_FLIGHT = 128
+DEFAULT_ECHO_ROUNDS = 3
+FINAL_ROUND_TIMEOUT_FACTOR = 2
+FINAL_ROUND_MAX_IN_FLIGHT = 16
+RECEIVE_BUFFER_BYTES = 1024 * 1024
+_SEQUENCE_SPACE = 0x10000
+_ECHO_REQUEST = {4: 8, 6: 128}
+_ECHO_REPLY = {4: 0, 6: 129}
+_HEADER = struct.Struct("!BBHHH")
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def open_icmp_socket(version: int) -> Optional[socket.socket]:
+    """Return a non-blocking unprivileged ICMP socket, or None if refused."""
+
+    if os.name == "nt":
+        return None
+    if version == 4:
+        family, protocol = socket.AF_INET, getattr(socket, "IPPROTO_ICMP", None)
+    else:
+        family, protocol = socket.AF_INET6, getattr(socket, "IPPROTO_ICMPV6", None)
+    if protocol is None:
+        return None
+    try:
+        sock = socket.socket(family, socket.SOCK_DGRAM, protocol)
+    except OSError:
+        return None
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_BYTES)
+    except OSError:
+        pass  # the kernel default still works, only with a smaller margin
+    sock.setblocking(False)
+    return sock
+
+
+@dataclass
+class _Channel:
+    version: int
+    sock: socket.socket
+    targets: List[str]
+    token: bytes = field(default_factory=lambda: secrets.token_bytes(8))
+    next_index: int = 0
+    in_flight: Dict[int, float] = field(default_factory=dict)
+
+    def echo_request(self, sequence: int) -> bytes:
+        payload = self.token + b"panorama-cleanup"
+        header = _HEADER.pack(_ECHO_REQUEST[self.version], 0, 0, 0, sequence)
+        if self.version == 4:
+            checksum = _checksum(header + payload)
+            header = _HEADER.pack(_ECHO_REQUEST[4], 0, checksum, 0, sequence)
+        # The kernel fills the ICMPv6 checksum and, on Linux, replaces the
+        # identifier with the socket's own one, so neither is matched on.
+        return header + payload
+
+    def parse_reply(self, data: bytes, address: str) -> Optional[int]:
+        if self.version == 4 and data and data[0] >> 4 == 4:
+            data = data[(data[0] & 0x0F) * 4:]  # BSD datagram sockets keep the IP header
+        if len(data) < _HEADER.size + len(self.token):
+            return None
+        kind, _code, _checksum_value, _identifier, sequence = _HEADER.unpack_from(data)
+        if kind != _ECHO_REPLY[self.version]:
+            return None
+        if data[_HEADER.size:_HEADER.size + len(self.token)] != self.token:
+            return None
+        if sequence not in self.in_flight or sequence >= len(self.targets):
+            return None
+        try:
+            source = str(ipaddress.ip_address(address.split("%", 1)[0]))
+        except ValueError:
+            return None
+        return sequence if source == self.targets[sequence] else None
+
+
+def probe_echo(
+    ips: Sequence[str],
+    *,
+    timeout_ms: int,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    rounds: int = DEFAULT_ECHO_ROUNDS,
+) -> Dict[str, PingResult]:
+    """Ping every address from one event loop, re-probing silent ones.
+
+    An address is reported as NO_REPLY only after ``rounds`` unanswered echo
+    requests; the final round waits ``FINAL_ROUND_TIMEOUT_FACTOR`` times
+    longer with at most ``FINAL_ROUND_MAX_IN_FLIGHT`` requests outstanding.
+    Returns results only for address families that got a socket; an empty
+    mapping means the caller must use the ``ping`` subprocess instead.
+    """
+
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be positive")
+    if rounds < 1:
+        raise ValueError("rounds must be positive")
+    results: Dict[str, PingResult] = {}
+    elapsed: Dict[str, float] = {}
+    pending = sorted({str(ipaddress.ip_address(value)) for value in ips})
+    for round_number in range(1, rounds + 1):
+        final = round_number == rounds and rounds > 1
+        observed = _probe_round(
+            pending,
+            timeout=timeout_ms / 1000.0 * (FINAL_ROUND_TIMEOUT_FACTOR if final else 1),
+            max_in_flight=(
+                min(max_in_flight, FINAL_ROUND_MAX_IN_FLIGHT) if final else max_in_flight
+            ),
+        )
+        for ip, result in observed.items():
+            elapsed[ip] = elapsed.get(ip, 0.0) + result.elapsed_seconds
+            detail = result.detail
+            if round_number > 1:
+                detail += (
+                    f"; wynik uzyskano w próbie {round_number}"
+                    if result.status != PingStatus.NO_REPLY
+                    else f"; brak odpowiedzi w {round_number} próbach"
+                )
+            results[ip] = PingResult(ip, result.status, detail, elapsed[ip])
+        pending = [
+            ip for ip in sorted(observed) if observed[ip].status == PingStatus.NO_REPLY
+        ]
+        if not pending:
+            break
+    return results
+
+
+def _probe_round(
+    ips: Sequence[str], *, timeout: float, max_in_flight: int
+) -> Dict[str, PingResult]:
+    by_version: Dict[int, List[str]] = {}
+    for ip in ips:
+        by_version.setdefault(ipaddress.ip_address(ip).version, []).append(ip)
+
+    channels: List[_Channel] = []
+    try:
+        for version, targets in sorted(by_version.items()):
+            for start in range(0, len(targets), _SEQUENCE_SPACE):
+                sock = open_icmp_socket(version)
+                if sock is None:
+                    break
+                channels.append(
+                    _Channel(version, sock, targets[start:start + _SEQUENCE_SPACE])
+                )
+        return _run(channels, timeout, max_in_flight)
+    finally:
+        for channel in channels:
+            channel.sock.close()
+
+
+def _run(
+    channels: Sequence[_Channel], timeout: float, max_in_flight: int
+) -> Dict[str, PingResult]:
+    results: Dict[str, PingResult] = {}
+    if not channels:
+        return results
+    selector = selectors.DefaultSelector()
+    for channel in channels:
+        selector.register(channel.sock, selectors.EVENT_READ, channel)
+    blocked: Dict[int, bool] = {}
+    try:
+        while True:
+            in_flight = sum(len(channel.in_flight) for channel in channels)
+            for channel in channels:
+                while (
+                    in_flight < max_in_flight
+                    and channel.next_index < len(channel.targets)
+                    and not blocked.get(id(channel))
+                ):
+                    sequence = channel.next_index
+                    ip = channel.targets[sequence]
+                    try:
+                        channel.sock.sendto(channel.echo_request(sequence), (ip, 0))
+                    except BlockingIOError:
+                        blocked[id(channel)] = True
+                        selector.modify(
+                            channel.sock,
+                            selectors.EVENT_READ | selectors.EVENT_WRITE,
+                            channel,
+                        )
+                        break
+                    except OSError as exc:
+                        results[ip] = PingResult(
+                            ip,
+                            PingStatus.ERROR,
+                            f"Błąd wysyłki ICMP ({exc.strerror or type(exc).__name__})",
+                            0.0,
+                        )
+                    else:
+                        channel.in_flight[sequence] = time.monotonic()
+                        in_flight += 1
+                    channel.next_index += 1
+                    # Replies to the first requests arrive while later ones
+                    # are still being sent; read them before the buffer fills.
+                    in_flight -= _drain(channel, results)
+
+            # in_flight preserves send order, so expiry stops at the first
+            # request that is still within its timeout.
+            now = time.monotonic()
+            for channel in channels:
+                expired = []
+                for sequence, sent in channel.in_flight.items():
+                    if now - sent < timeout:
+                        break
+                    expired.append((sequence, sent))
+                for sequence, sent in expired:
+                    del channel.in_flight[sequence]
+                    ip = channel.targets[sequence]
+                    results[ip] = PingResult(
+                        ip,
+                        PingStatus.NO_REPLY,
+                        f"Brak odpowiedzi ICMP (timeout {int(timeout * 1000)} ms)",
+                        now - sent,
+                    )
+
+            unsent = any(channel.next_index < len(channel.targets) for channel in channels)
+            oldest = min(
+                (
+                    next(iter(channel.in_flight.values()))
+                    for channel in channels
+                    if channel.in_flight
+                ),
+                default=None,
+            )
+            if oldest is None and not unsent:
+                return results
+            wait = max(0.0, oldest + timeout - now) if oldest is not None else timeout
+            for key, events in selector.select(wait):
+                channel = key.data
+                if events & selectors.EVENT_WRITE:
+                    blocked.pop(id(channel), None)
+                    selector.modify(channel.sock, selectors.EVENT_READ, channel)
+                if events & selectors.EVENT_READ:
+                    _drain(channel, results)
+    finally:
+        selector.close()
+
+
+def _drain(channel: _Channel, results: Dict[str, PingResult]) -> int:
+    matched = 0
+    while True:
+        try:
+            data, address = channel.sock.recvfrom(65535)
+        except (BlockingIOError, InterruptedError):
+            return matched
+        except OSError:
+            # Asynchronous ICMP errors surface here on some stacks; the
+            # affected target simply times out as NO_REPLY like `ping` would.
+            return matched
+        sequence = channel.parse_reply(data, address[0])
+        if sequence is None:
+            continue
+        matched += 1
+        sent = channel.in_flight.pop(sequence)
+        ip = channel.targets[sequence]
+        results[ip] = PingResult(
+            ip,
+            PingStatus.REPLIED,
+            "Odebrano odpowiedź ICMP",
+            time.monotonic() - sent,
+        )
+
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 __version__ = "1.6.0"
 
@@ -187,6 +187,9 @@ class ConfigModel:
     rule_references: Dict[RuleKey, List[ResolvedReference]]
     unknown_occurrences: List[UnknownOccurrence]
     warnings: List[str]
+    # Lookup tables derived from the parsed configuration, memoised by the
+    # module that owns them (e.g. ``references.reference_index``).
+    derived: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
 
 
 @dataclass
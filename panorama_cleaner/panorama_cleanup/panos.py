@@ -2,13 +2,28 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import copy
 import hashlib
 import ipaddress
 import re
 import xml.etree.ElementTree as ET
 from collections import defaultdict
-from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from defusedxml import ElementTree as SafeET
 from defusedxml.common import DefusedXmlException
@@ -146,8 +161,13 @@ def _scope_xpath(device_entry_name: str, location: str) -> str:
     )
 
 
-def parse_config(config: ET.Element) -> ConfigModel:
-    """Parse the complete Panorama configuration into scoped typed entities."""
+def parse_config(config: ET.Element, *, workers: int = 1) -> ConfigModel:
+    """Parse the complete Panorama configuration into scoped typed entities.
+
+    With ``workers > 1`` shared and device-group subtrees are parsed on a
+    process pool; the resulting model, warnings and errors are identical to
+    the serial walk.
+    """
 
     if config.tag != "config":
         config = _find_config_element(config)
@@ -219,152 +239,14 @@ def parse_config(config: ET.Element) -> ConfigModel:
 
     _validate_hierarchy(parents)
 
-    skipped_definition_entries: Set[int] = set()
-    handled_value_nodes: Set[int] = set()
-    rule_entry_keys: Dict[int, RuleKey] = {}
-    group_entry_keys: Dict[int, ScopedName] = {}
-
-    for location, scope in scope_nodes:
-        scope_xpath = _scope_xpath(device_entry_name, location)
-        address_container = scope.find("./address")
-        if address_container is not None:
-            for entry in address_container.findall("./entry"):
-                name = entry.get("name")
-                if not name:
-                    raise ParseError(f"Obiekt address bez nazwy w {location}.")
-                key = ScopedName(location, name)
-                if key in addresses:
-                    raise ParseError(f"Zduplikowany obiekt address {location}/{name}.")
-                typed_children = [
-                    child
-                    for child in list(entry)
-                    if child.tag in {"ip-netmask", "ip-range", "fqdn", "ip-wildcard"}
-                ]
-                if len(typed_children) != 1:
-                    raise ParseError(
-                        f"Obiekt {location}/{name} ma {len(typed_children)} obsługiwanych typów zamiast jednego."
-                    )
-                value_node = typed_children[0]
-                raw_value = (value_node.text or "").strip()
-                if not raw_value:
-                    raise ParseError(f"Obiekt {location}/{name} ma pustą wartość.")
-                tags = tuple(
-                    member.text.strip()
-                    for member in entry.findall("./tag/member")
-                    if member.text and member.text.strip()
-                )
-                xpath = f"{scope_xpath}/address/entry[@name={_xpath_literal(name)}]"
-                addresses[key] = AddressObject(
-                    key=key,
-                    object_type=value_node.tag,
-                    raw_value=raw_value,
-                    tags=tags,
-                    xml=_xml_text(entry),
-                    xpath=xpath,
-                )
-                skipped_definition_entries.add(id(entry))
-
-        group_container = scope.find("./address-group")
-        if group_container is not None:
-            for entry in group_container.findall("./entry"):
-                name = entry.get("name")
-                if not name:
-                    raise ParseError(f"Address-group bez nazwy w {location}.")
-                key = ScopedName(location, name)
-                if key in addresses:
-                    raise ParseError(
-                        f"Kolizja namespace w {location}: {name} jest jednocześnie address i address-group."
-                    )
-                if key in static_groups or key in dynamic_groups:
-                    raise ParseError(f"Zduplikowana address-group {location}/{name}.")
-                static = entry.find("./static")
-                dynamic = entry.find("./dynamic")
-                if static is not None and dynamic is not None:
-                    raise ParseError(f"Grupa {location}/{name} jest jednocześnie static i dynamic.")
-                xpath = f"{scope_xpath}/address-group/entry[@name={_xpath_literal(name)}]"
-                tags = tuple(
-                    member.text.strip()
-                    for member in entry.findall("./tag/member")
-                    if member.text and member.text.strip()
-                )
-                if static is not None:
-                    members = tuple(
-                        member.text.strip()
-                        for member in static.findall("./member")
-                        if member.text and member.text.strip()
-                    )
-                    static_groups[key] = StaticGroup(key, members, _xml_text(entry), xpath)
-                    if not members:
-                        warnings.append(
-                            f"Zastano pustą statyczną grupę {location}/{name}; nie będzie sprzątana automatycznie."
-                        )
-                    for member in static.findall("./member"):
-                        handled_value_nodes.add(id(member))
-                elif dynamic is not None:
-                    filter_text = (dynamic.findtext("./filter") or "").strip()
-                    dynamic_groups[key] = DynamicGroup(
-                        key, filter_text, tags, _xml_text(entry), xpath
-                    )
-                else:
-                    raise ParseError(f"Grupa {location}/{name} nie ma static ani dynamic.")
-                skipped_definition_entries.add(id(entry))
-                group_entry_keys[id(entry)] = key
-
-        for entry in scope.findall("./region/entry"):
-            name = entry.get("name")
-            if name:
-                other_address_definitions[ScopedName(location, name)] = "region"
-        for entry in scope.findall("./external-list/entry"):
-            name = entry.get("name")
-            if name and entry.find("./type/ip") is not None:
-                other_address_definitions[
-                    ScopedName(location, name)
-                ] = "ip-external-list"
-
-        for rulebase in RULEBASES:
-            for policy_type in POLICY_TYPES:
-                rules_container = scope.find(f"./{rulebase}/{policy_type}/rules")
-                if rules_container is None:
-                    continue
-                entries = rules_container.findall("./entry")
-                names = [entry.get("name") for entry in entries]
-                for index, entry in enumerate(entries):
-                    name = entry.get("name")
-                    if not name:
-                        raise ParseError(
-                            f"Reguła {policy_type} bez nazwy w {location}/{rulebase}."
-                        )
-                    key = RuleKey(location, rulebase, policy_type, name)
-                    if key in rules:
-                        raise ParseError(f"Zduplikowana reguła {key}.")
-                    source = _members(entry, "source")
-                    destination = _members(entry, "destination")
-                    if not source or not destination:
-                        raise ParseError(
-                            f"Reguła {location}/{rulebase}/{policy_type}/{name} ma puste source lub destination w running config."
-                        )
-                    for member in entry.findall("./source/member") + entry.findall("./destination/member"):
-                        handled_value_nodes.add(id(member))
-                    xpath = (
-                        f"{scope_xpath}/{rulebase}/{policy_type}/rules/entry"
-                        f"[@name={_xpath_literal(name)}]"
-                    )
-                    rules[key] = PolicyRule(
-                        key=key,
-                        uuid=entry.get("uuid"),
-                        source_members=source,
-                        destination_members=destination,
-                        negate_source=_yes(entry, "negate-source"),
-                        negate_destination=_yes(entry, "negate-destination"),
-                        disabled=_yes(entry, "disabled"),
-                        action=(entry.findtext("./action") or "").strip() or None,
-                        xml=_xml_text(entry),
-                        xpath=xpath,
-                        order_index=index,
-                        previous_rule=names[index - 1] if index > 0 else None,
-                        next_rule=names[index + 1] if index + 1 < len(names) else None,
-                    )
-                    rule_entry_keys[id(entry)] = key
+    scope_results = _parse_scopes(device_entry_name, scope_nodes, workers)
+    for result in scope_results:
+        addresses.update(result.addresses)
+        static_groups.update(result.static_groups)
+        dynamic_groups.update(result.dynamic_groups)
+        other_address_definitions.update(result.other_address_definitions)
+        rules.update(result.rules)
+        warnings.extend(result.warnings)
 
     model = ConfigModel(
         device_entry_name=device_entry_name,
@@ -377,19 +259,225 @@ def parse_config(config: ET.Element) -> ConfigModel:
         rules=rules,
         group_references={},
         rule_references={},
-        unknown_occurrences=[],
+        unknown_occurrences=[
+            occurrence
+            for result in scope_results
+            for occurrence in result.unknown_occurrences
+        ],
         warnings=warnings,
     )
     model.group_references = _resolve_group_references(model)
     model.rule_references = _resolve_rule_references(model)
-    model.unknown_occurrences = _scan_unknown_occurrences(
-        scope_nodes,
+    return model
+
+
+@dataclass
+class _ScopeParse:
+    addresses: Dict[ScopedName, AddressObject] = field(default_factory=dict)
+    static_groups: Dict[ScopedName, StaticGroup] = field(default_factory=dict)
+    dynamic_groups: Dict[ScopedName, DynamicGroup] = field(default_factory=dict)
+    other_address_definitions: Dict[ScopedName, str] = field(default_factory=dict)
+    rules: Dict[RuleKey, PolicyRule] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+    unknown_occurrences: List[UnknownOccurrence] = field(default_factory=list)
+
+
+def _parse_scopes(
+    device_entry_name: str,
+    scope_nodes: Sequence[Tuple[str, ET.Element]],
+    workers: int,
+) -> List[_ScopeParse]:
+    """Parse every scope, serially or on a process pool, in scope order.
+
+    Scopes are independent: every key is qualified by its location and the
+    unknown-occurrence scan of a scope only consults that scope's rules.
+    ``Executor.map`` yields results, and re-raises the first failure, in
+    submission order, so warnings, dict ordering and the reported ParseError
+    match the serial walk exactly.
+    """
+
+    if workers < 1:
+        raise ValueError("workers musi być dodatnie")
+    if workers == 1 or len(scope_nodes) < 2:
+        return [
+            _parse_scope(device_entry_name, location, scope)
+            for location, scope in scope_nodes
+        ]
+    payloads = [
+        (device_entry_name, location, ET.tostring(scope, encoding="utf-8"))
+        for location, scope in scope_nodes
+    ]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(payloads))
+    ) as pool:
+        return list(pool.map(_parse_scope_payload, payloads))
+
+
+def _parse_scope_payload(payload: Tuple[str, str, bytes]) -> _ScopeParse:
+    device_entry_name, location, serialized = payload
+    return _parse_scope(device_entry_name, location, safe_xml_fromstring(serialized))
+
+
+def _parse_scope(device_entry_name: str, location: str, scope: ET.Element) -> _ScopeParse:
+    result = _ScopeParse()
+    addresses = result.addresses
+    static_groups = result.static_groups
+    dynamic_groups = result.dynamic_groups
+    other_address_definitions = result.other_address_definitions
+    rules = result.rules
+    warnings = result.warnings
+    skipped_definition_entries: Set[int] = set()
+    handled_value_nodes: Set[int] = set()
+    rule_entry_keys: Dict[int, RuleKey] = {}
+
+    scope_xpath = _scope_xpath(device_entry_name, location)
+    address_container = scope.find("./address")
+    if address_container is not None:
+        for entry in address_container.findall("./entry"):
+            name = entry.get("name")
+            if not name:
+                raise ParseError(f"Obiekt address bez nazwy w {location}.")
+            key = ScopedName(location, name)
+            if key in addresses:
+                raise ParseError(f"Zduplikowany obiekt address {location}/{name}.")
+            typed_children = [
+                child
+                for child in list(entry)
+                if child.tag in {"ip-netmask", "ip-range", "fqdn", "ip-wildcard"}
+            ]
+            if len(typed_children) != 1:
+                raise ParseError(
+                    f"Obiekt {location}/{name} ma {len(typed_children)} obsługiwanych typów zamiast jednego."
+                )
+            value_node = typed_children[0]
+            raw_value = (value_node.text or "").strip()
+            if not raw_value:
+                raise ParseError(f"Obiekt {location}/{name} ma pustą wartość.")
+            tags = tuple(
+                member.text.strip()
+                for member in entry.findall("./tag/member")
+                if member.text and member.text.strip()
+            )
+            xpath = f"{scope_xpath}/address/entry[@name={_xpath_literal(name)}]"
+            addresses[key] = AddressObject(
+                key=key,
+                object_type=value_node.tag,
+                raw_value=raw_value,
+                tags=tags,
+                xml=_xml_text(entry),
+                xpath=xpath,
+            )
+            skipped_definition_entries.add(id(entry))
+
+    group_container = scope.find("./address-group")
+    if group_container is not None:
+        for entry in group_container.findall("./entry"):
+            name = entry.get("name")
+            if not name:
+                raise ParseError(f"Address-group bez nazwy w {location}.")
+            key = ScopedName(location, name)
+            if key in addresses:
+                raise ParseError(
+                    f"Kolizja namespace w {location}: {name} jest jednocześnie address i address-group."
+                )
+            if key in static_groups or key in dynamic_groups:
+                raise ParseError(f"Zduplikowana address-group {location}/{name}.")
+            static = entry.find("./static")
+            dynamic = entry.find("./dynamic")
+            if static is not None and dynamic is not None:
+                raise ParseError(f"Grupa {location}/{name} jest jednocześnie static i dynamic.")
+            xpath = f"{scope_xpath}/address-group/entry[@name={_xpath_literal(name)}]"
+            tags = tuple(
+                member.text.strip()
+                for member in entry.findall("./tag/member")
+                if member.text and member.text.strip()
+            )
+            if static is not None:
+                members = tuple(
+                    member.text.strip()
+                    for member in static.findall("./member")
+                    if member.text and member.text.strip()
+                )
+                static_groups[key] = StaticGroup(key, members, _xml_text(entry), xpath)
+                if not members:
+                    warnings.append(
+                        f"Zastano pustą statyczną grupę {location}/{name}; nie będzie sprzątana automatycznie."
+                    )
+                for member in static.findall("./member"):
+                    handled_value_nodes.add(id(member))
+            elif dynamic is not None:
+                filter_text = (dynamic.findtext("./filter") or "").strip()
+                dynamic_groups[key] = DynamicGroup(
+                    key, filter_text, tags, _xml_text(entry), xpath
+                )
+            else:
+                raise ParseError(f"Grupa {location}/{name} nie ma static ani dynamic.")
+            skipped_definition_entries.add(id(entry))
+
+    for entry in scope.findall("./region/entry"):
+        name = entry.get("name")
+        if name:
+            other_address_definitions[ScopedName(location, name)] = "region"
+    for entry in scope.findall("./external-list/entry"):
+        name = entry.get("name")
+        if name and entry.find("./type/ip") is not None:
+            other_address_definitions[
+                ScopedName(location, name)
+            ] = "ip-external-list"
+
+    for rulebase in RULEBASES:
+        for policy_type in POLICY_TYPES:
+            rules_container = scope.find(f"./{rulebase}/{policy_type}/rules")
+            if rules_container is None:
+                continue
+            entries = rules_container.findall("./entry")
+            names = [entry.get("name") for entry in entries]
+            for index, entry in enumerate(entries):
+                name = entry.get("name")
+                if not name:
+                    raise ParseError(
+                        f"Reguła {policy_type} bez nazwy w {location}/{rulebase}."
+                    )
+                key = RuleKey(location, rulebase, policy_type, name)
+                if key in rules:
+                    raise ParseError(f"Zduplikowana reguła {key}.")
+                source = _members(entry, "source")
+                destination = _members(entry, "destination")
+                if not source or not destination:
+                    raise ParseError(
+                        f"Reguła {location}/{rulebase}/{policy_type}/{name} ma puste source lub destination w running config."
+                    )
+                for member in entry.findall("./source/member") + entry.findall("./destination/member"):
+                    handled_value_nodes.add(id(member))
+                xpath = (
+                    f"{scope_xpath}/{rulebase}/{policy_type}/rules/entry"
+                    f"[@name={_xpath_literal(name)}]"
+                )
+                rules[key] = PolicyRule(
+                    key=key,
+                    uuid=entry.get("uuid"),
+                    source_members=source,
+                    destination_members=destination,
+                    negate_source=_yes(entry, "negate-source"),
+                    negate_destination=_yes(entry, "negate-destination"),
+                    disabled=_yes(entry, "disabled"),
+                    action=(entry.findtext("./action") or "").strip() or None,
+                    xml=_xml_text(entry),
+                    xpath=xpath,
+                    order_index=index,
+                    previous_rule=names[index - 1] if index > 0 else None,
+                    next_rule=names[index + 1] if index + 1 < len(names) else None,
+                )
+                rule_entry_keys[id(entry)] = key
+
+    result.unknown_occurrences = _scan_unknown_occurrences(
+        [(location, scope)],
         rule_entry_keys,
         rules,
         skipped_definition_entries,
         handled_value_nodes,
     )
-    return model
+    return result
 
 
 def _validate_hierarchy(parents: Dict[str, Optional[str]]) -> None:
@@ -411,7 +499,26 @@ def _validate_hierarchy(parents: Dict[str, Optional[str]]) -> None:
             current = parents.get(current)
 
 
+def _derived_table(model: ConfigModel, key: str) -> Dict[Any, Any]:
+    # Lookup tables below depend only on the parsed entities, which are not
+    # mutated after parse_config, so they live for the lifetime of the model.
+    table = model.derived.get(key)
+    if table is None:
+        table = model.derived[key] = {}
+    return table
+
+
 def scope_chain(model: ConfigModel, location: str) -> Tuple[str, ...]:
+    chains = _derived_table(model, "scope_chains")
+    cached = chains.get(location)
+    if cached is not None:
+        return cached
+    chain = _walk_scope_chain(model, location)
+    chains[location] = chain
+    return chain
+
+
+def _walk_scope_chain(model: ConfigModel, location: str) -> Tuple[str, ...]:
     if location == SHARED:
         return (SHARED,)
     if location not in model.parents:
@@ -432,9 +539,14 @@ def scope_chain(model: ConfigModel, location: str) -> Tuple[str, ...]:
 def resolution_chain(model: ConfigModel, location: str) -> Tuple[str, ...]:
     """Return object lookup precedence for one effective device-group scope."""
 
+    chains = _derived_table(model, "resolution_chains")
+    cached = chains.get(location)
+    if cached is not None:
+        return cached
     chain = scope_chain(model, location)
     if model.ancestor_objects_take_precedence:
-        return tuple(reversed(chain))
+        chain = tuple(reversed(chain))
+    chains[location] = chain
     return chain
 
 
@@ -566,23 +678,54 @@ def resolve_name(
 ) -> Tuple[str, Optional[ScopedName], str]:
     """Resolve an address/group reference using nearest effective scope."""
 
+    resolutions = _derived_table(model, "resolutions")
+    cached = resolutions.get((location, value))
+    if cached is not None:
+        return cached
+    resolution = _resolve_uncached(model, location, value)
+    resolutions[(location, value)] = resolution
+    return resolution
+
+
+def _scope_symbols(
+    model: ConfigModel,
+) -> Dict[str, Dict[str, Tuple[str, Optional[ScopedName], str]]]:
+    """Flatten the three definition tables into one name table per scope."""
+
+    symbols = model.derived.get("scope_symbols")
+    if symbols is not None:
+        return symbols
+    kinds: Dict[ScopedName, List[str]] = {}
+    for kind, definitions in (
+        ("address", model.addresses),
+        ("static-group", model.static_groups),
+        ("dynamic-group", model.dynamic_groups),
+    ):
+        for key in definitions:
+            kinds.setdefault(key, []).append(kind)
+    symbols = {}
+    for key, candidates in kinds.items():
+        symbols.setdefault(key.location, {})[key.name] = (
+            ("ambiguous", key, ",".join(candidates))
+            if len(candidates) > 1
+            else (candidates[0], key, "")
+        )
+    model.derived["scope_symbols"] = symbols
+    return symbols
+
+
+def _resolve_uncached(
+    model: ConfigModel, location: str, value: str
+) -> Tuple[str, Optional[ScopedName], str]:
     if value == "any":
         return "builtin", None, ""
     # A PAN-OS object can itself have an IP-looking name. Resolve definitions
     # first; only an otherwise unresolved token is treated as a raw literal.
+    symbols = _scope_symbols(model)
     for scope in resolution_chain(model, location):
-        key = ScopedName(scope, value)
-        candidates: List[str] = []
-        if key in model.addresses:
-            candidates.append("address")
-        if key in model.static_groups:
-            candidates.append("static-group")
-        if key in model.dynamic_groups:
-            candidates.append("dynamic-group")
-        if len(candidates) > 1:
-            return "ambiguous", key, ",".join(candidates)
-        if candidates:
-            return candidates[0], key, ""
+        resolved = symbols.get(scope, {}).get(value)
+        if resolved is not None:
+            return resolved
     literal = normalize_host_literal(value)
     if literal is not None:
         return "literal", None, literal
@@ -623,7 +766,7 @@ def _resolve_rule_references(
     result: Dict[RuleKey, List[ResolvedReference]] = {}
     for key, rule in sorted(model.rules.items()):
         refs: List[ResolvedReference] = []
-        for field, members in (
+        for rule_field, members in (
             ("source", rule.source_members),
             ("destination", rule.destination_members),
         ):
@@ -634,8 +777,8 @@ def _resolve_rule_references(
                         owner_location=key.location,
                         owner_type=f"{key.policy_type}-rule",
                         owner_name=key.name,
-                        configuration_path=f"{rule.xpath}/{field}/member",
-                        field=field,
+                        configuration_path=f"{rule.xpath}/{rule_field}/member",
+                        field=rule_field,
                         referenced_name=member,
                         resolved_kind=kind,
                         resolved_key=resolved,
@@ -765,91 +908,169 @@ def _scan_unknown_occurrences(
     return occurrences
 
 
-def match_ip_objects(model: ConfigModel, ips: Iterable[str]) -> Dict[str, IPMatch]:
-    normalized_ips = sorted({str(ipaddress.ip_address(ip)) for ip in ips})
-    parsed_ips = {ip: ipaddress.ip_address(ip) for ip in normalized_ips}
-    exact: Dict[str, List[ScopedName]] = {ip: [] for ip in normalized_ips}
-    containing: Dict[str, List[ScopedName]] = {ip: [] for ip in normalized_ips}
+class _IntervalTree:
+    """Static centred interval tree answering point-stabbing queries.
 
-    for key, obj in sorted(model.addresses.items()):
-        if obj.object_type == "ip-netmask":
-            try:
-                interface = ipaddress.ip_interface(obj.raw_value)
-            except ValueError:
-                model.warnings.append(
-                    f"Nie można zinterpretować ip-netmask {key.location}/{key.name}: {obj.raw_value}"
-                )
-                continue
-            if interface.network.prefixlen == interface.max_prefixlen:
-                value = str(interface.ip)
-                if value in exact:
-                    exact[value].append(key)
-            else:
-                for ip, parsed in parsed_ips.items():
-                    if parsed.version == interface.version and parsed in interface.network:
-                        containing[ip].append(key)
-        elif obj.object_type == "ip-range":
-            try:
-                start_text, end_text = obj.raw_value.split("-", 1)
-                start = ipaddress.ip_address(start_text.strip())
-                end = ipaddress.ip_address(end_text.strip())
-            except ValueError:
-                model.warnings.append(
-                    f"Nie można zinterpretować ip-range {key.location}/{key.name}: {obj.raw_value}"
-                )
-                continue
-            if start.version != end.version or int(start) > int(end):
-                model.warnings.append(
-                    f"Niepoprawny ip-range {key.location}/{key.name}: {obj.raw_value}"
+    Every node keeps the intervals spanning its centre twice: ordered by
+    start for points left of the centre and by descending end for points
+    right of it, so one query visits O(log n) nodes plus the matches.  Small
+    subtrees are kept as flat leaves, which are cheaper to scan than to build.
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+    LEAF_SIZE = 16
+
+    def __init__(self, intervals: Sequence[Tuple[int, int, ScopedName]]) -> None:
+        self.left: Optional[_IntervalTree] = None
+        self.right: Optional[_IntervalTree] = None
+        if len(intervals) <= self.LEAF_SIZE:
+            self.center: Optional[int] = None
+            self.by_start = list(intervals)
+            self.by_end = self.by_start
+            return
+        starts = sorted(start for start, _end, _key in intervals)
+        self.center = starts[len(starts) // 2]
+        spanning = [item for item in intervals if item[0] <= self.center <= item[1]]
+        left = [item for item in intervals if item[1] < self.center]
+        right = [item for item in intervals if item[0] > self.center]
+        self.by_start = sorted(spanning, key=lambda item: item[0])
+        self.by_end = sorted(spanning, key=lambda item: -item[1])
+        self.left = _IntervalTree(left) if left else None
+        self.right = _IntervalTree(right) if right else None
+
+    def stab(self, point: int) -> List[ScopedName]:
+        found: List[ScopedName] = []
+        node: Optional[_IntervalTree] = self
+        while node is not None:
+            if node.center is None:
+                found.extend(
+                    key for start, end, key in node.by_start if start <= point <= end
                 )
-                continue
-            if start == end:
-                value = str(start)
-                if value in exact:
-                    exact[value].append(key)
+                node = None
+            elif point < node.center:
+                for start, _end, key in node.by_start:
+                    if start > point:
+                        break
+                    found.append(key)
+                node = node.left
+            elif point > node.center:
+                for _start, end, key in node.by_end:
+                    if end < point:
+                        break
+                    found.append(key)
+                node = node.right
             else:
-                for ip, parsed in parsed_ips.items():
-                    if parsed.version == start.version and int(start) <= int(parsed) <= int(end):
-                        containing[ip].append(key)
-        elif obj.object_type == "ip-wildcard":
-            try:
-                base_text, wildcard_text = obj.raw_value.split("/", 1)
-                base = ipaddress.IPv4Address(base_text.strip())
-                wildcard = ipaddress.IPv4Address(wildcard_text.strip())
-            except ValueError:
-                model.warnings.append(
-                    f"Nie można zinterpretować ip-wildcard {key.location}/{key.name}: {obj.raw_value}"
-                )
-                continue
-            wildcard_int = int(wildcard)
-            for ip, parsed in parsed_ips.items():
-                if not isinstance(parsed, ipaddress.IPv4Address):
+                found.extend(key for _start, _end, key in node.by_start)
+                node = None
+        return found
+
+
+class AddressMatchIndex:
+    """Address objects indexed once for exact and containing IP lookups.
+
+    Host objects go to an exact-value table, ip-netmask/ip-range spans to one
+    interval tree per IP version and IPv4 wildcards to per-mask tables keyed
+    by the masked base, so a lookup costs O(log n) per IP plus one probe per
+    distinct wildcard mask instead of a scan over every object.
+    """
+
+    def __init__(self, model: ConfigModel) -> None:
+        self.warnings: List[str] = []
+        self._exact: Dict[str, List[ScopedName]] = defaultdict(list)
+        spans: Dict[int, List[Tuple[int, int, ScopedName]]] = defaultdict(list)
+        self._wildcards: Dict[int, Dict[int, List[ScopedName]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+
+        for key, obj in sorted(model.addresses.items()):
+            if obj.object_type == "ip-netmask":
+                try:
+                    interface = ipaddress.ip_interface(obj.raw_value)
+                except ValueError:
+                    self.warnings.append(
+                        f"Nie można zinterpretować ip-netmask {key.location}/{key.name}: {obj.raw_value}"
+                    )
+                    continue
+                if interface.network.prefixlen == interface.max_prefixlen:
+                    self._exact[str(interface.ip)].append(key)
+                else:
+                    network = interface.network
+                    spans[network.version].append(
+                        (int(network.network_address), int(network.broadcast_address), key)
+                    )
+            elif obj.object_type == "ip-range":
+                try:
+                    start_text, end_text = obj.raw_value.split("-", 1)
+                    start = ipaddress.ip_address(start_text.strip())
+                    end = ipaddress.ip_address(end_text.strip())
+                except ValueError:
+                    self.warnings.append(
+                        f"Nie można zinterpretować ip-range {key.location}/{key.name}: {obj.raw_value}"
+                    )
                     continue
-                matches = (
-                    (int(parsed) ^ int(base)) & (~wildcard_int & 0xFFFFFFFF)
-                ) == 0
-                if not matches:
+                if start.version != end.version or int(start) > int(end):
+                    self.warnings.append(
+                        f"Niepoprawny ip-range {key.location}/{key.name}: {obj.raw_value}"
+                    )
+                    continue
+                if start == end:
+                    self._exact[str(start)].append(key)
+                else:
+                    spans[start.version].append((int(start), int(end), key))
+            elif obj.object_type == "ip-wildcard":
+                try:
+                    base_text, wildcard_text = obj.raw_value.split("/", 1)
+                    base = ipaddress.IPv4Address(base_text.strip())
+                    wildcard = ipaddress.IPv4Address(wildcard_text.strip())
+                except ValueError:
+                    self.warnings.append(
+                        f"Nie można zinterpretować ip-wildcard {key.location}/{key.name}: {obj.raw_value}"
+                    )
                     continue
-                if wildcard_int == 0 and parsed == base:
-                    exact[ip].append(key)
+                if int(wildcard) == 0:
+                    self._exact[str(base)].append(key)
                 else:
-                    containing[ip].append(key)
+                    care = ~int(wildcard) & 0xFFFFFFFF
+                    self._wildcards[int(wildcard)][int(base) & care].append(key)
 
-    fqdn_count = sum(
-        1 for obj in model.addresses.values() if obj.object_type == "fqdn"
-    )
-    if fqdn_count:
+        self._spans = {
+            version: _IntervalTree(intervals) for version, intervals in spans.items()
+        }
+        self.fqdn_count = sum(
+            1 for obj in model.addresses.values() if obj.object_type == "fqdn"
+        )
+
+    def match(self, ip: str) -> IPMatch:
+        parsed = ipaddress.ip_address(ip)
+        value = str(parsed)
+        containing: List[ScopedName] = []
+        tree = self._spans.get(parsed.version)
+        if tree is not None:
+            containing.extend(tree.stab(int(parsed)))
+        if isinstance(parsed, ipaddress.IPv4Address):
+            for wildcard, bases in self._wildcards.items():
+                containing.extend(bases.get(int(parsed) & ~wildcard & 0xFFFFFFFF, ()))
+        return IPMatch(
+            value,
+            tuple(sorted(self._exact.get(value, ()))),
+            tuple(sorted(containing)),
+        )
+
+
+def match_ip_objects(model: ConfigModel, ips: Iterable[str]) -> Dict[str, IPMatch]:
+    normalized_ips = sorted({str(ipaddress.ip_address(ip)) for ip in ips})
+    index = AddressMatchIndex(model)
+    model.warnings.extend(index.warnings)
+
+    if index.fqdn_count:
         warning = (
-            f"Snapshot zawiera {fqdn_count} obiektów FQDN; ich bieżących rozwiązań DNS "
+            f"Snapshot zawiera {index.fqdn_count} obiektów FQDN; ich bieżących rozwiązań DNS "
             "nie można wiarygodnie przypisać do IP wyłącznie z running config."
         )
         if warning not in model.warnings:
             model.warnings.append(warning)
 
-    return {
-        ip: IPMatch(ip, tuple(sorted(exact[ip])), tuple(sorted(containing[ip])))
-        for ip in normalized_ips
-    }
+    return {ip: index.match(ip) for ip in normalized_ips}
 
 
 def static_group_cycle_nodes(model: ConfigModel) -> Set[ScopedName]:
@@ -906,22 +1127,94 @@ def static_group_cycle_nodes(model: ConfigModel) -> Set[ScopedName]:
     return cyclic
 
 
-def evaluate_dynamic_filter(filter_text: str, object_tags: Iterable[str]) -> Optional[bool]:
-    """Evaluate the common PAN-OS DAG boolean grammar; None means unknown."""
+_DAG_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<paren>[()])|"
+    r"'(?P<single>(?:\\.|[^'\\])*)'|"
+    r'"(?P<double>(?:\\.|[^"\\])*)"|'
+    r"(?P<bare>[^\s()]+)"
+    r")",
+    re.IGNORECASE,
+)
+
+# Compiled filter tree: ("tag", casefolded-name) | ("not", node) |
+# ("and", (node, ...)) | ("or", (node, ...)).
+_FilterNode = Tuple[str, object]
+
+
+class DynamicFilter:
+    """One DAG filter parsed once into an expression tree.
+
+    ``matches`` evaluates the filter for one object's tags.  ``select``
+    evaluates it over a whole tag→objects inverted index with set algebra,
+    so membership for every object is computed in a single pass over the
+    filter instead of once per (group, object) pair.
+    """
+
+    __slots__ = ("text", "tags", "_node")
+
+    def __init__(self, text: str, node: _FilterNode) -> None:
+        self.text = text
+        self._node = node
+        self.tags = frozenset(_filter_tags(node))
+
+    def matches(self, object_tags: Iterable[str]) -> bool:
+        return _filter_matches(self._node, {tag.casefold() for tag in object_tags})
+
+    def select(
+        self,
+        tag_index: Mapping[str, AbstractSet[ScopedName]],
+        universe: AbstractSet[ScopedName],
+    ) -> Set[ScopedName]:
+        return set(_filter_select(self._node, tag_index, universe))
+
+
+def _filter_tags(node: _FilterNode) -> Iterator[str]:
+    kind, value = node
+    if kind == "tag":
+        yield value  # type: ignore[misc]
+    elif kind == "not":
+        yield from _filter_tags(value)  # type: ignore[arg-type]
+    else:
+        for child in value:  # type: ignore[attr-defined]
+            yield from _filter_tags(child)
+
+
+def _filter_matches(node: _FilterNode, tags: AbstractSet[str]) -> bool:
+    kind, value = node
+    if kind == "tag":
+        return value in tags
+    if kind == "not":
+        return not _filter_matches(value, tags)  # type: ignore[arg-type]
+    if kind == "and":
+        return all(_filter_matches(child, tags) for child in value)  # type: ignore[attr-defined]
+    return any(_filter_matches(child, tags) for child in value)  # type: ignore[attr-defined]
+
+
+def _filter_select(
+    node: _FilterNode,
+    tag_index: Mapping[str, AbstractSet[ScopedName]],
+    universe: AbstractSet[ScopedName],
+) -> AbstractSet[ScopedName]:
+    kind, value = node
+    if kind == "tag":
+        return tag_index.get(value, frozenset()) & universe  # type: ignore[arg-type]
+    if kind == "not":
+        return universe - _filter_select(value, tag_index, universe)  # type: ignore[arg-type]
+    children = [_filter_select(child, tag_index, universe) for child in value]  # type: ignore[attr-defined]
+    if kind == "and":
+        return frozenset(universe).intersection(*children)
+    return frozenset().union(*children)
+
+
+@lru_cache(maxsize=4096)
+def compile_dynamic_filter(filter_text: str) -> Optional[DynamicFilter]:
+    """Parse the common PAN-OS DAG boolean grammar; None means unknown."""
 
-    token_pattern = re.compile(
-        r"\s*(?:"
-        r"(?P<paren>[()])|"
-        r"'(?P<single>(?:\\.|[^'\\])*)'|"
-        r'"(?P<double>(?:\\.|[^"\\])*)"|'
-        r"(?P<bare>[^\s()]+)"
-        r")",
-        re.IGNORECASE,
-    )
     tokens: List[Tuple[str, str]] = []
     position = 0
     while position < len(filter_text):
-        match = token_pattern.match(filter_text, position)
+        match = _DAG_TOKEN.match(filter_text, position)
         if not match:
             return None
         position = match.end()
@@ -945,17 +1238,16 @@ def evaluate_dynamic_filter(filter_text: str, object_tags: Iterable[str]) -> Opt
     if not tokens:
         return None
 
-    tags = {tag.casefold() for tag in object_tags}
     index = 0
 
-    def parse_atom() -> bool:
+    def parse_atom() -> _FilterNode:
         nonlocal index
         if index >= len(tokens):
             raise ValueError
         kind, value = tokens[index]
         if kind == "tag":
             index += 1
-            return value.casefold() in tags
+            return ("tag", value.casefold())
         if kind == "(":
             index += 1
             result = parse_or()
@@ -965,34 +1257,56 @@ def evaluate_dynamic_filter(filter_text: str, object_tags: Iterable[str]) -> Opt
             return result
         raise ValueError
 
-    def parse_not() -> bool:
+    def parse_not() -> _FilterNode:
         nonlocal index
         if index < len(tokens) and tokens[index] == ("op", "not"):
             index += 1
-            return not parse_not()
+            return ("not", parse_not())
         return parse_atom()
 
-    def parse_and() -> bool:
+    def parse_and() -> _FilterNode:
         nonlocal index
-        result = parse_not()
+        operands = [parse_not()]
         while index < len(tokens) and tokens[index] == ("op", "and"):
             index += 1
-            result = parse_not() and result
-        return result
+            operands.append(parse_not())
+        return operands[0] if len(operands) == 1 else ("and", tuple(operands))
 
-    def parse_or() -> bool:
+    def parse_or() -> _FilterNode:
         nonlocal index
-        result = parse_and()
+        operands = [parse_and()]
         while index < len(tokens) and tokens[index] == ("op", "or"):
             index += 1
-            result = parse_and() or result
-        return result
+            operands.append(parse_and())
+        return operands[0] if len(operands) == 1 else ("or", tuple(operands))
 
     try:
-        result = parse_or()
+        node = parse_or()
     except ValueError:
         return None
-    return result if index == len(tokens) else None
+    return DynamicFilter(filter_text, node) if index == len(tokens) else None
+
+
+def evaluate_dynamic_filter(filter_text: str, object_tags: Iterable[str]) -> Optional[bool]:
+    """Evaluate the common PAN-OS DAG boolean grammar; None means unknown."""
+
+    compiled = compile_dynamic_filter(filter_text)
+    return None if compiled is None else compiled.matches(object_tags)
+
+
+def address_tag_index(
+    model: ConfigModel, keys: Iterable[ScopedName]
+) -> Dict[str, Set[ScopedName]]:
+    """Map each casefolded tag to the address objects carrying it."""
+
+    index: Dict[str, Set[ScopedName]] = defaultdict(set)
+    for key in keys:
+        obj = model.addresses.get(key)
+        if obj is None:
+            continue
+        for tag in obj.tags:
+            index[tag.casefold()].add(key)
+    return dict(index)
 
 
 def _normalized_config_bytes(config: ET.Element, *, relevant_only: bool) -> bytes:
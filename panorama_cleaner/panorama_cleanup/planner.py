@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from typing import DefaultDict, Dict, Iterable, List, Mapping, Optional, Set, Tuple
@@ -20,12 +21,13 @@ from .models import (
 )
 from .panos import (
     address_literal_relation,
-    evaluate_dynamic_filter,
+    address_tag_index,
+    compile_dynamic_filter,
+    normalize_host_literal,
     resolve_occurrence,
-    resolve_name,
-    scope_chain,
     static_group_cycle_nodes,
 )
+from .references import ReferenceIndex, reference_index
 
 
 @dataclass
@@ -102,6 +104,7 @@ def plan_cleanup(
     eligible_ips: Iterable[str],
     *,
     nat_translation_action: str = "delete-rule",
+    workers: int = 1,
 ) -> BatchPlan:
     """Create a global plan and atomically block unsafe IPs until convergence."""
 
@@ -111,6 +114,7 @@ def plan_cleanup(
         model,
         build_target_tokens(matches, eligible_ips),
         nat_translation_action=nat_translation_action,
+        workers=workers,
     )
 
 
@@ -121,14 +125,34 @@ def plan_cleanup_targets(
     forced_groups: Optional[Mapping[ScopedName, TargetToken]] = None,
     forced_rules: Optional[Mapping[RuleKey, TargetToken]] = None,
     nat_translation_action: str = "delete-rule",
+    workers: int = 1,
 ) -> BatchPlan:
-    """Plan an atomic mixed batch of IP, object, group and policy targets."""
+    """Plan an atomic mixed batch of IP, object, group and policy targets.
+
+    With ``workers > 1`` targets that cannot reach a common group, rule or
+    occurrence are split into shards planned on a process pool; the merged
+    plan is the same as the one planned in a single pass.
+    """
 
     if nat_translation_action not in {"block", "delete-rule"}:
         raise ValueError("nat_translation_action must be block or delete-rule")
+    if workers < 1:
+        raise ValueError("workers musi być dodatnie")
     all_tokens = set(tokens)
     all_forced_groups = dict(forced_groups or {})
     all_forced_rules = dict(forced_rules or {})
+    if workers > 1:
+        shards = _independent_shards(
+            model, all_tokens, all_forced_groups, all_forced_rules, workers
+        )
+        if len(shards) > 1:
+            return _plan_shards(
+                model,
+                shards,
+                all_forced_groups,
+                all_forced_rules,
+                nat_translation_action,
+            )
     active_tokens = set(all_tokens)
     blocked_ips: Dict[str, List[BlockReason]] = {}
 
@@ -182,6 +206,193 @@ def plan_cleanup_targets(
     raise UnsafePlanError("Plan blokad nie osiągnął punktu stałego.")
 
 
+def _independent_shards(
+    model: ConfigModel,
+    tokens: Set[TargetToken],
+    forced_groups: Mapping[ScopedName, TargetToken],
+    forced_rules: Mapping[RuleKey, TargetToken],
+    count: int,
+) -> List[Tuple[TargetToken, ...]]:
+    """Split targets into at most ``count`` shards that share no owner.
+
+    Two targets interact only through an owner both can modify: a group or
+    rule naming them, directly or through groups that may empty, an unknown
+    occurrence, or a blocked IP shared by several tokens.  The walk follows
+    references by name in every scope, so it over-approximates effective
+    resolution.  Containing literals only block their own target and do not
+    join shards.
+    """
+
+    referrers: Dict[str, Set[object]] = {}
+    for owners in (model.group_references, model.rule_references):
+        for owner, refs in owners.items():
+            for ref in refs:
+                referrers.setdefault(ref.referenced_name, set()).add(owner)
+    for occurrence in model.unknown_occurrences:
+        referrers.setdefault(occurrence.value, set()).add(
+            occurrence.owner_rule or occurrence.owner_group or occurrence
+        )
+    literal_referrers: Dict[str, Set[object]] = {}
+    for value, owners in referrers.items():
+        literal = normalize_host_literal(value)
+        if literal is not None:
+            literal_referrers.setdefault(literal, set()).update(owners)
+
+    seeds: Dict[TargetToken, List[object]] = {
+        token: [("ip", token.ip)] for token in tokens
+    }
+    for token in tokens:
+        if token.kind == "address":
+            seeds[token].append(token.scoped_name)
+            seeds[token].extend(referrers.get(token.name, ()))
+        elif token.kind == "literal":
+            seeds[token].extend(literal_referrers.get(token.ip, ()))
+    for forced in (forced_groups, forced_rules):
+        for key, token in forced.items():
+            if token in seeds:
+                seeds[token].append(key)
+
+    parent: Dict[TargetToken, TargetToken] = {}
+
+    def find(token: TargetToken) -> TargetToken:
+        parent.setdefault(token, token)
+        while parent[token] != token:
+            parent[token] = parent[parent[token]]
+            token = parent[token]
+        return token
+
+    # A node reached before was fully expanded by its first owner, so the
+    # walk only joins the two targets and stops there.
+    owner_of: Dict[object, TargetToken] = {}
+    for token in sorted(tokens):
+        find(token)
+        stack = list(seeds[token])
+        while stack:
+            node = stack.pop()
+            owner = owner_of.get(node)
+            if owner is not None:
+                left, right = find(token), find(owner)
+                if left != right:
+                    parent[max(left, right)] = min(left, right)
+                continue
+            owner_of[node] = token
+            if isinstance(node, ScopedName) and node in model.static_groups:
+                stack.extend(referrers.get(node.name, ()))
+
+    components: Dict[TargetToken, List[TargetToken]] = {}
+    for token in sorted(tokens):
+        components.setdefault(find(token), []).append(token)
+    bins: List[List[TargetToken]] = [[] for _ in range(min(count, len(components)))]
+    for component in sorted(components.values(), key=lambda item: (-len(item), item[0])):
+        min(bins, key=len).extend(component)
+    return [tuple(sorted(shard)) for shard in bins if shard]
+
+
+_SHARD_MODEL: Optional[ConfigModel] = None
+
+
+def _init_shard_worker(model: ConfigModel) -> None:
+    global _SHARD_MODEL
+    _SHARD_MODEL = model
+
+
+def _plan_shard(
+    payload: Tuple[
+        Tuple[TargetToken, ...],
+        Dict[ScopedName, TargetToken],
+        Dict[RuleKey, TargetToken],
+        str,
+    ],
+) -> BatchPlan:
+    tokens, forced_groups, forced_rules, nat_translation_action = payload
+    if _SHARD_MODEL is None:
+        raise UnsafePlanError("Proces planowania nie otrzymał modelu konfiguracji.")
+    return plan_cleanup_targets(
+        _SHARD_MODEL,
+        tokens,
+        forced_groups=forced_groups,
+        forced_rules=forced_rules,
+        nat_translation_action=nat_translation_action,
+        workers=1,
+    )
+
+
+def _plan_shards(
+    model: ConfigModel,
+    shards: List[Tuple[TargetToken, ...]],
+    forced_groups: Mapping[ScopedName, TargetToken],
+    forced_rules: Mapping[RuleKey, TargetToken],
+    nat_translation_action: str,
+) -> BatchPlan:
+    # Build the shared lookup tables before the pool starts so forked workers
+    # inherit them; otherwise the model is pickled once per worker.
+    reference_index(model)
+    payloads = []
+    for shard in shards:
+        members = set(shard)
+        payloads.append(
+            (
+                shard,
+                {key: token for key, token in forced_groups.items() if token in members},
+                {key: token for key, token in forced_rules.items() if token in members},
+                nat_translation_action,
+            )
+        )
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(payloads),
+        initializer=_init_shard_worker,
+        initargs=(model,),
+    ) as pool:
+        plans = list(pool.map(_plan_shard, payloads))
+    return _merge_shard_plans(model, plans)
+
+
+def _merge_shard_plans(model: ConfigModel, plans: Iterable[BatchPlan]) -> BatchPlan:
+    merged = BatchPlan(
+        active_tokens=set(),
+        blocked_ips={},
+        group_member_removals={},
+        deleted_groups=set(),
+        group_causes={},
+        rule_field_removals={},
+        deleted_rules=set(),
+        rule_causes={},
+        deleted_addresses=set(),
+        dynamic_group_impacts={},
+        warnings=list(model.warnings),
+    )
+    for plan in plans:
+        for merged_part, part in (
+            (merged.blocked_ips, plan.blocked_ips),
+            (merged.group_member_removals, plan.group_member_removals),
+            (merged.group_causes, plan.group_causes),
+            (merged.rule_field_removals, plan.rule_field_removals),
+            (merged.rule_causes, plan.rule_causes),
+        ):
+            if merged_part.keys() & part.keys():
+                raise UnsafePlanError(
+                    "Równoległe części planu zmieniają tę samą encję; "
+                    "podział celów nie był niezależny."
+                )
+            merged_part.update(part)
+        merged.active_tokens.update(plan.active_tokens)
+        merged.deleted_groups.update(plan.deleted_groups)
+        merged.deleted_rules.update(plan.deleted_rules)
+        merged.deleted_addresses.update(plan.deleted_addresses)
+        for group_key, members in plan.dynamic_group_impacts.items():
+            merged.dynamic_group_impacts.setdefault(group_key, set()).update(members)
+    for name in (
+        "blocked_ips",
+        "group_member_removals",
+        "group_causes",
+        "rule_field_removals",
+        "rule_causes",
+        "dynamic_group_impacts",
+    ):
+        setattr(merged, name, dict(sorted(getattr(merged, name).items())))
+    return merged
+
+
 def _token_maps(
     active_tokens: Set[TargetToken],
 ) -> Tuple[Dict[ScopedName, TargetToken], Dict[str, TargetToken]]:
@@ -211,29 +422,8 @@ def _reference_tokens(
     return set()
 
 
-def _descendant_contexts(model: ConfigModel, location: str) -> Tuple[str, ...]:
-    contexts = [location]
-    for candidate in sorted(model.parents):
-        if candidate != location and location in scope_chain(model, candidate):
-            contexts.append(candidate)
-    return tuple(contexts)
-
-
-def _reference_contexts(
-    model: ConfigModel, ref: ResolvedReference
-) -> Tuple[str, ...]:
-    contexts: List[str] = []
-    for context in _descendant_contexts(model, ref.owner_location):
-        if ref.owner_group is not None:
-            kind, owner, _ = resolve_name(model, context, ref.owner_group.name)
-            if kind != "static-group" or owner != ref.owner_group:
-                continue
-        contexts.append(context)
-    return tuple(contexts)
-
-
 def _resolution_tokens(
-    model: ConfigModel,
+    index: ReferenceIndex,
     context: str,
     value: str,
     address_tokens: Mapping[ScopedName, TargetToken],
@@ -241,7 +431,7 @@ def _resolution_tokens(
     deleted_groups: Set[ScopedName],
     group_causes: Mapping[ScopedName, Set[TargetToken]],
 ) -> Set[TargetToken]:
-    kind, resolved, detail = resolve_name(model, context, value)
+    kind, resolved, detail = index.resolve(context, value)
     if kind == "address" and resolved in address_tokens:
         return {address_tokens[resolved]}
     if kind == "literal" and detail in literal_tokens:
@@ -258,15 +448,14 @@ def _effective_group_causes(
 ) -> Dict[Tuple[str, ScopedName], Set[TargetToken]]:
     """Expand target membership of static groups separately per effective scope."""
 
+    index = reference_index(model)
     affected: Dict[Tuple[str, ScopedName], Set[TargetToken]] = {}
     contexts_by_group: Dict[ScopedName, Tuple[str, ...]] = {}
     for group_key in sorted(model.static_groups):
         contexts = tuple(
             context
-            for context in _descendant_contexts(model, group_key.location)
-            if _resolves_to(
-                model, context, group_key.name, "static-group", group_key
-            )
+            for context in index.descendant_contexts(group_key.location)
+            if index.resolves_to(context, group_key.name, "static-group", group_key)
         )
         contexts_by_group[group_key] = contexts
         for context in contexts:
@@ -279,8 +468,8 @@ def _effective_group_causes(
                 owner_causes = affected[(context, owner)]
                 before = len(owner_causes)
                 for ref in refs:
-                    kind, resolved, detail = resolve_name(
-                        model, context, ref.referenced_name
+                    kind, resolved, detail = index.resolve(
+                        context, ref.referenced_name
                     )
                     if kind == "address" and resolved in address_tokens:
                         owner_causes.add(address_tokens[resolved])
@@ -298,7 +487,7 @@ def _effective_group_causes(
 
 
 def _occurrence_resolution_tokens(
-    model: ConfigModel,
+    index: ReferenceIndex,
     context: str,
     value: str,
     address_tokens: Mapping[ScopedName, TargetToken],
@@ -309,7 +498,7 @@ def _occurrence_resolution_tokens(
         Tuple[str, ScopedName], Set[TargetToken]
     ],
 ) -> Set[TargetToken]:
-    kind, resolved, detail = resolve_name(model, context, value)
+    kind, resolved, detail = index.resolve(context, value)
     if kind == "static-group" and resolved is not None:
         effective = effective_group_causes.get((context, resolved), set())
         if effective:
@@ -323,24 +512,13 @@ def _occurrence_resolution_tokens(
     return set()
 
 
-def _resolves_to(
-    model: ConfigModel,
-    context: str,
-    value: str,
-    expected_kind: str,
-    expected_key: ScopedName,
-) -> bool:
-    kind, resolved, _ = resolve_name(model, context, value)
-    return kind == expected_kind and resolved == expected_key
-
-
 def _containing_literal_tokens(
-    model: ConfigModel,
+    index: ReferenceIndex,
     context: str,
     value: str,
     literal_tokens: Mapping[str, TargetToken],
 ) -> Set[TargetToken]:
-    kind, _, _ = resolve_name(model, context, value)
+    kind, _, _ = index.resolve(context, value)
     if kind != "unresolved":
         return set()
     return {
@@ -371,17 +549,13 @@ def _audit_effective_scope_references(
 ) -> None:
     """Fail closed when one physical mutation has different DG meanings."""
 
-    all_refs = [
-        ref
-        for refs in list(model.group_references.values())
-        + list(model.rule_references.values())
-        for ref in refs
-    ]
-    for ref in all_refs:
-        contexts = _reference_contexts(model, ref)
+    index = reference_index(model)
+    for item in index.references:
+        ref = item.reference
+        contexts = item.contexts
         context_causes = {
             context: _resolution_tokens(
-                model,
+                index,
                 context,
                 ref.referenced_name,
                 address_tokens,
@@ -414,7 +588,7 @@ def _audit_effective_scope_references(
         for context in contexts or (ref.owner_location,):
             containing.update(
                 _containing_literal_tokens(
-                    model, context, ref.referenced_name, literal_tokens
+                    index, context, ref.referenced_name, literal_tokens
                 )
             )
         if containing:
@@ -460,11 +634,12 @@ def _audit_effective_scope_references(
                 ref.configuration_path,
             )
 
-    for occurrence in model.unknown_occurrences:
-        contexts = _descendant_contexts(model, occurrence.location)
+    for indexed_occurrence in index.occurrences:
+        occurrence = indexed_occurrence.occurrence
+        contexts = tuple(context for context, _ in indexed_occurrence.resolutions)
         context_causes = {
             context: _occurrence_resolution_tokens(
-                model,
+                index,
                 context,
                 occurrence.value,
                 address_tokens,
@@ -480,7 +655,7 @@ def _audit_effective_scope_references(
         for context in contexts:
             containing.update(
                 _containing_literal_tokens(
-                    model, context, occurrence.value, literal_tokens
+                    index, context, occurrence.value, literal_tokens
                 )
             )
         if containing:
@@ -558,6 +733,7 @@ def _propagate_plan_causes(
 ) -> None:
     """Propagate all batch IP causes through nested effective references."""
 
+    index = reference_index(model)
     max_passes = len(model.static_groups) + len(model.rules) + 2
     for _ in range(max_passes):
         before = sum(len(tokens) for tokens in group_causes.values()) + sum(
@@ -574,33 +750,31 @@ def _propagate_plan_causes(
             for tokens in removals.values()
         )
 
-        for refs in list(model.group_references.values()) + list(
-            model.rule_references.values()
-        ):
-            for ref in refs:
-                planned: Optional[Set[TargetToken]] = None
-                if ref.owner_group is not None:
-                    planned = group_removals.get(ref.owner_group, {}).get(
-                        ref.referenced_name
-                    )
-                elif ref.owner_rule is not None:
-                    planned = field_removals.get(
-                        (ref.owner_rule, ref.field), {}
-                    ).get(ref.referenced_name)
-                if planned is None:
-                    continue
-                for context in _reference_contexts(model, ref):
-                    planned.update(
-                        _resolution_tokens(
-                            model,
-                            context,
-                            ref.referenced_name,
-                            address_tokens,
-                            literal_tokens,
-                            deleted_groups,
-                            group_causes,
-                        )
+        for item in index.references:
+            ref = item.reference
+            planned: Optional[Set[TargetToken]] = None
+            if ref.owner_group is not None:
+                planned = group_removals.get(ref.owner_group, {}).get(
+                    ref.referenced_name
+                )
+            elif ref.owner_rule is not None:
+                planned = field_removals.get(
+                    (ref.owner_rule, ref.field), {}
+                ).get(ref.referenced_name)
+            if planned is None:
+                continue
+            for context in item.contexts:
+                planned.update(
+                    _resolution_tokens(
+                        index,
+                        context,
+                        ref.referenced_name,
+                        address_tokens,
+                        literal_tokens,
+                        deleted_groups,
+                        group_causes,
                     )
+                )
 
         for group_key in deleted_groups:
             for causes in group_removals.get(group_key, {}).values():
@@ -610,10 +784,10 @@ def _propagate_plan_causes(
                 for causes in field_removals.get((rule_key, field), {}).values():
                     rule_causes.setdefault(rule_key, set()).update(causes)
         for occurrence, planned in occurrence_removal_causes.items():
-            for context in _descendant_contexts(model, occurrence.location):
+            for context in index.descendant_contexts(occurrence.location):
                 planned.update(
                     _occurrence_resolution_tokens(
-                        model,
+                        index,
                         context,
                         occurrence.value,
                         address_tokens,
@@ -683,29 +857,43 @@ def _compute_plan(
     group_causes: Dict[ScopedName, Set[TargetToken]] = {
         key: {token} for key, token in (forced_groups or {}).items()
     }
-    changed = True
-    while changed:
-        changed = False
-        for group_key, group in sorted(model.static_groups.items()):
-            if group_key in deleted_groups or not group.members:
-                continue
-            removed: Dict[str, Set[TargetToken]] = {
-                member: set(causes)
-                for member, causes in direct_group_removals.get(group_key, {}).items()
-            }
-            for ref in model.group_references.get(group_key, []):
-                if (
-                    ref.resolved_kind == "static-group"
-                    and ref.resolved_key in deleted_groups
-                ):
-                    removed.setdefault(ref.referenced_name, set()).update(
-                        group_causes[ref.resolved_key]
-                    )
-            if removed and all(member in removed for member in group.members):
-                causes = set().union(*(removed[member] for member in group.members))
-                deleted_groups.add(group_key)
-                group_causes[group_key] = causes
-                changed = True
+    # A group empties only when every member is removed, and a member group's
+    # causes are final once it is deleted, so the fixed point does not depend
+    # on visiting order.  After one sweep only referrers of a newly deleted
+    # group can change, so only they are revisited.
+    group_referrers: DefaultDict[ScopedName, Set[ScopedName]] = defaultdict(set)
+    for group_key, refs in model.group_references.items():
+        for ref in refs:
+            if ref.resolved_kind == "static-group" and ref.resolved_key is not None:
+                group_referrers[ref.resolved_key].add(group_key)
+    worklist: deque[ScopedName] = deque(sorted(model.static_groups))
+    queued: Set[ScopedName] = set(worklist)
+    while worklist:
+        group_key = worklist.popleft()
+        queued.discard(group_key)
+        group = model.static_groups[group_key]
+        if group_key in deleted_groups or not group.members:
+            continue
+        removed: Dict[str, Set[TargetToken]] = {
+            member: set(causes)
+            for member, causes in direct_group_removals.get(group_key, {}).items()
+        }
+        for ref in model.group_references.get(group_key, []):
+            if (
+                ref.resolved_kind == "static-group"
+                and ref.resolved_key in deleted_groups
+            ):
+                removed.setdefault(ref.referenced_name, set()).update(
+                    group_causes[ref.resolved_key]
+                )
+        if removed and all(member in removed for member in group.members):
+            causes = set().union(*(removed[member] for member in group.members))
+            deleted_groups.add(group_key)
+            group_causes[group_key] = causes
+            for referrer in sorted(group_referrers.get(group_key, ())):
+                if referrer not in deleted_groups and referrer not in queued:
+                    worklist.append(referrer)
+                    queued.add(referrer)
 
     group_removals: Dict[ScopedName, Dict[str, Set[TargetToken]]] = {}
     for group_key, group in sorted(model.static_groups.items()):
@@ -953,6 +1141,7 @@ def _compute_plan(
                     ref.configuration_path,
                 )
 
+    index = reference_index(model)
     dag_impacts = _dynamic_group_impacts(model, active_tokens)
     for group_key, object_keys in sorted(dag_impacts.items()):
         tokens = {
@@ -960,18 +1149,12 @@ def _compute_plan(
         }
         downstream_rules = sorted(
             {
-                rule_key
-                for rule_key, refs in model.rule_references.items()
-                for ref in refs
-                if any(
-                    _resolves_to(
-                        model,
-                        context,
-                        ref.referenced_name,
-                        "dynamic-group",
-                        group_key,
-                    )
-                    for context in _reference_contexts(model, ref)
+                item.owner
+                for item in index.references
+                if isinstance(item.owner, RuleKey)
+                and any(
+                    kind == "dynamic-group" and resolved == group_key
+                    for _context, (kind, resolved, _detail) in item.resolutions
                 )
             }
         )
@@ -1077,30 +1260,33 @@ def _dynamic_group_impacts(
         for token in active_tokens
         if token.kind == "address" and token.scoped_name is not None
     }
+    address_keys = {key for key in address_keys if key in model.addresses}
+    tag_index = address_tag_index(model, address_keys)
+    index = reference_index(model)
     impacts: Dict[ScopedName, Set[ScopedName]] = {}
     for group_key, group in sorted(model.dynamic_groups.items()):
+        compiled = compile_dynamic_filter(group.filter_text)
+        # An unparseable filter is unknown and must be treated as matching.
+        candidates = (
+            address_keys
+            if compiled is None
+            else compiled.select(tag_index, address_keys)
+        )
+        if not candidates:
+            continue
         contexts = [
             context
-            for context in _descendant_contexts(model, group_key.location)
-            if _resolves_to(
-                model, context, group_key.name, "dynamic-group", group_key
-            )
+            for context in index.descendant_contexts(group_key.location)
+            if index.resolves_to(context, group_key.name, "dynamic-group", group_key)
         ]
-        matched: Set[ScopedName] = set()
-        for key in address_keys:
-            if key not in model.addresses:
-                continue
-            effective_together = any(
-                _resolves_to(model, context, key.name, "address", key)
+        matched: Set[ScopedName] = {
+            key
+            for key in candidates
+            if any(
+                index.resolves_to(context, key.name, "address", key)
                 for context in contexts
             )
-            if not effective_together:
-                continue
-            evaluation = evaluate_dynamic_filter(
-                group.filter_text, model.addresses[key].tags
-            )
-            if evaluation is True or evaluation is None:
-                matched.add(key)
+        }
         if matched:
             impacts[group_key] = matched
     return impacts
@@ -1130,48 +1316,12 @@ def dependency_inventory(
 def dependency_inventories(
     model: ConfigModel, address_keys: Iterable[ScopedName]
 ) -> Dict[ScopedName, Tuple[Set[ScopedName], Set[RuleKey], List[str]]]:
-    """Build reverse indexes once and report dependencies for many objects."""
+    """Report dependencies for many objects from the model's reference index."""
 
-    group_referrers: DefaultDict[ScopedName, List[Tuple[ScopedName, str]]] = defaultdict(list)
-    rule_referrers: DefaultDict[ScopedName, List[Tuple[RuleKey, str]]] = defaultdict(list)
-    for owner, refs in model.group_references.items():
-        for ref in refs:
-            for context in _reference_contexts(model, ref):
-                kind, resolved, _ = resolve_name(
-                    model, context, ref.referenced_name
-                )
-                if resolved is not None and kind in {"address", "static-group"}:
-                    group_referrers[resolved].append(
-                        (
-                            owner,
-                            f"{ref.configuration_path} [effective_scope={context}]",
-                        )
-                    )
-    for owner, refs in model.rule_references.items():
-        for ref in refs:
-            for context in _reference_contexts(model, ref):
-                kind, resolved, _ = resolve_name(
-                    model, context, ref.referenced_name
-                )
-                if resolved is not None and kind in {"address", "static-group"}:
-                    rule_referrers[resolved].append(
-                        (
-                            owner,
-                            f"{ref.configuration_path} [effective_scope={context}]",
-                        )
-                    )
-
-    unknown_paths: DefaultDict[ScopedName, List[Tuple[Optional[RuleKey], str]]] = defaultdict(list)
-    for occurrence in model.unknown_occurrences:
-        for context in _descendant_contexts(model, occurrence.location):
-            kind, resolved, _ = resolve_name(model, context, occurrence.value)
-            if kind in {"address", "static-group"} and resolved is not None:
-                unknown_paths[resolved].append(
-                    (
-                        occurrence.owner_rule,
-                        f"{occurrence.configuration_path} [effective_scope={context}]",
-                    )
-                )
+    index = reference_index(model)
+    group_referrers = index.group_referrers
+    rule_referrers = index.rule_referrers
+    unknown_paths = index.occurrence_referrers
 
     result: Dict[ScopedName, Tuple[Set[ScopedName], Set[RuleKey], List[str]]] = {}
     for address_key in sorted(set(address_keys)):
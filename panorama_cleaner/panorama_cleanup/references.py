@@ -0,0 +1,177 @@
+"""Resolved-reference graph of one configuration model.
+
+Planning, exclusion replans and the audit each need, for every address
+reference, the descendant device groups in which it is effective and what
+the referenced name resolves to in each of them.  The answers depend only on
+the parsed configuration, so they are computed once per ``ConfigModel`` and
+memoised on the model; consumers query the index instead of rebuilding the
+referrer maps and effective scopes on every pass.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .models import (
+    ConfigModel,
+    ResolvedReference,
+    RuleKey,
+    ScopedName,
+    UnknownOccurrence,
+)
+from .panos import resolve_name, scope_chain
+
+Resolution = Tuple[str, Optional[ScopedName], str]
+
+_INDEX_KEY = "reference_index"
+_DEPENDENCY_KINDS = frozenset({"address", "static-group"})
+
+
+@dataclass(frozen=True)
+class IndexedReference:
+    """One group/rule reference with its effective scopes resolved."""
+
+    reference: ResolvedReference
+    owner: object
+    contexts: Tuple[str, ...]
+    resolutions: Tuple[Tuple[str, Resolution], ...]
+
+
+@dataclass(frozen=True)
+class IndexedOccurrence:
+    """An unmodelled address value resolved in every descendant scope."""
+
+    occurrence: UnknownOccurrence
+    resolutions: Tuple[Tuple[str, Resolution], ...]
+
+
+@dataclass(frozen=True)
+class ReferenceIndex:
+    """Reverse references and memoised name resolution for one model."""
+
+    model: ConfigModel = field(repr=False, compare=False)
+    references: Tuple[IndexedReference, ...]
+    occurrences: Tuple[IndexedOccurrence, ...]
+    group_referrers: Mapping[ScopedName, Tuple[Tuple[ScopedName, str], ...]]
+    rule_referrers: Mapping[ScopedName, Tuple[Tuple[RuleKey, str], ...]]
+    occurrence_referrers: Mapping[
+        ScopedName, Tuple[Tuple[Optional[RuleKey], str], ...]
+    ]
+    rules_by_container: Mapping[Tuple[str, str, str], Tuple[RuleKey, ...]]
+    _descendants: Dict[str, Tuple[str, ...]] = field(repr=False, compare=False)
+
+    def descendant_contexts(self, location: str) -> Tuple[str, ...]:
+        """``location`` followed by every device group that inherits from it."""
+
+        cached = self._descendants.get(location)
+        if cached is None:
+            cached = _descendant_contexts(self.model, location)
+            self._descendants[location] = cached
+        return cached
+
+    def resolve(self, context: str, value: str) -> Resolution:
+        return resolve_name(self.model, context, value)
+
+    def resolves_to(
+        self, context: str, value: str, expected_kind: str, expected_key: ScopedName
+    ) -> bool:
+        kind, resolved, _ = self.resolve(context, value)
+        return kind == expected_kind and resolved == expected_key
+
+
+def _descendant_contexts(model: ConfigModel, location: str) -> Tuple[str, ...]:
+    contexts = [location]
+    for candidate in sorted(model.parents):
+        if candidate != location and location in scope_chain(model, candidate):
+            contexts.append(candidate)
+    return tuple(contexts)
+
+
+def reference_index(model: ConfigModel) -> ReferenceIndex:
+    """Return the model's reference index, building it on first use."""
+
+    index = model.derived.get(_INDEX_KEY)
+    if index is None:
+        index = _build_index(model)
+        model.derived[_INDEX_KEY] = index
+    return index
+
+
+def _build_index(model: ConfigModel) -> ReferenceIndex:
+    descendants: Dict[str, Tuple[str, ...]] = {}
+
+    def contexts_for(location: str) -> Tuple[str, ...]:
+        cached = descendants.get(location)
+        if cached is None:
+            cached = _descendant_contexts(model, location)
+            descendants[location] = cached
+        return cached
+
+    references: List[IndexedReference] = []
+    group_referrers: Dict[ScopedName, List[Tuple[ScopedName, str]]] = {}
+    rule_referrers: Dict[ScopedName, List[Tuple[RuleKey, str]]] = {}
+    owners: List[Tuple[object, List[ResolvedReference]]] = [
+        *model.group_references.items(),
+        *model.rule_references.items(),
+    ]
+    for owner, refs in owners:
+        for ref in refs:
+            contexts = tuple(
+                context
+                for context in contexts_for(ref.owner_location)
+                if ref.owner_group is None
+                or resolve_name(model, context, ref.owner_group.name)[:2]
+                == ("static-group", ref.owner_group)
+            )
+            resolved_in = tuple(
+                (context, resolve_name(model, context, ref.referenced_name))
+                for context in contexts
+            )
+            references.append(IndexedReference(ref, owner, contexts, resolved_in))
+            for context, (kind, resolved, _detail) in resolved_in:
+                if resolved is None or kind not in _DEPENDENCY_KINDS:
+                    continue
+                path = f"{ref.configuration_path} [effective_scope={context}]"
+                if isinstance(owner, RuleKey):
+                    rule_referrers.setdefault(resolved, []).append((owner, path))
+                elif isinstance(owner, ScopedName):
+                    group_referrers.setdefault(resolved, []).append((owner, path))
+
+    occurrences: List[IndexedOccurrence] = []
+    occurrence_referrers: Dict[ScopedName, List[Tuple[Optional[RuleKey], str]]] = {}
+    for occurrence in model.unknown_occurrences:
+        resolved_in = tuple(
+            (context, resolve_name(model, context, occurrence.value))
+            for context in contexts_for(occurrence.location)
+        )
+        occurrences.append(IndexedOccurrence(occurrence, resolved_in))
+        for context, (kind, resolved, _detail) in resolved_in:
+            if resolved is None or kind not in _DEPENDENCY_KINDS:
+                continue
+            occurrence_referrers.setdefault(resolved, []).append(
+                (
+                    occurrence.owner_rule,
+                    f"{occurrence.configuration_path} [effective_scope={context}]",
+                )
+            )
+
+    containers: Dict[Tuple[str, str, str], List[RuleKey]] = {}
+    for key in model.rules:
+        containers.setdefault((key.location, key.rulebase, key.policy_type), []).append(key)
+
+    return ReferenceIndex(
+        model=model,
+        references=tuple(references),
+        occurrences=tuple(occurrences),
+        group_referrers={key: tuple(value) for key, value in group_referrers.items()},
+        rule_referrers={key: tuple(value) for key, value in rule_referrers.items()},
+        occurrence_referrers={
+            key: tuple(value) for key, value in occurrence_referrers.items()
+        },
+        rules_by_container={
+            container: tuple(sorted(keys, key=lambda item: model.rules[item].order_index))
+            for container, keys in containers.items()
+        },
+        _descendants=descendants,
+    )
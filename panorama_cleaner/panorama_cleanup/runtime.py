@@ -19,6 +19,7 @@ import urllib3
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .icmp import probe_echo
 from .models import (
     InputError,
     InputRow,
@@ -267,11 +268,22 @@ def _ping_attempt(
     child_environment: Mapping[str, str],
 ) -> Dict[str, PingResult]:
     ordered = sorted(set(ips))
-    results: Dict[str, PingResult] = {}
+    # Families served by an unprivileged ICMP socket are probed in-process;
+    # probe_echo re-probes silent addresses itself before reporting NO_REPLY.
+    # `ping` is only used for families without such a socket and when the
+    # socket engine itself fails.
+    try:
+        probed = probe_echo(ordered, timeout_ms=timeout_ms)
+    except Exception:  # the subprocess path stays authoritative
+        probed = {}
+    results: Dict[str, PingResult] = dict(probed)
+    remaining = [ip for ip in ordered if ip not in results]
+    if not remaining:
+        return {ip: results[ip] for ip in ordered}
     with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
         futures = {
             executor.submit(_ping_one, ip, timeout_ms, child_environment): ip
-            for ip in ordered
+            for ip in remaining
         }
         for future in concurrent.futures.as_completed(futures):
             ip = futures[future]
@@ -11,7 +11,10 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from panorama_cleanup.artifacts import create_run_directory, write_run_artifacts
-from panorama_cleanup.hitcounts import collect_rule_hit_counts
+from panorama_cleanup.hitcounts import (
+    DEFAULT_HIT_COUNT_BATCH_SIZE,
+    collect_rule_hit_counts,
+)
 from panorama_cleanup.models import (
     ConfigModel,
     InputError,
@@ -164,6 +167,24 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("---no-ping", dest="no_ping", action="store_true", help=argparse.SUPPRESS)
     parser.add_argument("--ping-workers", type=int, default=64)
     parser.add_argument("--ping-timeout-ms", type=int, default=1000)
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help=(
+            "Liczba procesów parsujących shared i device groups równolegle "
+            "(domyślnie 1, zakres 1..32)."
+        ),
+    )
+    parser.add_argument(
+        "--plan-workers",
+        type=int,
+        default=1,
+        help=(
+            "Liczba procesów planujących niezależne grupy celów równolegle "
+            "(domyślnie 1, zakres 1..32)."
+        ),
+    )
     parser.add_argument(
         "--ping-error-retries",
         type=int,
@@ -216,6 +237,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 "ssl=no w panorama_host.txt jest sprzeczne z --ca-bundle. "
                 "Ustaw ssl=yes, aby użyć wskazanego CA."
             )
+        if args.parse_workers < 1 or args.parse_workers > 32:
+            raise InputError("--parse-workers musi być w zakresie 1..32.")
+        if args.plan_workers < 1 or args.plan_workers > 32:
+            raise InputError("--plan-workers musi być w zakresie 1..32.")
         ssl_verification_disabled = args.insecure or not host_settings.verify_ssl
         verify: Any = False if ssl_verification_disabled else (ca_bundle or True)
         rows = load_ip_rows(Path(args.ip_file))
@@ -322,7 +347,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             print("Running i candidate są semantycznie zgodne.")
 
         phase = time.perf_counter()
-        model = parse_config(running_config)
+        model = parse_config(running_config, workers=args.parse_workers)
         model.warnings.extend(icmp_warnings)
         metrics.parse_seconds = time.perf_counter() - phase
         metrics.discovered_object_count = len(model.addresses)
@@ -354,6 +379,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             matches,
             eligible_ips,
             nat_translation_action=args.nat_translation,
+            workers=args.plan_workers,
         )
         metrics.planning_seconds = time.perf_counter() - phase
 
@@ -372,7 +398,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         metrics.generated_command_count = len(rendered.commands)
 
         phase = time.perf_counter()
-        hit_counts = collect_rule_hit_counts(client, plan.deleted_rules)
+        hit_counts = collect_rule_hit_counts(
+            client,
+            plan.deleted_rules,
+            batch_size=DEFAULT_HIT_COUNT_BATCH_SIZE,
+        )
         metrics.hit_count_seconds = time.perf_counter() - phase
         metrics.remote_operational_command_count = client.operational_call_count
         metrics.hit_count_rule_count = len(hit_counts)
@@ -418,6 +448,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             "ping_workers": args.ping_workers,
             "ping_timeout_ms": args.ping_timeout_ms,
             "ping_error_retries": args.ping_error_retries,
+            "parse_workers": args.parse_workers,
+            "plan_workers": args.plan_workers,
             "ca_bundle": ca_bundle,
             "ssl_configured": "yes" if host_settings.verify_ssl else "no",
             "ssl_certificate_verification": not ssl_verification_disabled,
@@ -165,6 +165,89 @@ class HitCountTests(unittest.TestCase):
         self.assertTrue(result.requires_review)
         self.assertIn("RuntimeError", result.detail)
 
+    def test_bulk_query_splits_per_rule_entries_and_falls_back_for_missing(
+        self,
+    ) -> None:
+        now = datetime(2026, 7, 14, 12, 0, tzinfo=timezone.utc)
+        recent = int((now - timedelta(days=1)).timestamp())
+        stale = int((now - timedelta(days=30)).timestamp())
+
+        class BulkClient:
+            def __init__(self) -> None:
+                self.commands: list[list[str]] = []
+
+            def run_op_show(self, command: ET.Element) -> ET.Element:
+                names = [
+                    entry.get("name", "")
+                    for entry in command.findall(".//rule-name/entry")
+                ]
+                self.commands.append(names)
+                if names == ["LOST"]:
+                    return _response(
+                        "<entry name='FW-1'><latest>yes</latest>"
+                        "<hit-count>0</hit-count>"
+                        "<last-hit-timestamp>0</last-hit-timestamp></entry>"
+                    )
+                if "NAT-1" in names:
+                    raise RuntimeError("multiple rule-name entries rejected")
+                return _response(
+                    "<entry name='A'><device-vsys>"
+                    "<entry name='SERIAL-1/vsys1'><latest>yes</latest>"
+                    "<hit-count>2</hit-count>"
+                    f"<last-hit-timestamp>{stale}</last-hit-timestamp></entry>"
+                    "<entry name='SERIAL-2/vsys1'><latest>yes</latest>"
+                    "<hit-count>1</hit-count>"
+                    f"<last-hit-timestamp>{recent}</last-hit-timestamp></entry>"
+                    "</device-vsys></entry>"
+                    "<entry name='B'><latest>yes</latest>"
+                    "<hit-count>4</hit-count>"
+                    f"<last-hit-timestamp>{stale}</last-hit-timestamp></entry>"
+                    "<entry name='LOST' />"
+                )
+
+        client = BulkClient()
+        security = [
+            RuleKey("shared", "pre-rulebase", "security", name)
+            for name in ("A", "B", "LOST")
+        ]
+        nat = [RuleKey("DG", "pre-rulebase", "nat", f"NAT-{index}") for index in (1, 2)]
+        progress: list[int] = []
+
+        results = collect_rule_hit_counts(
+            client,
+            security + nat,
+            now=now,
+            batch_size=50,
+            progress_callback=lambda done, total, _rule: progress.append(done),
+        )
+
+        self.assertEqual(
+            sorted(client.commands),
+            sorted([["A", "B", "LOST"], ["LOST"], ["NAT-1", "NAT-2"], ["NAT-1"], ["NAT-2"]]),
+        )
+        self.assertEqual("RECENT", results[security[0]].status)
+        self.assertEqual(3, results[security[0]].hit_count)
+        self.assertIn("Odczyty urządzenie/VSYS: 2", results[security[0]].detail)
+        self.assertEqual("STALE", results[security[1]].status)
+        self.assertEqual("NEVER", results[security[2]].status)
+        self.assertEqual("ERROR", results[nat[0]].status)
+        self.assertEqual(list(results), sorted(security + nat))
+        self.assertEqual(progress, [1, 2, 3, 4, 5])
+
+        unattributable = FakeHitCountClient(
+            _response(
+                "<entry name='FW-1'><latest>yes</latest>"
+                "<hit-count>9</hit-count>"
+                f"<last-hit-timestamp>{recent}</last-hit-timestamp></entry>"
+            )
+        )
+        pair = [
+            RuleKey("shared", "pre-rulebase", "security", name) for name in ("X", "Y")
+        ]
+        results = collect_rule_hit_counts(unattributable, pair, now=now, batch_size=50)
+        self.assertEqual(3, len(unattributable.commands))
+        self.assertEqual({9}, {result.hit_count for result in results.values()})
+
     def test_queries_many_rules_with_bounded_parallelism(self) -> None:
         class ConcurrentClient:
             def __init__(self) -> None:
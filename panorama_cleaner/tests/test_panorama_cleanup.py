@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import dataclasses
 import json
 import os
 import subprocess
@@ -28,14 +29,24 @@ from panorama_cleanup.models import (
 )
 from panorama_cleanup.panos import (
     address_literal_relation,
+    address_tag_index,
     compare_configs,
+    compile_dynamic_filter,
     evaluate_dynamic_filter,
     match_ip_objects,
     parse_api_response,
     parse_config,
+    resolution_chain,
+    resolve_name,
     static_group_cycle_nodes,
 )
-from panorama_cleanup.planner import dependency_inventory, plan_cleanup
+from panorama_cleanup.planner import (
+    _independent_shards,
+    build_target_tokens,
+    dependency_inventory,
+    plan_cleanup,
+)
+from panorama_cleanup.references import reference_index
 from panorama_cleanup.render import quote_cli, render_plan
 from panorama_cleanup.runtime import (
     confirm_candidate_diff_checked,
@@ -91,6 +102,45 @@ class PlannerFixtureTests(unittest.TestCase):
         )
         return matches, plan, render_plan(self.model, plan)
 
+    def test_parallel_parse_matches_serial_model_warnings_and_errors(self) -> None:
+        parallel = parse_config(
+            ET.fromstring(ET.tostring(self.config)), workers=2
+        )
+        self.assertEqual(self.model, parallel)
+        self.assertEqual(list(self.model.addresses), list(parallel.addresses))
+        self.assertEqual(list(self.model.rules), list(parallel.rules))
+
+        warned = """
+            <config><devices><entry name="localhost.localdomain"><device-group>
+              <entry name="DG-B"><address-group><entry name="E1"><static/></entry>
+              </address-group></entry>
+              <entry name="DG-A"><address-group><entry name="E2"><static/></entry>
+              </address-group></entry>
+            </device-group></entry></devices></config>
+            """
+        serial = parse_config(ET.fromstring(warned))
+        self.assertEqual(3, len(serial.warnings))
+        self.assertEqual(
+            serial.warnings, parse_config(ET.fromstring(warned), workers=4).warnings
+        )
+
+        broken = ET.fromstring(
+            """
+            <config><devices><entry name="localhost.localdomain"><device-group>
+              <entry name="DG-A"><address-group><entry name="EMPTY"><static/></entry>
+              </address-group><address><entry name="BAD"><ip-netmask/></entry></address></entry>
+              <entry name="DG-B"><address><entry name="DUP"><fqdn>a</fqdn><ip-netmask>10.0.0.1</ip-netmask>
+              </entry></address></entry>
+            </device-group></entry></devices></config>
+            """
+        )
+        with self.assertRaises(ParseError) as serial_error:
+            parse_config(broken)
+        with self.assertRaises(ParseError) as parallel_error:
+            parse_config(broken, workers=2)
+        self.assertEqual(str(serial_error.exception), str(parallel_error.exception))
+        self.assertIn("DG-A/BAD", str(parallel_error.exception))
+
     def test_safe_member_removal_and_nested_group_cascade(self) -> None:
         _, plan, rendered = self.plan_for("10.0.0.1")
         self.assertNotIn("10.0.0.1", plan.blocked_ips)
@@ -389,6 +439,117 @@ class PlannerFixtureTests(unittest.TestCase):
         )
         self.assertTrue(any("effective_scope=CHILD" in path for path in paths))
 
+    def test_reference_index_is_built_once_and_shared_by_planning(self) -> None:
+        config = ET.fromstring(
+            """
+            <config>
+              <shared/>
+              <devices><entry name="localhost.localdomain"><device-group>
+                <entry name="PARENT">
+                  <address><entry name="OVR"><ip-netmask>192.0.2.1/32</ip-netmask></entry></address>
+                  <pre-rulebase><security><rules>
+                    <entry name="FIRST">
+                      <source><member>OVR</member></source><destination><member>any</member></destination>
+                    </entry>
+                    <entry name="SECOND">
+                      <source><member>any</member></source><destination><member>OVR</member></destination>
+                    </entry>
+                  </rules></security></pre-rulebase>
+                </entry>
+                <entry name="CHILD"><parent-dg>PARENT</parent-dg>
+                  <address><entry name="OVR"><ip-netmask>192.0.2.2/32</ip-netmask></entry></address>
+                </entry>
+              </device-group></entry></devices>
+            </config>
+            """
+        )
+        model = parse_config(config)
+        index = reference_index(model)
+        plan_cleanup(model, match_ip_objects(model, ["192.0.2.2"]), ["192.0.2.2"])
+        dependency_inventory(model, ScopedName("CHILD", "OVR"))
+
+        self.assertIs(index, reference_index(model))
+        self.assertEqual(("PARENT", "CHILD"), index.descendant_contexts("PARENT"))
+        self.assertEqual(
+            ["FIRST", "SECOND"],
+            [
+                key.name
+                for key in index.rules_by_container[
+                    ("PARENT", "pre-rulebase", "security")
+                ]
+            ],
+        )
+        self.assertEqual(
+            {"PARENT", "CHILD"},
+            {
+                path.rsplit("effective_scope=", 1)[1].rstrip("]")
+                for referrers in (
+                    index.rule_referrers[ScopedName("PARENT", "OVR")],
+                    index.rule_referrers[ScopedName("CHILD", "OVR")],
+                )
+                for _, path in referrers
+            },
+        )
+
+    def test_sharded_planning_matches_single_pass_plan(self) -> None:
+        config = ET.fromstring(
+            """
+            <config>
+              <shared>
+                <address>
+                  <entry name="A"><ip-netmask>192.0.2.1/32</ip-netmask></entry>
+                  <entry name="B"><ip-netmask>192.0.2.2/32</ip-netmask></entry>
+                  <entry name="C"><ip-netmask>192.0.2.3/32</ip-netmask></entry>
+                  <entry name="D"><ip-netmask>192.0.2.4/32</ip-netmask></entry>
+                  <entry name="KEEP"><ip-netmask>198.51.100.1/32</ip-netmask></entry>
+                </address>
+                <address-group>
+                  <entry name="INNER"><static><member>A</member><member>B</member></static></entry>
+                  <entry name="OUTER"><static><member>INNER</member><member>KEEP</member></static></entry>
+                </address-group>
+                <pre-rulebase><security><rules>
+                  <entry name="USES-OUTER">
+                    <source><member>OUTER</member></source><destination><member>any</member></destination>
+                  </entry>
+                  <entry name="ONLY-C">
+                    <source><member>C</member></source><destination><member>any</member></destination>
+                  </entry>
+                  <entry name="D-AND-LITERAL">
+                    <source><member>D</member><member>192.0.2.5</member></source>
+                    <destination><member>any</member></destination>
+                  </entry>
+                </rules></security></pre-rulebase>
+              </shared>
+            </config>
+            """
+        )
+        model = parse_config(config)
+        ips = ["192.0.2.1", "192.0.2.2", "192.0.2.3", "192.0.2.4", "192.0.2.5"]
+        matches = match_ip_objects(model, ips)
+
+        shards = _independent_shards(
+            model, build_target_tokens(matches, ips), {}, {}, len(ips)
+        )
+        self.assertEqual(
+            [{"192.0.2.1", "192.0.2.2"}, {"192.0.2.3"}, {"192.0.2.4", "192.0.2.5"}],
+            sorted(({token.ip for token in shard} for shard in shards), key=min),
+        )
+
+        serial = plan_cleanup(model, matches, ips)
+        sharded = plan_cleanup(model, matches, ips, workers=3)
+        for field in dataclasses.fields(serial):
+            self.assertEqual(
+                getattr(serial, field.name), getattr(sharded, field.name), field.name
+            )
+        self.assertIn(ScopedName("shared", "INNER"), sharded.deleted_groups)
+        self.assertEqual(
+            {
+                RuleKey("shared", "pre-rulebase", "security", "ONLY-C"),
+                RuleKey("shared", "pre-rulebase", "security", "D-AND-LITERAL"),
+            },
+            sharded.deleted_rules,
+        )
+
     def test_ancestor_precedence_resolves_parent_before_child_override(self) -> None:
         config = ET.fromstring(
             """
@@ -423,6 +584,53 @@ class PlannerFixtureTests(unittest.TestCase):
             [record.command for record in rendered.commands],
         )
 
+    def test_cached_name_resolution_follows_precedence_setting(self) -> None:
+        template = """
+            <config>
+              <shared>
+                <address><entry name="X"><ip-netmask>192.0.2.9/32</ip-netmask></entry></address>
+              </shared>
+              <devices><entry name="localhost.localdomain">
+                <deviceconfig><setting><management>
+                  <ancestor-objects-take-precedence>{precedence}</ancestor-objects-take-precedence>
+                </management></setting></deviceconfig>
+                <device-group>
+                  <entry name="PARENT">
+                    <address-group><entry name="Y"><static><member>X</member></static></entry></address-group>
+                  </entry>
+                  <entry name="CHILD"><parent-dg>PARENT</parent-dg>
+                    <address><entry name="X"><ip-netmask>192.0.2.2/32</ip-netmask></entry></address>
+                  </entry>
+                </device-group>
+              </entry></devices>
+            </config>
+            """
+        expected = {
+            "no": (("CHILD", "PARENT", "shared"), ScopedName("CHILD", "X")),
+            "yes": (("shared", "PARENT", "CHILD"), ScopedName("shared", "X")),
+        }
+        for precedence, (chain, resolved) in expected.items():
+            with self.subTest(precedence=precedence):
+                model = parse_config(ET.fromstring(template.format(precedence=precedence)))
+                self.assertEqual(chain, resolution_chain(model, "CHILD"))
+                self.assertIs(
+                    resolution_chain(model, "CHILD"), resolution_chain(model, "CHILD")
+                )
+                for _ in range(2):
+                    self.assertEqual(
+                        ("address", resolved, ""), resolve_name(model, "CHILD", "X")
+                    )
+                    self.assertEqual(
+                        ("static-group", ScopedName("PARENT", "Y"), ""),
+                        resolve_name(model, "CHILD", "Y"),
+                    )
+                    self.assertEqual(
+                        ("literal", None, "192.0.2.7"),
+                        resolve_name(model, "CHILD", "192.0.2.7"),
+                    )
+                with self.assertRaises(ParseError):
+                    resolve_name(model, "MISSING", "X")
+
     def test_parent_rule_mutation_blocks_non_target_child_override(self) -> None:
         config = ET.fromstring(
             """
@@ -679,6 +887,57 @@ address-secret-second</description>
         self.assertEqual((ScopedName("shared", "V6-HOST"),), match.exact_objects)
         self.assertEqual((ScopedName("shared", "V6-NET"),), match.containing_objects)
 
+    def test_indexed_ip_matching_agrees_with_per_object_relation(self) -> None:
+        import random
+
+        generator = random.Random(20260714)
+        values = {}
+        for index in range(400):
+            octets = [10, generator.randrange(4), generator.randrange(4), generator.randrange(8)]
+            base = ".".join(map(str, octets))
+            kind = index % 5
+            if kind == 0:
+                values[f"HOST-{index}"] = ("ip-netmask", f"{base}/32")
+            elif kind == 1:
+                prefix = generator.choice((8, 16, 22, 24, 29, 30))
+                values[f"NET-{index}"] = ("ip-netmask", f"{base}/{prefix}")
+            elif kind == 2:
+                last = octets[3] + generator.randrange(3)
+                end = ".".join(map(str, octets[:3] + [last]))
+                values[f"RANGE-{index}"] = ("ip-range", f"{base}-{end}")
+            elif kind == 3:
+                mask = generator.choice(("0.0.0.0", "0.0.0.7", "0.0.3.0", "0.3.0.5"))
+                values[f"WILD-{index}"] = ("ip-wildcard", f"{base}/{mask}")
+            else:
+                values[f"V6-{index}"] = (
+                    "ip-netmask",
+                    f"2001:db8::{generator.randrange(8):x}/{generator.choice((126, 127, 128))}",
+                )
+        entries = "".join(
+            f'<entry name="{name}"><{kind}>{value}</{kind}></entry>'
+            for name, (kind, value) in values.items()
+        )
+        model = parse_config(
+            ET.fromstring(f"<config><shared><address>{entries}</address></shared></config>")
+        )
+        ips = [
+            f"10.{a}.{b}.{c}" for a in range(4) for b in range(4) for c in range(10)
+        ] + [f"2001:db8::{c:x}" for c in range(1, 10)]
+
+        matches = match_ip_objects(model, ips)
+
+        for ip in ips:
+            expected = {"exact": [], "containing": []}
+            for name, (_kind, value) in sorted(values.items()):
+                relation = address_literal_relation(value, ip)
+                if relation is not None:
+                    expected[relation].append(ScopedName("shared", name))
+            with self.subTest(ip=ip):
+                self.assertEqual(tuple(expected["exact"]), matches[ip].exact_objects)
+                self.assertEqual(
+                    tuple(expected["containing"]), matches[ip].containing_objects
+                )
+
     def test_address_and_group_namespace_collision_fails_closed(self) -> None:
         config = ET.fromstring(
             """
@@ -1026,6 +1285,39 @@ address-secret-second</description>
         self.assertTrue(evaluate_dynamic_filter("not-prod", {"not-prod"}))
         self.assertTrue(evaluate_dynamic_filter("'PROD'", {"prod"}))
 
+    def test_compiled_dynamic_filter_is_cached_and_selects_like_per_object(self) -> None:
+        text = "('A' or 'b') and not ('C' and 'd')"
+        compiled = compile_dynamic_filter(text)
+        self.assertIs(compiled, compile_dynamic_filter(text))
+        self.assertEqual({"a", "b", "c", "d"}, set(compiled.tags))
+        self.assertIsNone(compile_dynamic_filter("'A' 'B'"))
+        self.assertIsNone(compile_dynamic_filter("('A'"))
+
+        entries = "".join(
+            f'<entry name="O{index}"><ip-netmask>10.0.0.{index}</ip-netmask><tag>'
+            + "".join(
+                f"<member>{tag}</member>"
+                for bit, tag in enumerate(("a", "B", "c", "D"))
+                if index >> bit & 1
+            )
+            + "</tag></entry>"
+            for index in range(16)
+        )
+        model = parse_config(
+            ET.fromstring(f"<config><shared><address>{entries}</address></shared></config>")
+        )
+        keys = set(model.addresses)
+        index = address_tag_index(model, keys)
+        for filter_text in (text, "'a'", "not 'a'", "'a' and 'b' or 'c'", "not not 'd'"):
+            compiled = compile_dynamic_filter(filter_text)
+            expected = {
+                key
+                for key in keys
+                if evaluate_dynamic_filter(filter_text, model.addresses[key].tags)
+            }
+            with self.subTest(filter_text=filter_text):
+                self.assertEqual(expected, compiled.select(index, keys))
+
     def test_cycle_detection_handles_deep_acyclic_group_chain(self) -> None:
         group_entries = [
             '<entry name="G0"><static><member>A</member></static></entry>'
@@ -1044,6 +1336,50 @@ address-secret-second</description>
         model = parse_config(config)
         self.assertEqual(set(), static_group_cycle_nodes(model))
 
+    def test_deep_group_chain_empties_when_outer_groups_sort_first(self) -> None:
+        depth = 400
+        group_entries = [
+            f'<entry name="G{depth:04d}"><static><member>A</member></static></entry>',
+            '<entry name="G0200"><static><member>G0201</member><member>C</member>'
+            "</static></entry>",
+            '<entry name="H"><static><member>G0000</member><member>B</member>'
+            "</static></entry>",
+        ]
+        group_entries.extend(
+            f'<entry name="G{index:04d}"><static><member>G{index + 1:04d}</member>'
+            "</static></entry>"
+            for index in range(depth)
+            if index != 200
+        )
+        config = ET.fromstring(
+            "<config><shared><address>"
+            '<entry name="A"><ip-netmask>10.0.0.1/32</ip-netmask></entry>'
+            '<entry name="B"><ip-netmask>10.0.0.9/32</ip-netmask></entry>'
+            '<entry name="C"><ip-netmask>10.0.0.2/32</ip-netmask></entry>'
+            "</address><address-group>"
+            + "".join(group_entries)
+            + "</address-group></shared></config>"
+        )
+        model = parse_config(config)
+        ips = ("10.0.0.1", "10.0.0.2")
+        plan = plan_cleanup(model, match_ip_objects(model, ips), ips)
+
+        self.assertEqual(
+            {ScopedName("shared", f"G{index:04d}") for index in range(depth + 1)},
+            plan.deleted_groups,
+        )
+        causes = {
+            key.name: {token.ip for token in tokens}
+            for key, tokens in plan.group_causes.items()
+        }
+        self.assertEqual({"10.0.0.1"}, causes["G0201"])
+        self.assertEqual({"10.0.0.1", "10.0.0.2"}, causes["G0200"])
+        self.assertEqual({"10.0.0.1", "10.0.0.2"}, causes["G0000"])
+        self.assertEqual(
+            {"G0000"},
+            set(plan.group_member_removals[ScopedName("shared", "H")]),
+        )
+
     def test_cycle_detection_does_not_misclassify_dag_cross_edge(self) -> None:
         config = ET.fromstring(
             """
@@ -1640,6 +1976,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
             with self.assertRaises(InputError):
                 obtain_password("PANORAMA_PASSWORD")
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_ping_reply_and_no_reply_are_classified(self, run: mock.Mock) -> None:
         run.side_effect = [
@@ -1653,6 +1990,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
         self.assertEqual(PingStatus.NO_REPLY, results["10.0.0.2"].status)
         self.assertTrue(all(call.kwargs["shell"] is False for call in run.mock_calls))
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_ping_non_timeout_process_failures_are_errors(self, run: mock.Mock) -> None:
         run.side_effect = [
@@ -1669,6 +2007,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
         self.assertEqual(PingStatus.ERROR, results["10.0.0.1"].status)
         self.assertEqual(PingStatus.ERROR, results["10.0.0.2"].status)
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_ping_execution_error_is_retried_and_can_recover(
         self, run: mock.Mock
@@ -1688,6 +2027,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
         self.assertEqual(2, run.call_count)
         self.assertIn("wynik uzyskano w próbie 2", result.detail)
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_persistent_ping_execution_error_stops_after_retry_limit(
         self, run: mock.Mock
@@ -1704,6 +2044,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
         self.assertEqual(3, run.call_count)
         self.assertIn("błąd utrzymał się po 3 próbach", result.detail)
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_missing_ping_program_is_not_retried(self, run: mock.Mock) -> None:
         run.side_effect = FileNotFoundError
@@ -1718,6 +2059,104 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
         self.assertEqual(1, run.call_count)
         self.assertEqual("Program ping nie jest dostępny", result.detail)
 
+    def test_icmp_socket_engine_matches_replies_and_leaves_fallback_to_ping(
+        self,
+    ) -> None:
+        import socket
+        import struct
+
+        class LoopbackIcmpSocket:
+            """Datagram pair standing in for a kernel ICMP socket."""
+
+            def __init__(self, replying: set[str]) -> None:
+                self.local, self.peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self.local.setblocking(False)
+                self.replying = replying
+                self.sent: list[str] = []
+
+            def fileno(self) -> int:
+                return self.local.fileno()
+
+            def sendto(self, data: bytes, address: tuple[str, int]) -> int:
+                self.sent.append(address[0])
+                if address[0] == "192.0.2.9":
+                    raise OSError(101, "Network is unreachable")
+                if address[0] in self.replying:
+                    kind, code, _checksum, ident, sequence = struct.unpack("!BBHHH", data[:8])
+                    foreign = struct.pack("!BBHHH", 0, 0, 0, ident, sequence) + b"x" * 24
+                    reply = struct.pack("!BBHHH", 0, code, 0, ident, sequence) + data[8:]
+                    for source, payload in (
+                        ("192.0.2.99", reply),
+                        (address[0], foreign),
+                        (address[0], reply),
+                    ):
+                        self.peer.send(source.encode().ljust(40, b" ") + payload)
+                return len(data)
+
+            def recvfrom(self, size: int) -> tuple[bytes, tuple[str, int]]:
+                packet = self.local.recv(size)
+                return packet[40:], (packet[:40].decode().strip(), 0)
+
+            def close(self) -> None:
+                self.local.close()
+                self.peer.close()
+
+        sockets: list[LoopbackIcmpSocket] = []
+
+        def open_socket(version: int):
+            if version == 6:
+                return None
+            sockets.append(LoopbackIcmpSocket({"192.0.2.1", "192.0.2.3"}))
+            return sockets[-1]
+
+        run = mock.Mock(
+            side_effect=lambda command, **kwargs: subprocess.CompletedProcess(
+                command, 0 if ":" in command[-1] else 1
+            )
+        )
+        with mock.patch(
+            "panorama_cleanup.icmp.open_icmp_socket", side_effect=open_socket
+        ), mock.patch("panorama_cleanup.runtime.subprocess.run", run):
+            results = ping_many(
+                ["192.0.2.1", "192.0.2.2", "192.0.2.3", "192.0.2.9", "2001:db8::1"],
+                bypass=False,
+                workers=1,
+                timeout_ms=200,
+                error_retries=0,
+            )
+
+        self.assertEqual(PingStatus.REPLIED, results["192.0.2.1"].status)
+        self.assertEqual(PingStatus.NO_REPLY, results["192.0.2.2"].status)
+        self.assertEqual(PingStatus.REPLIED, results["192.0.2.3"].status)
+        self.assertEqual(PingStatus.ERROR, results["192.0.2.9"].status)
+        self.assertEqual(PingStatus.REPLIED, results["2001:db8::1"].status)
+        # Socket NO_REPLY is re-probed in-process; only IPv6, which had no
+        # socket at all, falls back to ping.
+        self.assertEqual(
+            ["2001:db8::1"],
+            sorted(call.args[0][-1] for call in run.mock_calls),
+        )
+        sent = [ip for icmp_socket in sockets for ip in icmp_socket.sent]
+        self.assertEqual(3, sent.count("192.0.2.2"))
+        self.assertEqual(1, sent.count("192.0.2.1"))
+        self.assertIn("3 próbach", results["192.0.2.2"].detail)
+
+        run.reset_mock()
+        with mock.patch(
+            "panorama_cleanup.runtime.probe_echo", side_effect=OSError("selector")
+        ), mock.patch("panorama_cleanup.runtime.subprocess.run", run):
+            results = ping_many(
+                ["192.0.2.1", "192.0.2.2"],
+                bypass=False,
+                workers=1,
+                timeout_ms=200,
+                error_retries=0,
+            )
+        self.assertEqual(2, run.call_count)
+        self.assertEqual(
+            {PingStatus.NO_REPLY}, {result.status for result in results.values()}
+        )
+
     def test_ping_error_retry_limit_is_validated(self) -> None:
         for value in (-1, 6):
             with self.subTest(value=value), self.assertRaises(InputError):
@@ -1729,6 +2168,7 @@ class SnapshotAndRuntimeTests(unittest.TestCase):
                     error_retries=value,
                 )
 
+    @mock.patch("panorama_cleanup.runtime.probe_echo", new=lambda ips, **kwargs: {})
     @mock.patch("panorama_cleanup.runtime.subprocess.run")
     def test_ping_child_environment_excludes_password_variable(
         self, run: mock.Mock